@@ -14,6 +14,7 @@ import pandas as pd
 
 # 导入 YieldChart 类
 from frontend.charts.yield_chart import YieldChart
+from cp_data_processor.processing.stage_profiler import file_bytes, profiling_run, stage
 
 # 导入JavaScript嵌入工具 - 使用兼容的导入方式
 def get_embedded_plotly_js():
@@ -54,6 +55,14 @@ def main():
     logger.info(f"📂 数据输入目录: {data_input_dir.resolve()}")
     logger.info(f"📊 图表输出目录: {charts_output_dir.resolve()}")
 
+    # 各阶段的性能按监控配置写入日志，报告写到图表输出目录
+    with profiling_run("图表", str(charts_output_dir)):
+        generate_charts(data_input_dir, charts_output_dir)
+
+def generate_charts(data_input_dir, charts_output_dir):
+    """
+    加载数据目录中的标准CSV并生成所有类型的图表
+    """
     # 2. 初始化 YieldChart 并加载数据
     logger.info("🔄 初始化 YieldChart...")
     yield_analyzer = YieldChart(data_dir=str(data_input_dir))
@@ -163,11 +172,13 @@ def generate_custom_plotly_charts(cleaned_df, yield_analyzer, output_base_dir):
 
             box_filename = custom_output_dir / f"{param}_boxplot.html"
             # 使用本地嵌入的Plotly.js，避免CDN加载失败
-            fig_box.write_html(
-                str(box_filename),
-                include_plotlyjs=get_embedded_plotly_js(),
-                validate=False  # 跳过验证，提升速度
-            )
+            with stage("图表写出") as probe:
+                fig_box.write_html(
+                    str(box_filename),
+                    include_plotlyjs=get_embedded_plotly_js(),
+                    validate=False  # 跳过验证，提升速度
+                )
+                probe.add(bytes_out=file_bytes([box_filename]))
             logger.info(f"  ✅ [{i}/{len(plot_params)}] 箱体图: {box_filename.name}")
 
         except Exception as e:
@@ -211,11 +222,13 @@ def generate_custom_plotly_charts(cleaned_df, yield_analyzer, output_base_dir):
 
                     scatter_filename = custom_output_dir / f"{param1}_vs_{param2}_scatter.html"
                     # 使用本地嵌入的Plotly.js，避免CDN加载失败
-                    fig_scatter.write_html(
-                        str(scatter_filename),
-                        include_plotlyjs=get_embedded_plotly_js(),
-                        validate=False  # 跳过验证，提升速度
-                    )
+                    with stage("图表写出") as probe:
+                        fig_scatter.write_html(
+                            str(scatter_filename),
+                            include_plotlyjs=get_embedded_plotly_js(),
+                            validate=False  # 跳过验证，提升速度
+                        )
+                        probe.add(bytes_out=file_bytes([scatter_filename]))
                     logger.info(f"  ✅ 散点图: {scatter_filename.name}")
 
         except Exception as e:
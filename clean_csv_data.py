@@ -6,12 +6,17 @@ CSV数据清洗工具 - 重排字段顺序
 
 import os
 import sys
+import numpy as np
 import pandas as pd
 import argparse
+from functools import partial
 from datetime import datetime
 from typing import Optional, Tuple
 import re
 
+from cp_data_processor.data_models.compact_dtypes import write_csv
+from cp_data_processor.processing.memory_governor import get_memory_governor
+
 def extract_lot_id_from_folder_name(folder_name: str) -> Tuple[str, str]:
     """
     从标准格式的文件夹名称中提取 product_name 和 lot_id
@@ -102,10 +107,9 @@ def clean_csv_data(data_df: pd.DataFrame, output_dir: str, base_filename_part: s
         print(f"Error during column reordering: {e}. Columns in df: {current_df_columns}. Attempted order: {final_columns}")
         return None
 
-    # 格式化数值型数据
-    for col in df.columns:
-        if df[col].dtype in ['float64', 'float32']:
-            df[col] = df[col].apply(lambda x: format_number(x))
+    # 数值型数据在写出时按块格式化（见 format_numbers），不把整个表转为字符串；
+    # 紧凑模式下的 float32/category 列由 write_csv 按块还原，输出与 float64 数据一致
+    float_columns = [col for col in df.columns if df[col].dtype in ['float64', 'float32']]
     
     # 生成输出文件路径
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -115,13 +119,18 @@ def clean_csv_data(data_df: pd.DataFrame, output_dir: str, base_filename_part: s
     output_filepath = os.path.join(output_dir, cleaned_filename)
     
     try:
-        df.to_csv(output_filepath, index=False)
+        write_csv(df, output_filepath, chunk_rows=get_memory_governor().chunk_size,
+                  transform=partial(_format_float_columns, columns=float_columns), index=False)
         print(f"数据清洗完成，已保存到: {output_filepath}")
         return output_filepath
     except Exception as e:
         print(f"保存清洗后的CSV时出错: {str(e)}")
         return None
 
+def _format_float_columns(block: pd.DataFrame, columns) -> pd.DataFrame:
+    """把一块数据中的数值列格式化为字符串（write_csv 的 transform）"""
+    return block.assign(**{col: format_numbers(block[col].to_numpy()) for col in columns})
+
 def format_number(value):
     """
     根据数值大小选择适当的格式
@@ -143,6 +152,27 @@ def format_number(value):
         # 如果有任何格式化错误，返回原始值
         return value
 
+def format_numbers(values) -> np.ndarray:
+    """
+    format_number 的向量化版本，返回字符串数组，结果与逐个调用 format_number 相同
+
+    按数量级用掩码把数值分为三档（科学计数法、5位小数、5位有效数字），
+    每档用一次 % 格式化完成，不再逐个单元格调用 Python 函数
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, "", dtype=object)
+    magnitude = np.abs(values)
+    valid = ~np.isnan(values)
+    nonzero = valid & (values != 0)
+    scientific = nonzero & (magnitude < 0.0001)
+    fixed = nonzero & ~scientific & (magnitude < 10)
+    general = valid & ~scientific & ~fixed  # 包括 0 和 ±inf
+    for mask, spec in ((scientific, '%.5e'), (fixed, '%.5f'), (general, '%.5g')):
+        if mask.any():
+            selected = values[mask].tolist()
+            result[mask] = ('\n'.join([spec] * len(selected)) % tuple(selected)).split('\n')
+    return result
+
 def main():
     parser = argparse.ArgumentParser(description='CSV数据清洗工具 - (DataFrame input mode for testing)')
     parser.add_argument('-od', '--output_dir_test', help='Output directory for test', default="test_output_clean_csv")
@@ -25,8 +25,11 @@ logger = logging.getLogger(__name__)
 
 # 导入必要的模块
 from cp_data_processor.readers.dcp_reader import DCPReader
-from cp_data_processor.processing.data_transformer import DataTransformer
+from cp_data_processor.readers.dcp_file_scan import DCPFileScan
+from cp_data_processor.processing.data_transformer import OUTLIER_METHODS, DataTransformer
+from cp_data_processor.processing.stage_profiler import file_bytes, profiled, profiling_run, stage
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.data_models.compact_dtypes import categorical_constant, compact_float_digits
 from clean_csv_data import clean_csv_data
 from python_cp.yield_processor import generate_yield_report_from_dataframe
 from dcp_spec_extractor import generate_spec_file
@@ -34,8 +37,16 @@ from dcp_spec_extractor import generate_spec_file
 from cp_unit_converter import process_excel_file as convert_units_in_file
 
 def collect_wafer_data(lot: CPLot) -> pd.DataFrame:
-    """从lot对象的晶圆中收集数据"""
+    """从lot对象的晶圆中收集数据
+
+    开启紧凑数据类型时，Wafer_ID 和 Lot_ID 以共用类别的 category 列写入，
+    不再为每个芯片重复保存字符串。
+    """
     all_data = []
+    compact = compact_float_digits() is not None
+    if compact:
+        wafer_categories = pd.Index(list(dict.fromkeys(wafer.wafer_id for wafer in lot.wafers)))
+        lot_categories = pd.Index(list(dict.fromkeys(_wafer_lot_id(lot, wafer) for wafer in lot.wafers)))
     
     for wafer in lot.wafers:
         if hasattr(wafer, 'chip_data') and wafer.chip_data is not None:
@@ -43,7 +54,10 @@ def collect_wafer_data(lot: CPLot) -> pd.DataFrame:
             df = wafer.chip_data.copy()
             
             # 正确命名晶圆ID列为Wafer_ID
-            df['Wafer_ID'] = wafer.wafer_id
+            if compact:
+                df['Wafer_ID'] = categorical_constant(wafer.wafer_id, len(df), wafer_categories)
+            else:
+                df['Wafer_ID'] = wafer.wafer_id
             
             # 确保X,Y,Bin,Seq列存在并添加到数据中
             if hasattr(wafer, 'seq') and wafer.seq is not None:
@@ -62,14 +76,11 @@ def collect_wafer_data(lot: CPLot) -> pd.DataFrame:
             #     df['No.U'] = 1
                 
             # 添加Lot_ID作为参考（使用子目录名称作为lot_id）
-            if hasattr(wafer, 'source_lot_id') and wafer.source_lot_id is not None:
-                df['Lot_ID'] = wafer.source_lot_id
+            lot_id = _wafer_lot_id(lot, wafer)
+            if compact:
+                df['Lot_ID'] = categorical_constant(lot_id, len(df), lot_categories)
             else:
-                # 如果没有设置source_lot_id，尝试使用批次的lot_id
-                if hasattr(lot, 'lot_id') and lot.lot_id is not None:
-                    df['Lot_ID'] = lot.lot_id
-                else:
-                    df['Lot_ID'] = 'Unknown'
+                df['Lot_ID'] = lot_id
                 
             all_data.append(df)
     
@@ -83,11 +94,27 @@ def collect_wafer_data(lot: CPLot) -> pd.DataFrame:
         return combined_df
     return pd.DataFrame()
 
+def _wafer_lot_id(lot: CPLot, wafer) -> str:
+    """晶圆的批次号：优先使用子目录名称 source_lot_id，其次为批次的 lot_id"""
+    if hasattr(wafer, 'source_lot_id') and wafer.source_lot_id is not None:
+        return wafer.source_lot_id
+    # 如果没有设置source_lot_id，尝试使用批次的lot_id
+    if hasattr(lot, 'lot_id') and lot.lot_id is not None:
+        return lot.lot_id
+    return 'Unknown'
+
 def process_lot_data(lot: CPLot, output_dir: str, apply_clean: bool = True, 
                     outlier_method: str = 'iqr', 
                     source_dcp_file_for_spec: str | None = None,
-                    convert_units: bool = True):
-    """处理批次数据并保存"""
+                    convert_units: bool = True,
+                    source_scan_for_spec: DCPFileScan | None = None):
+    """处理批次数据并保存
+
+    outlier_method 为 DataTransformer.clean_data 支持的方法（OUTLIER_METHODS 中的键），
+    如 'iqr_wafer' 按晶圆、'mad_lot' 按源批次分别计算异常值上下限。
+    source_scan_for_spec 为 DCPReader 读取时保留的规格源文件扫描结果，
+    提供时直接从内存生成规格文件，不再重新读取源文件。
+    """
     if not lot or not lot.wafers:
         logger.warning("没有有效的晶圆数据，无法处理")
         return None
@@ -106,7 +133,8 @@ def process_lot_data(lot: CPLot, output_dir: str, apply_clean: bool = True,
         spec_file_path = None
         if source_dcp_file_for_spec:
             logger.info(f"开始为批次 {lot.lot_id} (源文件: {source_dcp_file_for_spec}) 生成规格文件...")
-            spec_file_path = generate_spec_file(source_dcp_file_for_spec, output_dir, lot.lot_id)
+            spec_file_path = generate_spec_file(source_dcp_file_for_spec, output_dir, lot.lot_id,
+                                                scan=source_scan_for_spec)
             if spec_file_path:
                 logger.info(f"规格文件已成功生成: {spec_file_path}")
                 print(f"规格文件已成功生成: {spec_file_path}")
@@ -134,7 +162,9 @@ def process_lot_data(lot: CPLot, output_dir: str, apply_clean: bool = True,
         if combined_data is not None and not combined_data.empty:
             # 调用修改后的 clean_csv_data，直接传递 DataFrame
             # 文件名将是 LOTID_cleaned_TIMESTAMP.csv
-            cleaned_file_path_str = clean_csv_data(combined_data, output_dir, lot.lot_id)
+            with stage("CSV写出", rows=len(combined_data)) as probe:
+                cleaned_file_path_str = clean_csv_data(combined_data, output_dir, lot.lot_id)
+                probe.add(bytes_out=file_bytes([cleaned_file_path_str]))
             
             if cleaned_file_path_str: 
                 logger.info(f"清洗后的数据已保存到: {cleaned_file_path_str}")
@@ -162,7 +192,9 @@ def process_lot_data(lot: CPLot, output_dir: str, apply_clean: bool = True,
                         else:
                             product_name = "Unknown"
                     
-                    success_yield = generate_yield_report_from_dataframe(cleaned_df_for_yield, str(yield_report_filepath), product_name)
+                    with stage("CSV写出") as probe:
+                        success_yield = generate_yield_report_from_dataframe(cleaned_df_for_yield, str(yield_report_filepath), product_name)
+                        probe.add(bytes_out=file_bytes([yield_report_filepath]))
                     
                     if success_yield:
                         logger.info(f"良率报告已成功生成: {yield_report_filepath}")
@@ -254,6 +286,7 @@ def detect_directory_structure(directory_path):
         # 没有找到DCP文件
         return 'none', None
 
+@profiled("文件发现", rows=len)
 def find_dcp_files_in_directory(directory_path, recursive=False):
     """查找指定目录中的DCP格式TXT文件
     
@@ -323,14 +356,24 @@ def extract_lot_id_from_folder_name(folder_name: str) -> tuple[str, str]:
     
     return product_name, lot_id
 
-def process_directory(directory_path, output_dir=None, outlier_method='iqr', convert_units=True):
-    """处理指定目录中的所有DCP文件"""
-    logger.info(f"开始处理目录: {directory_path}")
-    
+def process_directory(directory_path, output_dir=None, outlier_method='iqr', convert_units=True,
+                      parallel=None):
+    """处理指定目录中的所有DCP文件
+
+    parallel 传给 DCPReader：None 跟随 PerformanceConfig，False 强制串行读取。
+    各阶段的性能按监控配置写入日志，报告写到输出目录（见 stage_profiler）。
+    """
     # 设置输出目录
     if output_dir is None:
         output_dir = os.path.join(current_dir, "output")
     
+    with profiling_run("DCP", output_dir):
+        return _process_directory(directory_path, output_dir, outlier_method, convert_units, parallel)
+
+def _process_directory(directory_path, output_dir, outlier_method, convert_units, parallel):
+    """process_directory 的实现"""
+    logger.info(f"开始处理目录: {directory_path}")
+    
     # 检测目录结构并获取正确的lot_id
     structure_type, batch_info = detect_directory_structure(directory_path)
     
@@ -355,7 +398,7 @@ def process_directory(directory_path, output_dir=None, outlier_method='iqr', con
         
         # 创建DCPReader处理文件
         try:
-            reader = DCPReader(dcp_files)
+            reader = DCPReader(dcp_files, parallel=parallel)
             lot = reader.read()
             
             # 设置正确的lot_id和product
@@ -368,7 +411,8 @@ def process_directory(directory_path, output_dir=None, outlier_method='iqr', con
             first_dcp_file_for_spec = dcp_files[0] if dcp_files else None
             return process_lot_data(lot, output_dir, True, outlier_method, 
                                   source_dcp_file_for_spec=first_dcp_file_for_spec,
-                                  convert_units=convert_units)
+                                  convert_units=convert_units,
+                                  source_scan_for_spec=reader.file_scans.get(first_dcp_file_for_spec))
         except Exception as e:
             logger.exception(f"处理批次 {lot_id} 的DCP文件时出错: {str(e)}")
             return None
@@ -418,7 +462,7 @@ def process_directory(directory_path, output_dir=None, outlier_method='iqr', con
         
         # 创建DCPReader处理所有文件
         try:
-            reader = DCPReader(all_dcp_files)
+            reader = DCPReader(all_dcp_files, parallel=parallel)
             lot = reader.read()
             
             # 为每个晶圆设置正确的lot_id（基于文件的分组分配）
@@ -461,7 +505,8 @@ def process_directory(directory_path, output_dir=None, outlier_method='iqr', con
             first_dcp_file_for_spec = all_dcp_files[0] if all_dcp_files else None
             return process_lot_data(lot, output_dir, True, outlier_method, 
                                   source_dcp_file_for_spec=first_dcp_file_for_spec,
-                                  convert_units=convert_units)
+                                  convert_units=convert_units,
+                                  source_scan_for_spec=reader.file_scans.get(first_dcp_file_for_spec))
         except Exception as e:
             logger.exception(f"处理合并批次 {main_lot_id} 时出错: {str(e)}")
             return None
@@ -473,8 +518,10 @@ def main():
     parser = argparse.ArgumentParser(description='DCP数据读取与清洗工具')
     parser.add_argument('--dir', '-d', help='包含DCP文件的目录路径', default=os.path.join(current_dir, "data"))
     parser.add_argument('--output', '-o', help='输出目录路径', default=os.path.join(current_dir, "output"))
-    parser.add_argument('--method', '-m', help='异常值处理方法 (std_dev或iqr)', default='iqr', choices=['std_dev', 'iqr'])
+    parser.add_argument('--method', '-m', default='iqr', choices=list(OUTLIER_METHODS),
+                        help='异常值处理方法 (std_dev、iqr、mad；iqr/mad 加 _wafer 或 _lot 后缀时按晶圆或批次分别计算)')
     parser.add_argument('--no-convert', action='store_true', help='禁用单位转换（默认启用）')
+    parser.add_argument('--serial', action='store_true', help='强制串行读取DCP文件（默认按性能配置并行）')
     
     args = parser.parse_args()
     
@@ -485,7 +532,8 @@ def main():
         sys.exit(1)
     
     # 处理目录
-    result = process_directory(args.dir, args.output, args.method, not args.no_convert)
+    result = process_directory(args.dir, args.output, args.method, not args.no_convert,
+                               parallel=False if args.serial else None)
     
     if result:
         print(f"处理完成！最终输出文件: {result}")
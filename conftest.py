@@ -0,0 +1,19 @@
+import pytest
+
+from cp_data_processor.readers import parsed_file_cache
+
+
+@pytest.fixture(autouse=True)
+def disabled_parsed_file_cache(tmp_path_factory):
+    """测试默认关闭全局解析缓存，不读写用户目录下的缓存"""
+    parsed_file_cache.configure_parsed_file_cache(cache_dir=str(tmp_path_factory.mktemp("parsed_cache")),
+                                                  enabled=False)
+    yield
+    parsed_file_cache._default_cache = None
+
+
+@pytest.fixture
+def isolated_parsed_file_cache(tmp_path_factory):
+    """启用全局解析缓存，使用独立的缓存目录（需要经过全局缓存的测试显式使用）"""
+    return parsed_file_cache.configure_parsed_file_cache(cache_dir=str(tmp_path_factory.mktemp("parsed_cache")),
+                                                         enabled=True)
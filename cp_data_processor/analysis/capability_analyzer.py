@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from .base_analyzer import BaseAnalyzer
 from ..data_models.cp_data import CPParameter, CPWafer, CPLot
+from ..processing.numba_accelerators import cp_cpk, spec_fail_counts
+from ..processing.result_cache import frame_fingerprint, get_result_cache
 
 class CapabilityAnalyzer(BaseAnalyzer):
     """CP数据工艺能力分析器，用于计算Cp、Cpk等工艺能力指标"""
@@ -37,33 +39,30 @@ class CapabilityAnalyzer(BaseAnalyzer):
             # 如果没有指定参数，使用有规格的参数
             self.parameters = list(self.specs.keys())
         
-        # 计算整体工艺能力指标
-        param_capability = {}
-        for param in self.parameters:
-            if param in df.columns and param in self.specs:
-                param_data = pd.to_numeric(df[param], errors='coerce')
-                param_capability[param] = self._calculate_capability(
-                    param_data, 
-                    self.specs[param].get('LSL'), 
-                    self.specs[param].get('USL')
-                )
-        
-        self.results['overall'] = param_capability
-        
-        # 按晶圆分组计算工艺能力指标
-        if self.by_wafer and 'Wafer' in df.columns:
-            wafer_groups = df.groupby('Wafer')
-            for wafer, group in wafer_groups:
-                wafer_capability = {}
-                for param in self.parameters:
-                    if param in group.columns and param in self.specs:
-                        param_data = pd.to_numeric(group[param], errors='coerce')
-                        wafer_capability[param] = self._calculate_capability(
-                            param_data, 
-                            self.specs[param].get('LSL'), 
-                            self.specs[param].get('USL')
-                        )
-                self.results['by_wafer'][wafer] = wafer_capability
+        parameters = [param for param in self.parameters if param in df.columns and param in self.specs]
+        by_wafer = self.by_wafer and 'Wafer' in df.columns
+        
+        # 同一份数据、同一组规格的分析结果由共享结果缓存提供
+        key = ('capability', frame_fingerprint(df, parameters + (['Wafer'] if by_wafer else [])),
+               tuple((param, self.specs[param].get('LSL'), self.specs[param].get('USL')) for param in parameters),
+               by_wafer)
+        cache = get_result_cache()
+        results = cache.get(key)
+        if results is None:
+            # 计算整体工艺能力指标
+            results = {'overall': self._calculate_capabilities(df, parameters), 'by_wafer': {}}
+            
+            # 按晶圆分组计算工艺能力指标
+            if by_wafer:
+                wafer_groups = df.groupby('Wafer')
+                for wafer, group in wafer_groups:
+                    results['by_wafer'][wafer] = self._calculate_capabilities(group, parameters)
+            cache.set(key, results)
+        
+        # 复制缓存中的结果，调用方修改 self.results 不影响缓存
+        self.results['overall'] = {param: dict(result) for param, result in results['overall'].items()}
+        for wafer, wafer_results in results['by_wafer'].items():
+            self.results['by_wafer'][wafer] = {param: dict(result) for param, result in wafer_results.items()}
         
         return self.results
     
@@ -98,67 +97,61 @@ class CapabilityAnalyzer(BaseAnalyzer):
         else:
             return self.results
     
-    def _calculate_capability(self, data, lsl=None, usl=None):
+    def _calculate_capabilities(self, df, parameters):
         """
-        计算能力指标
+        一次计算多个参数的能力指标
         
         Args:
-            data: 参数数据
-            lsl: 下限
-            usl: 上限
+            df: 参数数据
+            parameters: 参数列表（均有规格）
         
         Returns:
-            包含Cp、Cpk等指标的字典
+            参数 -> 包含Cp、Cpk等指标的字典
         """
-        # 剔除缺失值
-        data = data.dropna()
-        
-        # 计算基本统计量
-        mean = data.mean()
-        std = data.std()
-        
-        # 初始化结果
-        result = {
-            'mean': mean,
-            'std': std,
-            'Cp': None,
-            'Cpk': None,
-            'Cpl': None,
-            'Cpu': None,
-            'within_spec_percent': None
-        }
-        
-        # 检查是否有足够的数据点和非零标准差
-        if len(data) < 30 or std == 0:
-            return result
-        
-        # 计算在规格内的百分比
-        if lsl is not None and usl is not None:
-            within_spec = ((data >= lsl) & (data <= usl)).sum()
-            result['within_spec_percent'] = (within_spec / len(data)) * 100
-        
-        # 计算Cp (Process Capability)
-        if lsl is not None and usl is not None:
-            result['Cp'] = (usl - lsl) / (6 * std)
+        if not parameters:
+            return {}
+        matrix = np.empty((len(df), len(parameters)), dtype=np.float64, order='F')
+        for position, param in enumerate(parameters):
+            matrix[:, position] = pd.to_numeric(df[param], errors='coerce').to_numpy(
+                dtype=np.float64, na_value=np.nan)
+        lsl = [self.specs[param].get('LSL') for param in parameters]
+        usl = [self.specs[param].get('USL') for param in parameters]
+        capability = cp_cpk(matrix, lsl, usl)
+        below, above, valid = spec_fail_counts(matrix, lsl, usl)
+        
+        results = {}
+        for position, param in enumerate(parameters):
+            std = capability['std'][position]
+            result = {
+                'mean': capability['mean'][position],
+                'std': std,
+                'Cp': None,
+                'Cpk': None,
+                'Cpl': None,
+                'Cpu': None,
+                'within_spec_percent': None
+            }
+            results[param] = result
             
-            # 计算Cpl (Lower Process Capability)
-            result['Cpl'] = (mean - lsl) / (3 * std)
+            # 检查是否有足够的数据点和非零标准差
+            if valid[position] < 30 or std == 0:
+                continue
             
-            # 计算Cpu (Upper Process Capability)
-            result['Cpu'] = (usl - mean) / (3 * std)
-            
-            # 计算Cpk (Minimum Process Capability)
-            result['Cpk'] = min(result['Cpl'], result['Cpu'])
-        elif lsl is not None:
-            # 只有下限
-            result['Cpl'] = (mean - lsl) / (3 * std)
-            result['Cpk'] = result['Cpl']
-        elif usl is not None:
-            # 只有上限
-            result['Cpu'] = (usl - mean) / (3 * std)
-            result['Cpk'] = result['Cpu']
-        
-        return result
+            has_lsl, has_usl = lsl[position] is not None, usl[position] is not None
+            if has_lsl and has_usl:
+                # 计算在规格内的百分比及Cp
+                within_spec = valid[position] - below[position] - above[position]
+                result['within_spec_percent'] = (within_spec / valid[position]) * 100
+                result['Cp'] = capability['Cp'][position]
+            if has_lsl:
+                result['Cpl'] = capability['Cpl'][position]
+            if has_usl:
+                result['Cpu'] = capability['Cpu'][position]
+            if has_lsl or has_usl:
+                # Cpk 取有规格各侧指标的最小值
+                result['Cpk'] = capability['Cpk'][position]
+        
+        return results
     
     def _get_dataframe(self):
         """根据输入数据类型获取DataFrame"""
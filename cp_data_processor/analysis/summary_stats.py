@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Tuple, Union
 from scipy import stats
 
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
+from cp_data_processor.processing.result_cache import frame_fingerprint, get_result_cache
 
 
 class SummaryStats:
@@ -41,17 +42,44 @@ class SummaryStats:
             print("无法计算统计量：没有可用的数据")
             return
         
+        combined_data = self.cp_lot.combined_data
+        params = [param for param in self.cp_lot.params if param.id in combined_data.columns]
+        
+        # 同一份数据、同一组参数和规格的统计结果由共享结果缓存提供
+        key = ('summary_stats', frame_fingerprint(combined_data, [param.id for param in params]),
+               tuple((param.id, param.unit, param.sl, param.su) for param in params))
+        cache = get_result_cache()
+        cached = cache.get(key)
+        if cached is None:
+            cached = self._compute_basic_stats(combined_data, params)
+            cache.set(key, cached)
+        stats_data, param_stats = cached
+        
+        # 更新参数对象
+        for param in params:
+            if param.id in param_stats:
+                param.mean, param.std_dev, param.median, param.min_val, param.max_val = param_stats[param.id]
+        
+        # 创建统计汇总表
+        if stats_data:
+            self.cp_lot.summary_stats = pd.DataFrame(stats_data)
+    
+    def _compute_basic_stats(self, combined_data: pd.DataFrame,
+                             params: List[CPParameter]) -> Tuple[List[Dict], Dict[str, Tuple]]:
+        """
+        计算各参数的统计量
+        
+        Returns:
+            (统计汇总表的行, 参数 -> (均值, 标准差, 中位数, 最小值, 最大值))
+        """
         # 初始化统计汇总数据
         stats_data = []
+        param_stats = {}
         
         # 计算每个参数的统计量
-        for param in self.cp_lot.params:
-            # 如果参数不在合并数据中，跳过
-            if param.id not in self.cp_lot.combined_data.columns:
-                continue
-            
+        for param in params:
             # 获取参数值
-            param_values = self.cp_lot.combined_data[param.id].dropna()
+            param_values = combined_data[param.id].dropna()
             
             if param_values.empty:
                 continue
@@ -73,12 +101,8 @@ class SummaryStats:
             lower_outlier = q1 - 1.5 * iqr
             upper_outlier = q3 + 1.5 * iqr
             
-            # 更新参数对象
-            param.mean = mean
-            param.std_dev = std_dev
-            param.median = median
-            param.min_val = min_val
-            param.max_val = max_val
+            # 参数对象的基本统计量
+            param_stats[param.id] = (mean, std_dev, median, min_val, max_val)
             
             # 创建统计数据字典
             stats_dict = {
@@ -111,9 +135,7 @@ class SummaryStats:
             # 添加到汇总数据
             stats_data.append(stats_dict)
         
-        # 创建统计汇总表
-        if stats_data:
-            self.cp_lot.summary_stats = pd.DataFrame(stats_data)
+        return stats_data, param_stats
     
     def calculate_capability_indices(self, 
                                      values: pd.Series, 
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from .base_analyzer import BaseAnalyzer
 from ..data_models.cp_data import CPParameter, CPWafer, CPLot
+from ..processing.numba_accelerators import bin_histograms
 
 class YieldAnalyzer(BaseAnalyzer):
     """CP数据良率分析器，用于计算各种良率指标"""
@@ -38,11 +39,14 @@ class YieldAnalyzer(BaseAnalyzer):
         
         # 计算每个晶圆的良率
         if 'Wafer' in df.columns:
-            wafer_groups = df.groupby('Wafer')
-            for wafer, group in wafer_groups:
-                wafer_dies = len(group)
-                wafer_good_dies = len(group[group['Bin'] == self.pass_bin])
-                self.results['wafer_yields'][wafer] = (wafer_good_dies / wafer_dies) * 100 if wafer_dies > 0 else 0
+            # 一次统计所有晶圆的 Bin 直方图
+            codes, wafers = pd.factorize(df['Wafer'], sort=True)
+            bins = pd.to_numeric(df['Bin'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            histograms = bin_histograms(bins, codes, len(wafers), int(self.pass_bin) + 1)
+            wafer_dies = np.bincount(codes[codes >= 0], minlength=len(wafers))
+            for number, wafer in enumerate(wafers):
+                wafer_good_dies = histograms[number, int(self.pass_bin)]
+                self.results['wafer_yields'][wafer] = (wafer_good_dies / wafer_dies[number]) * 100 if wafer_dies[number] > 0 else 0
         
         # 计算每个参数的良率（如果有上下限）
         if self.parameters is None:
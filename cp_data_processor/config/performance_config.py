@@ -13,6 +13,21 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# get_config_dict 中 (分类, 键) -> 属性名，键与属性名不是简单大写关系的项
+CONFIG_ATTRIBUTES = {
+    ('numba', 'enable'): 'ENABLE_NUMBA',
+    ('numba', 'parallel'): 'NUMBA_PARALLEL',
+    ('numba', 'cache'): 'NUMBA_CACHE',
+    ('parallel', 'enable'): 'ENABLE_PARALLEL',
+    ('memory', 'limit_mb'): 'MEMORY_LIMIT_MB',
+    ('memory', 'enable_monitor'): 'ENABLE_MEMORY_MONITOR',
+    ('cache', 'enable'): 'ENABLE_CACHE',
+    ('cache', 'size_mb'): 'CACHE_SIZE_MB',
+    ('cache', 'ttl_seconds'): 'CACHE_TTL_SECONDS',
+    ('scatter', 'enable'): 'SCATTER_OPTIMIZATION',
+}
+
+
 class PerformanceConfig:
     """性能优化配置类"""
     
@@ -53,16 +68,31 @@ class PerformanceConfig:
         self.ENABLE_CACHE = True
         self.CACHE_SIZE_MB = 256  # 缓存大小限制
         self.CACHE_TTL_SECONDS = 3600  # 缓存过期时间
+        self.CACHE_DIR = None  # 结果缓存的磁盘层目录，None 表示只使用内存
+        self.CACHE_DISK_SIZE_MB = 1024  # 结果缓存磁盘层容量上限
+        
+        # 原始文件解析结果磁盘缓存配置（缓存位置和关闭方式见 README）
+        self.ENABLE_PARSED_CACHE = os.environ.get("CP_PARSED_CACHE", "1") != "0"  # CP_PARSED_CACHE=0 时关闭
+        self.PARSED_CACHE_DIR = None  # None 表示使用 CP_CACHE_DIR 或业务数据根目录下的 cache
+        self.PARSED_CACHE_SIZE_MB = 2048  # 磁盘缓存容量上限，超出后按 LRU 淘汰
+        
+        # Excel 流式读取配置（逐行读取并直接写入列缓冲区，降低大文件的峰值内存）
+        self.ENABLE_STREAMING_EXCEL = False
+        
+        # 紧凑数据类型配置（参数列 float32、坐标/Bin 小整数、批次号/晶圆号 category）
+        self.ENABLE_COMPACT_DTYPES = False
+        self.COMPACT_FLOAT_DIGITS = 6  # float32 参数列保证无损的有效数字位数（最多 6 位）
         
         # 散点数据优化配置
         self.SCATTER_OPTIMIZATION = True
         self.MAX_POINTS_PER_WAFER = 80
         self.MIN_POINTS_PER_WAFER = 50
         
-        # 性能监控配置
-        self.ENABLE_PROFILING = False  # 默认关闭详细性能分析
-        self.LOG_PERFORMANCE = True
-        self.PERFORMANCE_REPORT = True
+        # 性能监控配置（各处理阶段的耗时、内存、吞吐量，见 stage_profiler），默认全部关闭，
+        # 通过 update_config({'monitoring': {...}}) 或 enable_debug_mode() 开启
+        self.ENABLE_PROFILING = False  # 详细性能分析（每个阶段写出 cProfile 结果）
+        self.LOG_PERFORMANCE = False  # 处理结束时在日志中输出各阶段汇总
+        self.PERFORMANCE_REPORT = False  # 处理结束时在输出目录写出 JSON 性能报告
     
     def _auto_tune_config(self):
         """根据硬件配置自动调整参数"""
@@ -140,6 +170,26 @@ class PerformanceConfig:
                 'enable': self.ENABLE_CACHE,
                 'size_mb': self.CACHE_SIZE_MB,
                 'ttl_seconds': self.CACHE_TTL_SECONDS,
+                'cache_dir': self.CACHE_DIR,
+                'cache_disk_size_mb': self.CACHE_DISK_SIZE_MB,
+            },
+            
+            # 解析结果磁盘缓存配置
+            'parsed_cache': {
+                'enable_parsed_cache': self.ENABLE_PARSED_CACHE,
+                'parsed_cache_dir': self.PARSED_CACHE_DIR,
+                'parsed_cache_size_mb': self.PARSED_CACHE_SIZE_MB,
+            },
+            
+            # Excel 流式读取配置
+            'excel': {
+                'enable_streaming_excel': self.ENABLE_STREAMING_EXCEL,
+            },
+            
+            # 紧凑数据类型配置
+            'compact_dtypes': {
+                'enable_compact_dtypes': self.ENABLE_COMPACT_DTYPES,
+                'compact_float_digits': self.COMPACT_FLOAT_DIGITS,
             },
             
             # 散点优化配置
@@ -158,14 +208,21 @@ class PerformanceConfig:
         }
     
     def update_config(self, config_dict: Dict[str, Any]):
-        """更新配置"""
+        """
+        更新配置
+        
+        config_dict 与 get_config_dict 的结构相同，例如 {'parallel': {'enable': False}}；
+        分类下的键按 CONFIG_ATTRIBUTES 映射到属性名，未列出的键按大写属性名匹配。
+        """
         for category, settings in config_dict.items():
             if isinstance(settings, dict):
                 for key, value in settings.items():
-                    attr_name = f"{key.upper()}"
+                    attr_name = CONFIG_ATTRIBUTES.get((category, key), key.upper())
                     if hasattr(self, attr_name):
                         setattr(self, attr_name, value)
                         logger.info(f"配置已更新: {attr_name} = {value}")
+                    else:
+                        logger.warning(f"未知的配置项: {category}.{key}")
     
     def enable_debug_mode(self):
         """启用调试模式"""
@@ -177,8 +234,11 @@ class PerformanceConfig:
     def enable_safe_mode(self):
         """启用安全模式（适用于低配置机器）"""
         self.ENABLE_PARALLEL = False
+        self.MAX_WORKERS = 1
+        self.IO_WORKERS = 1
         self.ENABLE_NUMBA = False
         self.ENABLE_CACHE = False
+        self.ENABLE_PARSED_CACHE = False
         self.MEMORY_LIMIT_MB = min(self.MEMORY_LIMIT_MB, 512)
         self.CHUNK_SIZE = 1000
         logger.info("安全模式已启用")
@@ -197,6 +257,8 @@ class PerformanceConfig:
         print(f"内存限制: {config['memory']['limit_mb']}MB")
         print(f"缓存: {'启用' if config['cache']['enable'] else '禁用'} "
               f"({config['cache']['size_mb']}MB)")
+        print(f"解析缓存: {'启用' if config['parsed_cache']['enable_parsed_cache'] else '禁用'} "
+              f"({config['parsed_cache']['parsed_cache_size_mb']}MB)")
         print(f"散点优化: {'启用' if config['scatter']['enable'] else '禁用'} "
               f"(每wafer最多{config['scatter']['max_points_per_wafer']}点)")
         print("="*60 + "\n")
@@ -233,7 +295,7 @@ def enable_compatibility_mode():
     """启用兼容模式（适用于旧电脑）"""
     config = {
         'numba': {'enable': False},
-        'parallel': {'enable': False, 'max_workers': 1},
+        'parallel': {'enable': False, 'max_workers': 1, 'io_workers': 1},
         'cache': {'enable': False},
         'memory': {'limit_mb': 256, 'chunk_size': 1000}
     }
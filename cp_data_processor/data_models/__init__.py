@@ -1,4 +1,6 @@
 # This file makes the directory a Python package 
 
 # 导入数据模型类
-from .cp_data import CPLot, CPWafer, CPParameter 
\ No newline at end of file
+from .cp_data import CPLot, CPWafer, CPParameter
+from .lot_store import LotColumnStore
+from .lot_collection import LazyWafer, LotCollection
@@ -0,0 +1,187 @@
+"""
+芯片数据的紧凑数据类型
+
+由 PerformanceConfig.ENABLE_COMPACT_DTYPES 开启，降低多批次合并时的内存占用：
+- 参数列：所有值都不超过 COMPACT_FLOAT_DIGITS 位有效数字时存为 float32
+- Seq、Bin、X、Y：整数列按取值范围存为 int16 或 int32
+- 批次号和晶圆号：存为 category
+
+float32 列在输出或参与统计前按同样的有效数字还原为 float64，还原结果与原值
+逐位相同，因此 CSV 输出与未开启紧凑模式时完全一致。有效数字超过上限的列
+保持 float64 不变。
+"""
+
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 批次号、晶圆号列
+ID_COLUMNS = ('Lot_ID', 'Wafer_ID', 'LotID', 'WaferID')
+# 可压缩为小整数类型的列
+INTEGER_COLUMNS = ('Seq', 'Bin', 'X', 'Y')
+# float32 能无损往返的十进制有效数字上限
+MAX_FLOAT32_DIGITS = 6
+# 写 CSV 时每次还原的行数
+CSV_CHUNK_ROWS = 100000
+
+_POWERS_OF_TEN = np.array([float(f"1e{i}") for i in range(23)])
+
+
+def compact_float_digits() -> Optional[int]:
+    """当前配置下 float32 列的有效数字位数；未开启紧凑模式时返回 None"""
+    from cp_data_processor.config.performance_config import get_performance_config
+    config = get_performance_config()
+    if not config.ENABLE_COMPACT_DTYPES:
+        return None
+    return max(1, min(int(config.COMPACT_FLOAT_DIGITS), MAX_FLOAT32_DIGITS))
+
+
+def _round_to_digits(values: np.ndarray, digits: int, carry: bool = False) -> Tuple[np.ndarray, bool]:
+    """
+    将有限值按 digits 位有效数字取整到最近的 float64。
+
+    尾数为精确整数、10 的幂取自精确常量表，取整结果即该十进制数最接近的 float64。
+    carry 为 True 时允许尾数进位到 10**digits：10 的整数幂存为 float32 后略小于
+    原值，按低一位的指数取整会进位。
+
+    Returns:
+        (取整结果, 是否所有值都在可精确取整的范围内)
+    """
+    magnitude = np.abs(values)
+    exponent = np.zeros(values.shape, dtype=np.int64)
+    nonzero = magnitude > 0
+    exponent[nonzero] = np.floor(np.log10(magnitude[nonzero])).astype(np.int64)
+    shift = digits - 1 - exponent
+    exact = bool(np.all(np.abs(shift) < len(_POWERS_OF_TEN)))
+    if not exact:
+        return values, False
+    scale = _POWERS_OF_TEN[np.abs(shift)]
+    up = shift >= 0
+    mantissa = np.where(up, np.round(values * scale), np.round(values / scale))
+    if np.any(np.abs(mantissa) > 10 ** digits if carry else np.abs(mantissa) >= 10 ** digits):
+        return values, False
+    return np.where(up, mantissa / scale, mantissa * scale), True
+
+
+def compact_float(values: np.ndarray, digits: int) -> np.ndarray:
+    """所有有限值都恰好是不超过 digits 位有效数字的十进制数时返回 float32，否则原样返回"""
+    if values.dtype != np.float64 or digits > MAX_FLOAT32_DIGITS:
+        return values
+    finite = values[np.isfinite(values)]
+    rounded, exact = _round_to_digits(finite, digits)
+    if not exact or not np.array_equal(rounded, finite):
+        return values
+    return values.astype(np.float32)
+
+
+def restore_float(values: np.ndarray, digits: int) -> np.ndarray:
+    """将 compact_float 得到的 float32 还原为原来的 float64"""
+    restored = values.astype(np.float64)
+    finite = np.isfinite(restored)
+    rounded, _exact = _round_to_digits(restored[finite], digits, carry=True)
+    restored[finite] = rounded
+    return restored
+
+
+def compact_integer(values: np.ndarray) -> np.ndarray:
+    """整数数组按取值范围压缩为 int16 或 int32"""
+    if values.dtype.kind not in 'iu' or values.size == 0:
+        return values
+    low, high = values.min(), values.max()
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if np.dtype(dtype).itemsize < values.dtype.itemsize and info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def compact_ids(values: np.ndarray) -> Any:
+    """object 类型的批次号、晶圆号数组转为 pd.Categorical"""
+    if values.dtype != object:
+        return values
+    return pd.Categorical(values)
+
+
+def compact_column(label: Any, values: Any, digits: int) -> Any:
+    """按列名和数据类型选择紧凑表示，无法压缩时原样返回"""
+    if not isinstance(values, np.ndarray):
+        return values
+    if label in ID_COLUMNS:
+        return compact_ids(values)
+    if label in INTEGER_COLUMNS:
+        return compact_integer(values)
+    return compact_float(values, digits)
+
+
+def expand_column(values: Any, digits: int) -> Any:
+    """紧凑列还原为原来的表示：float32 还原为 float64，category 还原为 object"""
+    if isinstance(values, pd.Categorical):
+        return np.asarray(values, dtype=object)
+    if isinstance(values, np.ndarray) and values.dtype == np.float32:
+        return restore_float(values, digits)
+    return values
+
+
+def expand_series(series: pd.Series, digits: Optional[int] = None) -> pd.Series:
+    """
+    紧凑模式下 float32 列还原为 float64，供统计和格式化使用。
+
+    digits 为 None 时取当前配置；未开启紧凑模式或不是 float32 列时原样返回。
+    """
+    digits = compact_float_digits() if digits is None else digits
+    if digits is None or series.dtype != np.float32:
+        return series
+    return pd.Series(restore_float(series.to_numpy(), digits), index=series.index, name=series.name)
+
+
+def expand_frame(frame: pd.DataFrame, digits: Optional[int] = None) -> pd.DataFrame:
+    """还原 DataFrame 中的紧凑列，未开启紧凑模式时原样返回"""
+    digits = compact_float_digits() if digits is None else digits
+    if digits is None:
+        return frame
+    expanded = {}
+    for position in range(frame.shape[1]):
+        column = frame.iloc[:, position]
+        if column.dtype == np.float32 or isinstance(column.dtype, pd.CategoricalDtype):
+            expanded[position] = expand_column(column.array if isinstance(column.dtype, pd.CategoricalDtype)
+                                               else column.to_numpy(), digits)
+    if not expanded:
+        return frame
+    frame = frame.copy(deep=False)
+    for position, values in expanded.items():
+        frame.isetitem(position, values)
+    return frame
+
+
+def write_csv(frame: pd.DataFrame, file_path: str, digits: Optional[int] = None,
+              chunk_rows: int = CSV_CHUNK_ROWS,
+              transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+              **to_csv_kwargs: Any) -> None:
+    """
+    写出 CSV，紧凑列按块还原后再写，输出与还原后整表调用 to_csv 相同。
+
+    transform 不为 None 时每块还原后先经 transform 处理（如把数值列格式化为字符串）再写出，
+    只有一块的数据同时保存为字符串。未开启紧凑模式且没有 transform 时直接调用 frame.to_csv。
+    """
+    digits = compact_float_digits() if digits is None else digits
+    chunk_rows = max(1, chunk_rows)
+    if (digits is None and transform is None) or len(frame) <= chunk_rows:
+        frame = expand_frame(frame, digits)
+        (transform(frame) if transform is not None else frame).to_csv(file_path, **to_csv_kwargs)
+        return
+    header = to_csv_kwargs.pop('header', True)
+    encoding = to_csv_kwargs.pop('encoding', 'utf-8')
+    with open(file_path, 'w', newline='', encoding=encoding) as f:
+        for start in range(0, len(frame), chunk_rows):
+            chunk = expand_frame(frame.iloc[start:start + chunk_rows], digits)
+            if transform is not None:
+                chunk = transform(chunk)
+            chunk.to_csv(f, header=header if start == 0 else False, **to_csv_kwargs)
+
+
+def categorical_constant(value: Any, length: int, categories: Optional[pd.Index] = None) -> pd.Categorical:
+    """长度为 length、取值全为 value 的 Categorical；categories 相同的数组拼接后仍是 category"""
+    categories = pd.Index([value]) if categories is None else categories
+    codes = np.full(length, categories.get_loc(value))
+    return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
@@ -5,6 +5,9 @@ from typing import List, Dict, Any, Optional
 import numpy as np
 import pandas as pd
 
+from .compact_dtypes import compact_column, compact_float_digits, compact_integer
+from .lot_store import LotColumnStore, column_values, same_array
+
 @dataclass
 class CPParameter:
     """存储单个测试参数的规格和统计信息。"""
@@ -58,6 +61,8 @@ class CPLot:
     # 合并后的数据，方便分析和绘图
     # 行=芯片, 列=WaferID, Seq, Bin, X, Y, Param1, Param2, ...
     combined_data: Optional[pd.DataFrame] = None
+    # combined_data 与各晶圆 chip_data 共用的列式存储 (由 combine_data_from_wafers 生成)
+    column_store: Optional[LotColumnStore] = field(default=None, repr=False, compare=False)
 
     # 分析结果汇总
     summary_stats: Optional[pd.DataFrame] = None # 参数统计汇总表
@@ -68,42 +73,191 @@ class CPLot:
         self.wafer_count = len(self.wafers)
         self.param_count = len(self.params)
 
-    def combine_data_from_wafers(self):
-        """将所有晶圆的数据合并到一个 DataFrame 中。"""
+    def combine_data_from_wafers(self, id_columns: bool = True):
+        """
+        将所有晶圆的数据合并到一个 DataFrame 中。
+
+        合并结果按列保存在 column_store 中，combined_data 与各晶圆的 chip_data
+        都是其上的零拷贝视图，数据只保存一份。列名重复等无法按列保存的情况
+        退回逐晶圆复制再拼接的方式。
+
+        Args:
+            id_columns: 是否在最前面插入 LotID、WaferID 列并去除重复列；
+                为 False 时结果与直接拼接各晶圆 chip_data 相同
+        """
+        self.column_store = None
         if not self.wafers:
             self.combined_data = pd.DataFrame()
             return
 
+        wafers = [wafer for wafer in self.wafers
+                  if wafer.chip_data is not None and not wafer.chip_data.empty]
+        if not wafers:
+            self.combined_data = pd.DataFrame()
+            return
+
+        constant_columns = {}
+        if id_columns:
+            constant_columns = {
+                'LotID': [wafer.source_lot_id if wafer.source_lot_id is not None else self.lot_id
+                          for wafer in wafers],
+                'WaferID': [wafer.wafer_id for wafer in wafers],
+            }
+        store = LotColumnStore.from_frames([wafer.chip_data for wafer in wafers], constant_columns)
+        if store is None:
+            self._combine_by_copy(wafers, id_columns)
+            return
+
+        links = [self._adopt_wafer_view(store, position, wafer) for position, wafer in enumerate(wafers)]
+        store.wafers = wafers
+        digits = compact_float_digits()
+        if digits is not None:
+            self._compact_store(store, links, digits)
+
+        labels = list(store.columns)
+        if id_columns:
+            labels = [label for label in labels if label not in _duplicate_columns(labels)]
+        self.combined_data = store.frame(labels)
+        self.column_store = store
+
+    def _combine_by_copy(self, wafers: List[CPWafer], id_columns: bool) -> None:
         all_dfs = []
-        for wafer in self.wafers:
-            if wafer.chip_data is not None and not wafer.chip_data.empty:
+        for wafer in wafers:
+            wafer_df = wafer.chip_data
+            if id_columns:
                 # 简单直接的方法：只添加LotID和WaferID
-                wafer_df = wafer.chip_data.copy()
-                
-                # 添加LotID和WaferID列
+                wafer_df = wafer_df.copy()
                 wafer_df.insert(0, 'LotID', wafer.source_lot_id if wafer.source_lot_id is not None else self.lot_id)
                 wafer_df.insert(1, 'WaferID', wafer.wafer_id)
-                
-                all_dfs.append(wafer_df)
-
-        if all_dfs:
-            self.combined_data = pd.concat(all_dfs, ignore_index=True)
-            
-            # 去除重复列（如果存在）
-            cols_to_remove = []
-            for col in self.combined_data.columns:
-                if col in ['Lot_ID', 'Wafer_ID'] and col != 'LotID' and col != 'WaferID':
-                    cols_to_remove.append(col)
-                elif '.' in col and col.split('.')[-1].isdigit():  # 去除pandas自动添加的重复列后缀
-                    original_col = col.split('.')[0]  # 取第一部分作为原始列名
-                    if original_col in self.combined_data.columns:
-                        cols_to_remove.append(col)
-            
+            all_dfs.append(wafer_df)
+
+        self.combined_data = pd.concat(all_dfs, ignore_index=True)
+        if id_columns:
+            cols_to_remove = _duplicate_columns(list(self.combined_data.columns))
             if cols_to_remove:
                 self.combined_data = self.combined_data.drop(columns=cols_to_remove)
-        else:
-             self.combined_data = pd.DataFrame()
+
+    @staticmethod
+    def _adopt_wafer_view(store: LotColumnStore, position: int, wafer: CPWafer) -> Optional[Dict[str, Any]]:
+        """
+        用存储上的视图替换晶圆原有的 chip_data。
+
+        只有每列数据类型都与合并结果相同时才替换，否则保留原 DataFrame；
+        原先指向 chip_data 某列的 seq/bin/x/y 数组一并改为指向存储。
+
+        Returns:
+            已替换时返回 {属性名: 列名}，记录 seq/bin/x/y 指向的列；未替换时返回 None
+        """
+        old = wafer.chip_data
+        dtypes = old.dtypes
+        if any(store.columns[label].dtype != dtype for label, dtype in dtypes.items()):
+            return None
+        rows = store.wafer_slice(position)
+        links = {}
+        arrays = {attr: getattr(wafer, attr) for attr in ('seq', 'bin', 'x', 'y')
+                  if isinstance(getattr(wafer, attr), np.ndarray)}
+        for label in (old.columns if arrays else []):
+            column = old[label].to_numpy()
+            for attr, values in list(arrays.items()):
+                if same_array(column, values):
+                    setattr(wafer, attr, store.columns[label][rows])
+                    links[attr] = label
+                    del arrays[attr]
+        wafer.chip_data = store.wafer_frame(position)
+        return links
+
+    @staticmethod
+    def _compact_store(store: LotColumnStore, links: List[Optional[Dict[str, Any]]], digits: int) -> None:
+        """将存储中的列换成紧凑数据类型，并重建晶圆视图和 seq/bin/x/y"""
+        for label, values in list(store.columns.items()):
+            store.columns[label] = compact_column(label, values, digits)
+        for position, (wafer, wafer_links) in enumerate(zip(store.wafers, links)):
+            rows = store.wafer_slice(position)
+            if wafer_links is not None:
+                wafer.chip_data = store.wafer_frame(position)
+                for attr, label in wafer_links.items():
+                    setattr(wafer, attr, np.asarray(store.columns[label][rows]))
+            for attr in ('seq', 'bin', 'x', 'y'):
+                if wafer_links is None or attr not in wafer_links:
+                    values = getattr(wafer, attr)
+                    if isinstance(values, np.ndarray):
+                        setattr(wafer, attr, compact_integer(values))
+
+    def wafer_rows(self, wafer: CPWafer) -> Optional[slice]:
+        """晶圆在 combined_data 中的行范围；未按列合并或晶圆不在合并结果中时返回 None"""
+        store = self.column_store
+        if store is None:
+            return None
+        for position, member in enumerate(store.wafers):
+            if member is wafer:
+                return store.wafer_slice(position)
+        return None
+
+    def sync_wafer_column(self, column: str) -> bool:
+        """
+        将 combined_data 中某列的修改同步到各晶圆的 chip_data。
+
+        列仍是存储中的同一数组时（如 .loc 原地赋值），晶圆视图已经反映修改，
+        无需任何操作；列被替换或新增时，存储改为引用 combined_data 中的新数组，
+        再重建晶圆视图。
+
+        Returns:
+            是否已同步；没有列式存储或行数不一致时返回 False
+        """
+        store = self.column_store
+        if (store is None or self.combined_data is None
+                or column not in self.combined_data.columns
+                or len(self.combined_data) != store.n_rows):
+            return False
+        values = column_values(self.combined_data[column])
+        if store.shares_column(column, values):
+            return True
+
+        previous_columns = [list(labels) for labels in store.wafer_columns]
+        store.set_column(column, values)
+        for position, wafer in enumerate(store.wafers):
+            if wafer is None or wafer.chip_data is None:
+                continue
+            if list(wafer.chip_data.columns) == previous_columns[position]:
+                wafer.chip_data = store.wafer_frame(position)
+            else:
+                wafer.chip_data[column] = values[store.wafer_slice(position)]
+        return True
+
+    def save(self, path: str) -> str:
+        """
+        以列式二进制格式保存批次（.npy 列数组 + JSON 元数据，见 lot_io）。
+
+        Returns:
+            保存目录
+        """
+        from .lot_io import save_lot
+        return str(save_lot(self, path))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, columns: Optional[List[Any]] = None) -> 'CPLot':
+        """
+        加载 save 保存的批次。
+
+        mmap 为 True 时列数组以写时复制的内存映射打开，多个进程共用同一份页缓存。
+        columns 不为 None 时芯片数据只加载其中列出的列。
+        """
+        from .lot_io import load_lot
+        return load_lot(path, mmap=mmap, columns=columns)
 
     def get_param_names(self) -> List[str]:
         """获取所有参数名称的列表。"""
-        return [p.id for p in self.params] 
\ No newline at end of file
+        return [p.id for p in self.params]
+
+
+def _duplicate_columns(columns: List[Any]) -> List[Any]:
+    """合并结果中需要去除的重复列：Lot_ID/Wafer_ID 及 pandas 自动添加 .N 后缀的列"""
+    cols_to_remove = []
+    for col in columns:
+        if col in ['Lot_ID', 'Wafer_ID']:
+            cols_to_remove.append(col)
+        elif isinstance(col, str) and '.' in col and col.split('.')[-1].isdigit():  # 去除pandas自动添加的重复列后缀
+            original_col = col.split('.')[0]  # 取第一部分作为原始列名
+            if original_col in columns:
+                cols_to_remove.append(col)
+    return cols_to_remove
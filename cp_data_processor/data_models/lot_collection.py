@@ -0,0 +1,266 @@
+"""
+多批次的按需加载集合
+
+产品级的历史趋势分析往往涉及上百个批次，全部读入内存不可行。LotCollection
+只索引 CPLot.save 保存的批次目录（批次号、晶圆号、行数、列名都来自 lot.json），
+晶圆的芯片数据在被访问时才以内存映射方式读取，并且可以只读取需要的参数列。
+
+集合同时是 lot_id -> CPLot 的只读映射，按键访问时才加载对应批次，可以直接
+交给接受批次字典的函数（如 StandardCSVGenerator.generate_combined_standard_csvs）。
+"""
+
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .compact_dtypes import expand_series
+from .cp_data import CPLot, CPWafer
+from .lot_io import META_FILE_NAME, LotReader
+
+logger = logging.getLogger(__name__)
+
+# 同时保持打开的批次目录数（只缓存元数据和对象列的解码结果）
+READER_CACHE_SIZE = 4
+
+
+@dataclass
+class LazyWafer:
+    """集合中一片晶圆的索引项，芯片数据在调用 load / chip_data 时才读取"""
+    lot_id: str
+    wafer_id: str
+    lot_path: Path
+    number: int  # 晶圆在批次中的序号
+    row_count: int
+    columns: List[Any] = field(default_factory=list)
+    collection: Optional['LotCollection'] = field(default=None, repr=False, compare=False)
+
+    def load(self, columns: Optional[Collection[Any]] = None) -> CPWafer:
+        """
+        读取这片晶圆，columns 不为 None 时 chip_data 只包含其中列出的列。
+
+        同一批次的各次读取共用一份内存映射，修改返回的数据前应先复制。
+        """
+        return self.collection._reader(self.lot_path).wafer(self.number, columns)
+
+    def chip_data(self, columns: Optional[Collection[Any]] = None) -> Optional[pd.DataFrame]:
+        return self.load(columns).chip_data
+
+
+class LotCollection(Mapping):
+    """
+    按需加载的多批次集合。
+
+    用法:
+        collection = LotCollection.from_directory("history/")
+        for wafer, data in collection.iter_chip_data(["VTH"]):
+            ...
+        stats = collection.aggregate(["VTH", "IDSS"], by="lot")
+    """
+
+    def __init__(self, paths: Iterable[Union[str, Path]], mmap: bool = True):
+        """
+        Args:
+            paths: CPLot.save 保存的批次目录
+            mmap: 是否以内存映射方式读取列数组
+        """
+        self.mmap = mmap
+        self._readers: 'OrderedDict[Path, LotReader]' = OrderedDict()
+        self._lot_paths: Dict[str, Path] = {}
+        self.wafers: List[LazyWafer] = []
+        for path in paths:
+            path = Path(path)
+            reader = self._reader(path)
+            lot_id = reader.lot_attribute('lot_id', '')
+            if lot_id in self._lot_paths:
+                raise ValueError(f"批次 {lot_id} 重复: {self._lot_paths[lot_id]} 与 {path}")
+            self._lot_paths[lot_id] = path
+            for number in range(reader.wafer_count):
+                self.wafers.append(LazyWafer(
+                    lot_id=lot_id,
+                    wafer_id=reader.wafer_attribute(number, 'wafer_id', ''),
+                    lot_path=path,
+                    number=number,
+                    row_count=reader.wafer_length(number),
+                    columns=reader.wafer_labels(number) or [],
+                    collection=self,
+                ))
+        logger.info(f"批次集合索引完成: {len(self._lot_paths)} 个批次, {len(self.wafers)} 片晶圆, "
+                    f"{self.row_count} 颗芯片")
+
+    @classmethod
+    def from_directory(cls, root: Union[str, Path], mmap: bool = True) -> 'LotCollection':
+        """索引 root 下所有批次目录（含 lot.json 的直接子目录），按目录名排序"""
+        root = Path(root)
+        paths = sorted(path for path in root.iterdir() if (path / META_FILE_NAME).is_file())
+        return cls(paths, mmap=mmap)
+
+    @classmethod
+    def save_lots(cls, lots: Union[Dict[str, CPLot], Iterable[CPLot]], root: Union[str, Path],
+                  mmap: bool = True) -> 'LotCollection':
+        """将批次逐个保存到 root/<lot_id> 并返回索引这些目录的集合"""
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        lots = lots.values() if isinstance(lots, dict) else lots
+        return cls([lot.save(str(root / lot.lot_id)) for lot in lots], mmap=mmap)
+
+    def _reader(self, path: Path) -> LotReader:
+        """打开批次目录，最近使用的 READER_CACHE_SIZE 个保持打开"""
+        reader = self._readers.get(path)
+        if reader is None:
+            reader = LotReader(str(path), mmap=self.mmap)
+            self._readers[path] = reader
+            if len(self._readers) > READER_CACHE_SIZE:
+                self._readers.popitem(last=False)
+        else:
+            self._readers.move_to_end(path)
+        return reader
+
+    # ------------------------------------------------------------------
+    # Mapping: lot_id -> CPLot
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, lot_id: str) -> CPLot:
+        return self.load_lot(lot_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lot_paths)
+
+    def __len__(self) -> int:
+        return len(self._lot_paths)
+
+    @property
+    def lot_ids(self) -> List[str]:
+        return list(self._lot_paths)
+
+    @property
+    def row_count(self) -> int:
+        return sum(wafer.row_count for wafer in self.wafers)
+
+    @property
+    def columns(self) -> List[Any]:
+        """所有晶圆芯片数据列名的并集，按首次出现的顺序"""
+        return list(dict.fromkeys(label for wafer in self.wafers for label in wafer.columns))
+
+    def load_lot(self, lot_id: str, columns: Optional[Collection[Any]] = None) -> CPLot:
+        """
+        加载一个批次，columns 不为 None 时芯片数据只包含其中列出的列。
+
+        与 CPLot.load 相同，每次加载都是独立的写时复制映射，修改互不影响。
+        """
+        return LotReader(str(self._lot_paths[lot_id]), mmap=self.mmap).lot(columns)
+
+    def lot_info(self, lot_id: str) -> CPLot:
+        """只含批次属性和参数、不含晶圆的 CPLot"""
+        return self._reader(self._lot_paths[lot_id]).lot(wafers=False)
+
+    def iter_lots(self, columns: Optional[Collection[Any]] = None) -> Iterator[CPLot]:
+        """逐个加载批次；调用方不保留上一个批次时，内存中同时只有一个批次"""
+        for lot_id in self._lot_paths:
+            yield self.load_lot(lot_id, columns)
+
+    def iter_chip_data(self, columns: Optional[Collection[Any]] = None
+                       ) -> Iterator[Tuple[LazyWafer, pd.DataFrame]]:
+        """逐片读取晶圆的芯片数据（只读 columns 中的列），跳过没有芯片数据的晶圆"""
+        for wafer in self.wafers:
+            if not wafer.columns:
+                continue
+            chip_data = wafer.chip_data(columns)
+            if chip_data is not None:
+                yield wafer, chip_data
+
+    def column_kinds(self, wafer: LazyWafer) -> Dict[Any, str]:
+        """晶圆各列的 dtype.kind（对象类列为 'O'），只读取数组文件头"""
+        return self._reader(wafer.lot_path).column_kinds(wafer.number)
+
+    # ------------------------------------------------------------------
+    # 流式统计
+    # ------------------------------------------------------------------
+
+    def aggregate(self, parameters: List[Any], by: Optional[str] = 'wafer',
+                  bins: Optional[Collection[Any]] = None, bin_column: str = 'Bin') -> pd.DataFrame:
+        """
+        逐片晶圆流式统计参数，内存中同时只有一片晶圆的所需列。
+
+        Args:
+            parameters: 统计的参数列
+            by: 'wafer' 按晶圆、'lot' 按批次分组，None 统计整个集合
+            bins: 只统计 bin_column 取值在 bins 中的芯片（如只统计良品 [1]），None 表示全部
+            bin_column: Bin 列名
+
+        Returns:
+            每个分组、每个参数一行：分组列、Parameter、Count、Mean、Std、Min、Max。
+            只统计有限数值，Std 为样本标准差（ddof=1）。
+        """
+        if by not in ('wafer', 'lot', None):
+            raise ValueError(f"不支持的分组方式: {by}")
+        columns = list(parameters) + ([bin_column] if bins is not None else [])
+        groups: Dict[Tuple, Dict[Any, RunningMoments]] = {}
+        for wafer, chip_data in self.iter_chip_data(columns):
+            key = {'wafer': (wafer.lot_id, wafer.wafer_id), 'lot': (wafer.lot_id,), None: ()}[by]
+            moments = groups.setdefault(key, {parameter: RunningMoments() for parameter in parameters})
+            if bins is not None:
+                if bin_column not in chip_data.columns:
+                    continue
+                chip_data = chip_data[chip_data[bin_column].isin(list(bins)).to_numpy()]
+            for parameter in parameters:
+                if parameter in chip_data.columns:
+                    moments[parameter].update(_finite_values(chip_data[parameter]))
+
+        key_columns = {'wafer': ['Lot_ID', 'Wafer_ID'], 'lot': ['Lot_ID'], None: []}[by]
+        records = [
+            {**dict(zip(key_columns, key)), 'Parameter': parameter, **stats.result()}
+            for key, moments in groups.items()
+            for parameter, stats in moments.items()
+        ]
+        return pd.DataFrame(records, columns=key_columns + ['Parameter'] + RunningMoments.FIELDS)
+
+
+def _finite_values(series: pd.Series) -> np.ndarray:
+    values = pd.to_numeric(expand_series(series), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+class RunningMoments:
+    """可分块累加的计数、均值、二阶中心矩和极值（Chan 等的并行合并公式）"""
+
+    FIELDS = ['Count', 'Mean', 'Std', 'Min', 'Max']
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        self._combine(n, mean, float(((values - mean) ** 2).sum()), float(values.min()), float(values.max()))
+
+    def merge(self, other: 'RunningMoments') -> None:
+        """并入另一组的统计量"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n: int, mean: float, m2: float, minimum: float, maximum: float) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def result(self) -> Dict[str, Any]:
+        if self.count == 0:
+            return {'Count': 0, 'Mean': np.nan, 'Std': np.nan, 'Min': np.nan, 'Max': np.nan}
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        return {'Count': self.count, 'Mean': self.mean, 'Std': std, 'Min': self.min, 'Max': self.max}
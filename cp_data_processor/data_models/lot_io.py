@@ -0,0 +1,495 @@
+"""
+CPLot 的二进制存储
+
+目录布局：
+    lot.json        批次、晶圆、参数的元数据及各列的编码描述
+    arrays/*.npy    列数组，每个数组一个 .npy 文件
+
+列的编码与解析缓存 (parsed_file_cache) 相同：数值列保存为原生数组，对象列拆分为
+类型码和各类型的值数组，category 列保存编码和类别，不使用 pickle。按列合并过的
+批次只保存列式存储中的一份数据，combined_data 和各晶圆 chip_data 记录为对存储
+的引用。
+
+加载时数组以写时复制 (copy-on-write) 的内存映射打开：多个进程加载同一批次时
+共用操作系统的页缓存，对加载结果的修改只作用于本进程，不会写回文件。
+"""
+
+import os
+import json
+import shutil
+import logging
+from collections.abc import Mapping
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cp_data_processor.readers.parsed_file_cache import (
+    decode_array,
+    decode_frame,
+    decode_scalar,
+    encode_array,
+    encode_frame,
+    encode_scalar,
+    json_default,
+)
+from .cp_data import CPLot, CPParameter, CPWafer
+from .lot_store import LotColumnStore, column_values, same_array
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "cplot"
+FORMAT_VERSION = 1
+META_FILE_NAME = "lot.json"
+ARRAY_DIR_NAME = "arrays"
+
+# CPWafer 中与芯片一一对应的数组属性
+WAFER_ARRAYS = ('seq', 'bin', 'x', 'y')
+# CPLot 中单独保存的字段
+_LOT_SKIPPED_FIELDS = ('wafers', 'params', 'column_store', 'combined_data')
+
+
+class LotFormatError(ValueError):
+    """目录不是可识别的 CPLot 存储"""
+
+
+class _ArrayDirectory(Mapping):
+    """按需从目录中加载 .npy 数组，加载过的数组缓存在目录对象上"""
+
+    def __init__(self, root: Path, mmap_mode: Optional[str]):
+        self.root = root
+        self.mmap_mode = mmap_mode
+        self._loaded: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        array = self._loaded.get(key)
+        if array is None:
+            path = self.root / f"{key}.npy"
+            if not path.exists():
+                raise KeyError(key)
+            # 内存映射转为普通 ndarray 视图（基对象仍是映射），切片时不再经过 np.memmap 的开销
+            array = np.asarray(np.load(path, mmap_mode=self.mmap_mode, allow_pickle=False))
+            self._loaded[key] = array
+        return array
+
+    def __iter__(self):
+        return (path.stem for path in self.root.glob("*.npy"))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.root.glob("*.npy"))
+
+
+# ---------------------------------------------------------------------------
+# 编码
+# ---------------------------------------------------------------------------
+
+def _encode_index(index: pd.Index, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    if isinstance(index, pd.RangeIndex):
+        spec = {"kind": "range", "start": index.start, "stop": index.stop, "step": index.step}
+    else:
+        spec = encode_array(index, prefix, arrays)
+    spec["name"] = encode_scalar(index.name)
+    return spec
+
+
+def _decode_index(spec: Dict[str, Any], prefix: str, arrays) -> pd.Index:
+    if spec["kind"] == "range":
+        index = pd.RangeIndex(spec["start"], spec["stop"], spec["step"])
+    else:
+        index = pd.Index(decode_array(spec, prefix, arrays))
+    index.name = decode_scalar(spec["name"])
+    return index
+
+
+def _encode_column(values: Any, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    编码列式存储中的一列。
+
+    全部为字符串的对象列（批次号、晶圆号等）按字典编码保存为整数编码和去重后的
+    字符串数组，加载时一次取值还原，其余列使用 encode_array。
+    """
+    if (isinstance(values, np.ndarray) and values.dtype == object
+            and pd.api.types.infer_dtype(values, skipna=False) == "string"):
+        codes, uniques = pd.factorize(values)
+        arrays[f"{prefix}.codes"] = codes.astype(np.int32)
+        arrays[f"{prefix}.uniques"] = np.array(list(uniques), dtype=str) if len(uniques) else np.array([], dtype="<U1")
+        return {"kind": "dictionary"}
+    return encode_array(values, prefix, arrays)
+
+
+def _encode_value(value: Any, prefix: str, arrays: Dict[str, np.ndarray]) -> Optional[Dict[str, Any]]:
+    """编码任意属性值；无法保存时返回 None"""
+    if isinstance(value, pd.DataFrame):
+        return {"kind": "frame", "spec": encode_frame(value, prefix, arrays)}
+    if isinstance(value, np.ndarray) and value.ndim == 1:
+        return {"kind": "array", "spec": encode_array(value, prefix, arrays)}
+    try:
+        json.dumps(value, default=json_default)
+    except (TypeError, ValueError):
+        return None
+    return {"kind": "json", "value": value}
+
+
+def _decode_value(spec: Dict[str, Any], prefix: str, arrays) -> Any:
+    if spec["kind"] == "frame":
+        return decode_frame(spec["spec"], prefix, arrays, copy=False)
+    if spec["kind"] == "array":
+        return decode_array(spec["spec"], prefix, arrays)
+    return spec["value"]
+
+
+def _encode_attributes(obj: Any, skipped: tuple, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    encoded = {}
+    for name, value in vars(obj).items():
+        if name in skipped:
+            continue
+        spec = _encode_value(value, f"{prefix}.{name}", arrays)
+        if spec is None:
+            logger.warning(f"属性 {prefix}.{name} 的类型 {type(value).__name__} 无法保存，已跳过")
+            continue
+        encoded[name] = spec
+    return encoded
+
+
+def _decode_attributes(obj: Any, encoded: Dict[str, Any], prefix: str, arrays) -> None:
+    for name, spec in encoded.items():
+        setattr(obj, name, _decode_value(spec, f"{prefix}.{name}", arrays))
+
+
+def _encode_store(store: LotColumnStore, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    labels = list(store.columns)
+    positions = {label: position for position, label in enumerate(labels)}
+    columns = []
+    for position, label in enumerate(labels):
+        spec = _encode_column(store.columns[label], f"store.{position}", arrays)
+        spec["label"] = encode_scalar(label)
+        columns.append(spec)
+    arrays["store.offsets"] = np.asarray(store.offsets, dtype=np.int64)
+    return {
+        "columns": columns,
+        "wafer_columns": [[positions[label] for label in wafer_labels] for wafer_labels in store.wafer_columns],
+        "wafer_indexes": [_encode_index(index, f"store.index.{position}", arrays)
+                          for position, index in enumerate(store.wafer_indexes)],
+    }
+
+
+def _is_store_view(frame: pd.DataFrame, store: LotColumnStore, position: int) -> bool:
+    """frame 是否仍是 store 上第 position 片晶圆的完整视图"""
+    if list(frame.columns) != store.wafer_columns[position] or not frame.index.equals(store.wafer_indexes[position]):
+        return False
+    rows = store.wafer_slice(position)
+    return all(same_array(column_values(frame.iloc[:, i]), store.columns[label][rows])
+               for i, label in enumerate(frame.columns))
+
+
+def _encode_combined(lot: CPLot, arrays: Dict[str, np.ndarray]) -> Optional[Dict[str, Any]]:
+    combined, store = lot.combined_data, lot.column_store
+    if combined is None:
+        return None
+    if (store is not None and combined.columns.is_unique
+            and combined.index.equals(pd.RangeIndex(store.n_rows))
+            and all(store.shares_column(label, column_values(combined[label])) for label in combined.columns)):
+        positions = {label: position for position, label in enumerate(store.columns)}
+        return {"kind": "store", "columns": [positions[label] for label in combined.columns]}
+    return {"kind": "frame", "spec": encode_frame(combined, "combined", arrays)}
+
+
+def _encode_wafer(wafer: CPWafer, number: int, store: Optional[LotColumnStore],
+                  store_position: Optional[int], arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    prefix = f"wafer.{number}"
+    spec: Dict[str, Any] = {"store_position": store_position, "arrays": {}}
+    chip_data = wafer.chip_data
+    if chip_data is None:
+        spec["chip_data"] = None
+    elif store_position is not None and _is_store_view(chip_data, store, store_position):
+        spec["chip_data"] = {"kind": "store"}
+    else:
+        spec["chip_data"] = {"kind": "frame", "spec": encode_frame(chip_data, f"{prefix}.chip_data", arrays)}
+
+    labels = list(store.columns) if store is not None else []
+    for attr in WAFER_ARRAYS:
+        values = getattr(wafer, attr)
+        if values is None:
+            continue
+        if store_position is not None:
+            rows = store.wafer_slice(store_position)
+            linked = next((position for position, label in enumerate(labels)
+                           if isinstance(store.columns[label], np.ndarray)
+                           and same_array(values, store.columns[label][rows])), None)
+            if linked is not None:
+                spec["arrays"][attr] = {"kind": "store", "column": linked}
+                continue
+        spec["arrays"][attr] = {"kind": "array", "spec": encode_array(np.asarray(values), f"{prefix}.{attr}", arrays)}
+    spec["attributes"] = _encode_attributes(wafer, ('chip_data',) + WAFER_ARRAYS, prefix, arrays)
+    return spec
+
+
+# ---------------------------------------------------------------------------
+# 保存 / 加载
+# ---------------------------------------------------------------------------
+
+def save_lot(lot: CPLot, path: str) -> Path:
+    """
+    将批次保存到目录 path。
+
+    先写入同级临时目录再替换，已存在的 path 必须是之前保存的批次目录。
+    无法保存的动态属性（非 DataFrame、非一维数组且不能写成 JSON）会被跳过并记录警告。
+
+    Returns:
+        保存目录
+    """
+    path = Path(path)
+    if path.exists() and not (path / META_FILE_NAME).is_file():
+        raise FileExistsError(f"目标已存在且不是批次存储目录: {path}")
+
+    arrays: Dict[str, np.ndarray] = {}
+    store = lot.column_store
+    store_positions = {id(wafer): position for position, wafer in enumerate(store.wafers)} if store else {}
+    meta = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "lot": _encode_attributes(lot, _LOT_SKIPPED_FIELDS, "lot", arrays),
+        "params": [asdict(param) for param in lot.params],
+        "store": _encode_store(store, arrays) if store is not None else None,
+        "combined_data": _encode_combined(lot, arrays),
+        "wafers": [_encode_wafer(wafer, number, store, store_positions.get(id(wafer)), arrays)
+                   for number, wafer in enumerate(lot.wafers)],
+    }
+
+    temp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    if temp.exists():
+        shutil.rmtree(temp)
+    array_dir = temp / ARRAY_DIR_NAME
+    array_dir.mkdir(parents=True)
+    try:
+        for key, values in arrays.items():
+            np.save(array_dir / f"{key}.npy", np.asarray(values), allow_pickle=False)
+        (temp / META_FILE_NAME).write_text(
+            json.dumps(meta, ensure_ascii=False, default=json_default), encoding="utf-8"
+        )
+        if path.exists():
+            previous = path.with_name(f".{path.name}.old-{os.getpid()}")
+            path.rename(previous)
+            temp.rename(path)
+            shutil.rmtree(previous, ignore_errors=True)
+        else:
+            temp.rename(path)
+    except BaseException:
+        shutil.rmtree(temp, ignore_errors=True)
+        raise
+    logger.info(f"批次 {lot.lot_id} 已保存到 {path} ({len(arrays)} 个数组)")
+    return path
+
+
+class LotReader:
+    """
+    读取 save_lot 保存的批次目录。
+
+    只解析 lot.json，列数组在用到时才加载。可以只取部分芯片数据列（列投影），
+    也可以不加载整批而单独读取一片晶圆，供 LotCollection 按需读取多个批次。
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        """
+        Args:
+            path: 批次目录
+            mmap: 是否以写时复制的内存映射打开数组；False 时读入内存
+        """
+        self.path = Path(path)
+        meta_path = self.path / META_FILE_NAME
+        if not meta_path.is_file():
+            raise LotFormatError(f"不是批次存储目录: {self.path}")
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("format") != FORMAT_NAME or meta.get("version") != FORMAT_VERSION:
+            raise LotFormatError(f"不支持的批次存储格式: {meta.get('format')} v{meta.get('version')}")
+        self.meta = meta
+        self.arrays = _ArrayDirectory(self.path / ARRAY_DIR_NAME, "c" if mmap else None)
+        store_meta = meta["store"]
+        self._store_labels = ([decode_scalar(spec["label"]) for spec in store_meta["columns"]]
+                              if store_meta is not None else [])
+        # 对象列需整列解码，按晶圆读取时缓存解码结果
+        self._object_columns: Dict[int, np.ndarray] = {}
+
+    @property
+    def wafer_count(self) -> int:
+        return len(self.meta["wafers"])
+
+    def lot_attribute(self, name: str, default: Any = None) -> Any:
+        """批次的 JSON 属性（lot_id、product 等），不加载任何数组"""
+        spec = self.meta["lot"].get(name)
+        return spec["value"] if spec is not None and spec["kind"] == "json" else default
+
+    def wafer_attribute(self, number: int, name: str, default: Any = None) -> Any:
+        """第 number 片晶圆的 JSON 属性，不加载任何数组"""
+        spec = self.meta["wafers"][number]["attributes"].get(name)
+        return spec["value"] if spec is not None and spec["kind"] == "json" else default
+
+    def wafer_labels(self, number: int) -> Optional[List[Any]]:
+        """第 number 片晶圆 chip_data 的列名；没有 chip_data 时返回 None"""
+        spec = self.meta["wafers"][number]
+        chip_data = spec["chip_data"]
+        if chip_data is None:
+            return None
+        if chip_data["kind"] == "store":
+            return [self._store_labels[position]
+                    for position in self.meta["store"]["wafer_columns"][spec["store_position"]]]
+        return [decode_scalar(column["label"]) for column in chip_data["spec"]["columns"]]
+
+    def wafer_length(self, number: int) -> int:
+        """第 number 片晶圆 chip_data 的行数；没有 chip_data 时为 0"""
+        spec = self.meta["wafers"][number]
+        chip_data = spec["chip_data"]
+        if chip_data is None:
+            return 0
+        if chip_data["kind"] == "store":
+            rows = self._store_rows(spec["store_position"])
+            return rows.stop - rows.start
+        return chip_data["spec"]["length"]
+
+    def column_kinds(self, number: int) -> Dict[Any, str]:
+        """
+        第 number 片晶圆各列的 dtype.kind，只读取 .npy 文件头。
+
+        对象列、字典编码列和 category 列都记为 'O'。
+        """
+        spec = self.meta["wafers"][number]
+        chip_data = spec["chip_data"]
+        if chip_data is None:
+            return {}
+        if chip_data["kind"] == "store":
+            items = [(self._store_labels[position], self.meta["store"]["columns"][position], f"store.{position}")
+                     for position in self.meta["store"]["wafer_columns"][spec["store_position"]]]
+        else:
+            items = [(decode_scalar(column["label"]), column, f"wafer.{number}.chip_data.{position}")
+                     for position, column in enumerate(chip_data["spec"]["columns"])]
+        return {label: self.arrays[f"{prefix}.values"].dtype.kind if column["kind"] == "numpy" else "O"
+                for label, column, prefix in items}
+
+    def _store_rows(self, position: int) -> slice:
+        offsets = self.arrays["store.offsets"]
+        return slice(int(offsets[position]), int(offsets[position + 1]))
+
+    def _store_column(self, position: int, rows: slice = slice(None)) -> Any:
+        """解码存储中的第 position 列，只取 rows 范围内的行"""
+        spec = self.meta["store"]["columns"][position]
+        prefix = f"store.{position}"
+        if spec["kind"] == "dictionary":
+            return self.arrays[f"{prefix}.uniques"].astype(object)[self.arrays[f"{prefix}.codes"][rows]]
+        if rows == slice(None):
+            return decode_array(spec, prefix, self.arrays)
+        if spec["kind"] == "numpy":
+            return self.arrays[f"{prefix}.values"][rows]
+        if position not in self._object_columns:
+            self._object_columns[position] = decode_array(spec, prefix, self.arrays)
+        return self._object_columns[position][rows]
+
+    def store(self, columns: Optional[Collection[Any]] = None) -> Optional[LotColumnStore]:
+        """还原列式存储；columns 不为 None 时只包含其中列出的列"""
+        store_meta = self.meta["store"]
+        if store_meta is None:
+            return None
+        labels = self._store_labels
+        store = LotColumnStore(
+            {label: self._store_column(position) for position, label in enumerate(labels)
+             if columns is None or label in columns},
+            self.arrays["store.offsets"],
+            [[labels[position] for position in wafer_columns if columns is None or labels[position] in columns]
+             for wafer_columns in store_meta["wafer_columns"]],
+            [_decode_index(spec, f"store.index.{position}", self.arrays)
+             for position, spec in enumerate(store_meta["wafer_indexes"])],
+        )
+        store.wafers = [None] * store.wafer_count
+        return store
+
+    def wafer(self, number: int, columns: Optional[Collection[Any]] = None,
+              store: Optional[LotColumnStore] = None) -> CPWafer:
+        """
+        还原第 number 片晶圆。
+
+        Args:
+            number: 晶圆序号
+            columns: chip_data 只保留的列，None 表示全部列
+            store: 同一批次已还原的列式存储（列投影须一致）；给出时 chip_data 为存储上的视图，
+                否则单独读取这片晶圆的行
+        """
+        prefix = f"wafer.{number}"
+        spec = self.meta["wafers"][number]
+        wafer = CPWafer(wafer_id="")
+        _decode_attributes(wafer, spec["attributes"], prefix, self.arrays)
+        position = spec["store_position"]
+        rows = self._store_rows(position) if position is not None else None
+        if store is not None and position is not None:
+            store.wafers[position] = wafer
+
+        chip_data = spec["chip_data"]
+        if chip_data is not None and chip_data["kind"] == "store":
+            if store is not None:
+                wafer.chip_data = store.wafer_frame(position)
+            else:
+                labels = [self._store_labels[i] for i in self.meta["store"]["wafer_columns"][position]
+                          if columns is None or self._store_labels[i] in columns]
+                positions = {label: i for i, label in enumerate(self._store_labels)}
+                wafer.chip_data = pd.DataFrame(
+                    {label: self._store_column(positions[label], rows) for label in labels},
+                    index=_decode_index(self.meta["store"]["wafer_indexes"][position],
+                                        f"store.index.{position}", self.arrays),
+                    columns=labels,
+                    copy=False,
+                )
+        elif chip_data is not None:
+            wafer.chip_data = decode_frame(chip_data["spec"], f"{prefix}.chip_data", self.arrays,
+                                           copy=False, columns=columns)
+
+        for attr, array_spec in spec["arrays"].items():
+            if array_spec["kind"] == "store":
+                label = self._store_labels[array_spec["column"]]
+                if store is not None and label in store.columns:
+                    values = store.columns[label][rows]
+                else:
+                    values = self._store_column(array_spec["column"], rows)
+                setattr(wafer, attr, np.asarray(values))
+            else:
+                setattr(wafer, attr, decode_array(array_spec["spec"], f"{prefix}.{attr}", self.arrays))
+        return wafer
+
+    def lot(self, columns: Optional[Collection[Any]] = None, wafers: bool = True) -> CPLot:
+        """
+        还原整个批次。
+
+        Args:
+            columns: 芯片数据只保留的列，None 表示全部列
+            wafers: 为 False 时只还原批次属性和参数，不读取晶圆
+        """
+        lot = CPLot(params=[CPParameter(**param) for param in self.meta["params"]])
+        _decode_attributes(lot, self.meta["lot"], "lot", self.arrays)
+        if not wafers:
+            return lot
+
+        store = self.store(columns)
+        for number in range(self.wafer_count):
+            lot.wafers.append(self.wafer(number, columns, store))
+
+        combined = self.meta["combined_data"]
+        if combined is not None:
+            if combined["kind"] == "store":
+                labels = [self._store_labels[position] for position in combined["columns"]]
+                lot.combined_data = store.frame([label for label in labels if label in store.columns])
+            else:
+                lot.combined_data = decode_frame(combined["spec"], "combined", self.arrays,
+                                                 copy=False, columns=columns)
+        lot.column_store = store
+        return lot
+
+
+def load_lot(path: str, mmap: bool = True, columns: Optional[Collection[Any]] = None) -> CPLot:
+    """
+    加载 save_lot 保存的批次。
+
+    Args:
+        path: 批次目录
+        mmap: 是否以写时复制的内存映射打开数组；False 时读入内存
+        columns: 芯片数据（chip_data、combined_data）只保留的列，None 表示全部列
+    """
+    return LotReader(path, mmap=mmap).lot(columns)
@@ -0,0 +1,161 @@
+"""
+批次列式存储
+
+合并批次数据时，把所有晶圆的同名列拼接成一个连续的数组，并记录每片晶圆在
+数组中的起止行偏移。CPLot.combined_data 和各晶圆的 chip_data 都构造为这些
+数组上的零拷贝视图，整批数据在内存中只保存一份，按晶圆取数据只是一次切片。
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class LotColumnStore:
+    """
+    按列存储的批次数据。
+
+    Attributes:
+        columns: 列名 -> 覆盖全批次所有行的一维数组（紧凑模式下批次号、晶圆号列为
+            pd.Categorical），按列出现顺序排列
+        offsets: 长度为晶圆数 + 1 的行偏移，第 i 片晶圆占 offsets[i]:offsets[i+1]
+        wafer_columns: 每片晶圆 chip_data 的列顺序
+        wafer_indexes: 每片晶圆 chip_data 原来的行索引
+        wafers: 与偏移一一对应的晶圆对象，由 CPLot 在合并时登记
+    """
+
+    def __init__(self, columns: Dict[Hashable, np.ndarray], offsets: np.ndarray,
+                 wafer_columns: List[List[Hashable]], wafer_indexes: List[pd.Index]):
+        self.columns = columns
+        self.offsets = offsets
+        self.wafer_columns = wafer_columns
+        self.wafer_indexes = wafer_indexes
+        self.wafers: List[Any] = []
+
+    @classmethod
+    def from_frames(cls, frames: Sequence[pd.DataFrame],
+                    constant_columns: Optional[Dict[Hashable, Sequence[Any]]] = None
+                    ) -> Optional['LotColumnStore']:
+        """
+        由各晶圆的 DataFrame 构建列式存储。
+
+        每列的数据类型与 pd.concat(frames, ignore_index=True) 的结果一致，
+        缺少某列的晶圆在该列补 NaN。
+
+        Args:
+            frames: 各晶圆的数据
+            constant_columns: 插入在最前面的常量列，列名 -> 每片晶圆的取值
+
+        Returns:
+            LotColumnStore；列名重复或含有扩展数据类型、无法按列保存时返回 None
+        """
+        if any(not frame.columns.is_unique for frame in frames):
+            return None
+        constant_columns = constant_columns or {}
+        if any(name in frame.columns for name in constant_columns for frame in frames):
+            return None
+
+        lengths = np.array([len(frame) for frame in frames], dtype=np.int64)
+        offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        columns: Dict[Hashable, np.ndarray] = {}
+        for name, values in constant_columns.items():
+            repeated = np.repeat(np.array(list(values), dtype=object), lengths)
+            columns[name] = pd.Series(repeated, copy=False).infer_objects().to_numpy()
+
+        labels = list(dict.fromkeys(label for frame in frames for label in frame.columns))
+        for label in labels:
+            present = [frame[label] for frame in frames if label in frame.columns]
+            if len(present) == len(frames) and all(
+                    isinstance(piece.dtype, np.dtype) and piece.dtype == present[0].dtype
+                    for piece in present):
+                # 各晶圆类型一致时直接拼接数组，结果与 pd.concat 相同
+                columns[label] = np.concatenate([piece.to_numpy() for piece in present])
+                continue
+            template = present[0]
+            pieces = [
+                frame[label] if label in frame.columns
+                else template.iloc[:0].reindex(pd.RangeIndex(len(frame)))
+                for frame in frames
+            ]
+            combined = pd.concat(pieces, ignore_index=True)
+            if not isinstance(combined.dtype, np.dtype):
+                return None
+            columns[label] = combined.to_numpy()
+
+        return cls(
+            columns,
+            offsets,
+            [list(frame.columns) for frame in frames],
+            [frame.index for frame in frames],
+        )
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def wafer_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def wafer_slice(self, position: int) -> slice:
+        """第 position 片晶圆在列数组中的行范围"""
+        return slice(int(self.offsets[position]), int(self.offsets[position + 1]))
+
+    def frame(self, labels: Optional[Sequence[Hashable]] = None) -> pd.DataFrame:
+        """整批数据的零拷贝视图，行索引为 RangeIndex"""
+        labels = list(self.columns) if labels is None else labels
+        return pd.DataFrame(
+            {label: self.columns[label] for label in labels},
+            index=pd.RangeIndex(self.n_rows),
+            columns=labels,
+            copy=False,
+        )
+
+    def wafer_frame(self, position: int) -> pd.DataFrame:
+        """第 position 片晶圆的零拷贝视图，列顺序和行索引与原 chip_data 相同"""
+        rows = self.wafer_slice(position)
+        labels = self.wafer_columns[position]
+        return pd.DataFrame(
+            {label: self.columns[label][rows] for label in labels},
+            index=self.wafer_indexes[position],
+            columns=labels,
+            copy=False,
+        )
+
+    def shares_column(self, label: Hashable, values: np.ndarray) -> bool:
+        """values 是否就是存储中 label 列的数组本身（同一块内存、同样的布局）"""
+        stored = self.columns.get(label)
+        return stored is not None and same_array(values, stored)
+
+    def set_column(self, label: Hashable, values: np.ndarray) -> None:
+        """替换或新增一列，新增的列追加到每片晶圆的列末尾"""
+        if len(values) != self.n_rows:
+            raise ValueError(f"列 {label} 的长度 {len(values)} 与批次行数 {self.n_rows} 不一致")
+        self.columns[label] = values
+        for labels in self.wafer_columns:
+            if label not in labels:
+                labels.append(label)
+
+
+def column_values(series: pd.Series) -> Any:
+    """Series 底层的列数组：category 列返回 pd.Categorical，其余返回 numpy 数组"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array
+    return series.to_numpy()
+
+
+def same_array(a: Any, b: Any) -> bool:
+    """a 与 b 是否指向同一块内存且布局相同（同一数组或其等价视图）"""
+    if isinstance(a, pd.Categorical) and isinstance(b, pd.Categorical):
+        return a.dtype == b.dtype and same_array(a.codes, b.codes)
+    return (
+        isinstance(a, np.ndarray)
+        and isinstance(b, np.ndarray)
+        and a.dtype == b.dtype
+        and a.shape == b.shape
+        and a.strides == b.strides
+        and a.__array_interface__['data'][0] == b.__array_interface__['data'][0]
+    )
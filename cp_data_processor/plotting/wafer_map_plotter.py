@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from matplotlib.colors import LinearSegmentedColormap
 from .base_plotter import BasePlotter
+from ..processing.numba_accelerators import rasterize_wafer_map
 
 class WaferMapPlotter(BasePlotter):
     """CP数据晶圆图绘图器，用于绘制晶圆图"""
@@ -138,6 +139,34 @@ class WaferMapPlotter(BasePlotter):
         plt.tight_layout()
         return self
     
+    def wafer_grid(self, parameter=None, bin_column='Bin', x_column='X', y_column='Y',
+                   wafer_column='Wafer', wafer_id=None):
+        """
+        将一片晶圆的数据栅格化为二维网格，可直接交给 imshow / heatmap 绘制
+        
+        Args:
+            parameter: 参数名，如果为None则使用bin列
+            bin_column, x_column, y_column, wafer_column: 列名，含义同plot
+            wafer_id: 晶圆ID，默认为None表示第一个晶圆
+        
+        Returns:
+            DataFrame：行索引为Y坐标、列为X坐标，没有芯片的位置为NaN；
+            同一坐标多次测试时取最后一次的数值
+        """
+        self.validate_data()
+        df = self._get_dataframe()
+        if wafer_column in df.columns:
+            if wafer_id is None:
+                wafer_id = df[wafer_column].iloc[0]
+            df = df[df[wafer_column] == wafer_id]
+        
+        column = bin_column if parameter is None else parameter
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        grid, x_min, y_min = rasterize_wafer_map(
+            pd.to_numeric(df[x_column], errors='coerce'), pd.to_numeric(df[y_column], errors='coerce'), values)
+        return pd.DataFrame(grid, index=pd.RangeIndex(y_min, y_min + grid.shape[0], name=y_column),
+                            columns=pd.RangeIndex(x_min, x_min + grid.shape[1], name=x_column))
+    
     def plot_multi_wafers(self, parameter=None, wafers=None, max_wafers=9, 
                          bin_column='Bin', x_column='X', y_column='Y', 
                          wafer_column='Wafer', colormap=None, 
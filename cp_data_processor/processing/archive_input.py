@@ -11,6 +11,8 @@ from tempfile import TemporaryDirectory
 from typing import Callable, Iterator, Sequence
 from zipfile import BadZipFile, ZipFile
 
+from cp_data_processor.processing.stage_profiler import file_bytes, profiled, stage
+
 
 ProgressCallback = Callable[[str], None]
 CommonRootPredicate = Callable[[str], bool]
@@ -106,6 +108,7 @@ def normalize_suffixes(allowed_suffixes: Sequence[str]) -> frozenset[str]:
     return suffixes
 
 
+@profiled("文件发现", rows=len)
 def discover_source_files(
     directory: Path,
     allowed_suffixes: Sequence[str],
@@ -375,14 +378,16 @@ def prepare_archive_input(
         for index, archive in enumerate(archives, start=1):
             if progress:
                 progress(f"正在解压ZIP ({index}/{len(archives)}): {archive.name}")
-            archive_batches, archive_files = _extract_archive(
-                archive,
-                staging_root,
-                suffixes,
-                source_label,
-                preserve_member_paths,
-                prefer_common_root,
-            )
+            with stage("压缩包解压", bytes_in=file_bytes([archive])) as probe:
+                archive_batches, archive_files = _extract_archive(
+                    archive,
+                    staging_root,
+                    suffixes,
+                    source_label,
+                    preserve_member_paths,
+                    prefer_common_root,
+                )
+                probe.add(rows=len(archive_files), bytes_out=file_bytes(archive_files))
             batch_directories.extend(archive_batches)
             extracted_files.extend(archive_files)
 
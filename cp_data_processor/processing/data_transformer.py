@@ -4,9 +4,183 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Union, Callable
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
 
+from cp_data_processor.config.performance_config import get_performance_config
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
+from cp_data_processor.data_models.compact_dtypes import expand_series
+from cp_data_processor.data_models.lot_collection import LotCollection, RunningMoments
+from cp_data_processor.processing.numba_accelerators import fence_mask
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.processing.quantile_sketch import DEFAULT_SKETCH_SIZE, QuantileSketch
+from cp_data_processor.processing.stage_profiler import lot_rows, stage
+
+
+# 清洗异常值时参数矩阵每块的最大字节数，超出时按列分块计算
+CLEAN_BLOCK_BYTES = 256 * 1024 * 1024
+
+# 异常值处理方法 -> (上下限算法, 分组级别)；分组级别为 None 时整批次只有一组上下限，
+# 'wafer' 按晶圆、'lot' 按源批次（合并批次中 source_lot_id 不同的晶圆分开）分别计算
+OUTLIER_METHODS = {
+    'std_dev': ('std_dev', None),
+    'iqr': ('iqr', None),
+    'iqr_wafer': ('iqr', 'wafer'),
+    'iqr_lot': ('iqr', 'lot'),
+    'mad': ('mad', None),
+    'mad_wafer': ('mad', 'wafer'),
+    'mad_lot': ('mad', 'lot'),
+}
+
+# 中位数绝对偏差换算为正态分布标准差的系数 1 / Φ⁻¹(3/4)
+MAD_SCALE = 1.482602218505602
+
+
+def _column_blocks(columns: List[str], n_rows: int, row_bytes: int = 8) -> List[List[str]]:
+    """按 CLEAN_BLOCK_BYTES 将列分块，每块至少一列；row_bytes 为每个矩阵元素占用的字节数"""
+    size = max(1, CLEAN_BLOCK_BYTES // max(1, n_rows * row_bytes))
+    return [columns[start:start + size] for start in range(0, len(columns), size)]
+
+
+def _outlier_bounds(matrix: np.ndarray, method: str, std_dev_threshold: float):
+    """
+    对参数矩阵（行为芯片、列为参数，Fortran 顺序）的每一列计算异常值上下限。
+    
+    与逐列调用 pandas 的 Series.mean/std/quantile 逐位一致：均值和标准差按有效值个数
+    分组，对去除 NaN 后的连续列求和（与一维求和的成对累加顺序相同）；分位数在
+    排序后的列上按 numpy 的线性插值公式计算。没有有效值的列上下限为 NaN。
+    
+    Returns:
+        (lower, upper, counts)：上下限和各列有效值个数，形状均为 (列数,)
+    """
+    n_rows, n_cols = matrix.shape
+    lower = np.full(n_cols, np.nan)
+    upper = np.full(n_cols, np.nan)
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=0)
+    
+    if method == 'std_dev':
+        for count in np.unique(counts):
+            if count == 0:
+                continue
+            columns = np.flatnonzero(counts == count)
+            if count == n_rows:
+                values = matrix if len(columns) == n_cols else np.asfortranarray(matrix[:, columns])
+            else:
+                # 去除 NaN，各列有效值按原顺序连续存放
+                values = matrix[:, columns].T[valid[:, columns].T].reshape(len(columns), count).T
+            mean = values.sum(axis=0) / count
+            if count > 1:
+                deviations = np.subtract(mean, values, order='F')
+                np.square(deviations, out=deviations)
+                std_dev = np.sqrt(deviations.sum(axis=0) / (count - 1))
+            else:
+                std_dev = np.full(len(columns), np.nan)
+            lower[columns] = mean - std_dev_threshold * std_dev
+            upper[columns] = mean + std_dev_threshold * std_dev
+    
+    elif method == 'iqr':
+        ordered = np.sort(matrix, axis=0)  # NaN 排在末尾
+        present = np.flatnonzero(counts)
+        q1 = _sorted_quantile(ordered[:, present], counts[present], 0.25)
+        q3 = _sorted_quantile(ordered[:, present], counts[present], 0.75)
+        iqr = q3 - q1
+        lower[present] = q1 - 1.5 * iqr
+        upper[present] = q3 + 1.5 * iqr
+    
+    return lower, upper, counts
+
+
+def _grouped_outlier_bounds(matrix: np.ndarray, groups: np.ndarray, n_groups: int,
+                            method: str, threshold: float):
+    """
+    按分组计算参数矩阵每一列的异常值上下限，所有分组、所有列一次完成。
+    
+    各行按分组编号放入 (分组数, 最大组行数, 列数) 的三维数组（不足处补 NaN），
+    沿组内行方向一次排序后，分位数和中位数按下标直接取值。
+    method 为 'iqr' 时上下限为 Q1 - 1.5·IQR、Q3 + 1.5·IQR（与 _outlier_bounds 逐位一致），
+    为 'mad' 时为 中位数 ± threshold·MAD_SCALE·MAD。没有有效值的分组上下限为 NaN。
+    
+    Args:
+        matrix: 行为芯片、列为参数的矩阵
+        groups: 每行的分组编号，取值 0..n_groups-1
+        n_groups: 分组数
+    
+    Returns:
+        (lower, upper, counts)：各组各列的上下限和有效值个数，形状均为 (分组数, 列数)
+    """
+    ordered = _group_layout(matrix, groups, n_groups)
+    ordered.sort(axis=1)  # NaN 排在组内末尾
+    counts = np.count_nonzero(~np.isnan(ordered), axis=1)
+    
+    if method == 'iqr':
+        q1 = _sorted_quantile(ordered, counts, 0.25)
+        q3 = _sorted_quantile(ordered, counts, 0.75)
+        iqr = q3 - q1
+        lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    elif method == 'mad':
+        median = _sorted_median(ordered, counts)
+        deviations = np.abs(ordered - median[:, np.newaxis, :], out=ordered)
+        deviations.sort(axis=1)
+        mad = MAD_SCALE * _sorted_median(deviations, counts)
+        lower, upper = median - threshold * mad, median + threshold * mad
+    else:
+        raise ValueError(f"不支持分组计算的方法: {method}")
+    
+    empty = counts == 0
+    lower[empty] = np.nan
+    upper[empty] = np.nan
+    return lower, upper, counts
+
+
+def _group_rows(groups: np.ndarray, n_groups: int) -> int:
+    """按分组补齐后每组的行数（最大组的行数）"""
+    return int(np.bincount(groups, minlength=n_groups).max()) if len(groups) else 0
+
+
+def _group_layout(matrix: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """将矩阵的行按分组编号放入 (分组数, 最大组行数, 列数) 的三维数组，组内保持原顺序，其余位置为 NaN"""
+    sizes = np.bincount(groups, minlength=n_groups)
+    # 分组编号用最小的无符号整数类型，稳定排序走基数排序
+    order = np.argsort(groups.astype(np.min_scalar_type(max(n_groups - 1, 0))), kind='stable')
+    positions = np.arange(len(groups)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    layout = np.full((n_groups, sizes.max(initial=0), matrix.shape[1]), np.nan)
+    layout[groups[order], positions] = matrix[order]
+    return layout
+
+
+def _sorted_median(ordered: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    已排序数组的中位数，偶数个有效值时取中间两值的平均（与 np.median 一致）。
+    
+    ordered 为 (..., 行数, 列数)，各列前 counts[..., j] 行为有效值。
+    """
+    a = _take_rows(ordered, np.maximum(counts - 1, 0) // 2)
+    b = _take_rows(ordered, np.minimum(counts // 2, max(ordered.shape[-2] - 1, 0)))
+    return (a + b) / 2
+
+
+def _take_rows(ordered: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """取 ordered[..., rows[..., j], j]"""
+    return np.take_along_axis(ordered, rows[..., np.newaxis, :], axis=-2)[..., 0, :]
+
+
+def _sorted_quantile(ordered: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """
+    已排序数组的线性插值分位数（与 np.percentile 的 linear 方法一致）。
+    
+    ordered 为 (..., 行数, 列数)，各列前 counts[..., j] 行为有效值。
+    """
+    virtual = (counts - 1) * q
+    previous = np.floor(virtual).astype(np.int64)
+    following = np.minimum(previous + 1, counts - 1)
+    gamma = virtual - previous
+    a = _take_rows(ordered, previous)
+    b = _take_rows(ordered, following)
+    diff = b - a
+    result = a + diff * gamma
+    upper_half = gamma >= 0.5
+    result[upper_half] = (b - diff * (1 - gamma))[upper_half]
+    return result
 
 
 class DataTransformer:
@@ -118,7 +292,31 @@ class DataTransformer:
         Args:
             param_id: 参数 ID
         """
-        if self.cp_lot.combined_data is None or param_id not in self.cp_lot.combined_data.columns:
+        self._update_wafer_columns([param_id])
+    
+    def _update_wafer_columns(self, param_ids: List[str]) -> None:
+        """
+        将 combined_data 中的若干参数列一次写回每个晶圆的 chip_data
+        
+        Args:
+            param_ids: 参数 ID 列表
+        """
+        combined_data = self.cp_lot.combined_data
+        if combined_data is None:
+            return
+        param_ids = [param_id for param_id in param_ids if param_id in combined_data.columns]
+        
+        # 按列合并的批次：晶圆 chip_data 是 combined_data 的视图，按行偏移同步即可
+        param_ids = [param_id for param_id in param_ids if not self.cp_lot.sync_wafer_column(param_id)]
+        if not param_ids:
+            return
+        
+        try:
+            # 每片晶圆在 combined_data 中的行位置，只分组一次
+            wafer_rows = combined_data.groupby('Wafer_ID', sort=False, observed=True).indices
+            columns = {param_id: combined_data[param_id].values for param_id in param_ids}
+        except Exception as e:
+            print(f"更新晶圆数据 {', '.join(map(str, param_ids))} 时出错: {e}")
             return
         
         for wafer in self.cp_lot.wafers:
@@ -127,13 +325,74 @@ class DataTransformer:
                 continue
             
             # 从 combined_data 中提取对应晶圆的参数值
-            wafer_data = self.cp_lot.combined_data[
-                self.cp_lot.combined_data['Wafer_ID'] == wafer.wafer_id
-            ]
+            rows = wafer_rows.get(wafer.wafer_id)
+            if rows is None or len(rows) == 0:
+                continue
             
-            if not wafer_data.empty:
+            try:
                 # 将参数值添加到晶圆的 chip_data 中
-                wafer.chip_data[param_id] = wafer_data[param_id].values
+                for param_id in param_ids:
+                    wafer.chip_data[param_id] = columns[param_id][rows]
+            except Exception as e:
+                print(f"更新晶圆 {wafer.wafer_id} 的数据时出错: {e}")
+    
+    def _mask_values(self, param_id: str, mask: np.ndarray, write_back: bool) -> None:
+        """
+        将 combined_data 中 param_id 列 mask 为 True 的值置为 NaN。
+        
+        非浮点列即使没有异常值也经 .loc 赋值，与逐列清洗时一样转为浮点列。
+        write_back 为 False 时不修改与晶圆 chip_data 共用的列数组，晶圆保留原始数据。
+        """
+        combined_data = self.cp_lot.combined_data
+        column = combined_data[param_id]
+        values = column.to_numpy()
+        store = self.cp_lot.column_store
+        shared = store is not None and store.shares_column(param_id, values)
+        if isinstance(column.dtype, np.dtype) and values.dtype.kind == 'f' and values.flags.writeable:
+            if shared and not write_back:
+                # 按列合并的批次：只替换 combined_data 中的列，晶圆视图不受影响
+                combined_data[param_id] = np.where(mask, np.nan, values)
+            elif mask.any():
+                # 浮点列直接写入底层数组；需要写回时晶圆视图同时得到更新
+                values[mask] = np.nan
+        else:
+            combined_data.loc[mask, param_id] = np.nan
+    
+    def _row_groups(self, level: str):
+        """
+        combined_data 每行所属分组的编号
+        
+        Args:
+            level: 'wafer' 按晶圆分组，'lot' 按源批次分组
+        
+        Returns:
+            (groups, n_groups)：每行的分组编号（0 起连续）和分组数；
+            按晶圆分组但没有晶圆标识时返回 None
+        """
+        lot = self.cp_lot
+        combined_data = lot.combined_data
+        store = lot.column_store
+        if store is not None and store.wafers and store.n_rows == len(combined_data):
+            # 按列合并的批次：各晶圆的行段由偏移给出
+            if level == 'wafer':
+                keys = np.arange(store.wafer_count)
+            else:
+                keys = pd.factorize(pd.Index([
+                    wafer.source_lot_id if wafer.source_lot_id is not None else lot.lot_id
+                    for wafer in store.wafers]))[0]
+            return np.repeat(keys, np.diff(store.offsets)), int(keys.max()) + 1
+        
+        columns = combined_data.columns
+        lot_column = next((column for column in ('LotID', 'Lot_ID') if column in columns), None)
+        wafer_column = next((column for column in ('WaferID', 'Wafer_ID') if column in columns), None)
+        if level == 'wafer' and wafer_column is None:
+            return None
+        keys = [column for column in (lot_column, wafer_column if level == 'wafer' else None) if column]
+        if not keys:
+            # 没有批次标识列：整批次属于同一批次
+            return np.zeros(len(combined_data), dtype=np.int64), 1
+        groups = combined_data.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+        return groups, int(groups.max()) + 1
     
     def add_standard_calculated_parameters(self) -> None:
         """
@@ -174,11 +433,24 @@ class DataTransformer:
         清理数据中的异常值
         
         Args:
-            outlier_method: 检测异常值的方法，可选 'std_dev'（标准差法）、'iqr'（四分位法）
-            std_dev_threshold: 使用标准差法时，超过均值多少个标准差视为异常值
+            outlier_method: 检测异常值的方法（OUTLIER_METHODS 中的键）：'std_dev'（标准差法）、
+                'iqr'（四分位法）、'mad'（中位数绝对偏差法），'iqr'、'mad' 加后缀 '_wafer'
+                或 '_lot' 时按晶圆或按源批次分别计算上下限
+            std_dev_threshold: 使用标准差法时，超过均值多少个标准差视为异常值；
+                使用 MAD 法时，超过中位数多少倍（换算为标准差的）MAD 视为异常值
         """
+        with stage("清洗", rows=lot_rows(self.cp_lot)):
+            self._clean_outliers(outlier_method, std_dev_threshold)
+    
+    def _clean_outliers(self, outlier_method: str, std_dev_threshold: float) -> None:
+        """clean_data 的实现"""
         print(f"开始数据清洗（{outlier_method}方法处理异常值）...")
         
+        if outlier_method not in OUTLIER_METHODS:
+            print(f"不支持的异常值处理方法: {outlier_method}，可选: {', '.join(OUTLIER_METHODS)}")
+            return
+        bounds_method, level = OUTLIER_METHODS[outlier_method]
+        
         # 确保combined_data存在并有数据
         if self.cp_lot.combined_data is None or self.cp_lot.combined_data.empty:
             # 如果没有，尝试合并数据
@@ -205,61 +477,67 @@ class DataTransformer:
         
         print(f"找到 {len(numeric_params)} 个数值参数进行清洗")
         
-        # 对每个参数处理异常值
+        numeric_params = list(dict.fromkeys(numeric_params))
+        combined_data = self.cp_lot.combined_data
+        # 与原实现一致：只有 combined_data 带 Wafer_ID 列时才把清洗结果写回晶圆 chip_data，
+        # combine_data_from_wafers 的结果（WaferID 列）清洗后晶圆保留读入的原始数据
+        write_back = 'Wafer_ID' in combined_data.columns
+        
+        # 分组方法（以及整批次的 MAD）经一次组内排序得到所有分组的上下限
+        groups = None
+        if bounds_method == 'mad' or level is not None:
+            grouping = self._row_groups(level) if level is not None else None
+            if grouping is None:
+                if level is not None:
+                    print("缺少晶圆标识列，按整批次计算异常值上下限")
+                grouping = np.zeros(len(combined_data), dtype=np.int64), 1
+            groups, n_groups = grouping
+        
+        # 按列块组成参数矩阵，一次计算所有参数的上下限并标记异常值
+        outlier_counts = {}
+        # 没有有效值（全部缺失）的参数不输出异常值统计，与逐列实现一致
+        empty_params = set()
+        if groups is None:
+            blocks = _column_blocks(numeric_params, len(combined_data))
+        else:
+            # 分组时另有补齐后的三维数组和逐行展开的上下限
+            padded_rows = n_groups * _group_rows(groups, n_groups)
+            blocks = _column_blocks(numeric_params, max(len(combined_data), padded_rows), 32)
+        for block in blocks:
+            matrix = np.empty((len(combined_data), len(block)), dtype=np.float64, order='F')
+            for position, param_id in enumerate(block):
+                matrix[:, position] = expand_series(combined_data[param_id]).to_numpy(
+                    dtype=np.float64, na_value=np.nan)
+            if groups is None:
+                lower, upper, counts = _outlier_bounds(matrix, bounds_method, std_dev_threshold)
+            else:
+                lower, upper, counts = _grouped_outlier_bounds(
+                    matrix, groups, n_groups, bounds_method, std_dev_threshold)
+                counts = counts.sum(axis=0)
+            outliers, found = fence_mask(matrix, lower, upper, groups)
+            has_values = ~np.isnan(matrix).all(axis=0)
+            for position, param_id in enumerate(block):
+                if not has_values[position]:
+                    empty_params.add(param_id)
+                mask = outliers[:, position]
+                outlier_counts[param_id] = int(found[position])
+                if counts[position]:
+                    self._mask_values(param_id, mask, write_back)
+        
+        scope = {None: '', 'wafer': '按晶圆', 'lot': '按批次'}[level]
         for param_id in numeric_params:
-            try:
-                if outlier_method == 'std_dev':
-                    # 标准差法
-                    param_values = self.cp_lot.combined_data[param_id]
-                    valid_values = param_values.dropna()
-                    
-                    if not valid_values.empty:
-                        mean = valid_values.mean()
-                        std_dev = valid_values.std()
-                        
-                        # 将异常值替换为 NaN
-                        lower_bound = mean - std_dev_threshold * std_dev
-                        upper_bound = mean + std_dev_threshold * std_dev
-                        
-                        # 标记异常值
-                        outliers = (param_values < lower_bound) | (param_values > upper_bound)
-                        outlier_count = outliers.sum()
-                        
-                        # 替换异常值
-                        self.cp_lot.combined_data.loc[outliers, param_id] = np.nan
-                        print(f"参数 {param_id}: 检测到 {outlier_count} 个异常值 (超出均值±{std_dev_threshold}倍标准差)")
-                
-                elif outlier_method == 'iqr':
-                    # 四分位法
-                    param_values = self.cp_lot.combined_data[param_id]
-                    valid_values = param_values.dropna()
-                    
-                    if not valid_values.empty:
-                        q1 = valid_values.quantile(0.25)
-                        q3 = valid_values.quantile(0.75)
-                        iqr = q3 - q1
-                        
-                        # 将异常值替换为 NaN
-                        lower_bound = q1 - 1.5 * iqr
-                        upper_bound = q3 + 1.5 * iqr
-                        
-                        # 标记异常值
-                        outliers = (param_values < lower_bound) | (param_values > upper_bound)
-                        outlier_count = outliers.sum()
-                        
-                        # 替换异常值
-                        self.cp_lot.combined_data.loc[outliers, param_id] = np.nan
-                        print(f"参数 {param_id}: 检测到 {outlier_count} 个异常值 (IQR方法)")
-            except Exception as e:
-                print(f"处理参数 {param_id} 时出错: {e}")
+            if param_id in empty_params:
                 continue
+            if bounds_method == 'std_dev':
+                print(f"参数 {param_id}: 检测到 {outlier_counts[param_id]} 个异常值 (超出均值±{std_dev_threshold}倍标准差)")
+            elif bounds_method == 'iqr':
+                print(f"参数 {param_id}: 检测到 {outlier_counts[param_id]} 个异常值 ({scope}IQR方法)")
+            else:
+                print(f"参数 {param_id}: 检测到 {outlier_counts[param_id]} 个异常值 ({scope}超出中位数±{std_dev_threshold}倍MAD)")
         
         # 更新晶圆的 chip_data
-        for param_id in numeric_params:
-            try:
-                self._update_wafer_chip_data(param_id)
-            except Exception as e:
-                print(f"更新晶圆数据 {param_id} 时出错: {e}")
+        if write_back:
+            self._update_wafer_columns(numeric_params)
         
         print("数据清洗完成")
     
@@ -320,4 +598,177 @@ class DataTransformer:
                             param_id=norm_id,
                             formula=normalize_z_score,
                             unit='标准差'
-                        ) 
\ No newline at end of file
+                        ) 
+
+
+# 流式拟合时交给 StreamingOutlierFences.fit 的数据来源：(批次号, 晶圆号, 芯片数据)
+WaferChunk = Tuple[Hashable, Hashable, pd.DataFrame]
+
+
+class StreamingOutlierFences:
+    """
+    流式计算的异常值上下限，用于无法合并到内存中的多批次数据。
+    
+    逐片晶圆累积统计量得到与 DataTransformer.clean_data 相同方法的上下限，不生成
+    combined_data：std_dev 用可合并的矩（精确），iqr 和 mad 用 QuantileSketch
+    （秩误差有界，数据量不超过草图容量时与内存中计算一致）。分组方法按晶圆或批次
+    分别累积；mad 需要读两遍数据（先求中位数，再求偏差的中位数）。
+    
+    各片晶圆的统计量在线程池中建立，按晶圆顺序合并，结果与串行计算相同。
+    
+    用法:
+        fences = StreamingOutlierFences('iqr').fit(collection)
+        for wafer, chip_data in collection.iter_chip_data():
+            chip_data = chip_data.copy()
+            fences.apply(chip_data, wafer.lot_id, wafer.wafer_id)
+    """
+    
+    def __init__(self, outlier_method: str = 'iqr', std_dev_threshold: float = 3.0,
+                 sketch_size: int = DEFAULT_SKETCH_SIZE):
+        """
+        Args:
+            outlier_method: OUTLIER_METHODS 中的方法
+            std_dev_threshold: 标准差法、MAD 法的倍数
+            sketch_size: 分位数草图每层保留的样本数
+        """
+        if outlier_method not in OUTLIER_METHODS:
+            raise ValueError(f"不支持的异常值处理方法: {outlier_method}，可选: {', '.join(OUTLIER_METHODS)}")
+        self.outlier_method = outlier_method
+        self.method, self.level = OUTLIER_METHODS[outlier_method]
+        self.std_dev_threshold = std_dev_threshold
+        self.sketch_size = sketch_size
+        self.parameters: List[Hashable] = []
+        self.fences: Dict[Hashable, Dict[Hashable, Tuple[float, float]]] = {}
+        self.rank_error = 0.0  # 所有分位数草图秩误差上界的最大值
+    
+    def fit(self, source: Union[LotCollection, Callable[[], Iterable[WaferChunk]]],
+            parameters: Optional[List[Hashable]] = None,
+            parallel: Optional[bool] = None, max_workers: Optional[int] = None) -> 'StreamingOutlierFences':
+        """
+        逐片晶圆计算上下限
+        
+        Args:
+            source: LotCollection，或每次调用都返回 (批次号, 晶圆号, 芯片数据) 可迭代对象的函数
+            parameters: 计算上下限的参数；source 为 LotCollection 时默认取各批次的参数
+            parallel: 是否在线程池中建立各片晶圆的统计量，None 表示跟随 PerformanceConfig.ENABLE_PARALLEL
+            max_workers: 线程数上限，默认取 PerformanceConfig.MAX_WORKERS
+        """
+        if isinstance(source, LotCollection):
+            collection = source
+            if parameters is None:
+                parameters = list(dict.fromkeys(
+                    param.id for lot_id in collection for param in collection.lot_info(lot_id).params))
+            columns = list(parameters)
+            source = lambda: ((wafer.lot_id, wafer.wafer_id, chip_data)
+                              for wafer, chip_data in collection.iter_chip_data(columns))
+        elif parameters is None:
+            raise ValueError("数据来源不是 LotCollection 时需要指定参数")
+        self.parameters = list(dict.fromkeys(parameters))
+        workers = self._resolve_workers(parallel, max_workers)
+        
+        stats = self._accumulate(source(), workers)
+        if self.method == 'std_dev':
+            self.fences = {key: {param: self._std_dev_fences(moments) for param, moments in params.items()}
+                           for key, params in stats.items()}
+            return self
+        
+        sketches = list(stats.values())
+        if self.method == 'iqr':
+            self.fences = {key: {param: self._iqr_fences(sketch) for param, sketch in params.items()}
+                           for key, params in stats.items()}
+        else:
+            medians = {key: {param: sketch.quantile(0.5) for param, sketch in params.items()}
+                       for key, params in stats.items()}
+            deviations = self._accumulate(source(), workers, medians)
+            self.fences = {
+                key: {param: self._mad_fences(medians[key][param], sketch) for param, sketch in params.items()}
+                for key, params in deviations.items()
+            }
+            sketches += list(deviations.values())
+        self.rank_error = max((sketch.rank_error for params in sketches for sketch in params.values()),
+                              default=0.0)
+        return self
+    
+    def bounds(self, parameter: Hashable, lot_id: Hashable = None,
+               wafer_id: Hashable = None) -> Tuple[float, float]:
+        """参数在指定批次、晶圆上的 (下限, 上限)，没有数据时为 NaN"""
+        return self.fences.get(self._group_key(lot_id, wafer_id), {}).get(parameter, (np.nan, np.nan))
+    
+    def apply(self, chip_data: pd.DataFrame, lot_id: Hashable = None,
+              wafer_id: Hashable = None) -> Dict[Hashable, int]:
+        """
+        将一片晶圆芯片数据中的异常值置为 NaN（就地修改，与 clean_data 一样参数列都转为浮点列）
+        
+        Returns:
+            Dict: 参数 -> 本片晶圆的异常值个数
+        """
+        fences = self.fences.get(self._group_key(lot_id, wafer_id), {})
+        counts = {}
+        for param in self.parameters:
+            if param not in chip_data.columns or not pd.api.types.is_numeric_dtype(chip_data[param]):
+                continue
+            values = expand_series(chip_data[param]).to_numpy(dtype=np.float64, na_value=np.nan)
+            lower, upper = fences.get(param, (np.nan, np.nan))
+            with np.errstate(invalid='ignore'):
+                mask = (values < lower) | (values > upper)
+            counts[param] = int(np.count_nonzero(mask))
+            if counts[param] or chip_data[param].dtype != np.float64:
+                chip_data[param] = np.where(mask, np.nan, values)
+        return counts
+    
+    def _group_key(self, lot_id: Hashable, wafer_id: Hashable) -> Hashable:
+        return {None: None, 'lot': lot_id, 'wafer': (lot_id, wafer_id)}[self.level]
+    
+    def _resolve_workers(self, parallel: Optional[bool], max_workers: Optional[int]) -> int:
+        """确定建立统计量的线程数，返回 1 表示串行"""
+        config = get_performance_config()
+        if parallel is False or (parallel is None and not config.ENABLE_PARALLEL):
+            return 1
+        return max(1, max_workers or config.MAX_WORKERS)
+    
+    def _accumulate(self, chunks: Iterable[WaferChunk], workers: int,
+                    centers: Optional[Dict[Hashable, Dict[Hashable, float]]] = None) -> Dict[Hashable, Dict]:
+        """逐片晶圆建立统计量并按分组合并；centers 不为 None 时统计与中心值的绝对偏差"""
+        def wafer_stats(lot_id, wafer_id, chip_data):
+            key = self._group_key(lot_id, wafer_id)
+            center = None if centers is None else centers.get(key, {})
+            stats = {}
+            for param in self.parameters:
+                if param not in chip_data.columns or not pd.api.types.is_numeric_dtype(chip_data[param]):
+                    continue
+                values = expand_series(chip_data[param]).to_numpy(dtype=np.float64, na_value=np.nan)
+                if self.method == 'std_dev':
+                    stats[param] = RunningMoments()
+                    stats[param].update(values[np.isfinite(values)])
+                else:
+                    if center is not None:
+                        values = np.abs(values - center.get(param, np.nan))
+                    stats[param] = QuantileSketch(self.sketch_size).update(values)
+            return key, stats
+        
+        groups: Dict[Hashable, Dict] = {}
+        # 线程池中逐片统计、按晶圆顺序合并，同时最多读取 2×workers 片晶圆
+        with ParallelProcessor('thread', parallel=workers > 1, max_workers=workers) as processor:
+            for result in processor.map(lambda chunk: wafer_stats(*chunk), chunks):
+                key, stats = result.result()
+                merged = groups.setdefault(key, {})
+                for param, value in stats.items():
+                    if param in merged:
+                        merged[param].merge(value)
+                    else:
+                        merged[param] = value
+        return groups
+    
+    def _std_dev_fences(self, moments: RunningMoments) -> Tuple[float, float]:
+        result = moments.result()
+        return (result['Mean'] - self.std_dev_threshold * result['Std'],
+                result['Mean'] + self.std_dev_threshold * result['Std'])
+    
+    @staticmethod
+    def _iqr_fences(sketch: QuantileSketch) -> Tuple[float, float]:
+        q1, q3 = sketch.quantile([0.25, 0.75])
+        return q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    
+    def _mad_fences(self, median: float, deviations: QuantileSketch) -> Tuple[float, float]:
+        mad = MAD_SCALE * deviations.quantile(0.5)
+        return median - self.std_dev_threshold * mad, median + self.std_dev_threshold * mad
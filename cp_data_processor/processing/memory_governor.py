@@ -0,0 +1,171 @@
+"""
+内存调控器
+
+按 PerformanceConfig 的内存配置在处理过程中调控内存：
+
+- MEMORY_LIMIT_MB：进程常驻内存（RSS）的上限；
+- GC_THRESHOLD：RSS 达到上限的这一比例时执行垃圾回收，之后仍高于该水位即视为内存紧张；
+- CHUNK_SIZE：流式写出时每次交给 to_csv 的行数；
+- ENABLE_MEMORY_MONITOR：为 False 时不采样、不降级。
+
+各处理阶段在开始耗内存的操作前询问调控器：内存紧张（或预计的额外占用会越过水位）时，
+CSV 生成由在内存中合并所有晶圆改为逐片晶圆写出，多批次读取把已读入的批次转存到磁盘，
+并行任务减少工作进程数。每个降级决定都记入日志和 decisions。
+"""
+
+import gc
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import psutil
+
+from cp_data_processor.config.performance_config import get_performance_config
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# 连续两次垃圾回收的最短间隔（秒），避免 RSS 持续高于水位时每次采样都回收
+GC_MIN_INTERVAL = 1.0
+
+
+@dataclass
+class MemoryDecision:
+    """一次降级决定"""
+    stage: str
+    action: str
+    rss_mb: float
+    limit_mb: float
+
+
+def process_rss_mb() -> float:
+    """当前进程的常驻内存（MB）"""
+    return psutil.Process().memory_info().rss / MB
+
+
+class MemoryGovernor:
+    """
+    按内存上限调控各处理阶段。
+
+    用法:
+        governor = get_memory_governor()
+        if governor.degrade("合并清洗数据CSV", "改为逐片晶圆写出", extra_bytes=estimated):
+            ...  # 流式处理
+        workers = governor.limit_workers("批次读取", workers)
+
+    构造参数为 None 时每次使用时读取全局性能配置，配置修改后立即生效。
+    """
+
+    def __init__(self, limit_mb: Optional[float] = None, gc_threshold: Optional[float] = None,
+                 chunk_size: Optional[int] = None, enabled: Optional[bool] = None,
+                 rss_sampler: Optional[Callable[[], float]] = None):
+        """
+        Args:
+            limit_mb: 内存上限（MB），默认 MEMORY_LIMIT_MB
+            gc_threshold: 触发垃圾回收和降级的水位（上限的比例），默认 GC_THRESHOLD
+            chunk_size: 流式写出的分块行数，默认 CHUNK_SIZE
+            enabled: 是否调控，默认 ENABLE_MEMORY_MONITOR
+            rss_sampler: 返回当前 RSS（MB）的函数，默认读取本进程
+        """
+        self._limit_mb = limit_mb
+        self._gc_threshold = gc_threshold
+        self._chunk_size = chunk_size
+        self._enabled = enabled
+        self._rss_sampler = rss_sampler or process_rss_mb
+        self._last_gc = float('-inf')
+        self.peak_rss_mb = 0.0
+        self.gc_count = 0
+        self.decisions: List[MemoryDecision] = []
+
+    @property
+    def limit_mb(self) -> float:
+        return self._limit_mb if self._limit_mb is not None else get_performance_config().MEMORY_LIMIT_MB
+
+    @property
+    def gc_threshold(self) -> float:
+        return self._gc_threshold if self._gc_threshold is not None else get_performance_config().GC_THRESHOLD
+
+    @property
+    def chunk_size(self) -> int:
+        return max(1, self._chunk_size if self._chunk_size is not None else get_performance_config().CHUNK_SIZE)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled if self._enabled is not None else get_performance_config().ENABLE_MEMORY_MONITOR
+
+    @property
+    def watermark_mb(self) -> float:
+        """触发垃圾回收和降级的 RSS 水位（MB）"""
+        return self.limit_mb * self.gc_threshold
+
+    def sample(self, stage: str = "") -> float:
+        """
+        采样当前 RSS（MB）并更新峰值；达到水位时执行一次垃圾回收，返回回收后的 RSS。
+
+        未启用调控时返回 0，不采样。
+        """
+        if not self.enabled:
+            return 0.0
+        rss = self._rss_sampler()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        now = time.monotonic()
+        if rss >= self.watermark_mb and now - self._last_gc >= GC_MIN_INTERVAL:
+            self._last_gc = now
+            self.gc_count += 1
+            gc.collect()
+            collected = self._rss_sampler()
+            logger.info(f"内存达到水位，执行垃圾回收 [{stage}]: {rss:.0f}MB -> {collected:.0f}MB "
+                        f"(上限 {self.limit_mb:.0f}MB)")
+            rss = collected
+        return rss
+
+    def under_pressure(self, stage: str = "", extra_bytes: float = 0) -> bool:
+        """当前 RSS 加上预计的额外占用是否达到水位"""
+        if not self.enabled:
+            return False
+        return self.sample(stage) + extra_bytes / MB >= self.watermark_mb
+
+    def record(self, stage: str, action: str, rss_mb: Optional[float] = None) -> MemoryDecision:
+        """记录一个降级决定并写入日志"""
+        rss_mb = self._rss_sampler() if rss_mb is None else rss_mb
+        decision = MemoryDecision(stage, action, rss_mb, self.limit_mb)
+        self.decisions.append(decision)
+        logger.warning(f"内存降级 [{stage}]: {action} (RSS {rss_mb:.0f}MB, 上限 {self.limit_mb:.0f}MB)")
+        return decision
+
+    def degrade(self, stage: str, action: str, extra_bytes: float = 0) -> bool:
+        """内存紧张时记录降级决定 action 并返回 True，调用方随后改用省内存的处理方式"""
+        if not self.under_pressure(stage, extra_bytes):
+            return False
+        self.record(stage, action + (f"，预计额外占用 {extra_bytes / MB:.0f}MB" if extra_bytes else ""))
+        return True
+
+    def limit_workers(self, stage: str, workers: int) -> int:
+        """
+        按内存情况限制并行工作数：超过上限时只用 1 个，达到水位时减半。
+
+        每个工作进程都持有自己的一份数据，减少工作数可以直接降低峰值内存。
+        """
+        if workers <= 1 or not self.enabled:
+            return workers
+        rss = self.sample(stage)
+        if rss >= self.limit_mb:
+            limited = 1
+        elif rss >= self.watermark_mb:
+            limited = max(1, workers // 2)
+        else:
+            return workers
+        self.record(stage, f"并行工作数 {workers} -> {limited}", rss)
+        return limited
+
+
+_default_governor: Optional[MemoryGovernor] = None
+
+
+def get_memory_governor() -> MemoryGovernor:
+    """获取全局内存调控器实例（按 PerformanceConfig 调控）"""
+    global _default_governor
+    if _default_governor is None:
+        _default_governor = MemoryGovernor()
+    return _default_governor
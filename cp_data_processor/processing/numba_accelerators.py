@@ -1 +1,401 @@
- 
\ No newline at end of file
+"""
+数值计算内核库
+
+清洗、良率、工艺能力和晶圆图中的逐行循环集中在这里实现。每个内核都有两个版本：
+
+- 循环版本（_xxx_loop）：按列 / 按行的显式循环，安装了 numba 且 PerformanceConfig.ENABLE_NUMBA
+  为 True 时在导入时以 numba.njit 编译（NUMBA_PARALLEL 控制 prange 并行，NUMBA_CACHE 控制
+  磁盘缓存），否则不会被调用；
+- NumPy 版本（_xxx_numpy）：没有 numba 或禁用时使用的向量化实现。
+
+两个版本的结果一致（计数、掩码完全相同，浮点统计量只有求和顺序带来的舍入差异），
+公开函数负责整理输入的 dtype 和形状，再调用导入时选定的版本。
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cp_data_processor.config.performance_config import get_performance_config
+from cp_data_processor.data_models.compact_dtypes import expand_series
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# 循环版本在编译时使用 numba.prange，以纯 Python 运行时等同于 range
+prange = numba.prange if NUMBA_AVAILABLE else range
+
+_config = get_performance_config()
+USE_NUMBA = NUMBA_AVAILABLE and _config.ENABLE_NUMBA
+
+
+def _jit(function, parallel: bool = False):
+    """按性能配置编译循环版本；error_model='numpy' 使除零得到 inf/NaN 而不是抛出异常"""
+    return numba.njit(parallel=parallel and _config.NUMBA_PARALLEL, cache=_config.NUMBA_CACHE,
+                      error_model='numpy')(function)
+
+
+# ----------------------------------------------------------------------
+# 异常值上下限掩码
+# ----------------------------------------------------------------------
+
+def _fence_mask_loop(matrix, lower, upper, groups):
+    n_rows, n_cols = matrix.shape
+    mask = np.zeros((n_cols, n_rows), dtype=np.bool_)
+    counts = np.zeros(n_cols, dtype=np.int64)
+    for col in prange(n_cols):
+        found = 0
+        for row in range(n_rows):
+            value = matrix[row, col]
+            group = groups[row]
+            if value < lower[group, col] or value > upper[group, col]:
+                mask[col, row] = True
+                found += 1
+        counts[col] = found
+    return mask.T, counts
+
+
+def _fence_mask_numpy(matrix, lower, upper, groups):
+    if len(lower) == 1:
+        lower, upper = lower[0], upper[0]
+    else:
+        lower, upper = lower[groups], upper[groups]
+    with np.errstate(invalid='ignore'):
+        mask = (matrix < lower) | (matrix > upper)
+    return mask, np.count_nonzero(mask, axis=0).astype(np.int64)
+
+
+# ----------------------------------------------------------------------
+# 每片晶圆的 Bin 直方图
+# ----------------------------------------------------------------------
+
+def _bin_histograms_loop(bins, wafers, n_wafers, n_bins):
+    counts = np.zeros((n_wafers, n_bins), dtype=np.int64)
+    for row in range(len(bins)):
+        code = bins[row]
+        wafer = wafers[row]
+        if 0 <= code < n_bins and 0 <= wafer < n_wafers:
+            counts[wafer, code] += 1
+    return counts
+
+
+def _bin_histograms_numpy(bins, wafers, n_wafers, n_bins):
+    valid = (bins >= 0) & (bins < n_bins) & (wafers >= 0) & (wafers < n_wafers)
+    flat = np.bincount(wafers[valid] * n_bins + bins[valid], minlength=n_wafers * n_bins)
+    return flat.reshape(n_wafers, n_bins).astype(np.int64)
+
+
+# ----------------------------------------------------------------------
+# 每个参数的规格内外计数
+# ----------------------------------------------------------------------
+
+def _spec_fail_counts_loop(matrix, lsl, usl):
+    n_rows, n_cols = matrix.shape
+    below = np.zeros(n_cols, dtype=np.int64)
+    above = np.zeros(n_cols, dtype=np.int64)
+    valid = np.zeros(n_cols, dtype=np.int64)
+    for col in prange(n_cols):
+        n_below = 0
+        n_above = 0
+        n_valid = 0
+        for row in range(n_rows):
+            value = matrix[row, col]
+            if value == value:
+                n_valid += 1
+                if value < lsl[col]:
+                    n_below += 1
+                elif value > usl[col]:
+                    n_above += 1
+        below[col] = n_below
+        above[col] = n_above
+        valid[col] = n_valid
+    return below, above, valid
+
+
+def _spec_fail_counts_numpy(matrix, lsl, usl):
+    with np.errstate(invalid='ignore'):
+        is_below = matrix < lsl
+        is_above = (matrix > usl) & ~is_below
+    return (np.count_nonzero(is_below, axis=0).astype(np.int64),
+            np.count_nonzero(is_above, axis=0).astype(np.int64),
+            np.count_nonzero(~np.isnan(matrix), axis=0).astype(np.int64))
+
+
+# ----------------------------------------------------------------------
+# Cp / Cpk
+# ----------------------------------------------------------------------
+
+def _cp_cpk_loop(matrix, lsl, usl):
+    n_rows, n_cols = matrix.shape
+    result = np.full((7, n_cols), np.nan)
+    for col in prange(n_cols):
+        count = 0
+        total = 0.0
+        for row in range(n_rows):
+            value = matrix[row, col]
+            if value == value:
+                count += 1
+                total += value
+        result[0, col] = count
+        if count == 0:
+            continue
+        mean = total / count
+        result[1, col] = mean
+        if count < 2:
+            continue
+        squares = 0.0
+        for row in range(n_rows):
+            value = matrix[row, col]
+            if value == value:
+                squares += (value - mean) * (value - mean)
+        std = np.sqrt(squares / (count - 1))
+        result[2, col] = std
+        if std > 0:
+            result[3, col] = (usl[col] - lsl[col]) / (6 * std)
+            cpl = (mean - lsl[col]) / (3 * std)
+            cpu = (usl[col] - mean) / (3 * std)
+            result[5, col] = cpl
+            result[6, col] = cpu
+            if cpl != cpl:
+                result[4, col] = cpu
+            elif cpu != cpu:
+                result[4, col] = cpl
+            else:
+                result[4, col] = min(cpl, cpu)
+    return result
+
+
+def _cp_cpk_numpy(matrix, lsl, usl):
+    result = np.full((7, matrix.shape[1]), np.nan)
+    present = ~np.isnan(matrix)
+    count = np.count_nonzero(present, axis=0)
+    result[0] = count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(present, matrix, 0.0).sum(axis=0) / count
+        squares = np.where(present, matrix - mean, 0.0)
+        std = np.sqrt((squares * squares).sum(axis=0) / (count - 1))
+        std[count < 2] = np.nan
+        result[1] = mean
+        result[2] = std
+        capable = std > 0
+        result[3] = np.where(capable, (usl - lsl) / (6 * std), np.nan)
+        result[5] = np.where(capable, (mean - lsl) / (3 * std), np.nan)
+        result[6] = np.where(capable, (usl - mean) / (3 * std), np.nan)
+    # 只有单侧规格时 Cpk 取有定义的一侧
+    result[4] = np.fmin(result[5], result[6])
+    return result
+
+
+# ----------------------------------------------------------------------
+# 晶圆图栅格化
+# ----------------------------------------------------------------------
+
+def _rasterize_loop(x, y, values, width, height):
+    grid = np.full((height, width), np.nan)
+    for row in range(len(x)):
+        col = x[row]
+        line = y[row]
+        if 0 <= col < width and 0 <= line < height:
+            grid[line, col] = values[row]
+    return grid
+
+
+def _rasterize_numpy(x, y, values, width, height):
+    grid = np.full((height, width), np.nan)
+    valid = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    cells = y[valid] * width + x[valid]
+    values = values[valid]
+    # 同一坐标多次测试时保留最后一次，与循环版本一致
+    _, last = np.unique(cells[::-1], return_index=True)
+    last = len(cells) - 1 - last
+    grid.flat[cells[last]] = values[last]
+    return grid
+
+
+if USE_NUMBA:
+    _fence_mask = _jit(_fence_mask_loop, parallel=True)
+    _bin_histograms = _jit(_bin_histograms_loop)
+    _spec_fail_counts = _jit(_spec_fail_counts_loop, parallel=True)
+    _cp_cpk = _jit(_cp_cpk_loop, parallel=True)
+    _rasterize = _jit(_rasterize_loop)
+    logger.info("数值内核使用 numba 编译版本")
+else:
+    _fence_mask = _fence_mask_numpy
+    _bin_histograms = _bin_histograms_numpy
+    _spec_fail_counts = _spec_fail_counts_numpy
+    _cp_cpk = _cp_cpk_numpy
+    _rasterize = _rasterize_numpy
+    logger.info("数值内核使用 NumPy 版本" + ("（numba 未安装）" if not NUMBA_AVAILABLE else "（numba 已禁用）"))
+
+
+# ----------------------------------------------------------------------
+# 公开接口
+# ----------------------------------------------------------------------
+
+CAPABILITY_FIELDS = ['count', 'mean', 'std', 'Cp', 'Cpk', 'Cpl', 'Cpu']
+
+
+def _float_matrix(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return matrix.reshape(-1, 1) if matrix.ndim == 1 else matrix
+
+
+def _limits(limits, n_cols: int) -> np.ndarray:
+    """规格限转为 (列数,) 的 float64 数组，None 表示该侧没有规格（NaN）"""
+    if limits is None:
+        return np.full(n_cols, np.nan)
+    limits = np.array([np.nan if limit is None else limit for limit in np.ravel(limits)], dtype=np.float64)
+    return np.broadcast_to(limits, (n_cols,)).copy()
+
+
+def _codes(values, length: int) -> np.ndarray:
+    """非负整数值转为 int64 编码，NaN、负数和非整数记为 -1"""
+    if values is None:
+        return np.zeros(length, dtype=np.int64)
+    values = np.asarray(values)
+    if values.dtype.kind in 'iub':
+        return values.astype(np.int64)
+    values = values.astype(np.float64)
+    with np.errstate(invalid='ignore'):
+        usable = (values >= 0) & (values == np.floor(values))
+    return np.where(usable, values, -1).astype(np.int64)
+
+
+def fence_mask(matrix, lower, upper, groups: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    标记超出上下限的值。
+
+    Args:
+        matrix: (行数, 列数) 参数矩阵，NaN 不会被标记
+        lower, upper: 每列的上下限，形状 (列数,)；按组计算时为 (分组数, 列数)，NaN 表示不限
+        groups: 每行所属分组的编号（0 起），lower/upper 为一维时忽略
+
+    Returns:
+        (mask, counts)：与 matrix 同形的布尔掩码和每列被标记的个数
+    """
+    matrix = _float_matrix(matrix)
+    lower = np.atleast_2d(np.asarray(lower, dtype=np.float64))
+    upper = np.atleast_2d(np.asarray(upper, dtype=np.float64))
+    if groups is None or len(lower) == 1:
+        groups = np.zeros(len(matrix), dtype=np.int64)
+    return _fence_mask(matrix, lower, upper, np.asarray(groups, dtype=np.int64))
+
+
+def bin_histograms(bins, wafers=None, n_wafers: Optional[int] = None,
+                   n_bins: Optional[int] = None) -> np.ndarray:
+    """
+    统计每片晶圆各 Bin 的芯片数。
+
+    Args:
+        bins: 每颗芯片的 Bin 号，NaN、负数和非整数不计入
+        wafers: 每颗芯片所属晶圆的编号（0 起），None 表示只有一片
+        n_wafers: 晶圆数，默认为最大编号 + 1
+        n_bins: 统计的 Bin 号范围 [0, n_bins)，默认为最大 Bin 号 + 1
+
+    Returns:
+        (晶圆数, n_bins) 的 int64 计数矩阵
+    """
+    codes = _codes(bins, 0)
+    wafers = _codes(wafers, len(codes))
+    if n_wafers is None:
+        n_wafers = int(wafers.max()) + 1 if len(wafers) else 1
+    if n_bins is None:
+        n_bins = int(codes.max()) + 1 if len(codes) and codes.max() >= 0 else 1
+    return _bin_histograms(codes, wafers, int(n_wafers), int(n_bins))
+
+
+def spec_fail_counts(matrix, lsl=None, usl=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    统计每列低于 LSL、高于 USL 的值的个数。
+
+    Args:
+        matrix: (行数, 列数) 参数矩阵
+        lsl, usl: 每列的规格下限、上限（标量或序列），None / NaN 表示没有该侧规格
+
+    Returns:
+        (below, above, valid)：每列低于下限、高于上限（下限优先）和非 NaN 值的个数
+    """
+    matrix = _float_matrix(matrix)
+    n_cols = matrix.shape[1]
+    return _spec_fail_counts(matrix, _limits(lsl, n_cols), _limits(usl, n_cols))
+
+
+def cp_cpk(matrix, lsl=None, usl=None) -> Dict[str, np.ndarray]:
+    """
+    按列计算工艺能力指标。
+
+    Args:
+        matrix: (行数, 列数) 参数矩阵，NaN 被忽略
+        lsl, usl: 每列的规格下限、上限，None / NaN 表示没有该侧规格
+
+    Returns:
+        CAPABILITY_FIELDS 中每个字段一个 (列数,) 数组。std 为样本标准差（ddof=1），
+        std 不为正数时 Cp/Cpk/Cpl/Cpu 为 NaN，只有单侧规格时 Cpk 等于该侧的指标。
+    """
+    matrix = _float_matrix(matrix)
+    n_cols = matrix.shape[1]
+    result = _cp_cpk(matrix, _limits(lsl, n_cols), _limits(usl, n_cols))
+    return dict(zip(CAPABILITY_FIELDS, result))
+
+
+def rasterize_wafer_map(x, y, values) -> Tuple[np.ndarray, int, int]:
+    """
+    将芯片坐标和数值栅格化为二维晶圆图，便于 imshow 等按像素绘制。
+
+    Args:
+        x, y: 芯片坐标（整数，NaN 的芯片被忽略）
+        values: 每颗芯片的数值
+
+    Returns:
+        (grid, x_min, y_min)：grid[y - y_min, x - x_min] 为该坐标最后一次测试的数值，
+        没有芯片的位置为 NaN
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    located = ~(np.isnan(x) | np.isnan(y))
+    if not located.any():
+        return np.full((0, 0), np.nan), 0, 0
+    x, y, values = x[located].astype(np.int64), y[located].astype(np.int64), values[located]
+    x_min, y_min = int(x.min()), int(y.min())
+    width, height = int(x.max()) - x_min + 1, int(y.max()) - y_min + 1
+    return _rasterize(x - x_min, y - y_min, values, width, height), x_min, y_min
+
+
+def batch_process_parameters(df: pd.DataFrame, params: List[Any]) -> Dict[str, Any]:
+    """
+    一次计算多个参数的描述统计量。
+
+    Returns:
+        {'statistics': {param: {'mean', 'std', 'median', 'min', 'max', 'count'}}}，
+        只统计有限数值，std 为样本标准差（ddof=1）
+    """
+    params = [param for param in params if param in df.columns]
+    matrix = np.empty((len(df), len(params)), dtype=np.float64, order='F')
+    for position, param in enumerate(params):
+        matrix[:, position] = pd.to_numeric(expand_series(df[param]), errors='coerce').to_numpy(
+            dtype=np.float64, na_value=np.nan)
+    matrix[~np.isfinite(matrix)] = np.nan
+    moments = cp_cpk(matrix)
+    statistics = {}
+    for position, param in enumerate(params):
+        column = matrix[:, position]
+        column = column[~np.isnan(column)]
+        empty = len(column) == 0
+        statistics[param] = {
+            'mean': float(moments['mean'][position]),
+            'std': float(moments['std'][position]),
+            'median': np.nan if empty else float(np.median(column)),
+            'min': np.nan if empty else float(column.min()),
+            'max': np.nan if empty else float(column.max()),
+            'count': int(moments['count'][position]),
+        }
+    return {'statistics': statistics}
@@ -1 +1,295 @@
- 
\ No newline at end of file
+"""
+并行执行引擎
+
+各厂商处理流程（HH/DCP、JT、Lion、国宇）和统一读取器批量读取中的逐文件、逐批次任务统一经 ParallelProcessor 执行：
+
+- 进程池（CPU 密集的解析）按 PerformanceConfig.MAX_WORKERS、线程池（以 I/O 为主的任务）
+  按 IO_WORKERS 确定大小，池在多次 map 之间复用，关闭时释放；
+- map 按输入顺序产出每一项的 TaskResult，同时最多有 2×工作数 个任务在执行或排队，
+  输入可以是生成器（如逐片读取的晶圆），不会一次全部读入内存；
+- chunk_size > 1 时多项合并为一个任务提交，减少进程间传输的开销；
+- 任务内的异常被捕获到对应项的 TaskResult 中，不影响其他项；超时、取消的项同样以
+  TaskResult.error 表示；
+- 进程池不可用（无法创建进程、任务无法序列化、工作进程崩溃）时剩余任务回退到当前进程串行执行，
+  失效的池被丢弃，下一次 map 重新创建；
+- 每次 map 开始时由内存调控器按当前内存情况限制工作数（见 memory_governor）；
+- 有进行中的性能剖析运行时，进程池任务内记录的阶段随结果带回并合并（见 stage_profiler）。
+
+parallel=False，或 parallel=None 且 ENABLE_PARALLEL 为 False（兼容模式、安全模式）时，
+所有任务都在当前进程中按顺序执行，不创建任何进程或线程。
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from cp_data_processor.config.performance_config import get_performance_config
+from cp_data_processor.processing.memory_governor import get_memory_governor
+from cp_data_processor.processing.stage_profiler import StageExport, capture_stages, current_run
+
+logger = logging.getLogger(__name__)
+
+# 进程池用于 CPU 密集任务，线程池用于以 I/O 为主的任务
+POOL_KINDS = ('process', 'thread')
+
+
+@dataclass
+class TaskResult:
+    """一个输入项的执行结果"""
+    index: int  # 输入项的序号
+    item: Any
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def cancelled(self) -> bool:
+        return isinstance(self.error, CancelledError)
+
+    @property
+    def timed_out(self) -> bool:
+        return isinstance(self.error, TimeoutError)
+
+    def result(self) -> Any:
+        """返回任务结果，任务失败时重新抛出其异常"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def _run_chunk(function: Callable, items: List[Any]) -> List[Tuple[Any, Optional[BaseException]]]:
+    """在工作进程（或线程）中依次执行一块输入，逐项捕获异常"""
+    outcomes = []
+    for item in items:
+        try:
+            outcomes.append((function(item), None))
+        except Exception as e:
+            outcomes.append((None, e))
+    return outcomes
+
+
+def _run_chunk_captured(function: Callable, items: List[Any], profile: bool
+                        ) -> Tuple[List[Tuple[Any, Optional[BaseException]]], StageExport]:
+    """在工作进程中执行一块输入，同时记录任务内的阶段并随结果带回"""
+    with capture_stages(profile) as run:
+        outcomes = _run_chunk(function, items)
+    return outcomes, run.export()
+
+
+def _chunked(items: Iterable[Any], chunk_size: int) -> Iterator[List[Tuple[int, Any]]]:
+    chunk = []
+    for entry in enumerate(items):
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ParallelProcessor:
+    """
+    有序、可取消、逐项捕获异常的并行执行器。
+
+    用法:
+        with ParallelProcessor('process') as processor:
+            for result in processor.map(parse_file, file_paths, timeout=600):
+                if result.ok:
+                    lots[result.item] = result.value
+
+    进程池中执行的 function 和输入项必须可以序列化（模块级函数、functools.partial 等）。
+    """
+
+    def __init__(self, kind: str = 'process', parallel: Optional[bool] = None,
+                 max_workers: Optional[int] = None, chunk_size: int = 1,
+                 timeout: Optional[float] = None):
+        """
+        Args:
+            kind: 'process' 使用进程池，'thread' 使用线程池
+            parallel: 是否并行执行。None 表示跟随 PerformanceConfig.ENABLE_PARALLEL，
+                False 强制在当前进程中串行执行
+            max_workers: 工作进程/线程数上限，默认进程池取 MAX_WORKERS、线程池取 IO_WORKERS
+            chunk_size: 每个任务包含的输入项数
+            timeout: 每个任务的默认超时秒数（从开始等待该任务的结果算起），None 表示不限；
+                串行执行时不限制超时
+        """
+        if kind not in POOL_KINDS:
+            raise ValueError(f"不支持的执行器类型: {kind}")
+        self.kind = kind
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._executor_workers = 0
+        self._abandoned = False  # 有超时后仍在运行的任务，关闭时不等待
+        self._cancel_event = threading.Event()
+        self._pending: Deque[Future] = deque()
+
+    @property
+    def workers(self) -> int:
+        """执行时使用的工作进程/线程数，1 表示在当前进程中串行执行（每次调用时读取性能配置）"""
+        config = get_performance_config()
+        if self.parallel is False or (self.parallel is None and not config.ENABLE_PARALLEL):
+            return 1
+        default = config.MAX_WORKERS if self.kind == 'process' else config.IO_WORKERS
+        return max(1, self.max_workers or default)
+
+    def __enter__(self) -> 'ParallelProcessor':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭工作池；有超时未结束的任务时不等待它们"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=not self._abandoned, cancel_futures=True)
+            self._executor = None
+            self._executor_workers = 0
+
+    def cancel(self) -> None:
+        """取消当前的 map：不再提交新任务，已提交但尚未开始的任务以 CancelledError 结束"""
+        self._cancel_event.set()
+        for future in list(self._pending):
+            future.cancel()
+
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any],
+            timeout: Optional[float] = None, chunk_size: Optional[int] = None) -> Iterator[TaskResult]:
+        """
+        对每个输入项执行 function(item)，按输入顺序产出 TaskResult。
+
+        cancel() 之后不再读取新的输入项，产出已提交任务的结果后结束。
+
+        Args:
+            function: 任务函数
+            items: 输入项，可以是生成器
+            timeout: 每个任务的超时秒数，默认使用构造时的 timeout
+            chunk_size: 每个任务包含的输入项数，默认使用构造时的 chunk_size
+        """
+        timeout = self.timeout if timeout is None else timeout
+        chunks = _chunked(items, max(1, chunk_size or self.chunk_size))
+        self._cancel_event.clear()
+        workers = self.workers
+        if workers > 1:
+            name = getattr(getattr(function, 'func', function), '__name__', '任务')
+            workers = get_memory_governor().limit_workers(f"并行任务 {name}", workers)
+        if workers <= 1:
+            yield from self._map_serial(function, chunks)
+            return
+
+        executor = self._get_executor(workers)
+        run = current_run() if self.kind == 'process' else None
+        window: Deque[Tuple[List[Tuple[int, Any]], Future]] = deque()
+        serial = False  # 进程池不可用后剩余任务在当前进程中执行
+        try:
+            for chunk in chunks:
+                if serial:
+                    while window:
+                        yield from self._collect(function, *window.popleft(), timeout)
+                    yield from self._map_serial(function, [chunk])
+                    continue
+                try:
+                    if run is not None:
+                        future = executor.submit(_run_chunk_captured, function, [item for _, item in chunk],
+                                                 run.profile)
+                    else:
+                        future = executor.submit(_run_chunk, function, [item for _, item in chunk])
+                except Exception as e:
+                    logger.warning(f"工作池提交任务失败: {e}，剩余任务回退到当前进程串行执行")
+                    self._discard_executor()
+                    serial = True
+                    while window:
+                        yield from self._collect(function, *window.popleft(), timeout)
+                    yield from self._map_serial(function, [chunk])
+                    continue
+                window.append((chunk, future))
+                self._pending.append(future)
+                while len(window) >= 2 * workers or (window and self._cancel_event.is_set()):
+                    serial = (yield from self._collect(function, *window.popleft(), timeout)) or serial
+                if self._cancel_event.is_set():
+                    break
+            while window:
+                serial = (yield from self._collect(function, *window.popleft(), timeout)) or serial
+        finally:
+            # 调用方提前停止迭代（如遇到异常）时取消尚未开始的任务
+            for _, future in window:
+                future.cancel()
+            self._pending.clear()
+
+    def map_values(self, function: Callable[[Any], Any], items: Iterable[Any],
+                   timeout: Optional[float] = None, chunk_size: Optional[int] = None) -> List[Any]:
+        """按输入顺序返回所有任务的结果；按顺序遇到第一个失败的任务时取消其余任务并抛出它的异常"""
+        return [result.result() for result in self.map(function, items, timeout, chunk_size)]
+
+    def _discard_executor(self) -> None:
+        """
+        丢弃失效的工作池（不等待其中的任务），下一次 map 重新创建。
+
+        已提交的任务不取消：池仍可用时它们照常完成，池已崩溃时它们的异常使对应块改为串行执行。
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_workers = 0
+
+    def _get_executor(self, workers: int) -> Executor:
+        """复用大小相同的工作池，工作数变化（如配置被修改）时重建"""
+        if self._executor is not None and self._executor_workers != workers:
+            self.close()
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.kind == 'process' else ThreadPoolExecutor
+            self._executor = pool(max_workers=workers)
+            self._executor_workers = workers
+            logger.info(f"创建{'进程' if self.kind == 'process' else '线程'}池: {workers} 个工作{'进程' if self.kind == 'process' else '线程'}")
+        return self._executor
+
+    def _map_serial(self, function: Callable, chunks: Iterable[List[Tuple[int, Any]]]) -> Iterator[TaskResult]:
+        for chunk in chunks:
+            for index, item in chunk:
+                if self._cancel_event.is_set():
+                    return
+                (value, error), = _run_chunk(function, [item])
+                yield TaskResult(index, item, value, error)
+
+    def _collect(self, function: Callable, chunk: List[Tuple[int, Any]], future: Future,
+                 timeout: Optional[float]) -> Iterator[TaskResult]:
+        """
+        产出一个任务块的结果，返回 True 表示工作池不可用、剩余任务应改为串行执行。
+
+        function 的异常已在 _run_chunk 中逐项捕获，future.result() 抛出的其他异常来自
+        工作池本身（进程崩溃、参数或结果无法序列化），这一块改在当前进程中重新执行。
+        """
+        fallback = False
+        try:
+            outcomes = future.result(timeout=timeout)
+            if isinstance(outcomes, tuple):  # _run_chunk_captured 的结果
+                outcomes, exported = outcomes
+                run = current_run()
+                if run is not None:
+                    run.absorb(exported)
+        except FutureTimeoutError:
+            future.cancel()
+            self._abandoned = True
+            logger.warning(f"任务超过 {timeout} 秒未完成: {[item for _, item in chunk]}")
+            outcomes = [(None, TimeoutError(f"任务超过 {timeout} 秒未完成"))] * len(chunk)
+        except CancelledError:
+            outcomes = [(None, CancelledError())] * len(chunk)
+        except Exception as e:
+            logger.warning(f"工作池执行失败: {e}，剩余任务回退到当前进程串行执行")
+            self._discard_executor()
+            fallback = True
+            outcomes = _run_chunk(function, [item for _, item in chunk])
+        finally:
+            if future in self._pending:
+                self._pending.remove(future)
+        for (index, item), (value, error) in zip(chunk, outcomes):
+            yield TaskResult(index, item, value, error)
+        return fallback
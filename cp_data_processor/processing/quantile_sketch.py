@@ -0,0 +1,128 @@
+"""
+可合并的分位数草图
+
+QuantileSketch 按 KLL / MRL 的压缩器层级累积数据：第 h 层的每个样本代表 2**h 个原始值，
+某层超过容量 k 时排序后两两配对、每对保留一个提升到上一层。各片晶圆分别建立的草图
+可以合并，合并后的误差界与把所有数据写入同一个草图相同，因此可以逐片晶圆（或在多个
+线程中）建立草图，再合并得到整批次、整个产品的分位数，而不需要把数据合并到内存中。
+
+误差界是确定性的：压缩第 h 层时，任一值的秩至多偏移 2**h（只有跨过该值的那一对会改变
+计数）。草图累计这些偏移，rank_error 给出分位数秩误差的上界（占总数的比例）。
+没有发生压缩时，quantile 与 np.quantile（线性插值）逐位一致。
+"""
+
+from typing import List, Union
+
+import numpy as np
+
+# 每层保留的样本数；秩误差上界约为 层数 / DEFAULT_SKETCH_SIZE
+DEFAULT_SKETCH_SIZE = 2048
+
+
+class QuantileSketch:
+    """
+    可合并的分位数草图。
+
+    用法:
+        sketch = QuantileSketch()
+        for chip_data in wafers:
+            sketch.update(chip_data["VTH"].to_numpy())
+        q1, q3 = sketch.quantile([0.25, 0.75])
+    """
+
+    def __init__(self, k: int = DEFAULT_SKETCH_SIZE):
+        """
+        Args:
+            k: 每层最多保留的样本数，越大误差越小、占用内存越多
+        """
+        if k < 2:
+            raise ValueError(f"草图容量至少为 2: {k}")
+        self.k = k
+        self.levels: List[np.ndarray] = []
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._error = 0  # 累计的秩偏移上界（原始值个数）
+        self._parity: List[int] = []  # 各层下次压缩保留每对中的第几个，交替取值避免偏差
+
+    @property
+    def retained(self) -> int:
+        """草图中保留的样本数"""
+        return sum(len(items) for items in self.levels)
+
+    @property
+    def rank_error(self) -> float:
+        """分位数秩误差的上界（占总数的比例），没有发生压缩时为 0"""
+        return self._error / self.count if self.count else 0.0
+
+    def update(self, values) -> 'QuantileSketch':
+        """加入一组值，NaN 被忽略"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._add(0, values)
+        self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """将另一个草图并入本草图（other 不变）"""
+        if other.k != self.k:
+            raise ValueError(f"草图容量不同，无法合并: {self.k} 与 {other.k}")
+        if other.count == 0:
+            return self
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._error += other._error
+        for level, items in enumerate(other.levels):
+            self._add(level, items)
+        self._compress()
+        return self
+
+    def quantile(self, q: Union[float, np.ndarray, List[float]]) -> Union[float, np.ndarray]:
+        """
+        线性插值分位数，q 可以是标量或数组；草图为空时返回 NaN。
+
+        有压缩时，每个样本按其代表的秩区间的中点参与插值，两端以真实的最小、最大值为界。
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        values = np.concatenate(self.levels)
+        if self._error == 0:
+            return np.quantile(values, q)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        positions = np.cumsum(weights) - (weights + 1) / 2
+        positions = np.concatenate(([0.0], positions, [self.count - 1.0]))
+        values = np.concatenate(([self.min], values, [self.max]))
+        result = np.interp(q * (self.count - 1), positions, values)
+        return result if q.ndim else float(result)
+
+    def _add(self, level: int, items: np.ndarray) -> None:
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+            self._parity.append(0)
+        current = self.levels[level]
+        self.levels[level] = np.concatenate((current, items)) if len(current) else items
+
+    def _compress(self) -> None:
+        """自下而上压缩超过容量的层"""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # 奇数个时最大的一个留在本层
+                paired = len(items) - len(items) % 2
+                promoted = items[self._parity[level]:paired:2]
+                self._parity[level] ^= 1
+                self.levels[level] = items[paired:]
+                self._error += 1 << level
+                self._add(level + 1, promoted)
+            level += 1
@@ -0,0 +1,394 @@
+"""
+共享结果缓存
+
+GUI、看板和分析模块反复对同一份数据做相同的计算（读取同一批 CSV、统计同一批参数、
+生成同一组图表），ResultCache 把这些结果保存在一个有容量上限的进程级缓存中：
+
+- 内存层按 CACHE_SIZE_MB 限制总字节数，DataFrame/Series/ndarray 按实际占用（含对象列
+  中的字符串）计算大小，图表等其他对象按固定大小计；超出上限时按最近使用（LRU）淘汰；
+- 条目在 CACHE_TTL_SECONDS 后过期（<= 0 表示不过期）；
+- 可选的磁盘层（CACHE_DIR）接收从内存层淘汰的条目，内存未命中时从磁盘读回，
+  磁盘层按 CACHE_DISK_SIZE_MB 限制总大小；
+- 统计命中、未命中、淘汰和过期次数。
+
+键是以命名空间开头的元组，如 ("capability", 数据指纹, 规格)；数据来自文件时用
+file_signature，来自内存中的 DataFrame 时用 frame_fingerprint 作为键的一部分，
+数据变化后键随之变化，不会读到旧结果。
+
+缓存返回的是保存的对象本身，调用方修改结果前应先复制。
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cp_data_processor.config.performance_config import get_performance_config
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# 每个内存条目的固定开销（键、记录对象、有序字典节点）
+ENTRY_OVERHEAD = 256
+# 无法直接计算大小的对象（图表、分析结果对象等）按固定大小计，不为估算而序列化
+OPAQUE_OBJECT_SIZE = MB
+DISK_SUFFIX = ".pkl"
+
+_MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    估算对象占用的字节数。
+
+    DataFrame、Series、Index 用 memory_usage(deep=True)，ndarray 用 nbytes（对象数组另加
+    各元素的大小），容器递归累加，其他对象按 OPAQUE_OBJECT_SIZE 计。
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(index=True, deep=True) if isinstance(value, pd.Series)
+                   else value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        size = value.nbytes
+        if value.dtype == object:
+            size += sum(sys.getsizeof(item) for item in value.ravel())
+        return int(size)
+    if isinstance(value, (str, bytes, int, float, bool, type(None), np.generic)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return OPAQUE_OBJECT_SIZE
+
+
+def frame_fingerprint(frame: pd.DataFrame, columns: Optional[Collection[Any]] = None) -> str:
+    """DataFrame（或其中 columns 列）内容的指纹：列名、dtype、索引和各单元格的值相同时指纹相同"""
+    if columns is not None:
+        frame = frame[[column for column in columns if column in frame.columns]]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(frame.columns), [str(dtype) for dtype in frame.dtypes], frame.shape)).encode())
+    if len(frame.columns):
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    else:
+        digest.update(pd.util.hash_pandas_object(frame.index).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def file_signature(file_path: Any) -> Tuple[str, int, int]:
+    """文件的 (绝对路径, 大小, 修改时间)，文件被改写后签名随之变化"""
+    stat = os.stat(file_path)
+    return os.path.abspath(str(file_path)), stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: Optional[float]
+
+
+class ResultCache:
+    """
+    有容量上限的 LRU + TTL 结果缓存，可选磁盘层。
+
+    用法:
+        cache = get_result_cache()
+        key = ("capability", frame_fingerprint(df, parameters), specs_key)
+        results = cache.get_or_compute(key, lambda: compute(df))
+
+    max_size_mb、ttl_seconds、enabled 为 None 时每次使用时读取全局性能配置。
+    """
+
+    def __init__(self, max_size_mb: Optional[float] = None, ttl_seconds: Optional[float] = None,
+                 enabled: Optional[bool] = None, disk_dir: Optional[str] = None,
+                 disk_size_mb: Optional[float] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            max_size_mb: 内存层容量上限（MB），默认 CACHE_SIZE_MB
+            ttl_seconds: 条目有效期（秒），默认 CACHE_TTL_SECONDS，<= 0 表示不过期
+            enabled: 是否启用，默认 ENABLE_CACHE；禁用时 get 总是未命中，set 不保存
+            disk_dir: 磁盘层目录，None 表示不使用磁盘层
+            disk_size_mb: 磁盘层容量上限（MB），默认 CACHE_DISK_SIZE_MB
+            clock: 返回当前时间（秒）的函数，磁盘层跨进程使用，需为墙上时间
+        """
+        self._max_size_mb = max_size_mb
+        self._ttl_seconds = ttl_seconds
+        self._enabled = enabled
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_size_mb = disk_size_mb
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def max_bytes(self) -> int:
+        size_mb = self._max_size_mb if self._max_size_mb is not None else get_performance_config().CACHE_SIZE_MB
+        return int(size_mb * MB)
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds if self._ttl_seconds is not None else get_performance_config().CACHE_TTL_SECONDS
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled if self._enabled is not None else get_performance_config().ENABLE_CACHE
+
+    @property
+    def disk_max_bytes(self) -> int:
+        size_mb = (self._disk_size_mb if self._disk_size_mb is not None
+                   else get_performance_config().CACHE_DISK_SIZE_MB)
+        return int(size_mb * MB)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -- 读写 ----------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """返回 key 对应的值；未命中、已过期或缓存禁用时返回 default"""
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            value, expires_at = self._load_from_disk(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.disk_hits += 1
+            size = estimate_size(value)
+            if size + ENTRY_OVERHEAD <= self.max_bytes:
+                self._insert(key, value, size, expires_at)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> None:
+        """
+        保存结果。
+
+        Args:
+            ttl: 有效期（秒），默认使用 ttl_seconds
+            size: 值的字节数，默认由 estimate_size 估算
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl and ttl > 0 else None
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size + ENTRY_OVERHEAD > self.max_bytes:
+                logger.debug(f"结果过大，不保存到内存缓存: {key!r} ({size / MB:.1f}MB)")
+                self._store_to_disk(key, value, expires_at)
+                return
+            self._insert(key, value, size, expires_at)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """命中时返回缓存的值，否则调用 compute() 并保存其结果"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除一个条目（含磁盘层）"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            path = self._disk_path(key)
+            if path is not None:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def keys(self, namespace: Optional[str] = None) -> List[Hashable]:
+        """内存层中的键（从旧到新）；指定 namespace 时只列出以它开头的键"""
+        with self._lock:
+            return [key for key in self._entries
+                    if namespace is None or (isinstance(key, tuple) and key and key[0] == namespace)]
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """清空内存层；指定 namespace 时只删除键以它开头的条目"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self.size_bytes = 0
+                return
+            for key in self.keys(namespace):
+                self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+    # -- 内存层 --------------------------------------------------------------
+
+    def _expired(self, entry: _Entry) -> bool:
+        return entry.expires_at is not None and self._clock() >= entry.expires_at
+
+    def _insert(self, key: Hashable, value: Any, size: int, expires_at: Optional[float]) -> None:
+        self._entries[key] = _Entry(value, size + ENTRY_OVERHEAD, expires_at)
+        self.size_bytes += size + ENTRY_OVERHEAD
+        self._evict()
+
+    def _remove(self, key: Hashable) -> _Entry:
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry.size
+        return entry
+
+    def _evict(self) -> None:
+        """先丢弃过期条目，仍超出上限时按最近使用从旧到新淘汰，淘汰的条目转存到磁盘层"""
+        if self.size_bytes <= self.max_bytes:
+            return
+        for key in [key for key, entry in self._entries.items() if self._expired(entry)]:
+            self._remove(key)
+            self.expirations += 1
+        while self.size_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            entry = self._remove(key)
+            self.evictions += 1
+            logger.debug(f"结果缓存超出容量上限，淘汰条目: {key!r}")
+            self._store_to_disk(key, entry.value, entry.expires_at)
+
+    # -- 磁盘层 --------------------------------------------------------------
+
+    def _disk_path(self, key: Hashable) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / (hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + DISK_SUFFIX)
+
+    def _store_to_disk(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump((key, expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.debug(f"结果未写入磁盘缓存 {key!r}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        self._evict_disk()
+
+    def _load_from_disk(self, key: Hashable) -> Tuple[Any, Optional[float]]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return _MISSING, None
+        try:
+            with open(path, "rb") as f:
+                stored_key, expires_at, value = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"磁盘缓存条目损坏，已丢弃 {path.name}: {e}")
+            stored_key, expires_at, value = None, None, _MISSING
+        if stored_key != key or (expires_at is not None and self._clock() >= expires_at):
+            if value is not _MISSING and stored_key == key:
+                self.expirations += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return _MISSING, None
+        try:
+            os.utime(path)  # 磁盘层按修改时间淘汰
+        except OSError:
+            pass
+        return value, expires_at
+
+    def _evict_disk(self) -> None:
+        """磁盘层总大小超出上限时，按修改时间从旧到新删除"""
+        try:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, Path(entry.path))
+                     for entry in os.scandir(self.disk_dir) if entry.name.endswith(DISK_SUFFIX)]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+
+def cached_read_csv(file_path: Any, **read_csv_kwargs: Any) -> pd.DataFrame:
+    """
+    pd.read_csv 的缓存版本：同一文件（路径、大小、修改时间不变）以相同参数重复读取时
+    由全局结果缓存提供。
+
+    返回的是缓存中的 DataFrame 本身（不复制，避免同一份数据在内存中保存两份），
+    调用方应只读使用，需要修改时先 copy()。
+    """
+    key = ("read_csv", file_signature(file_path), repr(sorted(read_csv_kwargs.items())))
+    return get_result_cache().get_or_compute(key, lambda: pd.read_csv(file_path, **read_csv_kwargs))
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """获取全局结果缓存实例，首次调用时按 PerformanceConfig 创建"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache(disk_dir=get_performance_config().CACHE_DIR)
+    return _default_cache
+
+
+def configure_result_cache(max_size_mb: Optional[float] = None, ttl_seconds: Optional[float] = None,
+                           enabled: Optional[bool] = None, disk_dir: Optional[str] = None,
+                           disk_size_mb: Optional[float] = None) -> ResultCache:
+    """替换全局结果缓存实例（未指定的参数沿用 PerformanceConfig）"""
+    global _default_cache
+    _default_cache = ResultCache(
+        max_size_mb=max_size_mb, ttl_seconds=ttl_seconds, enabled=enabled,
+        disk_dir=disk_dir if disk_dir is not None else get_performance_config().CACHE_DIR,
+        disk_size_mb=disk_size_mb,
+    )
+    return _default_cache
@@ -0,0 +1,389 @@
+"""
+阶段性能剖析
+
+按 PerformanceConfig 的监控配置记录一次处理（一次运行）中各阶段的性能，三个开关默认关闭：
+
+- LOG_PERFORMANCE：运行结束时把各阶段汇总写入日志；
+- PERFORMANCE_REPORT：运行结束时在输出目录写出 JSON 报告 performance_<运行名>_<时间>.json；
+- ENABLE_PROFILING：同时对每个阶段执行 cProfile，报告旁写出 performance_<运行名>_<时间>_<阶段>.prof
+  （可用 pstats 或 snakeviz 查看）。
+
+每个阶段记录调用次数、墙钟时间、CPU 时间、峰值 RSS、处理行数与每秒行数（文件发现、压缩包解压
+阶段为文件数）、读入/写出字节数，同名阶段的多次调用累加。阶段可以嵌套，时间按各自包含的范围计算。
+
+处理流程在 profiling_run 中执行，各模块用 stage() 或 @profiled 标记阶段：
+
+    with profiling_run("国宇", output_dir) as run:
+        with stage("解析", bytes_in=size) as probe:
+            lot = reader.read()
+            probe.add(rows=lot_rows(lot))
+
+没有进行中的运行（或三个开关都关闭）时 stage() 返回共享的空探针，只做一次列表判断。
+ParallelProcessor 在进程池中执行任务时，工作进程内记录的阶段随结果带回并合并到当前运行；
+线程池中的任务直接记录到当前运行。
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import psutil
+
+from cp_data_processor.config.performance_config import get_performance_config
+from cp_data_processor.processing.memory_governor import MB, process_rss_mb
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# 工作进程带回的阶段记录：各阶段统计和 cProfile 统计（pstats 的 stats 字典）
+StageExport = Tuple[List['StageStats'], Dict[str, dict]]
+
+
+def high_water_rss_mb() -> float:
+    """本进程启动以来的峰值常驻内存（MB）"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (MB if sys.platform == 'darwin' else 1024)  # macOS 以字节计，Linux 以 KB 计
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / MB
+
+
+def lot_rows(lot) -> int:
+    """CPLot 中芯片数据的总行数"""
+    return sum(len(wafer.chip_data) for wafer in (getattr(lot, 'wafers', None) or [])
+               if getattr(wafer, 'chip_data', None) is not None)
+
+
+def file_bytes(paths: Iterable[Any]) -> int:
+    """文件的总字节数，不存在的文件不计"""
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except (OSError, TypeError):
+            pass
+    return total
+
+
+def path_bytes(path: Any) -> int:
+    """单个文件的字节数，用作返回输出路径的函数的 bytes_out"""
+    return file_bytes([path])
+
+
+@dataclass
+class StageStats:
+    """一个阶段的累计性能"""
+    name: str
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss_mb: float = 0.0
+    rows: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.wall_time if self.rows and self.wall_time > 0 else 0.0
+
+    def merge(self, other: 'StageStats') -> None:
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.peak_rss_mb = max(self.peak_rss_mb, other.peak_rss_mb)
+        self.rows += other.rows
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result['rows_per_sec'] = self.rows_per_sec
+        return result
+
+
+class _StatsSnapshot:
+    """把 stats 字典包装成 pstats.Stats 可以加载的对象"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class StageProbe:
+    """一次阶段执行；阶段内可用 add() 累加处理行数和字节数"""
+
+    __slots__ = ('run', 'name', 'rows', 'bytes_in', 'bytes_out',
+                 '_wall', '_cpu', '_rss', '_high_water', '_profile')
+
+    def __init__(self, run: 'ProfilingRun', name: str, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0):
+        self.run = run
+        self.name = name
+        self.rows = rows
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self._profile: Optional[cProfile.Profile] = None
+
+    def add(self, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> None:
+        self.rows += rows
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def __enter__(self) -> 'StageProbe':
+        self.run._register(self.name)
+        self._rss = process_rss_mb()
+        self._high_water = high_water_rss_mb()
+        self._profile = self.run._start_profile()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        if self._profile is not None:
+            self.run._stop_profile(self.name, self._profile)
+        # 阶段内创下进程峰值时以峰值为准，否则取进入、退出时的较大值
+        high_water = high_water_rss_mb()
+        peak = max(self._rss, process_rss_mb(), high_water if high_water > self._high_water else 0.0)
+        self.run._record(StageStats(self.name, 1, wall, cpu, peak, self.rows, self.bytes_in, self.bytes_out))
+
+
+class _NullProbe:
+    """没有进行中的运行时使用的空探针"""
+
+    __slots__ = ()
+
+    def add(self, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> None:
+        pass
+
+    def __enter__(self) -> '_NullProbe':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NULL_PROBE = _NullProbe()
+
+
+class ProfilingRun:
+    """
+    一次处理的阶段性能记录。
+
+    构造参数为 None 时读取全局性能配置。output_dir 可以在运行开始后再设置
+    （如输出目录由首个批次号决定时）。
+    """
+
+    def __init__(self, name: str, output_dir: Optional[str] = None, profile: Optional[bool] = None,
+                 log: Optional[bool] = None, report: Optional[bool] = None):
+        config = get_performance_config()
+        self.name = name
+        self.output_dir = output_dir
+        self.profile = config.ENABLE_PROFILING if profile is None else profile
+        self.log = config.LOG_PERFORMANCE if log is None else log
+        self.report = config.PERFORMANCE_REPORT if report is None else report
+        self.stages: Dict[str, StageStats] = {}  # 按首次进入的顺序
+        self.profiles: Dict[str, pstats.Stats] = {}
+        self.started_at = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._lock = threading.Lock()
+        self._profiling = threading.local()  # 每个线程同时只能有一个 cProfile 在运行
+
+    @property
+    def enabled(self) -> bool:
+        return self.profile or self.log or self.report
+
+    def stage(self, name: str, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> StageProbe:
+        return StageProbe(self, name, rows, bytes_in, bytes_out)
+
+    def _start_profile(self) -> Optional[cProfile.Profile]:
+        """启用 cProfile 且本线程没有外层阶段正在剖析时开始剖析，内层阶段包含在外层的结果中"""
+        if not self.profile or getattr(self._profiling, 'active', False):
+            return None
+        self._profiling.active = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _stop_profile(self, name: str, profile: cProfile.Profile) -> None:
+        profile.disable()
+        self._profiling.active = False
+        self._add_profile(name, profile)
+
+    def _add_profile(self, name: str, source: Any) -> None:
+        with self._lock:
+            if name in self.profiles:
+                self.profiles[name].add(source)
+            else:
+                self.profiles[name] = pstats.Stats(source)
+
+    def _register(self, name: str) -> None:
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats(name)
+
+    def _record(self, stats: StageStats) -> None:
+        with self._lock:
+            if stats.name in self.stages:
+                self.stages[stats.name].merge(stats)
+            else:
+                self.stages[stats.name] = stats
+
+    def export(self) -> StageExport:
+        """导出阶段记录，供工作进程随任务结果带回"""
+        return list(self.stages.values()), {name: stats.stats for name, stats in self.profiles.items()}
+
+    def absorb(self, exported: StageExport) -> None:
+        """合并工作进程带回的阶段记录"""
+        stage_stats, profiles = exported
+        for stats in stage_stats:
+            self._record(stats)
+        for name, stats in profiles.items():
+            self._add_profile(name, _StatsSnapshot(stats))
+
+    def summary(self) -> Dict[str, Any]:
+        """运行汇总和各阶段的性能"""
+        return {
+            'run': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_time': time.perf_counter() - self._wall,
+            'cpu_time': time.process_time() - self._cpu,
+            'peak_rss_mb': high_water_rss_mb(),
+            'stages': [stats.to_dict() for stats in self.stages.values()],
+        }
+
+    def finish(self) -> Optional[str]:
+        """按配置写日志、写出报告和 cProfile 结果，返回报告路径"""
+        summary = self.summary()
+        if self.log:
+            logger.info(f"性能汇总 [{self.name}]: 总耗时 {summary['wall_time']:.2f}s, "
+                        f"CPU {summary['cpu_time']:.2f}s, 峰值内存 {summary['peak_rss_mb']:.0f}MB")
+            for stats in self.stages.values():
+                rate = f", {stats.rows_per_sec:,.0f}行/秒" if stats.rows else ""
+                logger.info(f"  {stats.name}: {stats.calls}次, {stats.wall_time:.3f}s (CPU {stats.cpu_time:.3f}s), "
+                            f"峰值内存 {stats.peak_rss_mb:.0f}MB{rate}")
+        if not (self.report or self.profile) or not self.output_dir:
+            return None
+        try:
+            return self.write_report(summary)
+        except OSError as e:
+            logger.warning(f"写出性能报告失败: {e}")
+            return None
+
+    def write_report(self, summary: Optional[Dict[str, Any]] = None) -> str:
+        """
+        在 output_dir 写出 JSON 报告和各阶段的 cProfile 结果，返回报告路径；
+        只启用 ENABLE_PROFILING 时不写 JSON 报告，返回输出目录。
+        """
+        output_dir = Path(self.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        summary = summary or self.summary()
+        prefix = f"performance_{_safe_name(self.name)}_{self.started_at.strftime('%Y%m%d_%H%M%S')}"
+        profiles = {}
+        for name, stats in self.profiles.items():
+            prof_path = output_dir / f"{prefix}_{_safe_name(name)}.prof"
+            stats.dump_stats(str(prof_path))
+            profiles[name] = prof_path.name
+        if profiles:
+            summary['profiles'] = profiles
+        if not self.report:
+            return str(output_dir)
+        report_path = output_dir / f"{prefix}.json"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        logger.info(f"性能报告已写出: {report_path}")
+        return str(report_path)
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[<>:"/\\|?*\s]+', '_', name)
+
+
+_active_runs: List[ProfilingRun] = []
+
+
+def current_run() -> Optional[ProfilingRun]:
+    """当前进行中的运行，没有时返回 None"""
+    return _active_runs[-1] if _active_runs else None
+
+
+def stage(name: str, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0):
+    """标记一个阶段，返回可在 with 中使用的探针；没有进行中的运行时返回空探针"""
+    if not _active_runs:
+        return NULL_PROBE
+    return _active_runs[-1].stage(name, rows, bytes_in, bytes_out)
+
+
+def profiled(name: str, rows: Optional[Callable[[Any], int]] = None,
+             bytes_in: Optional[Callable[..., int]] = None,
+             bytes_out: Optional[Callable[[Any], int]] = None) -> Callable:
+    """
+    把函数标记为一个阶段。
+
+    Args:
+        name: 阶段名称
+        rows: 由返回值计算处理行数的函数，如 lot_rows
+        bytes_in: 由调用参数计算读入字节数的函数
+        bytes_out: 由返回值计算写出字节数的函数，如返回输出路径时取文件大小
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _active_runs:
+                return function(*args, **kwargs)
+            with stage(name, bytes_in=bytes_in(*args, **kwargs) if bytes_in else 0) as probe:
+                result = function(*args, **kwargs)
+                if result is not None:
+                    probe.add(rows=rows(result) if rows else 0, bytes_out=bytes_out(result) if bytes_out else 0)
+                return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiling_run(name: str, output_dir: Optional[str] = None) -> Iterator[ProfilingRun]:
+    """
+    在一次运行中记录各阶段，结束时按配置写日志和报告。
+
+    三个监控开关都关闭时运行不生效，各阶段不做任何记录。
+    """
+    run = ProfilingRun(name, output_dir)
+    if not run.enabled:
+        yield run
+        return
+    _active_runs.append(run)
+    try:
+        yield run
+    finally:
+        _active_runs.remove(run)
+        run.finish()
+
+
+@contextmanager
+def capture_stages(profile: bool) -> Iterator[ProfilingRun]:
+    """在工作进程中记录任务内的阶段，不写日志和报告，由调用方 export() 带回"""
+    run = ProfilingRun('worker', profile=profile, log=False, report=False)
+    _active_runs.append(run)
+    try:
+        yield run
+    finally:
+        _active_runs.remove(run)
@@ -8,16 +8,73 @@
 """
 
 import os
+import numpy as np
 import pandas as pd
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Mapping, Callable, Tuple
 from pathlib import Path
 import logging
 from datetime import datetime
 
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
+from cp_data_processor.data_models.compact_dtypes import (
+    categorical_constant,
+    compact_float_digits,
+    expand_frame,
+    write_csv,
+)
+from cp_data_processor.data_models.lot_collection import LotCollection
+from cp_data_processor.processing.data_transformer import StreamingOutlierFences
+from cp_data_processor.processing.memory_governor import MemoryGovernor, get_memory_governor
+from cp_data_processor.processing.stage_profiler import file_bytes, lot_rows, stage
 
 logger = logging.getLogger(__name__)
 
+# 合并清洗数据时的标准化列名映射
+COMBINED_COLUMN_MAPPING = {
+    'X_COORD': 'X',
+    'Y_COORD': 'Y', 
+    'PART_INDEX': 'Seq',
+    'SOFT_BIN': 'Bin'
+}
+# 合并清洗数据中排在最前的基本字段
+COMBINED_BASIC_COLUMNS = ['Lot_ID', 'Wafer_ID', 'X', 'Y', 'Seq', 'Bin']
+# 在内存中合并时的峰值占用约为芯片数据本身的倍数（逐片复制、合并、排序各一份）
+CONCAT_MEMORY_FACTOR = 3
+
+# 流式写出的一片晶圆：批次号、晶圆号、各列 dtype.kind、读取芯片数据的函数
+WaferSource = Tuple[str, str, Dict[Any, str], Callable[[], pd.DataFrame]]
+
+
+def _combined_sort_key(column: pd.Series) -> pd.Series:
+    """合并数据按 Lot_ID、Wafer_ID 排序时的键：Wafer_ID 按数值排序"""
+    return pd.to_numeric(column, errors='coerce') if column.name == 'Wafer_ID' else column
+
+
+def _combined_column_order(columns) -> List[Any]:
+    """基本字段在前，测试参数在后"""
+    param_columns = [col for col in columns if col not in COMBINED_BASIC_COLUMNS]
+    return [col for col in COMBINED_BASIC_COLUMNS if col in columns] + param_columns
+
+
+def _frame_kinds(frame: pd.DataFrame) -> Dict[Any, str]:
+    """各列的 dtype.kind，对象类列（含 category、字符串扩展类型）记为 'O'，与 LotCollection.column_kinds 一致"""
+    return {label: dtype.kind if isinstance(dtype, np.dtype) and dtype.kind != 'O' else 'O'
+            for label, dtype in frame.dtypes.items()}
+
+
+def _lot_wafer_sources(lots: Mapping[str, CPLot]) -> List[WaferSource]:
+    """内存中各批次的晶圆，按流式写出的格式列出"""
+    return [(lot.lot_id, wafer.wafer_id, _frame_kinds(wafer.chip_data), lambda chip_data=wafer.chip_data: chip_data)
+            for lot in lots.values() for wafer in (lot.wafers or [])
+            if getattr(wafer, 'chip_data', None) is not None]
+
+
+def _chip_data_bytes(lots: Mapping[str, CPLot]) -> int:
+    """各批次芯片数据占用的字节数（不含对象列引用的对象本身）"""
+    return sum(int(wafer.chip_data.memory_usage(index=False).sum())
+               for lot in lots.values() for wafer in (lot.wafers or [])
+               if getattr(wafer, 'chip_data', None) is not None)
+
 
 class StandardCSVGenerator:
     """
@@ -27,9 +84,16 @@ class StandardCSVGenerator:
     为后续的图表生成提供统一的数据格式。
     """
     
-    def __init__(self):
-        """初始化CSV生成器"""
+    def __init__(self, memory_governor: Optional[MemoryGovernor] = None):
+        """
+        初始化CSV生成器
+        
+        Args:
+            memory_governor: 内存调控器，默认使用全局实例。内存紧张时清洗数据CSV
+                改为逐片晶圆写出，不在内存中合并所有晶圆
+        """
         self.logger = logging.getLogger(__name__)
+        self.memory_governor = memory_governor or get_memory_governor()
     
     def _generate_timestamp(self) -> str:
         """
@@ -64,17 +128,19 @@ class StandardCSVGenerator:
         file_paths = {}
         
         try:
-            # 1. 生成清洗数据CSV
-            cleaned_path = self.generate_cleaned_csv(lot, output_dir, timestamp)
-            file_paths['cleaned'] = cleaned_path
-            
-            # 2. 生成良率数据CSV
-            yield_path = self.generate_yield_csv(lot, output_dir, timestamp)
-            file_paths['yield'] = yield_path
-            
-            # 3. 生成规格数据CSV
-            spec_path = self.generate_spec_csv(lot, output_dir, timestamp)
-            file_paths['spec'] = spec_path
+            with stage("CSV写出", rows=lot_rows(lot)) as probe:
+                # 1. 生成清洗数据CSV
+                cleaned_path = self.generate_cleaned_csv(lot, output_dir, timestamp)
+                file_paths['cleaned'] = cleaned_path
+                
+                # 2. 生成良率数据CSV
+                yield_path = self.generate_yield_csv(lot, output_dir, timestamp)
+                file_paths['yield'] = yield_path
+                
+                # 3. 生成规格数据CSV
+                spec_path = self.generate_spec_csv(lot, output_dir, timestamp)
+                file_paths['spec'] = spec_path
+                probe.add(bytes_out=file_bytes(file_paths.values()))
             
             self.logger.info(f"标准CSV文件生成完成: {lot_id}")
             return file_paths
@@ -99,8 +165,31 @@ class StandardCSVGenerator:
         if not lot.wafers:
             raise ValueError("CPLot中没有晶圆数据")
         
+        # 生成文件路径（带时间戳）
+        if timestamp:
+            filename = f"{lot.lot_id}_cleaned_{timestamp}.csv"
+        else:
+            filename = f"{lot.lot_id}_cleaned.csv"
+        file_path = os.path.join(output_dir, filename)
+        
+        lots = {lot.lot_id: lot}
+        if not self._degrade_to_streaming("清洗数据CSV", lots):
+            try:
+                row_count = self._write_lot_cleaned_csv(lot, file_path)
+                self.logger.info(f"生成清洗数据CSV: {file_path} ({row_count}行)")
+                return file_path
+            except MemoryError:
+                self.memory_governor.record("清洗数据CSV", "在内存中合并时内存不足，改为逐片晶圆写出")
+        
+        row_count = self._stream_cleaned_csv(_lot_wafer_sources(lots), file_path)
+        self.logger.info(f"逐片晶圆生成清洗数据CSV: {file_path} ({row_count}行)")
+        return file_path
+    
+    def _write_lot_cleaned_csv(self, lot: CPLot, file_path: str) -> int:
+        """在内存中合并批次的所有晶圆后写出清洗数据CSV，返回行数"""
         # 收集所有晶圆的芯片数据
         all_chip_data = []
+        lot_categories = pd.Index([lot.lot_id])
         
         for wafer in lot.wafers:
             if hasattr(wafer, 'chip_data') and wafer.chip_data is not None:
@@ -109,9 +198,9 @@ class StandardCSVGenerator:
                 
                 # 添加或验证必需字段
                 if 'Lot_ID' not in chip_data.columns:
-                    chip_data['Lot_ID'] = lot.lot_id
+                    chip_data['Lot_ID'] = self._id_column(lot.lot_id, len(chip_data), lot_categories)
                 if 'Wafer_ID' not in chip_data.columns:
-                    chip_data['Wafer_ID'] = wafer.wafer_id
+                    chip_data['Wafer_ID'] = self._id_column(wafer.wafer_id, len(chip_data))
                 
                 # 标准化Wafer_ID为整数（如果是字符串）
                 if 'Wafer_ID' in chip_data.columns:
@@ -152,18 +241,16 @@ class StandardCSVGenerator:
         ordered_columns = [col for col in basic_columns if col in combined_data.columns] + param_columns
         combined_data = combined_data[ordered_columns]
         
-        # 生成文件路径（带时间戳）
-        if timestamp:
-            filename = f"{lot.lot_id}_cleaned_{timestamp}.csv"
-        else:
-            filename = f"{lot.lot_id}_cleaned.csv"
-        file_path = os.path.join(output_dir, filename)
-        
         # 保存文件
-        combined_data.to_csv(file_path, index=False)
-        self.logger.info(f"生成清洗数据CSV: {file_path} ({len(combined_data)}行)")
-        
-        return file_path
+        write_csv(combined_data, file_path, index=False)
+        return len(combined_data)
+    
+    def _degrade_to_streaming(self, stage: str, lots: Mapping[str, CPLot]) -> bool:
+        """在内存中合并所有晶圆会越过内存水位时返回 True（并记录降级决定）"""
+        governor = self.memory_governor
+        if not governor.enabled:
+            return False
+        return governor.degrade(stage, "改为逐片晶圆写出", _chip_data_bytes(lots) * CONCAT_MEMORY_FACTOR)
     
     def generate_yield_csv(self, lot: CPLot, output_dir: str, timestamp: str = None) -> str:
         """
@@ -569,14 +656,17 @@ class StandardCSVGenerator:
         
         return stats
     
-    def generate_combined_standard_csvs(self, lots: Dict[str, CPLot], output_dir: str, combined_name: str = "combined") -> Dict[str, str]:
+    def generate_combined_standard_csvs(self, lots: Mapping[str, CPLot], output_dir: str, combined_name: str = "combined",
+                                        outlier_fences: Optional[StreamingOutlierFences] = None) -> Dict[str, str]:
         """
         生成合并多批次的标准CSV文件
         
         Args:
-            lots: lot_id到CPLot对象的映射
+            lots: lot_id到CPLot对象的映射；为 LotCollection 时逐片晶圆流式写出，
+                不在内存中合并所有批次
             output_dir: 输出目录
             combined_name: 合并文件的名称前缀
+            outlier_fences: 已拟合的流式异常值上下限，提供时写出前逐片晶圆将异常值置为 NaN
             
         Returns:
             Dict[str, str]: 生成的合并文件路径字典
@@ -591,19 +681,23 @@ class StandardCSVGenerator:
         self.logger.info(f"开始生成合并的标准CSV文件 (时间戳: {timestamp})")
         
         file_paths = {}
+        rows = lots.row_count if isinstance(lots, LotCollection) else sum(lot_rows(lot) for lot in lots.values())
         
         try:
-            # 1. 生成合并的清洗数据CSV
-            cleaned_path = self._generate_combined_cleaned_csv(lots, output_dir, combined_name, timestamp)
-            file_paths['cleaned'] = cleaned_path
-            
-            # 2. 生成合并的良率数据CSV
-            yield_path = self._generate_combined_yield_csv(lots, output_dir, combined_name, timestamp)
-            file_paths['yield'] = yield_path
-            
-            # 3. 生成合并的规格数据CSV（使用第一个批次的规格）
-            spec_path = self._generate_combined_spec_csv(lots, output_dir, combined_name, timestamp)
-            file_paths['spec'] = spec_path
+            with stage("CSV写出", rows=rows) as probe:
+                # 1. 生成合并的清洗数据CSV
+                cleaned_path = self._generate_combined_cleaned_csv(lots, output_dir, combined_name, timestamp,
+                                                                   outlier_fences)
+                file_paths['cleaned'] = cleaned_path
+                
+                # 2. 生成合并的良率数据CSV
+                yield_path = self._generate_combined_yield_csv(lots, output_dir, combined_name, timestamp)
+                file_paths['yield'] = yield_path
+                
+                # 3. 生成合并的规格数据CSV（使用第一个批次的规格）
+                spec_path = self._generate_combined_spec_csv(lots, output_dir, combined_name, timestamp)
+                file_paths['spec'] = spec_path
+                probe.add(bytes_out=file_bytes(file_paths.values()))
             
             self.logger.info(f"合并标准CSV文件生成完成: {combined_name}")
             return file_paths
@@ -612,9 +706,32 @@ class StandardCSVGenerator:
             self.logger.error(f"生成合并标准CSV文件失败: {e}")
             raise
     
-    def _generate_combined_cleaned_csv(self, lots: Dict[str, CPLot], output_dir: str, combined_name: str, timestamp: str) -> str:
+    def _generate_combined_cleaned_csv(self, lots: Mapping[str, CPLot], output_dir: str, combined_name: str, timestamp: str,
+                                       outlier_fences: Optional[StreamingOutlierFences] = None) -> str:
         """生成合并的清洗数据CSV"""
+        if isinstance(lots, LotCollection):
+            return self._generate_collection_cleaned_csv(lots, output_dir, combined_name, timestamp, outlier_fences)
+        
+        filename = f"{combined_name}_cleaned_{timestamp}.csv"
+        file_path = os.path.join(output_dir, filename)
+        
+        if not self._degrade_to_streaming("合并清洗数据CSV", lots):
+            try:
+                row_count = self._write_combined_cleaned_csv(lots, file_path, outlier_fences)
+                self.logger.info(f"生成合并清洗数据CSV: {file_path} ({row_count}行)")
+                return file_path
+            except MemoryError:
+                self.memory_governor.record("合并清洗数据CSV", "在内存中合并时内存不足，改为逐片晶圆写出")
+        
+        row_count = self._stream_cleaned_csv(_lot_wafer_sources(lots), file_path, outlier_fences)
+        self.logger.info(f"逐片晶圆生成合并清洗数据CSV: {file_path} ({row_count}行)")
+        return file_path
+    
+    def _write_combined_cleaned_csv(self, lots: Mapping[str, CPLot], file_path: str,
+                                    outlier_fences: Optional[StreamingOutlierFences] = None) -> int:
+        """在内存中合并所有批次后写出清洗数据CSV，返回行数"""
         all_chip_data = []
+        lot_categories = pd.Index(sorted(set(lot.lot_id for lot in lots.values())))
         
         for lot_id, lot in lots.items():
             if not lot.wafers:
@@ -622,18 +739,10 @@ class StandardCSVGenerator:
                 
             for wafer in lot.wafers:
                 if hasattr(wafer, 'chip_data') and wafer.chip_data is not None:
-                    chip_data = wafer.chip_data.copy()
-                    
-                    # 确保包含基本字段
-                    if 'Lot_ID' not in chip_data.columns:
-                        chip_data['Lot_ID'] = lot.lot_id
-                    if 'Wafer_ID' not in chip_data.columns:
-                        chip_data['Wafer_ID'] = wafer.wafer_id
-                    
-                    # 标准化Wafer_ID为整数（如果是字符串）
-                    if 'Wafer_ID' in chip_data.columns:
-                        chip_data['Wafer_ID'] = self._standardize_wafer_id(chip_data['Wafer_ID'])
-                    
+                    chip_data = expand_frame(wafer.chip_data).copy()
+                    if outlier_fences is not None:
+                        outlier_fences.apply(chip_data, lot.lot_id, wafer.wafer_id)
+                    chip_data = self._prepare_combined_chip_data(chip_data, lot.lot_id, wafer.wafer_id, lot_categories)
                     all_chip_data.append(chip_data)
         
         if not all_chip_data:
@@ -642,39 +751,101 @@ class StandardCSVGenerator:
         # 合并所有数据
         combined_data = pd.concat(all_chip_data, ignore_index=True)
         
-        # 标准化列名映射
-        column_mapping = {
-            'X_COORD': 'X',
-            'Y_COORD': 'Y', 
-            'PART_INDEX': 'Seq',
-            'SOFT_BIN': 'Bin'
-        }
-        
         # 应用列名映射
-        combined_data = combined_data.rename(columns=column_mapping)
+        combined_data = combined_data.rename(columns=COMBINED_COLUMN_MAPPING)
         
         # 按Lot_ID和Wafer_ID进行排序
         if 'Lot_ID' in combined_data.columns and 'Wafer_ID' in combined_data.columns:
-            combined_data = combined_data.sort_values(['Lot_ID', 'Wafer_ID'], 
-                                                    key=lambda x: pd.to_numeric(x, errors='coerce') if x.name == 'Wafer_ID' else x)
+            combined_data = combined_data.sort_values(['Lot_ID', 'Wafer_ID'], key=_combined_sort_key)
         
         # 确保列顺序：基本字段在前，测试参数在后
-        basic_columns = ['Lot_ID', 'Wafer_ID', 'X', 'Y', 'Seq', 'Bin']
-        param_columns = [col for col in combined_data.columns if col not in basic_columns]
-        ordered_columns = [col for col in basic_columns if col in combined_data.columns] + param_columns
-        combined_data = combined_data[ordered_columns]
+        combined_data = combined_data[_combined_column_order(combined_data.columns)]
         
-        # 生成文件路径
+        # 保存文件
+        write_csv(combined_data, file_path, index=False)
+        return len(combined_data)
+    
+    def _prepare_combined_chip_data(self, chip_data: pd.DataFrame, lot_id: str, wafer_id: str,
+                                    lot_categories: Optional[pd.Index] = None) -> pd.DataFrame:
+        """补齐批次号、晶圆号并标准化晶圆号（就地修改 chip_data）"""
+        # 确保包含基本字段
+        if 'Lot_ID' not in chip_data.columns:
+            chip_data['Lot_ID'] = self._id_column(lot_id, len(chip_data), lot_categories)
+        if 'Wafer_ID' not in chip_data.columns:
+            chip_data['Wafer_ID'] = self._id_column(wafer_id, len(chip_data))
+        
+        # 标准化Wafer_ID为整数（如果是字符串）
+        chip_data['Wafer_ID'] = self._standardize_wafer_id(chip_data['Wafer_ID'])
+        return chip_data
+    
+    def _generate_collection_cleaned_csv(self, collection: LotCollection, output_dir: str, combined_name: str, timestamp: str,
+                                         outlier_fences: Optional[StreamingOutlierFences] = None) -> str:
+        """流式生成合并的清洗数据CSV：逐片读取晶圆、处理后追加写入，内存中同时只有一片晶圆。"""
+        sources = [(wafer.lot_id, wafer.wafer_id, collection.column_kinds(wafer), wafer.chip_data)
+                   for wafer in collection.wafers if wafer.columns]
         filename = f"{combined_name}_cleaned_{timestamp}.csv"
         file_path = os.path.join(output_dir, filename)
+        row_count = self._stream_cleaned_csv(sources, file_path, outlier_fences)
+        self.logger.info(f"流式生成合并清洗数据CSV: {file_path} ({row_count}行, {len(sources)}片晶圆)")
+        return file_path
+    
+    def _stream_cleaned_csv(self, sources: List[WaferSource], file_path: str,
+                            outlier_fences: Optional[StreamingOutlierFences] = None) -> int:
+        """
+        逐片晶圆处理后追加写入清洗数据CSV，返回行数。
         
-        # 保存文件
-        combined_data.to_csv(file_path, index=False)
-        self.logger.info(f"生成合并清洗数据CSV: {file_path} ({len(combined_data)}行)")
+        列集合与各列的输出类型由各晶圆的列类型预先确定，与在内存中合并时一致：
+        整数列在部分晶圆缺失或与浮点列合并时按浮点写出。行按批次号、晶圆号
+        （由晶圆的 wafer_id 标准化得到）排序，同一晶圆内保持原顺序。
+        """
+        if not sources:
+            raise ValueError("没有可用的芯片数据")
         
-        return file_path
+        # 各晶圆处理后的列名及 dtype.kind，确定输出列和需要转为浮点的整数列
+        wafer_kinds = []
+        fenced = set(outlier_fences.parameters) if outlier_fences is not None else set()
+        for _, _, column_kinds, _ in sources:
+            # 清洗异常值的参数列与 clean_data 一样转为浮点列
+            kinds = {COMBINED_COLUMN_MAPPING.get(label, label): 'f' if label in fenced and kind in 'iub' else kind
+                     for label, kind in column_kinds.items()}
+            kinds.setdefault('Lot_ID', 'O')
+            kinds['Wafer_ID'] = 'O'
+            wafer_kinds.append(kinds)
+        labels = list(dict.fromkeys(label for kinds in wafer_kinds for label in kinds))
+        ordered_columns = _combined_column_order(labels)
+        float_columns = []
+        for label in labels:
+            column_kinds = [kinds.get(label) for kinds in wafer_kinds]
+            if (any(kind in 'iu' for kind in column_kinds if kind) and not any(kind in 'Ob' for kind in column_kinds if kind)
+                    and (None in column_kinds or any(kind in 'fc' for kind in column_kinds if kind))):
+                float_columns.append(label)
+        
+        # 按Lot_ID和Wafer_ID排序晶圆
+        keys = pd.DataFrame({
+            'Lot_ID': pd.Series([lot_id for lot_id, _, _, _ in sources], dtype=object),
+            'Wafer_ID': self._standardize_wafer_id(pd.Series([wafer_id for _, wafer_id, _, _ in sources], dtype=object)),
+        })
+        order = keys.sort_values(['Lot_ID', 'Wafer_ID'], key=_combined_sort_key).index
+        
+        row_count = 0
+        chunk_size = self.memory_governor.chunk_size
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            for position, source_position in enumerate(order):
+                lot_id, wafer_id, _, load = sources[source_position]
+                chip_data = expand_frame(load()).copy()
+                if outlier_fences is not None:
+                    outlier_fences.apply(chip_data, lot_id, wafer_id)
+                chip_data = self._prepare_combined_chip_data(chip_data, lot_id, wafer_id)
+                chip_data = chip_data.rename(columns=COMBINED_COLUMN_MAPPING).reindex(columns=ordered_columns)
+                for label in float_columns:
+                    chip_data[label] = chip_data[label].astype(float)
+                chip_data.to_csv(f, index=False, header=position == 0, chunksize=chunk_size)
+                row_count += len(chip_data)
+                del chip_data
+                self.memory_governor.sample("清洗数据CSV写出")
+        return row_count
     
-    def _generate_combined_yield_csv(self, lots: Dict[str, CPLot], output_dir: str, combined_name: str, timestamp: str) -> str:
+    def _generate_combined_yield_csv(self, lots: Mapping[str, CPLot], output_dir: str, combined_name: str, timestamp: str) -> str:
         """生成合并的良率数据CSV"""
         all_yield_data = []
         
@@ -711,7 +882,7 @@ class StandardCSVGenerator:
         
         return file_path
     
-    def _generate_combined_spec_csv(self, lots: Dict[str, CPLot], output_dir: str, combined_name: str, timestamp: str) -> str:
+    def _generate_combined_spec_csv(self, lots: Mapping[str, CPLot], output_dir: str, combined_name: str, timestamp: str) -> str:
         """生成合并的规格数据CSV（使用第一个有效批次的规格）"""
         # 找到第一个有效的批次来获取规格信息
         first_lot = None
@@ -722,7 +893,7 @@ class StandardCSVGenerator:
         
         if not first_lot:
             # 如果没有找到有params的批次，使用第一个批次
-            first_lot = list(lots.values())[0]
+            first_lot = next(iter(lots.values()))
         
         # 使用现有的规格生成逻辑，但使用合并的文件名
         if hasattr(first_lot, 'params') and first_lot.params:
@@ -885,6 +1056,12 @@ class StandardCSVGenerator:
         
         return file_path
     
+    def _id_column(self, value, length: int, categories: Optional[pd.Index] = None):
+        """批次号/晶圆号列：紧凑模式下为 category，否则为标量（由 pandas 广播）"""
+        if compact_float_digits() is None:
+            return value
+        return categorical_constant(value, length, categories)
+    
     def _standardize_wafer_id(self, wafer_id_series) -> pd.Series:
         """
         标准化Wafer_ID为整数类型
@@ -895,6 +1072,15 @@ class StandardCSVGenerator:
         Returns:
             pd.Series: 标准化后的Wafer_ID序列
         """
+        if isinstance(wafer_id_series.dtype, pd.CategoricalDtype):
+            # 紧凑模式的 category 列：只转换类别，再按编码取值
+            categories = pd.Series(wafer_id_series.cat.categories, dtype=object)
+            standardized = self._standardize_wafer_id(categories)
+            codes = wafer_id_series.cat.codes.to_numpy()
+            if standardized is categories or (codes < 0).any():
+                return wafer_id_series.astype(object)
+            return pd.Series(standardized.to_numpy()[codes], index=wafer_id_series.index,
+                             name=wafer_id_series.name)
         try:
             # 尝试转换为整数
             if wafer_id_series.dtype == 'object':
@@ -949,7 +1135,7 @@ def batch_generate_csvs(lots: Dict[str, CPLot], output_dir: str) -> Dict[str, Di
     return results
 
 
-def generate_combined_csvs(lots: Dict[str, CPLot], output_dir: str, combined_name: str = "combined") -> Dict[str, str]:
+def generate_combined_csvs(lots: Mapping[str, CPLot], output_dir: str, combined_name: str = "combined") -> Dict[str, str]:
     """
     生成合并多批次的标准CSV文件
     
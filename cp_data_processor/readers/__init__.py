@@ -5,6 +5,9 @@
 from cp_data_processor.readers.base_reader import BaseReader
 from cp_data_processor.readers.cw_reader import CWReader
 from cp_data_processor.readers.dcp_reader import DCPReader
+from cp_data_processor.readers.dcp_file_scan import DCPFileScan
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache, get_parsed_file_cache
+from cp_data_processor.readers.excel_stream import SheetRowStream, ColumnSpec, collect_columns
 from cp_data_processor.readers.mex_reader import MEXReader
 from cp_data_processor.readers.excel_txt_reader import ExcelTXTReader
 from cp_data_processor.readers.reader_factory import create_reader
@@ -14,6 +17,12 @@ __all__ = [
     'BaseReader',
     'CWReader',
     'DCPReader',
+    'DCPFileScan',
+    'ParsedFileCache',
+    'get_parsed_file_cache',
+    'SheetRowStream',
+    'ColumnSpec',
+    'collect_columns',
     'MEXReader',
     'ExcelTXTReader',
     'create_reader',
@@ -8,6 +8,7 @@ import os
 import pandas as pd
 
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.stage_profiler import file_bytes
 
 
 class BaseReader(ABC):
@@ -50,6 +51,10 @@ class BaseReader(ABC):
         """
         pass
     
+    def input_bytes(self) -> int:
+        """所有输入文件的总字节数（性能报告中解析阶段的读入字节数）"""
+        return file_bytes(self.file_paths or [])
+    
     def get_file_extension(self, file_path: str) -> str:
         """获取文件扩展名（小写）"""
         _, ext = os.path.splitext(file_path)
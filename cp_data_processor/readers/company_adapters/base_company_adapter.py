@@ -5,10 +5,14 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
 import pandas as pd
 import logging
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.stage_profiler import profiled
+
+if TYPE_CHECKING:
+    from .file_probe import FileProbe
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +91,7 @@ class BaseCompanyAdapter(ABC):
             self.logger.error(f"数据格式验证失败: {e}")
             return False
     
+    @profiled("单位转换", rows=len)
     def convert_units(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         执行单位转换
@@ -182,6 +187,21 @@ class BaseCompanyAdapter(ABC):
         """
         pass
     
+    def can_process_probe(self, probe: 'FileProbe') -> bool:
+        """
+        基于共享的文件探测结果检查是否能处理文件
+        
+        默认回退到 can_process_file；需要读取文件内容的适配器应重写此方法，
+        直接使用探测结果中的工作表名称和首行内容，避免再次打开文件。
+        
+        Args:
+            probe: 文件探测结果
+            
+        Returns:
+            bool: 能处理返回True，否则返回False
+        """
+        return self.can_process_file(probe.file_path)
+    
     def standardize_data(self, lot: CPLot) -> CPLot:
         """
         标准化数据流程：字段映射 → 单位转换 → 数据验证
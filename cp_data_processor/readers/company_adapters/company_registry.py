@@ -6,15 +6,21 @@
 
 import os
 import importlib
-from typing import Dict, List, Optional, Type, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Type, Any, Tuple
 import logging
 from pathlib import Path
 
 from .base_company_adapter import BaseCompanyAdapter
 from .company_config import COMPANY_CONFIGS, detect_company_from_path, detect_company_from_filename
+from .file_probe import FileProbe
 
 logger = logging.getLogger(__name__)
 
+# 探测结果和识别结果缓存的最大文件数，超出后淘汰最久未使用的条目
+DETECTION_CACHE_SIZE = 4096
+
 
 class CompanyRegistry:
     """
@@ -28,6 +34,10 @@ class CompanyRegistry:
         """初始化注册管理器"""
         self._adapters: Dict[str, Type[BaseCompanyAdapter]] = {}
         self._instances: Dict[str, BaseCompanyAdapter] = {}
+        # 绝对路径 -> 探测结果 / ((文件大小, mtime_ns), 公司代码)
+        self._probes: "OrderedDict[str, FileProbe]" = OrderedDict()
+        self._detections: "OrderedDict[str, Tuple[Tuple[int, int], Optional[str]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()  # 批量读取时多个线程并发识别
         self.logger = logging.getLogger(__name__)
         
         # 自动加载已知的适配器
@@ -88,19 +98,90 @@ class CompanyRegistry:
         """
         return list(self._adapters.keys())
     
+    def get_file_probe(self, file_path: str) -> FileProbe:
+        """
+        获取文件的探测结果
+        
+        同一文件（路径、大小和修改时间均未变化）只探测一次，所有适配器共用。
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            FileProbe: 文件探测结果
+        """
+        key = os.path.abspath(file_path)
+        probe = FileProbe.from_file(file_path)
+        with self._cache_lock:
+            cached = self._probes.get(key)
+            if cached is not None and cached.signature == probe.signature and probe.exists:
+                self._probes.move_to_end(key)
+                return cached
+            if probe.exists:
+                self._remember(self._probes, key, probe)
+        return probe
+    
     def detect_company_from_file(self, file_path: str) -> Optional[str]:
         """
         从文件路径自动识别公司
         
+        识别结果按 (路径, 文件大小, 修改时间) 缓存，文件未变化时不再探测。
+        
         Args:
             file_path: 文件路径
             
         Returns:
             Optional[str]: 公司代码，如果无法识别返回None
         """
+        key = os.path.abspath(file_path)
+        probe = self.get_file_probe(file_path)
+        with self._cache_lock:
+            cached = self._detections.get(key)
+            if cached is not None and probe.exists and cached[0] == probe.signature:
+                self._detections.move_to_end(key)
+                return cached[1]
+        
+        company = self._detect_company(probe)
+        if probe.exists:
+            with self._cache_lock:
+                self._remember(self._detections, key, (probe.signature, company))
+        return company
+    
+    def adapter_can_process_file(self, company_code: str, file_path: str) -> bool:
+        """
+        使用共享的探测结果检查指定公司的适配器能否处理文件
+        
+        Args:
+            company_code: 公司代码
+            file_path: 文件路径
+            
+        Returns:
+            bool: 能处理返回True，否则返回False
+        """
+        adapter = self.get_company_adapter(company_code)
+        if not adapter:
+            return False
+        return adapter.can_process_probe(self.get_file_probe(file_path))
+    
+    def clear_detection_cache(self):
+        """清空探测结果和识别结果缓存"""
+        with self._cache_lock:
+            self._probes.clear()
+            self._detections.clear()
+    
+    @staticmethod
+    def _remember(cache: OrderedDict, key: str, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > DETECTION_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def _detect_company(self, probe: FileProbe) -> Optional[str]:
+        """按内容签名、路径、文件名、适配器的顺序识别公司"""
+        file_path = probe.file_path
         # 国宇 JUNO 文件有明确内容签名，优先于 Lion 过宽的 /data/ 路径规则。
         guoyu_adapter = self.get_company_adapter('GUOYU')
-        if guoyu_adapter and guoyu_adapter.can_process_file(file_path):
+        if guoyu_adapter and guoyu_adapter.can_process_probe(probe):
             self.logger.info(f"通过国宇内容签名识别公司: {file_path} -> GUOYU")
             return 'GUOYU'
 
@@ -117,10 +198,10 @@ class CompanyRegistry:
             self.logger.info(f"从文件名识别公司: {filename} -> {company}")
             return company
         
-        # 3. 尝试通过适配器的can_process_file方法识别
+        # 3. 尝试通过适配器的can_process_probe方法识别
         for company_code in self._adapters.keys():
             adapter = self.get_company_adapter(company_code)
-            if adapter and adapter.can_process_file(file_path):
+            if adapter and adapter.can_process_probe(probe):
                 self.logger.info(f"通过适配器识别公司: {file_path} -> {company_code}")
                 return company_code
         
@@ -0,0 +1,101 @@
+"""
+文件探测结果
+
+公司识别时各适配器共用的一次性探测：扩展名、文件大小与修改时间、文件头魔数，
+以及 Excel 文件的工作表名称和首个工作表的前若干行。工作表内容只在第一次被
+访问时读取，且只打开一次文件。
+"""
+
+import os
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from cp_data_processor.readers.excel_stream import Row, SheetRowStream, rows_to_frame
+
+logger = logging.getLogger(__name__)
+
+# 文件头魔数长度及 Excel 格式签名
+MAGIC_LENGTH = 8
+EXCEL_MAGIC = {
+    b'PK\x03\x04': 'xlsx',
+    b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1': 'xls',
+}
+# 读取首个工作表的行数，覆盖各厂商的头部识别区域
+PROBE_ROW_COUNT = 40
+
+
+@dataclass
+class FileProbe:
+    """
+    单个文件的探测结果。
+
+    文件不存在时 exists 为 False，signature 为 None，不会被缓存。
+    """
+    file_path: str
+    extension: str
+    signature: Optional[Tuple[int, int]] = None
+    magic: bytes = b''
+    _sheet_names: Optional[List[str]] = field(default=None, repr=False)
+    _head_rows: Optional[List[Row]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'FileProbe':
+        """读取文件状态和文件头魔数，工作表内容延迟到首次访问时读取"""
+        extension = os.path.splitext(file_path)[1].lower()
+        try:
+            stat = os.stat(file_path)
+            with open(file_path, 'rb') as f:
+                magic = f.read(MAGIC_LENGTH)
+        except OSError:
+            return cls(file_path=file_path, extension=extension)
+        return cls(
+            file_path=file_path,
+            extension=extension,
+            signature=(stat.st_size, stat.st_mtime_ns),
+            magic=magic,
+        )
+
+    @property
+    def exists(self) -> bool:
+        return self.signature is not None
+
+    @property
+    def excel_format(self) -> Optional[str]:
+        """按魔数判断的 Excel 格式（'xlsx' 或 'xls'），不是 Excel 文件时返回 None"""
+        for magic, excel_format in EXCEL_MAGIC.items():
+            if self.magic.startswith(magic):
+                return excel_format
+        return None
+
+    @property
+    def sheet_names(self) -> List[str]:
+        self._load_workbook_head()
+        return self._sheet_names
+
+    @property
+    def head_rows(self) -> List[Row]:
+        """首个工作表的前 PROBE_ROW_COUNT 行（单元格转换规则与 pd.read_excel 一致）"""
+        self._load_workbook_head()
+        return self._head_rows
+
+    @property
+    def head_frame(self) -> pd.DataFrame:
+        """head_rows 对应的 DataFrame，布局与 pd.read_excel(header=None, nrows=...) 相同"""
+        return rows_to_frame(self.head_rows)
+
+    def _load_workbook_head(self) -> None:
+        if self._head_rows is not None:
+            return
+        self._sheet_names, self._head_rows = [], []
+        if self.excel_format is None:
+            return
+        try:
+            with SheetRowStream(self.file_path, 0) as stream:
+                self._sheet_names = stream.sheet_names
+                self._head_rows = list(itertools.islice(stream, PROBE_ROW_COUNT))
+        except Exception as e:
+            logger.debug(f"探测工作表失败 {self.file_path}: {e}")
@@ -4,8 +4,10 @@ from pathlib import Path
 from typing import Dict
 
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 
 from .base_company_adapter import BaseCompanyAdapter
+from .file_probe import FileProbe
 
 
 class GUOYUAdapter(BaseCompanyAdapter):
@@ -14,6 +16,7 @@ class GUOYUAdapter(BaseCompanyAdapter):
     def __init__(self, config: Dict):
         super().__init__("GUOYU", config)
 
+    @profiled("适配转换", rows=lot_rows)
     def transform_to_standard_format(self, lot: CPLot) -> CPLot:
         if not self.validate_data_format(lot):
             raise ValueError("国宇 FRD 数据格式验证失败")
@@ -30,3 +33,14 @@ class GUOYUAdapter(BaseCompanyAdapter):
         from guoyu.guoyu_reader import GuoyuFRDReader
 
         return GuoyuFRDReader().can_read(str(path))
+
+    def can_process_probe(self, probe: FileProbe) -> bool:
+        """用探测到的首行内容识别 JUNO 签名，并登记到 Reader 的头部缓存。"""
+        if probe.extension not in {".xls", ".xlsx"} or probe.excel_format is None:
+            return False
+        from guoyu.guoyu_reader import remember_file_header
+
+        try:
+            return remember_file_header(probe.file_path, probe.head_frame).is_guoyu
+        except Exception:
+            return False
@@ -7,6 +7,7 @@ HH公司作为标准格式，适配器主要用于格式验证和兼容性处理
 from typing import Dict
 import logging
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from .base_company_adapter import BaseCompanyAdapter
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,7 @@ class HHAdapter(BaseCompanyAdapter):
         super().__init__('HH', config)
         self.logger = logging.getLogger(f"{__name__}.HH")
         
+    @profiled("适配转换", rows=lot_rows)
     def transform_to_standard_format(self, lot: CPLot) -> CPLot:
         """
         将HH格式转换为标准格式
@@ -11,6 +11,7 @@ from pathlib import Path
 
 from .base_company_adapter import BaseCompanyAdapter
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,7 @@ class JTAdapter(BaseCompanyAdapter):
         super().__init__('JT', config)
         self.logger = logging.getLogger(f"{__name__}.JT")
     
+    @profiled("适配转换", rows=lot_rows)
     def transform_to_standard_format(self, lot: CPLot) -> CPLot:
         """
         将JT格式转换为标准HH格式
@@ -10,6 +10,7 @@ import numpy as np
 from typing import List, Dict, Union, Optional, Tuple
 
 from cp_data_processor.readers.base_reader import BaseReader
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
 
 # 定义 CW 格式数据文件的列和行常量
@@ -45,6 +46,7 @@ class CWReader(BaseReader):
         self.multi_wafer = multi_wafer
         self.param_positions = {}  # 参数位置映射 {列索引: 参数索引}
     
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         """
         读取所有 CW 格式文件并返回一个填充好的 CPLot 对象。
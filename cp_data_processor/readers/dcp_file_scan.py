@@ -0,0 +1,159 @@
+"""
+DCP 文件单次扫描，读取并解码一次文件，供 DCPReader、批次 ID 提取和规格提取共用。
+"""
+
+import os
+import logging
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# DCP 文件固定结构（0-based 行索引）
+HEADER_LINE_INDEX = 6      # 标题行 "No.U X Y Bin ..."
+DATA_START_INDEX = 15      # 数据起始行（跳过 Limit 和 Bias 信息行）
+HEADER_ROW_COUNT = 20      # 头部区域行数，足以包含规格信息
+BIAS_ROW_COUNT = 6         # Bias 1 到 Bias 6
+
+# 与 DCPReader 历史行为一致的解码顺序
+DECODE_ENCODINGS = ('utf-8', 'latin1', 'gbk')
+
+
+def decode_dcp_bytes(content: bytes) -> tuple[str, str]:
+    """
+    按 utf-8、latin1、gbk 的顺序解码 DCP 文件内容。
+
+    Returns:
+        tuple[str, str]: (解码后的文本, 使用的编码)
+    """
+    for encoding in DECODE_ENCODINGS:
+        try:
+            return content.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    # 如果解码失败，强制使用latin1（不会引发解码错误）
+    logger.warning("无法使用标准编码解码，强制使用latin1替代字符")
+    return content.decode('latin1', errors='replace'), 'latin1'
+
+
+def _split_second_column(line: str) -> Optional[str]:
+    """按 DCPReader 的分隔符顺序取一行的第二列"""
+    for sep in ['\t', '\\t', ' ', ',']:
+        parts = line.split(sep)
+        if len(parts) >= 2:
+            return parts[1].strip()
+    return None
+
+
+@dataclass
+class DCPFileScan:
+    """
+    一个 DCP 文件的单次扫描结果。
+
+    文件只读取和解码一次，头部行、R2C2/R3C2 中的 LotID/WaferID、
+    Limit/Bias 行以及数据块都从同一份文本中获取。
+    """
+    file_path: str
+    encoding: str
+    line_count: int
+    lines: List[str] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def from_file(cls, file_path: str, header_only: bool = False) -> 'DCPFileScan':
+        """
+        读取并解码 DCP 文件。
+
+        Args:
+            file_path: DCP 文件路径
+            header_only: 仅读取头部区域（前 HEADER_ROW_COUNT 行），用于只需要规格信息的场景
+
+        Raises:
+            OSError: 文件无法读取
+        """
+        with open(file_path, 'rb') as f:
+            if header_only:
+                raw_lines = []
+                for raw_line in f:
+                    raw_lines.append(raw_line)
+                    if len(raw_lines) >= HEADER_ROW_COUNT:
+                        break
+                content = b''.join(raw_lines)
+            else:
+                content = f.read()
+
+        decoded, encoding = decode_dcp_bytes(content)
+        lines = decoded.splitlines()
+        logger.debug(f"扫描文件 {os.path.basename(file_path)}: 编码 {encoding}, {len(lines)} 行")
+        return cls(file_path=file_path, encoding=encoding, line_count=len(lines), lines=lines)
+
+    def without_data(self) -> 'DCPFileScan':
+        """返回只保留头部区域的副本，数据行被释放，便于长期持有"""
+        return replace(self, lines=self.lines[:HEADER_ROW_COUNT])
+
+    @property
+    def header_rows(self) -> List[str]:
+        """头部区域的原始行（最多 HEADER_ROW_COUNT 行）"""
+        return self.lines[:HEADER_ROW_COUNT]
+
+    @property
+    def lot_id_r2c2(self) -> Optional[str]:
+        """第二行第二列的 LotID"""
+        return _split_second_column(self.lines[1]) if len(self.lines) >= 2 else None
+
+    @property
+    def wafer_id_r3c2(self) -> Optional[str]:
+        """第三行第二列的 WaferID"""
+        return _split_second_column(self.lines[2]) if len(self.lines) >= 3 else None
+
+    @property
+    def header_line(self) -> Optional[str]:
+        """数据块的标题行（固定位于第7行）"""
+        return self.lines[HEADER_LINE_INDEX] if self.line_count > HEADER_LINE_INDEX else None
+
+    @property
+    def data_lines(self) -> List[str]:
+        """数据行（从第16行开始）"""
+        return self.lines[DATA_START_INDEX:] if self.line_count > DATA_START_INDEX else []
+
+    @property
+    def data_block(self) -> Optional[str]:
+        """标题行与非空数据行拼接成的文本，可直接交给 pandas 解析"""
+        if self.header_line is None:
+            return None
+        return self.header_line + '\n' + '\n'.join([line for line in self.data_lines if line.strip()])
+
+    @property
+    def param_row_index(self) -> int:
+        """在头部区域中查找参数标题行 ("No.U X Y Bin ...")，未找到时返回 -1"""
+        for i, line in enumerate(self.header_rows):
+            parts = line.strip().split('\t')
+            if len(parts) > 4 and parts[0].strip() == "No.U" and \
+               parts[1].strip() == "X" and parts[2].strip() == "Y" and \
+               parts[3].strip() == "Bin":
+                return i
+        return -1
+
+    def _header_row(self, index: int) -> Optional[str]:
+        rows = self.header_rows
+        return rows[index] if 0 <= index < len(rows) else None
+
+    @property
+    def limit_u_row(self) -> Optional[str]:
+        """LimitU 行（参数标题行的下一行）"""
+        index = self.param_row_index
+        return self._header_row(index + 1) if index >= 0 else None
+
+    @property
+    def limit_l_row(self) -> Optional[str]:
+        """LimitL 行（参数标题行之后第二行）"""
+        index = self.param_row_index
+        return self._header_row(index + 2) if index >= 0 else None
+
+    @property
+    def bias_rows(self) -> List[str]:
+        """Bias 1 到 Bias 6 所在的行（头部区域不足时可能少于 6 行）"""
+        index = self.param_row_index
+        if index < 0:
+            return []
+        start = index + 3
+        return self.header_rows[start:start + BIAS_ROW_COUNT]
@@ -8,10 +8,16 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Union, Optional, Tuple
 import io # 导入io模块
+import csv
 import logging # 导入日志模块
 import sys # 添加系统模块
+from functools import partial
 
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.readers.base_reader import BaseReader
+from cp_data_processor.readers.dcp_file_scan import DCPFileScan
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache, get_parsed_file_cache
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
 
 logger = logging.getLogger(__name__) # 获取日志记录器
@@ -22,24 +28,44 @@ handler = logging.StreamHandler(sys.stdout)
 handler.setLevel(logging.DEBUG)
 logger.addHandler(handler)
 
+# 除空格、制表符和换行之外的空白字符：python 引擎的 \s+ 会把它们当作分隔符而 C 引擎不会
+_UNSAFE_WHITESPACE = re.compile(r'[^\S \t\n]')
+
+# 解析缓存命名空间，数据块解析逻辑变化时需要升级版本号
+PARSED_CACHE_NAMESPACE = 'dcp-v1'
+
 class DCPReader(BaseReader):
     """
     DCP 格式 CP 数据读取器。
     DCP 格式是一种制表符分隔的文本文件格式。
     """
     
-    def __init__(self, file_paths: Union[str, List[str]], pass_bin: int = 1):
+    def __init__(self, file_paths: Union[str, List[str]], pass_bin: int = 1,
+                 fast_parse: bool = True, parallel: Optional[bool] = None,
+                 max_workers: Optional[int] = None, cache: Optional[ParsedFileCache] = None):
         """
         初始化 DCP 格式数据读取器
         
         Args:
             file_paths: 要读取的文件路径，可以是单个字符串或字符串列表
             pass_bin: 表示通过的 Bin 值，默认为 1
+            fast_parse: 是否优先使用 C 引擎快速解析数据块，默认为 True；
+                快速解析失败时自动回退到兼容解析
+            parallel: 是否使用进程池并行解析文件。None 表示跟随
+                PerformanceConfig.ENABLE_PARALLEL，False 强制串行
+            max_workers: 进程数上限，默认取 PerformanceConfig.MAX_WORKERS
+            cache: 解析结果磁盘缓存，None 表示使用全局缓存 get_parsed_file_cache()
         """
         super().__init__(file_paths, pass_bin)
         self.header_map = {}  # 列标题映射到索引
         self.param_columns = []  # 参数列索引列表
+        self.fast_parse = fast_parse
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.cache = cache
+        self.file_scans: Dict[str, DCPFileScan] = {}  # 文件路径 -> 头部扫描结果
     
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         """
         读取所有 DCP 格式文件并返回一个填充好的 CPLot 对象。
@@ -53,9 +79,13 @@ class DCPReader(BaseReader):
         # 创建新的 CPLot 对象，使用文件夹名称作为批次ID
         self.lot = CPLot(lot_id=batch_id, pass_bin=self.pass_bin) 
         
-        for file_path in self.file_paths:
-            lot_id_from_r2c2, wafer_id_from_r3c2 = self._extract_ids_from_r2c2_r2c3(file_path)
-            self._extract_from_file(file_path, self.lot, lot_id_from_r2c2, wafer_id_from_r3c2)
+        self.file_scans = {}
+        workers = self._resolve_workers()
+        if workers > 1:
+            self._read_parallel(workers)
+        else:
+            self._read_serial()
+        self._get_cache().flush()
 
         # 更新计数并合并数据
         self.lot.update_counts()
@@ -63,6 +93,104 @@ class DCPReader(BaseReader):
         
         return self.lot
     
+    def _resolve_workers(self) -> int:
+        """确定并行解析使用的进程数，返回 1 表示串行"""
+        if len(self.file_paths) < 2:
+            return 1
+        workers = ParallelProcessor('process', self.parallel, self.max_workers).workers
+        return min(workers, len(self.file_paths))
+    
+    def _read_serial(self) -> None:
+        """在当前进程中按顺序读取所有文件，内容未变的文件直接使用解析缓存"""
+        cache = self._get_cache()
+        for file_path in self.file_paths:
+            parsed = self._load_cached_file(cache, file_path)
+            if parsed is None:
+                parsed = self._parse_file(file_path)
+                self._store_cached_file(cache, file_path, *parsed)
+            self._add_parsed_file(file_path, *parsed)
+    
+    def _read_parallel(self, workers: int) -> None:
+        """
+        在进程池中解析文件，再按原始文件顺序合并到 self.lot。
+        
+        工作进程只负责读取、解码和解析数据块；参数信息和晶圆对象仍在主进程中
+        按文件顺序创建，因此晶圆顺序与串行读取完全一致，调用方基于文件顺序的
+        lot_id 分配（如 clean_dcp_data 的 subdir_file_ranges）保持正确。
+        命中解析缓存的文件不再分发给工作进程；进程池不可用时自动回退到串行读取。
+        """
+        cache = self._get_cache()
+        results = {file_path: self._load_cached_file(cache, file_path) for file_path in self.file_paths}
+        pending = [file_path for file_path, parsed in results.items() if parsed is None]
+        
+        if pending:
+            logger.info(f"使用 {workers} 个进程并行解析 {len(pending)} 个DCP文件"
+                        f"（{len(self.file_paths) - len(pending)} 个命中解析缓存）")
+            try:
+                with ParallelProcessor('process', parallel=True, max_workers=min(workers, len(pending))) as processor:
+                    parsed_list = processor.map_values(partial(_parse_dcp_file, fast_parse=self.fast_parse), pending)
+            except Exception as e:
+                logger.warning(f"并行解析失败: {e}，回退到串行读取")
+                self._read_serial()
+                return
+            for file_path, parsed in zip(pending, parsed_list):
+                self._store_cached_file(cache, file_path, *parsed)
+                results[file_path] = parsed
+        
+        for file_path in self.file_paths:
+            self._add_parsed_file(file_path, *results[file_path])
+    
+    def _get_cache(self) -> ParsedFileCache:
+        return self.cache if self.cache is not None else get_parsed_file_cache()
+    
+    def _load_cached_file(self, cache: ParsedFileCache, file_path: str
+                          ) -> Optional[Tuple[DCPFileScan, pd.DataFrame]]:
+        """从解析缓存恢复头部扫描结果和数据块 DataFrame，未命中时返回 None"""
+        cached = cache.load(file_path, PARSED_CACHE_NAMESPACE)
+        if cached is None:
+            return None
+        logger.info(f"解析缓存命中，跳过解析: {os.path.basename(file_path)}")
+        header_scan = DCPFileScan(file_path=file_path, encoding=cached.meta['encoding'],
+                                  line_count=cached.meta['line_count'], lines=cached.meta['header_rows'])
+        return header_scan, cached.frames['data']
+    
+    def _store_cached_file(self, cache: ParsedFileCache, file_path: str,
+                           header_scan: Optional[DCPFileScan], df: Optional[pd.DataFrame]) -> None:
+        """把成功解析的文件写入解析缓存，无效文件不缓存"""
+        if header_scan is None or df is None:
+            return
+        cache.store(file_path, PARSED_CACHE_NAMESPACE, {'data': df}, {
+            'encoding': header_scan.encoding,
+            'line_count': header_scan.line_count,
+            'header_rows': header_scan.header_rows,
+        })
+    
+    def _parse_file(self, file_path: str) -> Tuple[Optional[DCPFileScan], Optional[pd.DataFrame]]:
+        """
+        扫描并解析单个文件，不修改任何 CPLot 状态（可在工作进程中执行）。
+        
+        Returns:
+            (头部扫描结果, 数据块 DataFrame)，文件无法读取时均为 None，数据无效时 DataFrame 为 None
+        """
+        scan = self._scan_file(file_path)
+        if scan is None:
+            return None, None
+        logger.info(f"开始处理文件: {os.path.basename(file_path)}")
+        df = self._parse_scan(scan)
+        # 只保留头部信息，供规格提取复用，数据行随扫描对象释放
+        return scan.without_data(), df
+    
+    def _add_parsed_file(self, file_path: str, header_scan: Optional[DCPFileScan],
+                         df: Optional[pd.DataFrame]) -> None:
+        """确定晶圆ID并把解析结果加入 self.lot；晶圆ID依赖文件路径，因此不进入缓存"""
+        if header_scan is None:
+            return
+        self.file_scans[file_path] = header_scan
+        lot_id_from_r2c2, wafer_id_from_r3c2 = self._ids_from_scan(header_scan)
+        current_wafer_id = self._resolve_wafer_id(file_path, lot_id_from_r2c2, wafer_id_from_r3c2)
+        if df is not None:
+            self._add_wafer_from_dataframe(df, current_wafer_id, file_path, self.lot)
+    
     def _extract_batch_id_from_folder(self, file_path: str) -> str:
         """
         从文件路径中提取批次ID（文件夹名称），使用新的提取规则
@@ -114,172 +242,104 @@ class DCPReader(BaseReader):
         
         return product_name, lot_id
     
-    def _extract_ids_from_r2c2_r2c3(self, file_path: str) -> Tuple[Optional[str], Optional[str]]:
-        """
-        从文件的第二行第二列和第三行第二列提取LotID和WaferID。
-        
-        Returns:
-            Tuple[Optional[str], Optional[str]]: (lot_id_r2c2, wafer_id_r3c2)
-        """
-        lot_id_r2c2 = None
-        wafer_id_r3c2 = None
+    def _scan_file(self, file_path: str) -> Optional[DCPFileScan]:
+        """读取并解码一次文件，失败时记录错误并返回 None"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                try:
-                    lines = f.readlines()
-                except Exception as e:
-                    logger.error(f"读取文件时出错: {e}，尝试二进制读取")
-                    with open(file_path, 'rb') as f2:
-                        content = f2.read()
-                        # 尝试不同编码
-                        for encoding in ['utf-8', 'latin1', 'gbk']:
-                            try:
-                                lines = content.decode(encoding).splitlines()
-                                logger.info(f"成功使用{encoding}解码文件")
-                                break
-                            except UnicodeDecodeError:
-                                continue
-                        else:
-                            # 如果所有编码都失败，使用replace模式
-                            lines = content.decode('latin1', errors='replace').splitlines()
-            
-            logger.debug(f"文件的前三行内容：")
-            for i in range(min(3, len(lines))):
-                logger.debug(f"行 {i+1}: {lines[i]}")
-            
-            # 提取第二行第二列的LotID
-            if len(lines) >= 2:
-                # 尝试不同的分隔符
-                for sep in ['\t', '\\t', ' ', ',']:
-                    parts = lines[1].split(sep)
-                    if len(parts) >= 2:
-                        lot_id_r2c2 = parts[1].strip()
-                        logger.debug(f"使用分隔符 '{sep}' 从R2C2提取到LotID: {lot_id_r2c2}")
-                        break
-            
-            # 提取第三行第二列的WaferID
-            if len(lines) >= 3:
-                # 尝试不同的分隔符
-                for sep in ['\t', '\\t', ' ', ',']:
-                    parts = lines[2].split(sep)
-                    if len(parts) >= 2:
-                        wafer_id_r3c2 = parts[1].strip()
-                        logger.debug(f"使用分隔符 '{sep}' 从R3C2提取到WaferID: {wafer_id_r3c2}")
-                        break
-            
-            if len(lines) < 3:
-                logger.warning(f"文件 {os.path.basename(file_path)} 行数不足3行，无法提取完整ID信息。")
-
+            return DCPFileScan.from_file(file_path)
         except Exception as e:
-            logger.error(f"从文件 {os.path.basename(file_path)} 提取ID时出错: {e}")
+            logger.exception(f"处理文件 {file_path} 时出错: {str(e)}")
+            return None
+    
+    def _ids_from_scan(self, scan: DCPFileScan) -> Tuple[Optional[str], Optional[str]]:
+        """从扫描结果的第二行第二列和第三行第二列取 LotID 和 WaferID"""
+        logger.debug(f"文件的前三行内容：")
+        for i, line in enumerate(scan.lines[:3]):
+            logger.debug(f"行 {i+1}: {line}")
+        
+        lot_id_r2c2 = scan.lot_id_r2c2
+        wafer_id_r3c2 = scan.wafer_id_r3c2
+        logger.debug(f"从R2C2提取到LotID: {lot_id_r2c2}, 从R3C2提取到WaferID: {wafer_id_r3c2}")
+        
+        if scan.line_count < 3:
+            logger.warning(f"文件 {os.path.basename(scan.file_path)} 行数不足3行，无法提取完整ID信息。")
         
         return lot_id_r2c2, wafer_id_r3c2
     
-    def _extract_from_file(self, file_path: str, lot: CPLot, lot_id_r2c2: Optional[str], wafer_id_r3c2: Optional[str]) -> None:
-        """
-        从单个 DCP 格式文件中提取数据到 CPLot 对象。
-        使用从R2C2/R2C3预先提取的ID。
-        """
+    def _extract_from_file(self, file_path: str, lot: CPLot) -> None:
+        """从单个 DCP 文件提取数据到 lot（BaseReader 的接口，与 read() 使用同一解析流程，不经解析缓存）"""
+        self.lot = lot
+        self._add_parsed_file(file_path, *self._parse_file(file_path))
+    
+    def _resolve_wafer_id(self, file_path: str, lot_id_r2c2: Optional[str], wafer_id_r3c2: Optional[str]) -> str:
+        """根据 R2C2 的 LotID 和 R3C2 的 WaferID 确定晶圆ID，缺失时回退到文件名"""
         file_basename = os.path.basename(file_path)
-        logger.info(f"开始处理文件: {file_basename}")
+        
+        # --- LotID 和 WaferID 从参数传入，不再依赖文件名提取 ---
+        current_wafer_id = wafer_id_r3c2
 
+        if not current_wafer_id: # 如果从R2C3未能提取到wafer_id，则尝试从文件名后备
+            current_wafer_id = self.extract_wafer_id(file_path)
+            logger.warning(f"未能从 {file_basename} 的R2C3提取WaferID，回退到从文件名提取: {current_wafer_id}")
+        
+        # 格式化wafer_id为"250303@203_001"形式
+        if wafer_id_r3c2 and lot_id_r2c2:
+            # 提取lot_id中的编号部分
+            lot_parts = lot_id_r2c2.split('-')
+            if len(lot_parts) > 2 and '@' in lot_parts[2]:
+                wafer_part = lot_parts[2].split('@')[0]
+                site_part = lot_parts[2].split('@')[1]
+                formatted_wafer_id = f"{wafer_part}@{site_part}_{wafer_id_r3c2.zfill(3)}"
+                current_wafer_id = formatted_wafer_id
+        
+        if not lot_id_r2c2:
+             logger.warning(f"未能从 {file_basename} 的R2C2提取LotID。CPWafer.source_lot_id 将为 None。")
+        
+        return current_wafer_id
+    
+    def _parse_scan(self, scan: DCPFileScan) -> Optional[pd.DataFrame]:
+        """
+        把扫描结果中的数据块解析为列名已清理的 DataFrame。
+        
+        Returns:
+            Optional[pd.DataFrame]: 解析结果，文件结构无效或解析失败时返回 None
+        """
         try:
-            # 直接以二进制模式读取文件，强制不使用解码
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
-            # 尝试解码
-            decoded = None
-            for encoding in ['utf-8', 'latin1', 'gbk']:
-                try:
-                    decoded = content.decode(encoding)
-                    logger.info(f"成功使用 {encoding} 解码")
-                    break
-                except:
-                    continue
-            
-            if decoded is None:
-                # 如果解码失败，强制使用latin1（不会引发解码错误）
-                decoded = content.decode('latin1', errors='replace')
-                logger.warning(f"无法使用标准编码解码，强制使用latin1替代字符")
+            logger.info(f"成功使用 {scan.encoding} 解码")
             
-            # 按行分割
-            lines = decoded.splitlines()
-            line_count = len(lines)
+            line_count = scan.line_count
             
             if line_count < 16: # 需要至少16行（根据您提供的示例）
                 logger.error(f"文件行数不足: {line_count}行")
-                return
-            
-            # --- LotID 和 WaferID 从参数传入，不再依赖文件名提取 ---
-            current_wafer_id = wafer_id_r3c2
-
-            if not current_wafer_id: # 如果从R2C3未能提取到wafer_id，则尝试从文件名后备
-                current_wafer_id = self.extract_wafer_id(file_path)
-                logger.warning(f"未能从 {file_basename} 的R2C3提取WaferID，回退到从文件名提取: {current_wafer_id}")
-            
-            # 格式化wafer_id为"250303@203_001"形式
-            if wafer_id_r3c2 and lot_id_r2c2:
-                # 提取lot_id中的编号部分
-                lot_parts = lot_id_r2c2.split('-')
-                if len(lot_parts) > 2 and '@' in lot_parts[2]:
-                    wafer_part = lot_parts[2].split('@')[0]
-                    site_part = lot_parts[2].split('@')[1]
-                    formatted_wafer_id = f"{wafer_part}@{site_part}_{wafer_id_r3c2.zfill(3)}"
-                    current_wafer_id = formatted_wafer_id
-            
-            if not lot_id_r2c2:
-                 logger.warning(f"未能从 {file_basename} 的R2C2提取LotID。CPWafer.source_lot_id 将为 None。")
+                return None
 
             # --- 调整表头和数据位置基于提供的示例 ---
             # 源数据中：
             # 第1行(索引0)为 "Program name..."
             # 标题行 ("No.U X Y Bin...") 实际为文件的第7行 (索引6)
             # 数据从文件的第16行 (索引15) 开始 (跳过Limit和Bias信息行)
-            header_line_index = 6 
-            data_start_index = 15
-
-            header_line = lines[header_line_index] if line_count > header_line_index else None
-            data_lines = lines[data_start_index:] if line_count > data_start_index else []
+            header_line = scan.header_line
+            data_lines = scan.data_lines
             
             if not header_line:
                 logger.error("找不到表头行")
-                return
+                return None
                 
             if not data_lines:
                 logger.error("找不到数据行")
-                return
+                return None
             
             # 日志输出前几行数据，帮助调试
             logger.debug(f"表头行: {header_line[:100]}...")
             for i, line in enumerate(data_lines[:3]):
                 logger.debug(f"数据行 {i+1}: {line[:100]}...")
             
-            # 准备给Pandas的内容
-            cleaned_data = header_line + '\n' + '\n'.join([line for line in data_lines if line.strip()])
-            
-            # 创建StringIO对象
-            csv_data = io.StringIO(cleaned_data)
-            
-            # 尝试使用pandas读取数据
-            try:
-                # 优先尝试使用正则表达式匹配一个或多个空白字符作为分隔符
-                csv_data.seek(0) # 确保每次尝试前重置 StringIO 对象
-                df = pd.read_csv(csv_data, sep=r'\s+', engine='python')
-                logger.info(f"成功使用 sep='\\s+' 读取数据，形状: {df.shape}")
-            except Exception as e_regex:
-                logger.warning(f"使用 sep='\\s+' 读取失败: {e_regex}。尝试使用 sep='\\t'...")
-                try:
-                    csv_data.seek(0)
-                    df = pd.read_csv(csv_data, sep='\t', engine='python') # engine='python' 可以更好地处理复杂情况
-                    logger.info(f"成功使用 sep='\\t' 读取数据，形状: {df.shape}")
-                except Exception as e_tab:
-                    logger.error(f"使用 sep='\\t' 也失败: {e_tab}。Pandas无法读取数据。")
-                    return
+            df = self._parse_data_block(scan.data_block)
+            if df is None:
+                return None
             
             if df.empty:
                 logger.error("Pandas返回了空DataFrame")
-                return
+                return None
                 
             # 处理列名问题：确保所有列都有名称
             df.columns = [f"Col{i}" if not col or pd.isna(col) else col for i, col in enumerate(df.columns)]
@@ -288,7 +348,15 @@ class DCPReader(BaseReader):
             df.columns = df.columns.str.strip()
             
             logger.info(f"成功读取数据，形状: {df.shape}")
-            
+            return df
+                
+        except Exception as e:
+            logger.exception(f"处理文件 {scan.file_path} 时出错: {str(e)}")
+            return None
+    
+    def _add_wafer_from_dataframe(self, df: pd.DataFrame, current_wafer_id: str, file_path: str, lot: CPLot) -> None:
+        """按文件顺序把解析好的数据加入 CPLot：首个文件确定参数信息，再创建晶圆"""
+        try:
             # 初始化参数信息
             if lot.param_count == 0:
                 self._setup_header_map(df)
@@ -309,6 +377,74 @@ class DCPReader(BaseReader):
             logger.exception(f"处理文件 {file_path} 时出错: {str(e)}")
             return
     
+    def _parse_data_block(self, cleaned_data: str) -> Optional[pd.DataFrame]:
+        """
+        将表头行和数据行解析为 DataFrame。
+        
+        优先使用 C 引擎一次性解析整个数据块；文本中含有引号或非 ASCII 空白、
+        或者 C 引擎解析失败时，回退到原有的 python 引擎解析，保证结果一致。
+        
+        Args:
+            cleaned_data: 表头行与非空数据行拼接后的文本
+            
+        Returns:
+            Optional[pd.DataFrame]: 解析结果，全部解析方式失败时返回 None
+        """
+        if self.fast_parse and self._can_fast_parse(cleaned_data):
+            try:
+                # python 引擎的正则分隔符不处理引号，这里用 QUOTE_NONE 保持一致；
+                # low_memory=False 避免分块推断导致列类型与 python 引擎不同
+                df = pd.read_csv(io.StringIO(cleaned_data), sep=r'\s+', engine='c',
+                                 quoting=csv.QUOTE_NONE, low_memory=False)
+                logger.info(f"成功使用 C 引擎快速解析数据，形状: {df.shape}")
+                return df
+            except Exception as e_fast:
+                logger.warning(f"C 引擎快速解析失败: {e_fast}，回退到兼容解析")
+        
+        # 创建StringIO对象
+        csv_data = io.StringIO(cleaned_data)
+        
+        # 尝试使用pandas读取数据
+        try:
+            # 优先尝试使用正则表达式匹配一个或多个空白字符作为分隔符
+            csv_data.seek(0) # 确保每次尝试前重置 StringIO 对象
+            df = pd.read_csv(csv_data, sep=r'\s+', engine='python')
+            logger.info(f"成功使用 sep='\\s+' 读取数据，形状: {df.shape}")
+        except Exception as e_regex:
+            logger.warning(f"使用 sep='\\s+' 读取失败: {e_regex}。尝试使用 sep='\\t'...")
+            try:
+                csv_data.seek(0)
+                df = pd.read_csv(csv_data, sep='\t', engine='python') # engine='python' 可以更好地处理复杂情况
+                logger.info(f"成功使用 sep='\\t' 读取数据，形状: {df.shape}")
+            except Exception as e_tab:
+                logger.error(f"使用 sep='\\t' 也失败: {e_tab}。Pandas无法读取数据。")
+                return None
+        return df
+    
+    @staticmethod
+    def _can_fast_parse(cleaned_data: str) -> bool:
+        """判断数据块能否安全地使用 C 引擎解析（只含空格、制表符作为空白，且不含引号）"""
+        return '"' not in cleaned_data and _UNSAFE_WHITESPACE.search(cleaned_data) is None
+    
+    @staticmethod
+    def _to_float_array(values: np.ndarray) -> np.ndarray:
+        """
+        将一列参数值批量转换为 float64。
+        
+        数值列直接整体转换；对象列先尝试整体转换（numpy 对每个元素调用 float()，
+        结果与逐个转换完全一致），存在无法转换的值时再逐个转换并将其置为 NaN。
+        """
+        try:
+            return np.asarray(values).astype(np.float64)
+        except (ValueError, TypeError):
+            float_values = []
+            for val in values:
+                try:
+                    float_values.append(float(val))
+                except (ValueError, TypeError):
+                    float_values.append(np.nan)
+            return np.array(float_values)
+    
     def _setup_header_map(self, df: pd.DataFrame) -> None:
         """设置列标题映射和参数列列表"""
         self.header_map = {}
@@ -467,16 +603,8 @@ class DCPReader(BaseReader):
             if i < len(self.param_columns) and self.param_columns[i] < len(wafer_df.columns):
                 col_name = wafer_df.columns[self.param_columns[i]]
                 if col_name in wafer_df.columns:
-                    # 提取参数值并转换为浮点数
-                    values = wafer_df[col_name].values
-                    float_values = []
-                    for val in values:
-                        try:
-                            float_values.append(float(val))
-                        except (ValueError, TypeError):
-                            float_values.append(np.nan)
-                    
-                    param_data[param.id] = np.array(float_values)
+                    # 提取参数值并批量转换为浮点数
+                    param_data[param.id] = self._to_float_array(wafer_df[col_name].values)
         
         # 添加No.U列，默认为1
         if 'No.U' not in param_data:
@@ -531,3 +659,14 @@ class DCPReader(BaseReader):
         count = name_dict[base_name] + 1
         name_dict[base_name] = count
         return f"{base_name}{count}"
+
+
+def _parse_dcp_file(file_path: str, fast_parse: bool = True) -> Tuple[Optional[DCPFileScan], Optional[pd.DataFrame]]:
+    """
+    进程池工作函数：扫描并解析单个 DCP 文件。
+    
+    Returns:
+        (头部扫描结果, 数据块 DataFrame)，与 DCPReader._parse_file 一致
+    """
+    reader = DCPReader(file_path, fast_parse=fast_parse, parallel=False)
+    return reader._parse_file(file_path)
@@ -0,0 +1,455 @@
+"""
+Excel 工作表流式读取，供厂商 Excel 读取器共用。
+
+pd.read_excel 会先把整张工作表转换成逐单元格的 Python 列表，再交给文本解析器
+生成 DataFrame，10 万行的工作表峰值内存是最终结果的数倍。这里按行迭代工作表
+（.xlsx 使用 openpyxl 只读模式，.xls 使用 xlrd 按需加载），调用方在已知的块边界
+（如 Serial# 表头、DUT_DATA 末尾）停止，需要的列直接写入类型化的 NumPy 缓冲区。
+
+单元格转换规则与 pandas 的 Excel 引擎一致：空单元格、错误值和 pandas 默认的
+NA 字符串视为缺失，整数值的浮点数转换为 int，.xls 日期转换为 datetime。
+与 pd.read_excel 一样，工作表末尾的空行不计入数据（drop_trailing_blank_rows），
+整列的类型推断见 infer_object_column。
+"""
+
+import math
+import logging
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 与 pandas.read_excel 默认 na_values 一致的缺失值字符串
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+# openpyxl 在 values_only 模式下以字符串返回的 Excel 错误值
+EXCEL_ERROR_STRINGS = frozenset([
+    '#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A',
+])
+# 缓冲区每块的行数
+DEFAULT_CHUNK_ROWS = 16384
+
+Row = Tuple[object, ...]
+
+
+def _normalize_xlsx_cell(value):
+    """按 pandas openpyxl 引擎的规则转换单元格值"""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        if value in NA_STRINGS or value in EXCEL_ERROR_STRINGS:
+            return np.nan
+        return value
+    if isinstance(value, float):
+        if math.isfinite(value) and value == int(value):
+            return int(value)
+        return value
+    return value
+
+
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+
+def is_xls_file(file_path: str) -> bool:
+    """按文件头判断是否为 .xls（OLE2）格式，与 pandas 一样不依赖扩展名"""
+    with open(file_path, 'rb') as f:
+        return f.read(len(XLS_MAGIC)) == XLS_MAGIC
+
+
+class SheetRowStream:
+    """
+    按行迭代一张工作表，用作上下文管理器以确保文件句柄被释放。
+
+    Args:
+        file_path: .xlsx/.xlsm 或 .xls 文件路径
+        sheet: 迭代时默认读取的工作表名称或从 0 开始的序号；同一工作簿的其他工作表
+            用 rows(sheet) 读取，不再重新打开文件
+    """
+
+    def __init__(self, file_path: str, sheet: Union[str, int] = 0):
+        self.file_path = file_path
+        self.sheet = sheet
+        self._book = None
+        self._is_xls = None
+
+    def __enter__(self) -> 'SheetRowStream':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._book is None:
+            return
+        if self._is_xls:
+            self._book.release_resources()
+        else:
+            self._book.close()
+        self._book = None
+
+    def _open(self):
+        if self._book is None:
+            self._is_xls = is_xls_file(self.file_path)
+            if self._is_xls:
+                import xlrd
+                self._book = xlrd.open_workbook(self.file_path, on_demand=True)
+            else:
+                from openpyxl import load_workbook
+                self._book = load_workbook(self.file_path, read_only=True, data_only=True, keep_links=False)
+        return self._book
+
+    @property
+    def sheet_names(self) -> List[str]:
+        book = self._open()
+        return book.sheet_names() if self._is_xls else list(book.sheetnames)
+
+    def __iter__(self) -> Iterator[Row]:
+        return self.rows()
+
+    def rows(self, sheet: Union[str, int, None] = None) -> Iterator[Row]:
+        """按行迭代指定工作表，None 表示构造时的 sheet"""
+        self._open()
+        sheet = self.sheet if sheet is None else sheet
+        return self._iter_xls_rows(sheet) if self._is_xls else self._iter_xlsx_rows(sheet)
+
+    def _iter_xlsx_rows(self, sheet: Union[str, int]) -> Iterator[Row]:
+        if isinstance(sheet, int):
+            worksheet = self._book.worksheets[sheet]
+        else:
+            worksheet = self._book[sheet]
+        # 只读模式下部分导出工具写入的维度信息不可靠，与 pandas 一样重新计算
+        worksheet.reset_dimensions()
+        for row in worksheet.iter_rows(values_only=True):
+            yield tuple(_normalize_xlsx_cell(value) for value in row)
+
+    def _iter_xls_rows(self, sheet: Union[str, int]) -> Iterator[Row]:
+        if isinstance(sheet, int):
+            worksheet = self._book.sheet_by_index(sheet)
+        else:
+            worksheet = self._book.sheet_by_name(sheet)
+        datemode = self._book.datemode
+        for index in range(worksheet.nrows):
+            yield tuple(
+                self._normalize_xls_cell(value, cell_type, datemode)
+                for value, cell_type in zip(worksheet.row_values(index), worksheet.row_types(index))
+            )
+
+    @staticmethod
+    def _normalize_xls_cell(value, cell_type: int, datemode: int):
+        """按 pandas xlrd 引擎的规则转换单元格值"""
+        import xlrd
+
+        if cell_type in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return np.nan
+        if cell_type == xlrd.XL_CELL_NUMBER:
+            if math.isfinite(value) and value == int(value):
+                return int(value)
+            return value
+        if cell_type == xlrd.XL_CELL_BOOLEAN:
+            return bool(value)
+        if cell_type == xlrd.XL_CELL_DATE:
+            try:
+                converted = xlrd.xldate.xldate_as_datetime(value, datemode)
+            except OverflowError:
+                return value
+            # Excel 不区分日期和时间，纪元当天的值按时间处理
+            year = converted.timetuple()[0:3]
+            if (not datemode and year == (1899, 12, 31)) or (datemode and year == (1904, 1, 1)):
+                return time(converted.hour, converted.minute, converted.second, converted.microsecond)
+            return converted
+        if isinstance(value, str) and value in NA_STRINGS:
+            return np.nan
+        return value
+
+
+def read_until(rows: Iterator[Row], predicate: Callable[[Row], bool]) -> Tuple[List[Row], bool]:
+    """
+    读取行直到 predicate 命中（包含命中的行）。
+
+    Returns:
+        tuple[list, bool]: (已读取的行, 是否命中)；未命中时迭代器已耗尽
+    """
+    collected = []
+    for row in rows:
+        collected.append(row)
+        if predicate(row):
+            return collected, True
+    return collected, False
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def trimmed_width(row: Row) -> int:
+    """去掉行尾缺失单元格后的行宽，pandas 按所有行的最大值补齐列数"""
+    width = len(row)
+    while width and _is_missing(row[width - 1]):
+        width -= 1
+    return width
+
+
+def drop_trailing_blank_rows(rows: Iterator[Row]) -> Iterator[Row]:
+    """跳过工作表末尾的空行（中间的空行保留），与 pd.read_excel 的行数一致"""
+    blank: List[Row] = []
+    for row in rows:
+        if trimmed_width(row):
+            yield from blank
+            blank.clear()
+            yield row
+        else:
+            blank.append(row)
+
+
+def infer_object_column(values: np.ndarray) -> np.ndarray:
+    """
+    按 pandas Excel 解析器的规则推断一整列的类型：所有单元格（含数字文本）都能转换为
+    数值时得到数值列，否则保留原始单元格的对象列。
+    """
+    try:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='raise').to_numpy()
+    except (ValueError, TypeError):
+        return np.asarray(values, dtype=object)
+
+
+def rows_to_frame(rows: Sequence[Row], width: Optional[int] = None) -> pd.DataFrame:
+    """
+    把少量头部行转换为与 pd.read_excel(header=None) 相同布局的 DataFrame。
+
+    width 为整张工作表的列数，未给出时取这些行的最大行宽。
+    """
+    if width is None:
+        width = max((trimmed_width(row) for row in rows), default=0)
+    rows = [row[:width] for row in rows]
+    return pd.DataFrame([list(row) + [np.nan] * (width - len(row)) for row in rows], dtype=object)
+
+
+@dataclass
+class ColumnSpec:
+    """
+    流式收集的列定义。
+
+    kind 取值：
+        'float': 写入 float64 缓冲区，converter 负责把单元格转换为数值
+        'numeric': 与 pd.to_numeric(errors='coerce') 结果一致，全部为整数时得到 int64
+        'object': 原样保存单元格
+        'codes': 按内容去重，保存 int32 编码和去重后的值，适合重复度高的文本列
+    """
+    name: str
+    index: int
+    kind: str = 'float'
+    converter: Optional[Callable[[object], float]] = None
+
+
+@dataclass
+class CodedColumn:
+    """去重编码后的列，-1 表示缺失"""
+    codes: np.ndarray
+    uniques: List[object] = field(default_factory=list)
+
+    def to_numpy(self) -> np.ndarray:
+        values = np.empty(len(self.uniques) + 1, dtype=object)
+        values[:-1] = self.uniques
+        values[-1] = np.nan
+        return values[self.codes]
+
+
+class _ChunkedBuffer:
+    """按块增长的一维缓冲区，避免逐次扩容时的整体拷贝"""
+
+    def __init__(self, dtype, chunk_rows: int, initial: Optional[np.ndarray] = None):
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+        self._chunks: List[np.ndarray] = [] if initial is None else [initial.astype(self.dtype)]
+        self._stored = 0 if initial is None else len(initial)
+        self._current = np.empty(chunk_rows, dtype=self.dtype)
+        self._filled = 0
+
+    def append(self, value) -> None:
+        if self._filled == self.chunk_rows:
+            self._chunks.append(self._current)
+            self._stored += self._filled
+            self._current = np.empty(self.chunk_rows, dtype=self.dtype)
+            self._filled = 0
+        self._current[self._filled] = value
+        self._filled += 1
+
+    def __len__(self) -> int:
+        return self._stored + self._filled
+
+    def to_numpy(self) -> np.ndarray:
+        return np.concatenate(self._chunks + [self._current[:self._filled]])
+
+
+class _FloatColumn:
+    def __init__(self, spec: ColumnSpec, chunk_rows: int):
+        self.converter = spec.converter or self._to_float
+        self.buffer = _ChunkedBuffer(np.float64, chunk_rows)
+
+    @staticmethod
+    def _to_float(value) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    def append(self, value) -> None:
+        self.buffer.append(self.converter(value))
+
+    def finish(self) -> np.ndarray:
+        return self.buffer.to_numpy()
+
+
+class _NumericColumn:
+    """
+    与 pd.to_numeric(errors='coerce') 一致的数值列。
+
+    整数写入 int64 缓冲区，出现浮点数或缺失值后整体转为 float64；
+    遇到字符串、布尔等其他类型时改为保存原值，结束时交给 pd.to_numeric 处理。
+    """
+
+    def __init__(self, spec: ColumnSpec, chunk_rows: int):
+        self.chunk_rows = chunk_rows
+        self.buffer = _ChunkedBuffer(np.int64, chunk_rows)
+        self.coerced = False  # 是否有非缺失的单元格无法转换、被置为 NaN
+
+    def _convert_buffer(self, dtype) -> None:
+        self.buffer = _ChunkedBuffer(dtype, self.chunk_rows, initial=self.buffer.to_numpy())
+
+    def append(self, value) -> None:
+        kind = self.buffer.dtype.kind
+        if kind == 'O':
+            self.buffer.append(value)
+        elif isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)):
+            if kind == 'i' and not -2 ** 63 <= value < 2 ** 63:
+                self._convert_buffer(np.float64)
+            self.buffer.append(value)
+        elif isinstance(value, (float, np.floating)):
+            if kind == 'i':
+                self._convert_buffer(np.float64)
+            self.buffer.append(value)
+        else:
+            self._convert_buffer(object)
+            self.buffer.append(value)
+
+    def finish(self) -> np.ndarray:
+        values = self.buffer.to_numpy()
+        if values.dtype.kind != 'O':
+            return values
+        converted = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy()
+        self.coerced = bool((pd.isna(converted) & ~pd.isna(values)).any())
+        return converted
+
+
+class _ObjectColumn:
+    def __init__(self, spec: ColumnSpec, chunk_rows: int):
+        self.buffer = _ChunkedBuffer(object, chunk_rows)
+
+    def append(self, value) -> None:
+        self.buffer.append(value)
+
+    def finish(self) -> np.ndarray:
+        return self.buffer.to_numpy()
+
+
+class _CodedColumn:
+    def __init__(self, spec: ColumnSpec, chunk_rows: int):
+        self.buffer = _ChunkedBuffer(np.int32, chunk_rows)
+        self.lookup: Dict[object, int] = {}
+        self.uniques: List[object] = []
+
+    def append(self, value) -> None:
+        if isinstance(value, str):
+            key = value
+        elif value is None or (isinstance(value, float) and math.isnan(value)):
+            self.buffer.append(-1)
+            return
+        else:
+            # 非字符串按类型和表示去重，避免 1 与 True、0.0 与 -0.0 被合并
+            key = (type(value), repr(value))
+        code = self.lookup.get(key)
+        if code is None:
+            code = len(self.uniques)
+            self.lookup[key] = code
+            self.uniques.append(value)
+        self.buffer.append(code)
+
+    def finish(self) -> CodedColumn:
+        return CodedColumn(self.buffer.to_numpy(), self.uniques)
+
+
+_COLUMN_TYPES = {
+    'float': _FloatColumn,
+    'numeric': _NumericColumn,
+    'object': _ObjectColumn,
+    'codes': _CodedColumn,
+}
+
+
+@dataclass
+class StreamedBlock:
+    """
+    流式收集的数据块：各列结果、数据行在工作表中的行号（0-based）、
+    读取过的所有行（含被过滤的行）的最大行宽、停止行，以及有单元格无法转换为数值的
+    'numeric' 列（pandas 对这样的整列推断为对象列）。
+    """
+    columns: Dict[str, Union[np.ndarray, CodedColumn]]
+    row_numbers: np.ndarray
+    max_width: int = 0
+    stop_row: Optional[Row] = None
+    coerced: Set[str] = field(default_factory=set)
+
+    def __len__(self) -> int:
+        return len(self.row_numbers)
+
+
+def collect_columns(
+    rows: Iterator[Row],
+    specs: Sequence[ColumnSpec],
+    first_row_number: int = 0,
+    row_filter: Optional[Callable[[Row], bool]] = None,
+    stop: Optional[Callable[[Row], bool]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> StreamedBlock:
+    """
+    从行迭代器中收集指定列，直到 stop 命中或工作表结束。
+
+    Args:
+        rows: 行迭代器（通常是 SheetRowStream 读取了头部之后的剩余部分）
+        specs: 列定义
+        first_row_number: rows 第一行在工作表中的行号，用于生成与 pd.read_excel 一致的行索引
+        row_filter: 返回 False 的行被跳过
+        stop: 返回 True 时停止，该行不计入数据
+        chunk_rows: 缓冲区每块的行数
+    """
+    unknown = [spec.kind for spec in specs if spec.kind not in _COLUMN_TYPES]
+    if unknown:
+        raise ValueError(f"不支持的列类型: {unknown}")
+    columns = [(spec.index, _COLUMN_TYPES[spec.kind](spec, chunk_rows)) for spec in specs]
+    row_numbers = _ChunkedBuffer(np.int64, chunk_rows)
+    stop_row = None
+    max_width = 0
+
+    for row_number, row in enumerate(rows, start=first_row_number):
+        if stop is not None and stop(row):
+            stop_row = row
+            break
+        width = len(row)
+        if width > max_width:
+            max_width = max(max_width, trimmed_width(row))
+        if row_filter is not None and not row_filter(row):
+            continue
+        for index, column in columns:
+            column.append(row[index] if index < width else np.nan)
+        row_numbers.append(row_number)
+
+    result = {spec.name: column.finish() for spec, (_index, column) in zip(specs, columns)}
+    coerced = {spec.name for spec, (_index, column) in zip(specs, columns) if getattr(column, 'coerced', False)}
+    logger.debug(f"流式读取 {len(row_numbers)} 行, {len(specs)} 列")
+    return StreamedBlock(result, row_numbers.to_numpy(), max_width, stop_row, coerced)
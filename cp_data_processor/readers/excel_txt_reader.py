@@ -10,6 +10,7 @@ import logging
 import sys
 
 from cp_data_processor.readers.base_reader import BaseReader
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
 
 # 获取日志记录器
@@ -33,6 +34,7 @@ class ExcelTXTReader(BaseReader):
         self.header_map = {}  # 列标题映射到索引
         self.param_columns = []  # 参数列索引列表
     
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         """
         读取所有 ExcelTXT 格式文件并返回一个填充好的 CPLot 对象。
@@ -5,6 +5,7 @@ from typing import List, Union
 import pandas as pd
 
 from .base_reader import BaseReader
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer
 
 class JTReader(BaseReader):
@@ -15,6 +16,7 @@ class JTReader(BaseReader):
     def __init__(self, file_paths: Union[str, List[str]], pass_bin: int = 1):
         super().__init__(file_paths, pass_bin)
 
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         """
         读取所有指定的JT Excel文件，并将它们合并到一个CPLot对象中。
@@ -9,6 +9,7 @@ import numpy as np
 from typing import List, Dict, Union, Optional, Tuple, Any
 
 from cp_data_processor.readers.base_reader import BaseReader
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
 
 
@@ -36,6 +37,7 @@ class MEXReader(BaseReader):
         self.y_col = None  # Y 坐标列
         self.param_cols = {}  # 参数列映射 {参数索引: 列索引}
     
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         """
         读取所有 MEX 格式文件并返回一个填充好的 CPLot 对象。
@@ -0,0 +1,620 @@
+"""
+原始文件解析结果的磁盘缓存。
+
+Reader 把单个原始文件解析出的 DataFrame（Die 表、规格表等）和少量元数据写入缓存，
+下次遇到内容未变的文件时直接加载，跳过 Excel/DCP 解析。
+
+- 缓存条目按内容寻址：条目文件名由命名空间和文件内容哈希组成，同一份数据被解压到
+  新的临时目录或复制到别处时仍能命中
+- 路径索引记录 (路径, 大小, mtime) -> 内容哈希，文件未变化时只需一次 stat，无需重新计算哈希
+- 条目使用 numpy .npz 按列存储，数值列直接保存为原生数组，对象列拆分为类型码和各类型的值数组
+- 超出容量上限时按最近访问时间（LRU）淘汰
+- 多个进程共用同一缓存目录：写回索引时持有目录下的锁文件，先读入磁盘上的索引，
+  与本进程的新增、访问和淘汰记录合并后再写回，不会覆盖其他进程写入的索引项
+- 命中的条目同时保存在共享结果缓存（内存层）中，同一进程内再次命中时不再读取和解码 .npz
+"""
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "index.json"
+INDEX_LOCK_NAME = "index.lock"
+INDEX_LOCK_TIMEOUT = 10.0  # 等待索引锁的最长秒数
+INDEX_LOCK_STALE = 60.0  # 锁文件超过该秒数未释放时视为持有进程已退出
+INDEX_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 对象列中单元格的类型码
+_OBJ_NONE, _OBJ_FLOAT, _OBJ_INT, _OBJ_STR, _OBJ_BOOL = 0, 1, 2, 3, 4
+
+
+def _memory_tier():
+    """共享结果缓存（延迟导入，避免 readers 与 processing 之间的循环导入）"""
+    from cp_data_processor.processing.result_cache import get_result_cache
+    return get_result_cache()
+
+
+def _copy_parse(parse: 'CachedParse') -> 'CachedParse':
+    """Reader 会修改读到的 DataFrame，内存层中的条目与返回给 Reader 的对象互不共享"""
+    return CachedParse(frames={name: df.copy() for name, df in parse.frames.items()},
+                       meta=json.loads(json.dumps(parse.meta, default=json_default)))
+
+
+class CacheEncodeError(ValueError):
+    """DataFrame 中包含无法无损写入缓存的数据类型"""
+
+
+@dataclass
+class CachedParse:
+    """一个缓存条目：若干命名的 DataFrame 加 JSON 元数据"""
+    frames: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def default_cache_dir() -> Path:
+    """默认缓存目录：CP_CACHE_DIR，或业务数据根目录下的 cache（与 runtime_paths 的约定一致）"""
+    configured = os.environ.get("CP_CACHE_DIR")
+    if configured:
+        return Path(configured).expanduser()
+    data_root = os.environ.get("CP_DATA_ROOT")
+    if data_root:
+        return Path(data_root).expanduser() / "cache"
+    if os.name == "nt":
+        return Path(r"D:\CPData") / "cache"
+    return Path.home() / "CPData" / "cache"
+
+
+@contextmanager
+def _index_lock(cache_dir: Path) -> Iterator[bool]:
+    """
+    跨进程的索引锁（以独占方式创建锁文件），产出是否取得了锁。
+
+    等待超过 INDEX_LOCK_TIMEOUT 秒时放弃；锁文件存在超过 INDEX_LOCK_STALE 秒时视为
+    持有进程已异常退出，将其删除后重试。
+    """
+    lock_path = cache_dir / INDEX_LOCK_NAME
+    deadline = time.monotonic() + INDEX_LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > INDEX_LOCK_STALE:
+                    lock_path.unlink()
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(0.01)
+        except OSError as e:
+            logger.warning(f"无法创建解析缓存索引锁 {lock_path}: {e}")
+            yield False
+            return
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield True
+    finally:
+        try:
+            lock_path.unlink()
+        except OSError:
+            pass
+
+
+def hash_file(file_path: str) -> str:
+    """计算文件内容的 blake2b 哈希"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# DataFrame <-> 列数组编码（CPLot 的二进制存储 lot_io 也使用这套编码）
+# ---------------------------------------------------------------------------
+
+def encode_scalar(value: Any) -> List[Any]:
+    """把列名等标量编码为可写入 JSON 的 [类型, 值]"""
+    if value is None:
+        return ["none", None]
+    if isinstance(value, (bool, np.bool_)):
+        return ["bool", bool(value)]
+    if isinstance(value, (int, np.integer)):
+        return ["int", int(value)]
+    if isinstance(value, (float, np.floating)):
+        return ["float", repr(float(value))]
+    if isinstance(value, str):
+        return ["str", value]
+    raise CacheEncodeError(f"不支持的标量类型: {type(value).__name__}")
+
+
+def decode_scalar(encoded: List[Any]) -> Any:
+    kind, value = encoded
+    if kind == "float":
+        return float(value)
+    return value
+
+
+def _encode_object_array(values: np.ndarray, prefix: str, arrays: Dict[str, np.ndarray]) -> None:
+    """把对象数组拆分为类型码数组和各类型的值数组，保证读回的 Python 对象与原值一致"""
+    codes = np.empty(len(values), dtype=np.int8)
+    floats, ints, strs, bools = [], [], [], []
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = _OBJ_NONE
+        elif isinstance(value, (bool, np.bool_)):
+            codes[i] = _OBJ_BOOL
+            bools.append(bool(value))
+        elif isinstance(value, (int, np.integer)):
+            if not -2**63 <= value < 2**63:
+                raise CacheEncodeError("整数超出 int64 范围")
+            codes[i] = _OBJ_INT
+            ints.append(int(value))
+        elif isinstance(value, (float, np.floating)):
+            codes[i] = _OBJ_FLOAT
+            floats.append(float(value))
+        elif isinstance(value, str):
+            if value.endswith("\x00"):
+                raise CacheEncodeError("字符串以空字符结尾，无法无损保存")
+            codes[i] = _OBJ_STR
+            strs.append(value)
+        else:
+            raise CacheEncodeError(f"不支持的单元格类型: {type(value).__name__}")
+    arrays[f"{prefix}.codes"] = codes
+    arrays[f"{prefix}.floats"] = np.array(floats, dtype=np.float64)
+    arrays[f"{prefix}.ints"] = np.array(ints, dtype=np.int64)
+    arrays[f"{prefix}.strs"] = np.array(strs, dtype=str) if strs else np.array([], dtype="<U1")
+    arrays[f"{prefix}.bools"] = np.array(bools, dtype=bool)
+
+
+def _decode_object_array(prefix: str, arrays) -> np.ndarray:
+    codes = arrays[f"{prefix}.codes"]
+    values = np.empty(len(codes), dtype=object)
+    for code, key in ((_OBJ_FLOAT, "floats"), (_OBJ_INT, "ints"), (_OBJ_STR, "strs"), (_OBJ_BOOL, "bools")):
+        mask = codes == code
+        if mask.any():
+            # astype(object) 生成原生 Python float/int/str/bool
+            values[mask] = arrays[f"{prefix}.{key}"].astype(object)
+    return values
+
+
+def encode_array(values, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """编码一列（或索引）的值，返回列描述"""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categorical = pd.Categorical(values)
+        categories = encode_array(pd.Index(categorical.categories), f"{prefix}.categories", arrays)
+        arrays[f"{prefix}.values"] = np.asarray(categorical.codes)
+        return {"kind": "category", "ordered": bool(categorical.ordered), "categories": categories}
+    if not isinstance(dtype, np.dtype):
+        raise CacheEncodeError(f"不支持的列类型: {dtype}")
+    if dtype.kind in "biufcmM":
+        arrays[f"{prefix}.values"] = np.asarray(values)
+        return {"kind": "numpy"}
+    if dtype.kind == "O":
+        _encode_object_array(np.asarray(values), prefix, arrays)
+        return {"kind": "object"}
+    raise CacheEncodeError(f"不支持的列类型: {dtype}")
+
+
+def decode_array(spec: Dict[str, Any], prefix: str, arrays):
+    kind = spec["kind"]
+    if kind == "numpy":
+        return arrays[f"{prefix}.values"]
+    if kind == "object":
+        return _decode_object_array(prefix, arrays)
+    categories = decode_array(spec["categories"], f"{prefix}.categories", arrays)
+    return pd.Categorical.from_codes(arrays[f"{prefix}.values"], categories=pd.Index(categories),
+                                     ordered=spec["ordered"])
+
+
+def encode_frame(df: pd.DataFrame, name: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    if not df.columns.is_unique:
+        raise CacheEncodeError(f"DataFrame {name} 存在重复列名")
+    spec: Dict[str, Any] = {
+        "columns": [],
+        "length": len(df),
+        "columns_range": isinstance(df.columns, pd.RangeIndex) and df.columns.start == 0 and df.columns.step == 1,
+        "columns_dtype": str(df.columns.dtype),
+        "index_name": encode_scalar(df.index.name),
+    }
+    if isinstance(df.index, pd.RangeIndex):
+        spec["index"] = {"kind": "range", "start": df.index.start, "step": df.index.step}
+    else:
+        spec["index"] = encode_array(df.index, f"{name}.index", arrays)
+    for position, label in enumerate(df.columns):
+        column_spec = encode_array(df.iloc[:, position], f"{name}.{position}", arrays)
+        column_spec["label"] = encode_scalar(label)
+        spec["columns"].append(column_spec)
+    return spec
+
+
+def decode_frame(spec: Dict[str, Any], name: str, arrays, copy: bool = True,
+                 columns: Optional[Collection[Any]] = None) -> pd.DataFrame:
+    """
+    由 encode_frame 的描述和数组还原 DataFrame。
+
+    copy 为 False 时数值列直接引用 arrays 中的数组（如内存映射），不复制。
+    columns 不为 None 时只还原其中列出的列，其余列的数组不会被读取。
+    """
+    length = spec["length"]
+    index_spec = spec["index"]
+    if index_spec["kind"] == "range":
+        start, step = index_spec["start"], index_spec["step"]
+        index = pd.RangeIndex(start, start + step * length, step)
+    else:
+        index = pd.Index(decode_array(index_spec, f"{name}.index", arrays))
+    index.name = decode_scalar(spec["index_name"])
+    labels = [decode_scalar(column_spec["label"]) for column_spec in spec["columns"]]
+    positions = [position for position, label in enumerate(labels) if columns is None or label in columns]
+    data = {position: decode_array(spec["columns"][position], f"{name}.{position}", arrays)
+            for position in positions}
+    df = pd.DataFrame(data, index=index, columns=positions, copy=copy)
+    labels = [labels[position] for position in positions]
+    if spec["columns_range"] and len(labels) == len(spec["columns"]):
+        df.columns = pd.RangeIndex(len(labels))
+    elif spec["columns_range"]:
+        df.columns = pd.Index(labels)
+    elif labels:
+        df.columns = pd.Index(labels, dtype=spec["columns_dtype"])
+    return df
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    raise TypeError(f"无法序列化为 JSON: {type(value).__name__}")
+
+
+# ---------------------------------------------------------------------------
+# 缓存
+# ---------------------------------------------------------------------------
+
+class ParsedFileCache:
+    """
+    原始文件解析结果的磁盘缓存。
+
+    Args:
+        cache_dir: 缓存目录，None 表示使用 default_cache_dir()
+        max_size_mb: 缓存总容量上限 (MB)，超出时按 LRU 淘汰
+        enabled: 是否启用；禁用时 load 总是未命中，store 不写入
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: float = 2048, enabled: bool = True):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._paths: Dict[str, Dict[str, Any]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Tuple[int, int, str]] = {}
+        # 自上次写回索引以来本进程的改动，写回时与磁盘上的索引合并
+        self._touched_paths: Set[str] = set()
+        self._new_entries: Set[str] = set()
+        self._dropped_entries: Set[str] = set()
+        self._loaded = False
+        self._dirty = False
+
+    # -- 索引 ----------------------------------------------------------------
+
+    def _read_index(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """读取磁盘上的索引，返回 (路径索引, 条目)；索引不存在或损坏时返回空索引"""
+        index_path = self.cache_dir / INDEX_FILE_NAME
+        if index_path.exists():
+            try:
+                index = json.loads(index_path.read_text(encoding="utf-8"))
+                if index.get("version") == INDEX_VERSION:
+                    return index.get("paths", {}), index.get("entries", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"解析缓存索引损坏，将重建: {e}")
+        return {}, {}
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._paths, self._entries = self._read_index()
+        # 与磁盘上的条目文件对齐：其他进程写入的条目纳入管理，丢失的条目移出索引
+        on_disk = {path.stem: path for path in self.cache_dir.glob("*.npz")}
+        for key in list(self._entries):
+            if key not in on_disk:
+                del self._entries[key]
+                self._dirty = True
+        for key, path in on_disk.items():
+            if key not in self._entries:
+                stat = path.stat()
+                self._entries[key] = {"bytes": stat.st_size, "last_access": stat.st_mtime}
+                self._new_entries.add(key)
+                self._dirty = True
+
+    def _merge_index(self) -> None:
+        """
+        把磁盘上的索引（可能已被其他进程更新）与本进程的改动合并（调用方持有索引锁）。
+
+        磁盘索引中没有、也不是本进程新增的条目已被其他进程淘汰，不再保留；
+        两边都有的条目取较晚的访问时间。
+        """
+        disk_paths, disk_entries = self._read_index()
+        entries = {key: entry for key, entry in disk_entries.items() if key not in self._dropped_entries}
+        for key, entry in self._entries.items():
+            other = entries.get(key)
+            if other is not None:
+                entries[key] = entry if entry["last_access"] >= other["last_access"] else other
+            elif key in self._new_entries:
+                entries[key] = entry
+        paths = dict(disk_paths)
+        paths.update((key, self._paths[key]) for key in self._touched_paths if key in self._paths)
+        live_hashes = {key.rsplit("-", 1)[-1] for key in entries}
+        self._paths = {key: record for key, record in paths.items() if record["hash"] in live_hashes}
+        self._entries = entries
+
+    def flush(self) -> None:
+        """
+        把路径索引和访问记录与磁盘上的索引合并，按合并后的总容量淘汰条目，再写回磁盘。
+
+        store 只写入条目文件，索引由 Reader 在读完一批文件后调用 flush 一次性写回。
+        """
+        with self._lock:
+            if not self._loaded or not self._dirty:
+                return
+            with _index_lock(self.cache_dir) as locked:
+                if not locked:
+                    logger.warning("等待解析缓存索引锁超时，本次不写回索引")
+                    return
+                self._merge_index()
+                self._evict()
+                index = {"version": INDEX_VERSION, "paths": self._paths, "entries": self._entries}
+                index_path = self.cache_dir / INDEX_FILE_NAME
+                tmp_path = index_path.with_name(f"{INDEX_FILE_NAME}.{os.getpid()}.tmp")
+                try:
+                    tmp_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+                    os.replace(tmp_path, index_path)
+                    self._dirty = False
+                    self._touched_paths.clear()
+                    self._new_entries.clear()
+                    self._dropped_entries.clear()
+                except OSError as e:
+                    logger.warning(f"写入解析缓存索引失败: {e}")
+
+    # -- 读写 ----------------------------------------------------------------
+
+    @staticmethod
+    def _path_key(file_path: str, namespace: str) -> str:
+        return f"{namespace}|{os.path.abspath(file_path)}"
+
+    def _entry_path(self, entry_key: str) -> Path:
+        return self.cache_dir / f"{entry_key}.npz"
+
+    def _content_hash(self, file_path: str, namespace: str) -> Optional[str]:
+        """stat 与索引一致时直接返回记录的哈希，否则重新计算"""
+        stat = os.stat(file_path)
+        path_key = self._path_key(file_path, namespace)
+        record = self._paths.get(path_key)
+        if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return record["hash"]
+        content_hash = hash_file(file_path)
+        self._pending[path_key] = (stat.st_size, stat.st_mtime_ns, content_hash)
+        return content_hash
+
+    def load(self, file_path: str, namespace: str) -> Optional[CachedParse]:
+        """
+        读取文件的缓存解析结果。
+
+        Args:
+            file_path: 原始文件路径
+            namespace: Reader 命名空间，应包含解析逻辑版本号，如 "dcp-v1"
+
+        Returns:
+            Optional[CachedParse]: 命中时返回缓存内容，未命中或缓存禁用时返回 None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                self._ensure_loaded()
+                content_hash = self._content_hash(file_path, namespace)
+            except OSError as e:
+                logger.debug(f"无法检查解析缓存 {file_path}: {e}")
+                self.misses += 1
+                return None
+            entry_key = f"{namespace}-{content_hash}"
+            if entry_key not in self._entries:
+                self.misses += 1
+                return None
+            memory_key = ("parsed_file", entry_key)
+            parse = _memory_tier().get(memory_key)
+            if parse is None:
+                try:
+                    with np.load(self._entry_path(entry_key), allow_pickle=False) as arrays:
+                        header = json.loads(str(arrays["__header__"]))
+                        frames = {name: decode_frame(spec, name, arrays)
+                                  for name, spec in header["frames"].items()}
+                except Exception as e:
+                    logger.warning(f"解析缓存条目损坏，已丢弃 {entry_key}: {e}")
+                    self._drop_entry(entry_key)
+                    self.misses += 1
+                    return None
+                parse = CachedParse(frames=frames, meta=header["meta"])
+                _memory_tier().set(memory_key, _copy_parse(parse))
+            else:
+                parse = _copy_parse(parse)
+
+            path_key = self._path_key(file_path, namespace)
+            if path_key in self._pending:
+                size, mtime_ns, _ = self._pending.pop(path_key)
+                self._paths[path_key] = {"size": size, "mtime_ns": mtime_ns, "hash": content_hash}
+                self._touched_paths.add(path_key)
+            self._entries[entry_key]["last_access"] = time.time()
+            self._dirty = True
+            self.hits += 1
+            logger.debug(f"解析缓存命中: {os.path.basename(file_path)} ({namespace})")
+            return parse
+
+    def store(self, file_path: str, namespace: str, frames: Dict[str, pd.DataFrame],
+              meta: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        写入文件的解析结果。包含无法无损编码的数据时放弃写入并返回 False。
+
+        只写入条目文件，索引和容量淘汰在下一次 flush 时处理。
+        """
+        if not self.enabled:
+            return False
+        meta = meta or {}
+        with self._lock:
+            try:
+                self._ensure_loaded()
+                content_hash = self._content_hash(file_path, namespace)
+                arrays: Dict[str, np.ndarray] = {}
+                header = {
+                    "frames": {name: encode_frame(df, name, arrays) for name, df in frames.items()},
+                    "meta": meta,
+                }
+                arrays["__header__"] = np.array(json.dumps(header, ensure_ascii=False, default=json_default))
+            except (CacheEncodeError, TypeError, OSError) as e:
+                logger.debug(f"解析结果未写入缓存 {file_path}: {e}")
+                return False
+
+            entry_key = f"{namespace}-{content_hash}"
+            entry_path = self._entry_path(entry_key)
+            tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp_path, entry_path)
+            except OSError as e:
+                logger.warning(f"写入解析缓存失败 {entry_path}: {e}")
+                return False
+
+            path_key = self._path_key(file_path, namespace)
+            size, mtime_ns, _ = self._pending.pop(path_key, (None, None, None))
+            if size is None:
+                stat = os.stat(file_path)
+                size, mtime_ns = stat.st_size, stat.st_mtime_ns
+            self._paths[path_key] = {"size": size, "mtime_ns": mtime_ns, "hash": content_hash}
+            self._touched_paths.add(path_key)
+            self._entries[entry_key] = {"bytes": entry_path.stat().st_size, "last_access": time.time()}
+            self._new_entries.add(entry_key)
+            self._dropped_entries.discard(entry_key)
+            self._dirty = True
+            self.stores += 1
+            return True
+
+    # -- 淘汰 ----------------------------------------------------------------
+
+    def _drop_entry(self, entry_key: str) -> None:
+        self._entries.pop(entry_key, None)
+        self._new_entries.discard(entry_key)
+        self._dropped_entries.add(entry_key)
+        _memory_tier().invalidate(("parsed_file", entry_key))
+        try:
+            self._entry_path(entry_key).unlink()
+        except OSError:
+            pass
+        self._dirty = True
+
+    def _evict(self) -> None:
+        """总容量超出上限时，按最近访问时间从旧到新淘汰条目"""
+        total = sum(entry["bytes"] for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for entry_key, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["bytes"]
+            self._drop_entry(entry_key)
+            self.evictions += 1
+            logger.info(f"解析缓存超出容量上限，淘汰条目: {entry_key}")
+        live_hashes = {key.rsplit("-", 1)[-1] for key in self._entries}
+        self._paths = {key: record for key, record in self._paths.items() if record["hash"] in live_hashes}
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return sum(entry["bytes"] for entry in self._entries.values())
+
+    def clear(self) -> None:
+        """删除所有缓存条目"""
+        with self._lock:
+            self._ensure_loaded()
+            for entry_key in list(self._entries):
+                self._drop_entry(entry_key)
+            self._paths = {}
+            self._pending = {}
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "cache_dir": str(self.cache_dir),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+_default_cache: Optional[ParsedFileCache] = None
+
+
+def get_parsed_file_cache() -> ParsedFileCache:
+    """获取全局解析缓存实例，首次调用时按 PerformanceConfig 创建"""
+    global _default_cache
+    if _default_cache is None:
+        from cp_data_processor.config.performance_config import get_performance_config
+        config = get_performance_config()
+        _default_cache = ParsedFileCache(
+            cache_dir=config.PARSED_CACHE_DIR,
+            max_size_mb=config.PARSED_CACHE_SIZE_MB,
+            enabled=config.ENABLE_PARSED_CACHE,
+        )
+    return _default_cache
+
+
+def configure_parsed_file_cache(cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None,
+                                enabled: Optional[bool] = None) -> ParsedFileCache:
+    """替换全局解析缓存实例（未指定的参数沿用 PerformanceConfig）"""
+    global _default_cache
+    from cp_data_processor.config.performance_config import get_performance_config
+    config = get_performance_config()
+    if _default_cache is not None:
+        _default_cache.flush()
+    _default_cache = ParsedFileCache(
+        cache_dir=cache_dir if cache_dir is not None else config.PARSED_CACHE_DIR,
+        max_size_mb=max_size_mb if max_size_mb is not None else config.PARSED_CACHE_SIZE_MB,
+        enabled=enabled if enabled is not None else config.ENABLE_PARSED_CACHE,
+    )
+    return _default_cache
+
+
+@atexit.register
+def _flush_default_cache() -> None:
+    if _default_cache is not None:
+        _default_cache.flush()
@@ -6,16 +6,21 @@
 """
 
 import os
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple
 import logging
 from pathlib import Path
 
+from cp_data_processor.config.performance_config import get_performance_config
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
 from .company_adapters.company_registry import get_company_registry
 from .reader_factory import create_reader_by_format
 
 logger = logging.getLogger(__name__)
 
+# 批量读取的进度回调：(已完成文件数, 文件总数, 文件路径, 是否成功)
+ProgressCallback = Callable[[int, int, str, bool], None]
+
 
 class UnifiedReader:
     """
@@ -28,6 +33,7 @@ class UnifiedReader:
     def __init__(self):
         """初始化统一读取器"""
         self.company_registry = get_company_registry()
+        self.failed_files: List[Tuple[str, str]] = []  # 最近一次批量读取失败的 (文件路径, 错误信息)
         self.logger = logging.getLogger(__name__)
     
     def read_data(self, file_path: str, company_code: Optional[str] = None) -> CPLot:
@@ -77,35 +83,115 @@ class UnifiedReader:
             self.logger.error(f"处理文件失败 {file_path}: {e}")
             raise RuntimeError(f"数据读取失败: {e}") from e
     
-    def read_batch(self, file_paths: list[str]) -> Dict[str, CPLot]:
+    def read_batch(self, file_paths: list[str], parallel: Optional[bool] = None,
+                   max_workers: Optional[int] = None,
+                   progress_callback: Optional[ProgressCallback] = None) -> Dict[str, CPLot]:
         """
         批量读取多个文件
         
+        并行模式下经 ParallelProcessor 先用线程池识别各文件所属公司（文件探测以 I/O 为主），
+        再用进程池读取和标准化数据；单个文件失败不影响其他文件。结果按输入顺序返回，
+        失败的文件记录在 self.failed_files 中。
+        
         Args:
             file_paths: 文件路径列表
+            parallel: 是否并行读取。None 表示跟随 PerformanceConfig.ENABLE_PARALLEL，
+                False 强制串行
+            max_workers: 进程数上限，默认取 PerformanceConfig.MAX_WORKERS
+            progress_callback: 每个文件完成（成功或失败）后调用，
+                参数为 (已完成文件数, 文件总数, 文件路径, 是否成功)
             
         Returns:
             Dict[str, CPLot]: 文件路径到CPLot对象的映射
         """
-        results = {}
-        failed_files = []
+        unique_paths = list(dict.fromkeys(file_paths))
+        workers = self._resolve_workers(parallel, max_workers, len(unique_paths))
+        progress = _BatchProgress(len(unique_paths), progress_callback)
+        if workers > 1:
+            outcomes = self._read_batch_parallel(unique_paths, workers, progress)
+        else:
+            outcomes = {file_path: self._read_one(file_path, None, progress) for file_path in unique_paths}
         
-        for file_path in file_paths:
-            try:
-                lot = self.read_data(file_path)
+        results = {}
+        self.failed_files = []
+        for file_path in unique_paths:
+            lot, error = outcomes[file_path]
+            if error is None:
                 results[file_path] = lot
-                self.logger.info(f"成功处理: {file_path}")
-            except Exception as e:
-                failed_files.append((file_path, str(e)))
-                self.logger.error(f"处理失败: {file_path} - {e}")
+            else:
+                self.failed_files.append((file_path, error))
         
-        if failed_files:
-            self.logger.warning(f"批量处理完成，{len(failed_files)}个文件失败")
-            for file_path, error in failed_files:
+        if self.failed_files:
+            self.logger.warning(f"批量处理完成，{len(self.failed_files)}个文件失败")
+            for file_path, error in self.failed_files:
                 self.logger.warning(f"  失败: {file_path} - {error}")
         
         return results
     
+    def _resolve_workers(self, parallel: Optional[bool], max_workers: Optional[int], file_count: int) -> int:
+        """确定批量读取使用的进程数，返回 1 表示串行"""
+        if file_count < 2:
+            return 1
+        return min(ParallelProcessor('process', parallel, max_workers).workers, file_count)
+    
+    def _read_one(self, file_path: str, company_code: Optional[str],
+                  progress: '_BatchProgress') -> Tuple[Optional[CPLot], Optional[str]]:
+        """在当前进程中读取单个文件，返回 (CPLot, None) 或 (None, 错误信息)"""
+        try:
+            lot = self.read_data(file_path, company_code)
+        except Exception as e:
+            self.logger.error(f"处理失败: {file_path} - {e}")
+            progress.advance(file_path, False)
+            return None, str(e)
+        self.logger.info(f"成功处理: {file_path}")
+        progress.advance(file_path, True)
+        return lot, None
+    
+    def _read_batch_parallel(self, file_paths: list[str], workers: int,
+                             progress: '_BatchProgress') -> Dict[str, Tuple[Optional[CPLot], Optional[str]]]:
+        """
+        经 ParallelProcessor 先用线程池识别公司，再用进程池读取数据。
+        
+        无法识别公司或不存在的文件在主进程中按串行逻辑处理（识别结果已缓存，
+        只用于生成与串行读取一致的错误信息）；进程池不可用时 ParallelProcessor
+        把剩余文件回退到当前进程读取。
+        """
+        io_workers = min(get_performance_config().IO_WORKERS, len(file_paths))
+        with ParallelProcessor('thread', parallel=True, max_workers=io_workers) as processor:
+            companies = dict(zip(file_paths, processor.map_values(self._detect_for_batch, file_paths)))
+        
+        outcomes: Dict[str, Tuple[Optional[CPLot], Optional[str]]] = {}
+        for file_path, company_code in companies.items():
+            if company_code is None:
+                outcomes[file_path] = self._read_one(file_path, None, progress)
+        pending = [file_path for file_path in file_paths if file_path not in outcomes]
+        if not pending:
+            return outcomes
+        
+        self.logger.info(f"使用 {min(workers, len(pending))} 个进程并行读取 {len(pending)} 个文件")
+        tasks = [(file_path, companies[file_path]) for file_path in pending]
+        with ParallelProcessor('process', parallel=True, max_workers=min(workers, len(pending))) as processor:
+            for result in processor.map(_read_data_in_worker, tasks):
+                file_path = result.item[0]
+                if result.ok:
+                    self.logger.info(f"成功处理: {file_path}")
+                    outcomes[file_path] = (result.value, None)
+                else:
+                    self.logger.error(f"处理失败: {file_path} - {result.error}")
+                    outcomes[file_path] = (None, str(result.error))
+                progress.advance(file_path, result.ok)
+        return outcomes
+    
+    def _detect_for_batch(self, file_path: str) -> Optional[str]:
+        """批量读取时识别公司，文件不存在或识别出错时返回 None"""
+        if not os.path.exists(file_path):
+            return None
+        try:
+            return self._detect_company(file_path)
+        except Exception as e:
+            self.logger.warning(f"识别公司失败 {file_path}: {e}")
+            return None
+    
     def can_process_file(self, file_path: str) -> bool:
         """
         检查是否能处理指定文件
@@ -124,13 +210,8 @@ class UnifiedReader:
         if not company_code:
             return False
         
-        # 检查适配器是否可用
-        adapter = self.company_registry.get_company_adapter(company_code)
-        if not adapter:
-            return False
-        
-        # 检查适配器是否能处理此文件
-        return adapter.can_process_file(file_path)
+        # 检查适配器是否能处理此文件（与公司识别共用同一份文件探测结果）
+        return self.company_registry.adapter_can_process_file(company_code, file_path)
     
     def get_supported_companies(self) -> list[str]:
         """
@@ -227,6 +308,29 @@ class UnifiedReader:
         return lot
 
 
+class _BatchProgress:
+    """批量读取的完成计数，逐个文件通知进度回调"""
+    
+    def __init__(self, total: int, callback: Optional[ProgressCallback]):
+        self.total = total
+        self.completed = 0
+        self.callback = callback
+    
+    def advance(self, file_path: str, success: bool) -> None:
+        self.completed += 1
+        if self.callback is not None:
+            try:
+                self.callback(self.completed, self.total, file_path, success)
+            except Exception as e:
+                logger.warning(f"进度回调出错: {e}")
+
+
+def _read_data_in_worker(task: Tuple[str, str]) -> CPLot:
+    """进程池工作函数：在子进程中读取并标准化单个文件，task 为 (文件路径, 公司代码)"""
+    file_path, company_code = task
+    return UnifiedReader().read_data(file_path, company_code)
+
+
 # 便捷函数
 def read_cp_data(file_path: str, company_code: Optional[str] = None) -> CPLot:
     """
@@ -243,18 +347,24 @@ def read_cp_data(file_path: str, company_code: Optional[str] = None) -> CPLot:
     return reader.read_data(file_path, company_code)
 
 
-def batch_read_cp_data(file_paths: list[str]) -> Dict[str, CPLot]:
+def batch_read_cp_data(file_paths: list[str], parallel: Optional[bool] = None,
+                       max_workers: Optional[int] = None,
+                       progress_callback: Optional[ProgressCallback] = None) -> Dict[str, CPLot]:
     """
     批量读取CP数据的便捷函数
     
     Args:
         file_paths: 文件路径列表
+        parallel: 是否并行读取，None 表示跟随 PerformanceConfig.ENABLE_PARALLEL
+        max_workers: 进程数上限，默认取 PerformanceConfig.MAX_WORKERS
+        progress_callback: 每个文件完成后调用，参数为 (已完成文件数, 文件总数, 文件路径, 是否成功)
         
     Returns:
         Dict[str, CPLot]: 文件路径到CPLot对象的映射
     """
     reader = UnifiedReader()
-    return reader.read_batch(file_paths)
+    return reader.read_batch(file_paths, parallel=parallel, max_workers=max_workers,
+                             progress_callback=progress_callback)
 
 
 def can_process_cp_file(file_path: str) -> bool:
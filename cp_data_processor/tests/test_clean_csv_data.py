@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from clean_csv_data import clean_csv_data, format_number, format_numbers
+from cp_data_processor.config.performance_config import get_performance_config
+
+
+def test_format_numbers_matches_format_number():
+    rng = np.random.default_rng(0)
+    edge = [0.0, -0.0, np.nan, np.inf, -np.inf, 1e-4, -1e-4, 9.99999e-5, 9.999995, 10.0, -10.0,
+            99999.5, 1e300, 5e-324, 0.00012345]
+    values = np.concatenate([edge, rng.normal(size=5000) * 10.0 ** rng.integers(-12, 12, 5000)])
+
+    assert format_numbers(values).tolist() == [format_number(v) for v in values]
+    float32 = values[np.abs(values) < 1e30].astype(np.float32)
+    assert format_numbers(float32).tolist() == pd.Series(float32).apply(lambda x: format_number(x)).tolist()
+    assert format_numbers(np.array([np.nan, np.nan])).tolist() == ["", ""]
+
+
+@pytest.mark.parametrize("chunk_size", [3, 5000])
+def test_cleaned_csv_is_unchanged_by_chunked_formatting(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(get_performance_config(), "CHUNK_SIZE", chunk_size)
+    rng = np.random.default_rng(1)
+    n = 20
+    data = pd.DataFrame({
+        "VTH": rng.normal(size=n) * 1e-5, "Lot_ID": "LOT", "Wafer_ID": 1, "Seq": np.arange(n), "Bin": 1,
+        "X": np.arange(n), "Y": 0, "CONT": rng.normal(size=n), "No.U": 1,
+        "IDSS": np.where(rng.random(n) < 0.3, np.nan, rng.random(n) * 100),
+        "BV": rng.normal(600, 20, n).astype(np.float32),
+    })
+
+    # 逐个单元格格式化后整表写出的原实现
+    expected = data.drop(columns=["No.U"])[["Lot_ID", "Wafer_ID", "Seq", "Bin", "X", "Y", "CONT", "VTH", "IDSS", "BV"]]
+    for col in ["CONT", "VTH", "IDSS", "BV"]:
+        expected[col] = expected[col].apply(lambda x: format_number(x))
+    expected.to_csv(tmp_path / "expected.csv", index=False)
+
+    output = clean_csv_data(data, str(tmp_path), "LOT")
+    assert open(output, "rb").read() == (tmp_path / "expected.csv").read_bytes()
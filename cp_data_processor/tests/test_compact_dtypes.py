@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from clean_csv_data import format_number
+from cp_data_processor.config.performance_config import get_performance_config
+from cp_data_processor.data_models.compact_dtypes import compact_float, restore_float, write_csv
+from cp_data_processor.processing.standard_csv_generator import StandardCSVGenerator
+from guoyu.guoyu_reader import GuoyuFRDReader
+from guoyu.tests.test_guoyu_reader import write_juno_workbook
+
+
+@pytest.fixture
+def compact_mode(monkeypatch):
+    def set_mode(enabled):
+        monkeypatch.setattr(get_performance_config(), "ENABLE_COMPACT_DTYPES", enabled)
+    return set_mode
+
+
+def test_float32_restores_six_digit_values_exactly():
+    rng = np.random.default_rng(0)
+    mantissas = rng.integers(-999999, 999999, 20000)
+    values = np.array([float(f"{m}e{e}") for m, e in zip(mantissas, rng.integers(-15, 12, len(mantissas)))])
+    values = np.concatenate([values, [0.0, -0.0, 0.0001, 9.99999, 0.123455, 1e-05, np.nan, np.inf]])
+
+    compact = compact_float(values, 6)
+
+    assert compact.dtype == np.float32
+    restored = restore_float(compact, 6)
+    assert restored.tobytes() == values.tobytes()
+    assert [format_number(v) for v in restored] == [format_number(v) for v in values]
+
+
+@pytest.mark.parametrize("extra", [1.2345678, 0.1 + 0.2, 1e-30])
+def test_columns_beyond_precision_stay_float64(extra):
+    values = np.array([1.5, 2.25, extra])
+
+    assert compact_float(values, 6) is values
+
+
+def test_chunked_csv_matches_plain_to_csv(tmp_path):
+    frame = pd.DataFrame({
+        "Lot_ID": pd.Categorical(["A", "B", "A", "B", "A"]),
+        "Bin": np.array([1, 2, 1, 1, 3], dtype=np.int16),
+        "VTH": compact_float(np.array([0.1, 1.25, np.nan, 3e-07, 12345.6]), 6),
+    })
+    expected = frame.astype({"Lot_ID": object, "VTH": np.float64})
+    expected["VTH"] = [0.1, 1.25, np.nan, 3e-07, 12345.6]
+
+    write_csv(frame, str(tmp_path / "chunked.csv"), digits=6, chunk_rows=2, index=False)
+    expected.to_csv(tmp_path / "plain.csv", index=False)
+
+    assert (tmp_path / "chunked.csv").read_bytes() == (tmp_path / "plain.csv").read_bytes()
+
+
+def test_compact_lot_writes_identical_cleaned_csv(tmp_path, compact_mode):
+    files = [str(write_juno_workbook(tmp_path / "257375" / f"{i:02d}.xlsx", wafer_no=i, seed=i, die_count=200))
+             for i in (1, 2)]
+    outputs = {}
+    for enabled in (False, True):
+        compact_mode(enabled)
+        lot = GuoyuFRDReader(files).read()
+        out_dir = tmp_path / f"compact_{enabled}"
+        out_dir.mkdir()
+        outputs[enabled] = StandardCSVGenerator().generate_cleaned_csv(lot, str(out_dir))
+        dtypes = lot.combined_data.dtypes
+
+    assert dtypes["Lot_ID"] == "category"
+    assert dtypes["X"] == np.int16
+    assert (dtypes == np.float32).any()
+    assert lot.wafers[0].x.dtype == np.int16
+    with open(outputs[True], "rb") as compact, open(outputs[False], "rb") as plain:
+        assert compact.read() == plain.read()
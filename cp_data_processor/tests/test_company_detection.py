@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cp_data_processor.readers import excel_stream
+from cp_data_processor.readers.company_adapters.company_registry import CompanyRegistry
+from cp_data_processor.readers.company_adapters.file_probe import FileProbe
+from guoyu import guoyu_reader
+from guoyu.tests.test_guoyu_reader import write_juno_workbook
+
+
+@pytest.fixture
+def count_workbook_opens(monkeypatch):
+    guoyu_reader.clear_header_cache()
+    opened = []
+    original_open = excel_stream.SheetRowStream._open
+
+    def counting_open(self):
+        if self._book is None:
+            opened.append(self.file_path)
+        return original_open(self)
+
+    monkeypatch.setattr(excel_stream.SheetRowStream, "_open", counting_open)
+    yield opened
+    guoyu_reader.clear_header_cache()
+
+
+def test_probe_reads_sheet_names_and_head_once(tmp_path, count_workbook_opens):
+    path = str(write_juno_workbook(tmp_path / "257375" / "01.xlsx"))
+
+    probe = FileProbe.from_file(path)
+
+    assert probe.excel_format == "xlsx"
+    assert probe.sheet_names == ["Sheet1"]
+    expected = pd.read_excel(path, header=None, nrows=len(probe.head_rows))
+    assert probe.head_frame.iloc[:, 0].astype(str).tolist() == expected.iloc[:, 0].astype(str).tolist()
+    assert count_workbook_opens == [path]
+
+
+def test_detection_probes_each_file_once(tmp_path, count_workbook_opens):
+    guoyu_file = str(write_juno_workbook(tmp_path / "257375" / "01.xlsx"))
+    (tmp_path / "misc").mkdir()
+    other_file = tmp_path / "misc" / "report.xlsx"
+    pd.DataFrame({"PART_INDEX": [1, 2]}).to_excel(other_file, index=False)
+    text_file = tmp_path / "misc" / "notes.xls"
+    text_file.write_text("not a workbook", encoding="utf-8")
+    registry = CompanyRegistry()
+
+    first = [registry.detect_company_from_file(str(path)) for path in (guoyu_file, other_file, text_file)]
+    second = [registry.detect_company_from_file(str(path)) for path in (guoyu_file, other_file, text_file)]
+
+    assert first == second
+    assert first[0] == "GUOYU"
+    assert sorted(count_workbook_opens) == sorted([guoyu_file, str(other_file)])
+    assert registry.adapter_can_process_file("GUOYU", guoyu_file)
+    assert guoyu_reader.GuoyuFRDReader().can_read(guoyu_file)
+    assert len(count_workbook_opens) == 2
+
+
+def test_changed_file_is_probed_again(tmp_path, count_workbook_opens):
+    path = tmp_path / "257375" / "01.xlsx"
+    write_juno_workbook(path)
+    registry = CompanyRegistry()
+    assert registry.detect_company_from_file(str(path)) == "GUOYU"
+
+    pd.DataFrame({"PART_INDEX": [1]}).to_excel(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert registry.detect_company_from_file(str(path)) != "GUOYU"
+    assert count_workbook_opens == [str(path), str(path)]
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.processing.data_transformer import (
+    MAD_SCALE, DataTransformer, _grouped_outlier_bounds, _outlier_bounds)
+
+
+def reference_bounds(series, method, threshold):
+    """逐列用 pandas 计算的上下限（矩阵实现之前的算法）"""
+    valid = series.dropna()
+    if valid.empty:
+        return np.nan, np.nan
+    if method == "std_dev":
+        mean, std_dev = valid.mean(), valid.std()
+        return mean - threshold * std_dev, mean + threshold * std_dev
+    if method == "mad":
+        median = valid.median()
+        mad = MAD_SCALE * (valid - median).abs().median()
+        return median - threshold * mad, median + threshold * mad
+    q1, q3 = valid.quantile(0.25), valid.quantile(0.75)
+    return q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+
+
+@pytest.mark.parametrize("method", ["std_dev", "iqr"])
+@pytest.mark.parametrize("rows", [1, 2, 7, 130, 5001])
+def test_matrix_bounds_match_pandas_bit_for_bit(method, rows):
+    rng = np.random.default_rng(rows)
+    frame = pd.DataFrame(rng.standard_t(3, (rows, 6)) * 10.0 ** rng.integers(-6, 6, 6))
+    frame.iloc[:, 1] = np.where(rng.random(rows) < 0.3, np.nan, frame.iloc[:, 1])
+    frame.iloc[:, 2] = np.where(rng.random(rows) < 0.3, np.nan, frame.iloc[:, 2])
+    frame.iloc[:, 3] = np.nan
+    frame.iloc[: rows // 2, 4] = np.nan
+
+    lower, upper, counts = _outlier_bounds(np.asfortranarray(frame.to_numpy()), method, 2.5)
+
+    for position in range(frame.shape[1]):
+        expected = reference_bounds(frame[position], method, 2.5)
+        np.testing.assert_array_equal([lower[position], upper[position]], expected)
+    assert counts.tolist() == frame.notna().sum().tolist()
+
+
+@pytest.mark.parametrize("method", ["iqr", "mad"])
+def test_grouped_bounds_match_per_group_pandas(method):
+    rng = np.random.default_rng(7)
+    rows = 3000
+    groups = rng.integers(0, 9, rows)
+    groups[groups == 8] = 0  # 分组 8 没有行
+    frame = pd.DataFrame(rng.standard_t(3, (rows, 4)) * 10.0 ** rng.integers(-6, 6, 4))
+    frame.iloc[:, 1] = np.where(rng.random(rows) < 0.3, np.nan, frame.iloc[:, 1])
+    frame.iloc[:, 2] = np.where(groups == 3, np.nan, frame.iloc[:, 2])
+    frame.iloc[:, 3] = np.where(groups == 5, 1.0, frame.iloc[:, 3])
+
+    lower, upper, counts = _grouped_outlier_bounds(np.asfortranarray(frame.to_numpy()), groups, 9, method, 2.5)
+
+    for group in range(9):
+        members = frame[groups == group]
+        for position in range(frame.shape[1]):
+            expected = reference_bounds(members[position], method, 2.5)
+            np.testing.assert_array_equal([lower[group, position], upper[group, position]], expected)
+        assert counts[group].tolist() == members.notna().sum().tolist()
+
+
+@pytest.mark.parametrize("combine", [True, False])
+def test_clean_data_updates_combined_and_wafers(combine, capsys):
+    rng = np.random.default_rng(0)
+    wafers = []
+    for number in (1, 2):
+        chip_data = pd.DataFrame({"VTH": rng.normal(1.0, 0.1, 200), "Bin": rng.integers(1, 3, 200)})
+        chip_data.loc[[5, 50], "VTH"] = [9.0, -9.0]
+        wafers.append(CPWafer(wafer_id=str(number), chip_data=chip_data))
+    lot = CPLot(lot_id="L", wafers=wafers, params=[CPParameter(id="VTH"), CPParameter(id="Bin")])
+    originals = [wafer.chip_data.copy() for wafer in wafers]
+    lot.combine_data_from_wafers()
+    if not combine:
+        # 未按列合并的批次：按 Wafer_ID 写回晶圆
+        lot.column_store = None
+        lot.combined_data = lot.combined_data.assign(Wafer_ID=np.repeat(["1", "2"], 200))
+    expected = lot.combined_data["VTH"].copy()
+    low, high = reference_bounds(expected, "iqr", 3.0)
+    expected[(expected < low) | (expected > high)] = np.nan
+
+    DataTransformer(lot).clean_data("iqr")
+
+    np.testing.assert_array_equal(lot.combined_data["VTH"], expected)
+    assert lot.combined_data["Bin"].dtype == np.float64
+    for number, wafer in enumerate(lot.wafers):
+        if combine:
+            # 合并结果只有 WaferID 列：晶圆保留原始数据
+            pd.testing.assert_frame_equal(wafer.chip_data, originals[number])
+        else:
+            np.testing.assert_array_equal(wafer.chip_data["VTH"], expected[number * 200:(number + 1) * 200])
+            assert wafer.chip_data["Bin"].dtype == np.float64
+    assert f"参数 VTH: 检测到 {int(expected.isna().sum())} 个异常值 (IQR方法)" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("combine", [True, False])
+@pytest.mark.parametrize("method, level", [("iqr_wafer", "wafer"), ("mad_lot", "lot"), ("mad", None)])
+def test_grouped_clean_data_uses_per_group_fences(combine, method, level, capsys):
+    rng = np.random.default_rng(1)
+    wafers = []
+    for number, (source, shift) in enumerate([("S1", 0.0), ("S1", 0.5), ("S2", 5.0)]):
+        chip_data = pd.DataFrame({"VTH": rng.normal(1.0 + shift, 0.1, 150)})
+        chip_data.loc[[3, 80], "VTH"] = [20.0, -20.0]
+        wafers.append(CPWafer(wafer_id=str(number + 1), source_lot_id=source, chip_data=chip_data))
+    lot = CPLot(lot_id="L", wafers=wafers, params=[CPParameter(id="VTH")])
+    lot.combine_data_from_wafers()
+    if not combine:
+        lot.column_store = None
+        lot.combined_data = lot.combined_data.copy()
+    data = lot.combined_data
+    keys = {"wafer": data["WaferID"], "lot": data["LotID"], None: pd.Series(0, index=data.index)}[level]
+    raw = data["VTH"].to_numpy().copy()
+    expected = data["VTH"].copy()
+    for _, members in expected.groupby(keys.to_numpy()):
+        low, high = reference_bounds(members, method.split("_")[0], 3.0)
+        expected[members.index[(members < low) | (members > high)]] = np.nan
+
+    DataTransformer(lot).clean_data(method)
+
+    np.testing.assert_array_equal(lot.combined_data["VTH"], expected)
+    for number, wafer in enumerate(lot.wafers):
+        np.testing.assert_array_equal(wafer.chip_data["VTH"], raw[number * 150:(number + 1) * 150])
+    assert f"检测到 {int(expected.isna().sum())} 个异常值" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("method", ["std_dev", "iqr", "mad_wafer"])
+def test_columns_without_values_print_no_outlier_count(method, capsys):
+    chip_data = pd.DataFrame({"VTH": [1.0, 1.1, 0.9, 1.0, 1.05, 0.95], "IDSS": np.nan})
+    lot = CPLot(lot_id="L", wafers=[CPWafer(wafer_id="1", chip_data=chip_data)],
+                params=[CPParameter(id="VTH"), CPParameter(id="IDSS")])
+
+    DataTransformer(lot).clean_data(method)
+
+    out = capsys.readouterr().out
+    assert "找到 2 个数值参数进行清洗" in out
+    assert "参数 VTH: 检测到 0 个异常值" in out and "参数 IDSS" not in out
@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import numpy as np
+
+from cp_data_processor.readers.dcp_file_scan import DCPFileScan
+from cp_data_processor.readers.dcp_reader import DCPReader
+
+
+PARAMS = ["CONT", "IGSS0", "VTH", "BVDSS1", "IDSS1"]
+
+
+def write_dcp(path: Path, wafer_no: int = 1, die_count: int = 200, seed: int = 0) -> Path:
+    rng = np.random.default_rng(seed)
+    header = [
+        "Program name\tME58XX1_G00Z2AB.jtf",
+        "Lot number\tFA54-5339-327A-250501@203",
+        f"Wafer number\t{wafer_no}",
+        "Date\t5/1/2025",
+        "Time\t0:49:13",
+        "",
+        "No.U\tX\tY\tBin\t" + "\t".join(PARAMS),
+        "LimitU\t\t\t\t0.500V\t99.00uA\t3.900V\t140.0V\t100.0nA",
+        "LimitL\t\t\t\t0V\t0A\t2.400V\t120.0V\t0A",
+    ] + [f"Bias {i}" for i in range(1, 7)]
+    rows = []
+    for index in range(die_count):
+        values = [
+            f"{rng.normal():.6g}",
+            f"{rng.lognormal(-20, 3):.5E}",
+            rng.choice([repr(float(rng.normal(3, 1))), "nan"]),
+            f"{rng.uniform(100, 200):.3f}",
+            repr(float(rng.normal() * 1e-9)),
+        ]
+        coords = [index + 1, rng.integers(-50, 50), rng.integers(-50, 50), rng.integers(1, 5)]
+        rows.append("\t".join([str(value) for value in coords] + values))
+    rows.insert(3, "")
+    path.write_text("\n".join(header + rows) + "\n", encoding="utf-8")
+    return path
+
+
+def assert_same_wafers(fast_lot, slow_lot):
+    assert [wafer.wafer_id for wafer in fast_lot.wafers] == [wafer.wafer_id for wafer in slow_lot.wafers]
+    for fast, slow in zip(fast_lot.wafers, slow_lot.wafers):
+        for name in ("seq", "bin", "x", "y"):
+            assert getattr(fast, name).dtype == getattr(slow, name).dtype
+            assert np.array_equal(getattr(fast, name), getattr(slow, name))
+        assert list(fast.chip_data.columns) == list(slow.chip_data.columns)
+        for column in fast.chip_data.columns:
+            fast_bits = fast.chip_data[column].to_numpy().view(np.int64)
+            slow_bits = slow.chip_data[column].to_numpy().view(np.int64)
+            assert np.array_equal(fast_bits, slow_bits)
+
+
+def test_fast_parse_matches_compatible_parse_bit_for_bit(tmp_path):
+    files = [str(write_dcp(tmp_path / f"w{i}.txt", wafer_no=i, seed=i)) for i in (1, 2)]
+
+    fast_lot = DCPReader(files).read()
+    slow_lot = DCPReader(files, fast_parse=False).read()
+
+    assert fast_lot.wafer_count == 2
+    assert fast_lot.wafers[0].chip_count == 200
+    assert [(p.id, p.sl, p.su) for p in fast_lot.params] == [(p.id, p.sl, p.su) for p in slow_lot.params]
+    assert_same_wafers(fast_lot, slow_lot)
+
+
+def test_quoted_block_uses_compatible_parse(tmp_path):
+    path = write_dcp(tmp_path / "quoted.txt")
+    text = path.read_text(encoding="utf-8").replace("\tVTH\t", '\t"VTH"\t')
+    path.write_text(text, encoding="utf-8")
+
+    fast_lot = DCPReader([str(path)]).read()
+    slow_lot = DCPReader([str(path)], fast_parse=False).read()
+
+    assert '"VTH"' in fast_lot.get_param_names()
+    assert_same_wafers(fast_lot, slow_lot)
+
+
+def test_to_float_array_coerces_bad_cells_to_nan():
+    values = np.array(["1.5", "abc", None, 2], dtype=object)
+
+    result = DCPReader._to_float_array(values)
+
+    assert result.dtype == np.float64
+    assert result[0] == 1.5 and result[3] == 2.0
+    assert np.isnan(result[1]) and np.isnan(result[2])
+
+
+def test_file_scan_exposes_ids_header_and_data_block(tmp_path):
+    path = write_dcp(tmp_path / "w7.txt", wafer_no=7, die_count=5)
+
+    scan = DCPFileScan.from_file(str(path))
+
+    assert scan.lot_id_r2c2 == "FA54-5339-327A-250501@203"
+    assert scan.wafer_id_r3c2 == "7"
+    assert scan.param_row_index == 6
+    assert scan.limit_u_row.startswith("LimitU")
+    assert [row.split("\t")[0] for row in scan.bias_rows] == [f"Bias {i}" for i in range(1, 7)]
+    assert scan.data_block.splitlines()[0] == "No.U\tX\tY\tBin\t" + "\t".join(PARAMS)
+    assert len(scan.data_block.splitlines()) == 1 + 5
+
+
+def test_spec_file_is_built_from_reader_scan_without_disk(tmp_path):
+    from dcp_spec_extractor import generate_spec_file
+
+    path = write_dcp(tmp_path / "w1.txt")
+    expected = Path(generate_spec_file(str(path), str(tmp_path / "disk"))).read_text(encoding="utf-8")
+
+    reader = DCPReader([str(path)])
+    reader.read()
+    scan = reader.file_scans[str(path)]
+    path.unlink()
+
+    assert scan.line_count > len(scan.lines)
+    generated = generate_spec_file(str(path), str(tmp_path / "memory"), scan=scan)
+    assert Path(generated).read_text(encoding="utf-8") == expected
+
+
+def test_parallel_read_keeps_file_order(tmp_path):
+    files = [str(write_dcp(tmp_path / f"w{i:02d}.txt", wafer_no=i, die_count=50, seed=i)) for i in (3, 1, 2, 5)]
+
+    parallel_reader = DCPReader(files, parallel=True, max_workers=2)
+    parallel_lot = parallel_reader.read()
+    serial_lot = DCPReader(files, parallel=False).read()
+
+    assert [wafer.file_path for wafer in parallel_lot.wafers] == files
+    assert [wafer.wafer_id for wafer in parallel_lot.wafers] == ["3", "1", "2", "5"]
+    assert list(parallel_reader.file_scans) == files
+    assert_same_wafers(parallel_lot, serial_lot)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.readers.excel_stream import (
+    ColumnSpec,
+    SheetRowStream,
+    collect_columns,
+    read_until,
+    rows_to_frame,
+)
+
+
+def write_sheet(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows).to_excel(path, sheet_name="dut_data", header=False, index=False)
+    return path
+
+
+@pytest.mark.parametrize(
+    "cells",
+    [
+        [1, 2, 3],
+        [1, np.nan, 3],
+        [1, 2.5, 3],
+        [1, "3", 2],
+        [1.5, "x", True],
+        [2 ** 70, 1],
+    ],
+)
+def test_numeric_column_matches_to_numeric(cells):
+    block = collect_columns(iter([(cell,) for cell in cells]), [ColumnSpec("v", 0, "numeric")])
+
+    expected = pd.to_numeric(pd.Series(cells, dtype=object), errors="coerce").to_numpy()
+    assert block.columns["v"].dtype == expected.dtype
+    np.testing.assert_array_equal(block.columns["v"], expected)
+
+
+def test_collect_columns_filters_stops_and_keeps_row_numbers():
+    rows = [("P1", 1, "1mV"), ("note",), ("F2", 2, "1mV"), ("P3", 1, 0.0), ("END",), ("P4", 1, "9mV")]
+
+    block = collect_columns(
+        iter(rows),
+        [ColumnSpec("serial", 0, "object"), ColumnSpec("bin", 1, "numeric"), ColumnSpec("value", 2, "codes")],
+        first_row_number=10,
+        row_filter=lambda row: row[0][0] in "PF",
+        stop=lambda row: row[0] == "END",
+        chunk_rows=2,
+    )
+
+    assert len(block) == 3
+    assert block.row_numbers.tolist() == [10, 12, 13]
+    assert block.columns["serial"].tolist() == ["P1", "F2", "P3"]
+    assert block.columns["bin"].dtype == np.int64
+    assert block.columns["value"].codes.tolist() == [0, 0, 1]
+    assert block.columns["value"].to_numpy().tolist() == ["1mV", "1mV", 0.0]
+    assert block.stop_row == ("END",)
+    assert block.max_width == 3
+
+
+def test_stream_matches_read_excel_cells(tmp_path):
+    rows = [
+        ["Title", None, None],
+        ["NA", 2.0, "nan"],
+        [None, 1.5, "x"],
+        ["Serial#", "Bin", "VTH"],
+        ["P1", 1, "1.0V"],
+        ["P2", 2, None],
+    ]
+    path = write_sheet(tmp_path / "sheet.xlsx", rows)
+
+    with SheetRowStream(str(path), "dut_data") as stream:
+        rows_iter = iter(stream)
+        head, found = read_until(rows_iter, lambda row: row[0] == "Serial#")
+        block = collect_columns(rows_iter, [ColumnSpec("Bin", 1, "numeric")], first_row_number=len(head))
+
+    expected = pd.read_excel(path, sheet_name="dut_data", header=None)
+    assert found
+    pd.testing.assert_frame_equal(rows_to_frame(head), expected.iloc[: len(head)].astype(object))
+    np.testing.assert_array_equal(block.columns["Bin"], expected.iloc[len(head):, 1].astype(np.int64))
+    assert block.row_numbers.tolist() == [4, 5]
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.config.performance_config import get_performance_config
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.data_models.lot_collection import LotCollection
+from cp_data_processor.processing.standard_csv_generator import StandardCSVGenerator
+
+
+def make_lot(lot_id, seed):
+    rng = np.random.default_rng(seed)
+    wafers = []
+    for number in (3, 1, 12):
+        rows = 40 + number
+        chip_data = pd.DataFrame({
+            "X_COORD": rng.integers(0, 20, rows),
+            "Y_COORD": rng.integers(0, 20, rows),
+            "Bin": rng.integers(1, 4, rows),
+            "VTH": rng.normal(1.0, 0.1, rows).round(4),
+            "IDSS": rng.normal(5.0, 1.0, rows).round(3),
+        })
+        if number == 12:
+            # 整数列只出现在部分晶圆，合并后按浮点写出
+            chip_data["SITE"] = rng.integers(0, 4, rows)
+        wafer = CPWafer(wafer_id=f"{lot_id}-{number:02d}", chip_data=chip_data, chip_count=rows)
+        wafer.summary_data = {"gross_die": rows}
+        wafers.append(wafer)
+    lot = CPLot(lot_id=lot_id, product="P1", wafers=wafers, pass_bin=1,
+                params=[CPParameter(id="VTH", unit="V"), CPParameter(id="IDSS", unit="A")])
+    lot.combine_data_from_wafers()
+    return lot
+
+
+def is_mapped(array):
+    while isinstance(array, np.ndarray) and not isinstance(array, np.memmap):
+        array = array.base
+    return isinstance(array, np.memmap)
+
+
+@pytest.fixture
+def lots():
+    return {lot_id: make_lot(lot_id, seed) for seed, lot_id in enumerate(["LOT_B", "LOT_A"])}
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_streamed_combined_csvs_match_in_memory(tmp_path, monkeypatch, compact):
+    monkeypatch.setattr(get_performance_config(), "ENABLE_COMPACT_DTYPES", compact)
+    lots = {lot_id: make_lot(lot_id, seed) for seed, lot_id in enumerate(["LOT_B", "LOT_A"])}
+    collection = LotCollection.save_lots(lots, tmp_path / "lots")
+    generator = StandardCSVGenerator()
+    generator._generate_timestamp = lambda: "T"
+    (tmp_path / "memory").mkdir()
+
+    expected = generator.generate_combined_standard_csvs(lots, str(tmp_path / "memory"))
+    streamed = generator.generate_combined_standard_csvs(collection, str(tmp_path / "stream"))
+
+    for kind in ("cleaned", "yield", "spec"):
+        with open(expected[kind], "rb") as a, open(streamed[kind], "rb") as b:
+            assert a.read() == b.read(), kind
+
+
+def test_index_and_projection_read_only_requested_columns(tmp_path, lots):
+    collection = LotCollection.save_lots(lots, tmp_path)
+
+    assert collection.lot_ids == ["LOT_B", "LOT_A"] and len(collection.wafers) == 6
+    assert collection.row_count == sum(len(lot.combined_data) for lot in lots.values())
+    assert collection.columns == ["X_COORD", "Y_COORD", "Bin", "VTH", "IDSS", "SITE"]
+
+    wafer, chip_data = next(collection.iter_chip_data(["VTH", "Bin"]))
+    assert list(chip_data.columns) == ["Bin", "VTH"]
+    pd.testing.assert_frame_equal(chip_data, lots["LOT_B"].wafers[0].chip_data[["Bin", "VTH"]])
+    assert is_mapped(chip_data["VTH"].to_numpy())
+
+    lot = LotCollection.from_directory(tmp_path)["LOT_A"]
+    pd.testing.assert_frame_equal(lot.combined_data, lots["LOT_A"].combined_data)
+    assert list(collection.load_lot("LOT_A", ["IDSS"]).combined_data.columns) == ["IDSS"]
+
+
+def test_streaming_aggregate_matches_pandas(tmp_path, lots):
+    collection = LotCollection.save_lots(lots, tmp_path)
+    frames = [lot.combined_data.assign(Lot_ID=lot.lot_id) for lot in lots.values()]
+    combined = pd.concat(frames, ignore_index=True)
+    good = combined[combined["Bin"] == 1]
+
+    result = collection.aggregate(["VTH", "IDSS"], by="lot", bins=[1]).set_index(["Lot_ID", "Parameter"])
+
+    expected = good.groupby("Lot_ID")[["VTH", "IDSS"]].agg(["count", "mean", "std", "min", "max"])
+    for lot_id in lots:
+        for parameter in ("VTH", "IDSS"):
+            row = result.loc[(lot_id, parameter)]
+            stats = expected.loc[lot_id, parameter]
+            assert row["Count"] == stats["count"]
+            np.testing.assert_allclose(row[["Mean", "Std", "Min", "Max"]].astype(float),
+                                       stats[["mean", "std", "min", "max"]].astype(float), rtol=1e-12)
+    assert len(collection.aggregate(["VTH"], by="wafer")) == 6
+    assert collection.aggregate(["VTH"], by=None)["Count"].item() == combined["VTH"].notna().sum()
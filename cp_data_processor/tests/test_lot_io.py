@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.config.performance_config import get_performance_config
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.data_models.lot_io import LotFormatError
+
+
+def make_lot():
+    rng = np.random.default_rng(0)
+    wafers = []
+    for number in (1, 2, 3):
+        rows = 50 + number
+        chip_data = pd.DataFrame({
+            "VTH": rng.normal(1.0, 0.1, rows).round(4),
+            "IDSS": rng.normal(5.0, 1.0, rows),
+            "Wafer_ID": f"W{number}",
+            "Note": np.where(rng.random(rows) > 0.5, "ok", None),
+        })
+        wafer = CPWafer(wafer_id=f"W{number}", chip_data=chip_data, chip_count=rows, yield_rate=0.9,
+                        seq=np.arange(1, rows + 1), bin=rng.integers(1, 3, rows),
+                        x=rng.integers(0, 10, rows), y=rng.integers(0, 10, rows))
+        wafer.spec_data = pd.DataFrame({"Parameter": ["VTH", "IDSS"], "Unit": ["V", "A"]})
+        wafer.summary_data = {"Total": rows, "Tester": "T1"}
+        wafers.append(wafer)
+    lot = CPLot(lot_id="LOT1", product="P1", wafers=wafers, pass_bin=1,
+                params=[CPParameter(id="VTH", unit="V", sl=0.5, su=1.5, test_cond=["Vd=1V"], mean=1.0)])
+    lot.update_counts()
+    return lot
+
+
+def assert_same_lot(loaded, lot):
+    assert loaded.lot_id == lot.lot_id and loaded.product == lot.product
+    assert loaded.params == lot.params
+    pd.testing.assert_frame_equal(loaded.combined_data, lot.combined_data)
+    for loaded_wafer, wafer in zip(loaded.wafers, lot.wafers):
+        assert loaded_wafer.wafer_id == wafer.wafer_id and loaded_wafer.yield_rate == wafer.yield_rate
+        pd.testing.assert_frame_equal(loaded_wafer.chip_data, wafer.chip_data)
+        pd.testing.assert_frame_equal(loaded_wafer.spec_data, wafer.spec_data)
+        assert loaded_wafer.summary_data == wafer.summary_data
+        for attr in ("seq", "bin", "x", "y"):
+            np.testing.assert_array_equal(getattr(loaded_wafer, attr), getattr(wafer, attr))
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_save_load_round_trip_shares_mapped_columns(tmp_path, monkeypatch, compact):
+    monkeypatch.setattr(get_performance_config(), "ENABLE_COMPACT_DTYPES", compact)
+    lot = make_lot()
+    lot.combine_data_from_wafers()
+
+    loaded = CPLot.load(lot.save(str(tmp_path / "lot")))
+
+    assert_same_lot(loaded, lot)
+    vth = loaded.column_store.columns["VTH"]
+    assert isinstance(vth.base, np.memmap)
+    assert np.shares_memory(loaded.combined_data["VTH"].to_numpy(), vth)
+    assert np.shares_memory(loaded.wafers[2].chip_data["VTH"].to_numpy(), vth)
+    assert loaded.wafer_rows(loaded.wafers[2]) == lot.wafer_rows(lot.wafers[2])
+
+
+def test_edits_after_load_stay_in_process(tmp_path):
+    lot = make_lot()
+    lot.combine_data_from_wafers()
+    path = lot.save(str(tmp_path / "lot"))
+
+    loaded = CPLot.load(path)
+    loaded.combined_data.loc[0, "VTH"] = np.nan
+
+    assert np.isnan(loaded.wafers[0].chip_data["VTH"].iloc[0])
+    assert CPLot.load(path).combined_data.loc[0, "VTH"] == lot.combined_data.loc[0, "VTH"]
+
+
+def test_uncombined_lot_round_trip_and_overwrite(tmp_path):
+    lot = make_lot()
+    path = str(tmp_path / "lot")
+    lot.save(path)
+    lot.wafers[0].chip_data.loc[0, "VTH"] = 9.0
+
+    loaded = CPLot.load(lot.save(path), mmap=False)
+
+    assert loaded.column_store is None and loaded.combined_data is None
+    assert loaded.wafers[0].chip_data.loc[0, "VTH"] == 9.0
+    for loaded_wafer, wafer in zip(loaded.wafers, lot.wafers):
+        pd.testing.assert_frame_equal(loaded_wafer.chip_data, wafer.chip_data)
+
+
+def test_refuses_foreign_directories(tmp_path):
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "keep.txt").write_text("x")
+
+    with pytest.raises(FileExistsError):
+        make_lot().save(str(tmp_path / "other"))
+    with pytest.raises(LotFormatError):
+        CPLot.load(str(tmp_path / "other"))
+    assert (tmp_path / "other" / "keep.txt").exists()
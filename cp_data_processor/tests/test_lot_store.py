@@ -0,0 +1,110 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from clean_dcp_data import collect_wafer_data
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.processing.data_transformer import DataTransformer
+
+
+def make_lot():
+    rng = np.random.default_rng(0)
+    wafers = []
+    for number, rows in ((1, 5), (2, 4), (3, 6)):
+        frame = pd.DataFrame({
+            "Seq": np.arange(1, rows + 1),
+            "Bin": rng.integers(1, 4, rows),
+            "VTH": rng.normal(1.0, 0.1, rows),
+            "Wafer_ID": str(number),
+        })
+        if number != 2:
+            frame["IDSS"] = rng.normal(5.0, 1.0, rows)
+        if number == 3:
+            frame["VTH.1"] = frame["VTH"]
+            frame.index = frame.index + 100
+        wafer = CPWafer(wafer_id=str(number), chip_data=frame, chip_count=rows)
+        wafer.seq = frame["Seq"].to_numpy()
+        wafer.bin = frame["Bin"].to_numpy()
+        wafers.append(wafer)
+    wafers.insert(1, CPWafer(wafer_id="empty"))
+    return CPLot(lot_id="LOT1", wafers=wafers,
+                 params=[CPParameter(id="VTH"), CPParameter(id="IDSS")])
+
+
+def test_combined_data_matches_copy_concat():
+    lot = make_lot()
+    reference = copy.deepcopy(lot)
+    reference._combine_by_copy([w for w in reference.wafers if w.chip_data is not None], True)
+    originals = [w.chip_data.copy() for w in lot.wafers if w.chip_data is not None]
+
+    lot.combine_data_from_wafers()
+
+    pd.testing.assert_frame_equal(lot.combined_data, reference.combined_data)
+    views = [w.chip_data for w in lot.wafers if w.chip_data is not None]
+    for view, original in zip(views, originals):
+        pd.testing.assert_frame_equal(view, original)
+
+
+def test_wafer_data_are_views_of_combined_data():
+    lot = make_lot()
+    lot.combine_data_from_wafers()
+    vth = lot.combined_data["VTH"].to_numpy()
+
+    for wafer in lot.wafers:
+        if wafer.chip_data is None:
+            continue
+        rows = lot.wafer_rows(wafer)
+        assert np.shares_memory(wafer.chip_data["VTH"].to_numpy(), vth)
+        np.testing.assert_array_equal(wafer.chip_data["VTH"].to_numpy(), vth[rows])
+        assert np.shares_memory(wafer.seq, lot.column_store.columns["Seq"])
+        assert np.shares_memory(wafer.bin, lot.column_store.columns["Bin"])
+    assert lot.wafer_rows(lot.wafers[1]) is None
+
+
+def test_clean_data_reaches_wafer_views_only_with_wafer_id_column():
+    lot = make_lot()
+    lot.combine_data_from_wafers(id_columns=False)
+    lot.combined_data.loc[0, "VTH"] = 100.0
+    lot.params.append(CPParameter(id="Bin"))
+
+    DataTransformer(lot).clean_data(std_dev_threshold=1.0)
+
+    assert np.isnan(lot.wafers[0].chip_data["VTH"].iloc[0])
+    for wafer in lot.wafers:
+        if wafer.chip_data is None:
+            continue
+        rows = lot.wafer_rows(wafer)
+        for column in set(wafer.chip_data.columns) & {"VTH", "IDSS", "Bin"}:
+            np.testing.assert_array_equal(
+                wafer.chip_data[column].to_numpy(), lot.combined_data[column].to_numpy()[rows]
+            )
+
+
+def test_clean_data_keeps_wafer_data_for_cleaned_csv():
+    lot = make_lot()
+    lot.wafers[0].chip_data.loc[0, "VTH"] = 100.0
+    lot.params.append(CPParameter(id="Bin"))
+    lot.combine_data_from_wafers()
+    before = collect_wafer_data(lot)
+
+    DataTransformer(lot).clean_data(std_dev_threshold=1.0)
+
+    # HH 清洗 CSV 由晶圆 chip_data 生成：内容与清洗前相同，整数列保持整数
+    assert np.isnan(lot.combined_data.loc[0, "VTH"]) and lot.combined_data["Bin"].isna().any()
+    after = collect_wafer_data(lot)
+    pd.testing.assert_frame_equal(after, before)
+    assert after["Bin"].dtype == np.int64
+
+
+def test_added_column_is_shared_by_wafers():
+    lot = make_lot()
+    lot.combine_data_from_wafers()
+
+    DataTransformer(lot).add_calculated_parameter("VTH2", "VTH * 2")
+
+    values = lot.combined_data["VTH2"].to_numpy()
+    third = lot.wafers[3]
+    assert list(third.chip_data.columns)[-1] == "VTH2"
+    assert np.shares_memory(third.chip_data["VTH2"].to_numpy(), values)
+    np.testing.assert_allclose(third.chip_data["VTH2"], third.chip_data["VTH"] * 2)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.processing import memory_governor
+from cp_data_processor.processing.memory_governor import MemoryGovernor
+from cp_data_processor.processing.standard_csv_generator import StandardCSVGenerator
+
+
+class FakeRSS:
+    """按顺序返回给定的 RSS 值，用完后重复最后一个"""
+
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def __call__(self):
+        return self.values.pop(0) if len(self.values) > 1 else self.values[0]
+
+
+def test_gc_runs_at_threshold_and_decisions_are_logged(monkeypatch, caplog):
+    collected = []
+    monkeypatch.setattr(memory_governor.gc, "collect", lambda: collected.append(1))
+    governor = MemoryGovernor(limit_mb=1000, gc_threshold=0.8, enabled=True,
+                              rss_sampler=FakeRSS(500, 850, 700, 900, 850))
+
+    assert not governor.under_pressure("读取") and not collected
+    assert not governor.under_pressure("读取") and len(collected) == 1  # 回收后降到 700MB
+    assert governor.degrade("写出", "改为逐片晶圆写出")
+    assert governor.peak_rss_mb == 900 and governor.gc_count == 1  # 两次回收间隔太短
+    assert [(d.stage, d.action, d.rss_mb) for d in governor.decisions] == [("写出", "改为逐片晶圆写出", 850)]
+    assert "内存降级 [写出]" in caplog.text
+
+
+def test_limit_workers_and_disabled_governor():
+    assert MemoryGovernor(limit_mb=1000, enabled=True, rss_sampler=lambda: 100).limit_workers("t", 8) == 8
+    assert MemoryGovernor(limit_mb=1000, gc_threshold=0.8, enabled=True,
+                          rss_sampler=lambda: 850).limit_workers("t", 8) == 4
+    assert MemoryGovernor(limit_mb=1000, enabled=True, rss_sampler=lambda: 1200).limit_workers("t", 8) == 1
+
+    disabled = MemoryGovernor(limit_mb=1, enabled=False, rss_sampler=lambda: 1200)
+    assert disabled.limit_workers("t", 8) == 8 and not disabled.degrade("t", "x") and not disabled.decisions
+
+
+def make_lot(lot_id, seed):
+    rng = np.random.default_rng(seed)
+    wafers = []
+    for number in (3, 1, 12):
+        chip_data = pd.DataFrame({"X_COORD": np.arange(40), "Y_COORD": np.arange(40) % 5,
+                                  "SOFT_BIN": rng.integers(1, 4, 40), "VTH": rng.normal(1.0, 0.1, 40)})
+        if number == 12:
+            chip_data["IDSS"] = rng.integers(0, 100, 40)  # 只有部分晶圆有的整数列按浮点写出
+        wafers.append(CPWafer(wafer_id=f"{lot_id}-W{number:02d}", chip_data=chip_data))
+    return CPLot(lot_id=lot_id, wafers=wafers, params=[CPParameter(id="VTH"), CPParameter(id="IDSS")])
+
+
+@pytest.mark.parametrize("combined", [False, True])
+def test_cleaned_csv_streams_under_memory_pressure(tmp_path, combined):
+    lots = {lot_id: make_lot(lot_id, seed) for seed, lot_id in enumerate(["LOT_B", "LOT_A"])}
+    relaxed = StandardCSVGenerator(MemoryGovernor(limit_mb=10_000, enabled=True, rss_sampler=lambda: 100))
+    pressured = StandardCSVGenerator(MemoryGovernor(limit_mb=1, enabled=True, chunk_size=7,
+                                                    rss_sampler=lambda: 100))
+
+    if combined:
+        expected = relaxed._generate_combined_cleaned_csv(lots, str(tmp_path), "memory", "T")
+        streamed = pressured._generate_combined_cleaned_csv(lots, str(tmp_path), "stream", "T")
+    else:
+        expected = relaxed.generate_cleaned_csv(lots["LOT_A"], str(tmp_path), "memory")
+        streamed = pressured.generate_cleaned_csv(lots["LOT_A"], str(tmp_path), "stream")
+
+    with open(expected, "rb") as a, open(streamed, "rb") as b:
+        assert a.read() == b.read()
+    assert not relaxed.memory_governor.decisions
+    assert [d.action.split("，")[0] for d in pressured.memory_governor.decisions] == ["改为逐片晶圆写出"]
+
+
+def test_memory_error_falls_back_to_streaming(tmp_path, monkeypatch):
+    lot = make_lot("LOT_A", 0)
+    generator = StandardCSVGenerator(MemoryGovernor(limit_mb=10_000, enabled=True, rss_sampler=lambda: 100))
+    expected = open(generator.generate_cleaned_csv(lot, str(tmp_path), "memory"), "rb").read()
+
+    def out_of_memory(*args, **kwargs):
+        raise MemoryError()
+
+    monkeypatch.setattr(generator, "_write_lot_cleaned_csv", out_of_memory)
+    streamed = generator.generate_cleaned_csv(lot, str(tmp_path), "stream")
+
+    assert open(streamed, "rb").read() == expected
+    assert "内存不足" in generator.memory_governor.decisions[0].action
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.analysis.capability_analyzer import CapabilityAnalyzer
+from cp_data_processor.analysis.yield_analyzer import YieldAnalyzer
+from cp_data_processor.processing import numba_accelerators as kernels
+
+# 循环版本以纯 Python 运行，安装了 numba 时再比较编译后的版本
+LOOP_IMPLEMENTATIONS = [pytest.param(lambda function: function, id="python")]
+if kernels.NUMBA_AVAILABLE:
+    LOOP_IMPLEMENTATIONS.append(pytest.param(kernels._jit, id="numba"))
+
+
+def make_matrix(rows=300, cols=5, seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = np.asfortranarray(rng.standard_t(3, (rows, cols)))
+    matrix[rng.random((rows, cols)) < 0.2] = np.nan
+    matrix[:, 2] = np.nan
+    matrix[1:, 3] = np.nan  # 只有一个有效值
+    matrix[:, 4] = 1.5  # 标准差为 0
+    return matrix
+
+
+@pytest.mark.parametrize("compile", LOOP_IMPLEMENTATIONS)
+@pytest.mark.parametrize("grouped", [False, True])
+def test_fence_mask_loop_matches_numpy(compile, grouped):
+    matrix = make_matrix()
+    rng = np.random.default_rng(1)
+    n_groups = 4 if grouped else 1
+    lower = rng.normal(-1.0, 0.3, (n_groups, matrix.shape[1]))
+    upper = rng.normal(1.0, 0.3, (n_groups, matrix.shape[1]))
+    lower[0, 1] = np.nan
+    groups = rng.integers(0, n_groups, len(matrix))
+
+    mask, counts = compile(kernels._fence_mask_loop)(matrix, lower, upper, groups)
+    expected_mask, expected_counts = kernels._fence_mask_numpy(matrix, lower, upper, groups)
+
+    np.testing.assert_array_equal(mask, expected_mask)
+    np.testing.assert_array_equal(counts, expected_counts)
+    assert counts[2] == 0 and counts.dtype == np.int64
+
+
+@pytest.mark.parametrize("compile", LOOP_IMPLEMENTATIONS)
+def test_bin_histograms_loop_matches_numpy(compile):
+    rng = np.random.default_rng(2)
+    bins = rng.integers(-1, 12, 2000)
+    wafers = rng.integers(-1, 6, 2000)
+
+    counts = compile(kernels._bin_histograms_loop)(bins, wafers, 5, 10)
+
+    np.testing.assert_array_equal(counts, kernels._bin_histograms_numpy(bins, wafers, 5, 10))
+    valid = (bins >= 0) & (bins < 10) & (wafers >= 0) & (wafers < 5)
+    assert counts.sum() == valid.sum() and counts[3, 7] == np.count_nonzero(valid & (wafers == 3) & (bins == 7))
+
+
+@pytest.mark.parametrize("compile", LOOP_IMPLEMENTATIONS)
+def test_spec_fail_counts_loop_matches_numpy(compile):
+    matrix = make_matrix()
+    lsl = np.array([-1.0, np.nan, -1.0, 0.0, 2.0])
+    usl = np.array([1.0, 0.5, np.nan, 0.0, 1.0])  # 最后一列上下限交叉，下限优先
+
+    result = compile(kernels._spec_fail_counts_loop)(matrix, lsl, usl)
+
+    for actual, expected in zip(result, kernels._spec_fail_counts_numpy(matrix, lsl, usl)):
+        np.testing.assert_array_equal(actual, expected)
+    assert result[0][4] == result[2][4] and result[1][4] == 0
+
+
+@pytest.mark.parametrize("compile", LOOP_IMPLEMENTATIONS)
+def test_cp_cpk_loop_matches_numpy(compile):
+    matrix = make_matrix()
+    lsl = np.array([-3.0, np.nan, -3.0, -3.0, 1.0])
+    usl = np.array([3.0, 2.0, 3.0, np.nan, 2.0])
+
+    result = compile(kernels._cp_cpk_loop)(matrix, lsl, usl)
+
+    np.testing.assert_allclose(result, kernels._cp_cpk_numpy(matrix, lsl, usl), rtol=1e-12, equal_nan=True)
+    valid = pd.Series(matrix[:, 0]).dropna()
+    np.testing.assert_allclose(result[:3, 0], [len(valid), valid.mean(), valid.std()], rtol=1e-12)
+    np.testing.assert_allclose(result[4, 1], (2.0 - result[1, 1]) / (3 * result[2, 1]), rtol=1e-12)
+    assert np.isnan(result[1:, 2]).all() and np.isnan(result[2:, 3]).all() and np.isnan(result[3:, 4]).all()
+
+
+@pytest.mark.parametrize("compile", LOOP_IMPLEMENTATIONS)
+def test_rasterize_loop_matches_numpy(compile):
+    rng = np.random.default_rng(3)
+    x = rng.integers(-1, 9, 500)
+    y = rng.integers(0, 7, 500)
+    values = rng.normal(size=500)
+
+    grid = compile(kernels._rasterize_loop)(x, y, values, 8, 6)
+
+    np.testing.assert_array_equal(grid, kernels._rasterize_numpy(x, y, values, 8, 6))
+    last = np.flatnonzero((x == 2) & (y == 4))[-1]
+    assert grid[4, 2] == values[last]
+
+
+def test_public_wrappers_normalize_inputs():
+    grid, x_min, y_min = kernels.rasterize_wafer_map([3, 4, np.nan, 4], [-2, -1, 0, -1], [1.0, 2.0, 3.0, 5.0])
+    assert (x_min, y_min) == (3, -2)
+    np.testing.assert_array_equal(grid, [[1.0, np.nan], [np.nan, 5.0]])
+
+    counts = kernels.bin_histograms([1, 1, 2.0, np.nan, 2.5, 3], [0, 1, 1, 1, 0, 1])
+    np.testing.assert_array_equal(counts, [[0, 1, 0, 0], [0, 1, 1, 1]])
+
+    below, above, valid = kernels.spec_fail_counts([[0.0, 5.0], [2.0, np.nan]], lsl=[1.0, None], usl=1.5)
+    assert below.tolist() == [1, 0] and above.tolist() == [1, 1] and valid.tolist() == [2, 1]
+
+    statistics = kernels.batch_process_parameters(
+        pd.DataFrame({"VTH": [1.0, 2.0, np.inf, 4.0], "BV": ["1", "x", "3", None]}), ["VTH", "BV", "missing"])
+    assert statistics["statistics"]["VTH"] == {"mean": 7 / 3, "std": pytest.approx(np.std([1, 2, 4], ddof=1)),
+                                               "median": 2.0, "min": 1.0, "max": 4.0, "count": 3}
+    assert statistics["statistics"]["BV"]["mean"] == 2.0 and "missing" not in statistics["statistics"]
+
+
+def test_analyzers_use_kernels():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({"Wafer": np.repeat([2, 1], 60), "Bin": rng.integers(1, 4, 120),
+                       "VTH": rng.normal(1.0, 0.1, 120), "IDSS": rng.normal(5.0, 1.0, 120)})
+    df.loc[3, "VTH"] = np.nan
+
+    yields = YieldAnalyzer(df).analyze()["wafer_yields"]
+    for wafer, group in df.groupby("Wafer"):
+        assert yields[wafer] == pytest.approx((group["Bin"] == 1).mean() * 100)
+
+    specs = {"VTH": {"LSL": 0.8, "USL": 1.1}, "IDSS": {"USL": 7.0}}
+    results = CapabilityAnalyzer(df, specs=specs, by_wafer=True).analyze()
+    vth = df["VTH"].dropna()
+    overall = results["overall"]["VTH"]
+    assert overall["Cp"] == pytest.approx((1.1 - 0.8) / (6 * vth.std()))
+    assert overall["Cpk"] == pytest.approx(min(vth.mean() - 0.8, 1.1 - vth.mean()) / (3 * vth.std()))
+    assert overall["within_spec_percent"] == pytest.approx(vth.between(0.8, 1.1).mean() * 100)
+    idss = results["by_wafer"][1]["IDSS"]
+    assert idss["Cp"] is None and idss["Cpl"] is None and idss["Cpk"] == idss["Cpu"]
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import pytest
+
+from cp_data_processor.config import performance_config
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+
+
+def square_or_fail(value):
+    if value == 3:
+        raise ValueError("bad item 3")
+    return value * value, os.getpid()
+
+
+def crash_in_worker(task):
+    parent_pid, value = task
+    if value == 2 and os.getpid() != parent_pid:
+        os._exit(1)
+    return value
+
+
+def slow_identity(value):
+    time.sleep(0.5 if value == 1 else 0.01)
+    return value
+
+
+@pytest.mark.parametrize("kind", ["process", "thread"])
+@pytest.mark.parametrize("chunk_size", [1, 3])
+def test_map_keeps_order_and_captures_errors(kind, chunk_size):
+    with ParallelProcessor(kind, parallel=True, max_workers=2, chunk_size=chunk_size) as processor:
+        results = list(processor.map(square_or_fail, iter(range(8))))
+
+    assert [result.index for result in results] == list(range(8))
+    assert [result.value[0] for result in results if result.ok] == [0, 1, 4, 16, 25, 36, 49]
+    assert isinstance(results[3].error, ValueError) and not results[3].ok
+    with pytest.raises(ValueError, match="bad item 3"):
+        ParallelProcessor(kind, parallel=True, max_workers=2).map_values(square_or_fail, range(8))
+
+
+def test_unpicklable_tasks_fall_back_to_serial():
+    with ParallelProcessor("process", parallel=True, max_workers=2) as processor:
+        values = processor.map_values(lambda value: (value + 1, os.getpid()), range(5))
+
+    assert [value for value, _ in values] == [1, 2, 3, 4, 5]
+    assert {pid for _, pid in values} == {os.getpid()}
+
+
+def test_maps_after_worker_crash_fall_back_and_recreate_pool():
+    tasks = [(os.getpid(), value) for value in range(6)]
+    with ParallelProcessor("process", parallel=True, max_workers=2) as processor:
+        assert processor.map_values(crash_in_worker, tasks) == list(range(6))
+        assert processor.map_values(crash_in_worker, tasks) == list(range(6))
+        # 崩溃的池被丢弃后重新创建，之后的任务仍在工作进程中执行
+        assert os.getpid() not in {pid for _, pid in processor.map_values(square_or_fail, [1, 2])}
+
+
+def test_timeout_and_cancel():
+    with ParallelProcessor("thread", parallel=True, max_workers=2, timeout=0.1) as processor:
+        results = list(processor.map(slow_identity, range(4)))
+    assert results[1].timed_out and [result.value for result in results if result.ok] == [0, 2, 3]
+
+    started = []
+
+    def record(value):
+        started.append(value)
+        time.sleep(0.05)
+        return value
+
+    processor = ParallelProcessor("thread", parallel=True, max_workers=1)
+    seen = []
+    for result in processor.map(record, range(100)):
+        seen.append(result)
+        processor.cancel()
+    processor.close()
+    assert seen[0].value == 0 and len(started) < 5
+    assert all(result.ok or result.cancelled for result in seen)
+
+
+@pytest.mark.parametrize("mode", ["compatibility", "safe"])
+def test_compatibility_and_safe_modes_run_serially_in_process(monkeypatch, mode):
+    config = performance_config.get_performance_config()
+    for name in ("ENABLE_NUMBA", "ENABLE_PARALLEL", "MAX_WORKERS", "IO_WORKERS", "ENABLE_CACHE",
+                 "ENABLE_PARSED_CACHE", "MEMORY_LIMIT_MB", "CHUNK_SIZE"):
+        monkeypatch.setattr(config, name, getattr(config, name))
+    config.ENABLE_PARALLEL, config.MAX_WORKERS = True, 4
+
+    if mode == "compatibility":
+        performance_config.enable_compatibility_mode()
+        assert (config.ENABLE_NUMBA, config.ENABLE_CACHE, config.MEMORY_LIMIT_MB) == (False, False, 256)
+    else:
+        config.enable_safe_mode()
+
+    assert config.ENABLE_PARALLEL is False
+    for kind in ("process", "thread"):
+        processor = ParallelProcessor(kind)
+        threads = processor.map_values(lambda _: (os.getpid(), threading.get_ident()), range(4))
+        assert processor.workers == 1 and processor._executor is None
+        assert set(threads) == {(os.getpid(), threading.get_ident())}
@@ -0,0 +1,164 @@
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.config.performance_config import PerformanceConfig
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.readers.dcp_reader import DCPReader
+from cp_data_processor.readers.parsed_file_cache import INDEX_FILE_NAME, ParsedFileCache
+from cp_data_processor.tests.test_dcp_reader import assert_same_wafers, write_dcp
+
+
+def store_in_worker(task):
+    cache_dir, source = task
+    cache = ParsedFileCache(cache_dir)
+    stored = cache.store(source, "test-v1", {"data": pd.DataFrame({"value": [1.0]})})
+    cache.flush()
+    return stored
+
+
+def write_sources(tmp_path, names):
+    sources = []
+    for name in names:
+        source = tmp_path / f"{name}.txt"
+        source.write_text(name, encoding="utf-8")
+        sources.append(str(source))
+    return sources
+
+
+def indexed_paths(cache_dir):
+    return {key.split("|", 1)[1] for key in json.loads((cache_dir / INDEX_FILE_NAME).read_text(encoding="utf-8"))["paths"]}
+
+
+@pytest.mark.parametrize("value, enabled", [(None, True), ("0", False), ("1", True)])
+def test_parsed_cache_switch(monkeypatch, value, enabled):
+    if value is None:
+        monkeypatch.delenv("CP_PARSED_CACHE", raising=False)
+    else:
+        monkeypatch.setenv("CP_PARSED_CACHE", value)
+    assert PerformanceConfig().ENABLE_PARSED_CACHE is enabled
+
+
+def test_readers_use_global_cache(tmp_path, isolated_parsed_file_cache):
+    files = [str(write_dcp(tmp_path / f"w{i}.txt", wafer_no=i, seed=i)) for i in (1, 2)]
+
+    first = DCPReader(files, parallel=False).read()
+    second = DCPReader(files, parallel=False).read()
+
+    assert (isolated_parsed_file_cache.stores, isolated_parsed_file_cache.hits) == (2, 2)
+    assert_same_wafers(first, second)
+
+
+def test_frames_and_meta_round_trip_exactly(tmp_path):
+    source = tmp_path / "raw.txt"
+    source.write_text("raw", encoding="utf-8")
+    frame = pd.DataFrame(
+        {
+            "mixed": pd.Series(["P1", 2, 3.5, None, np.nan, True], dtype=object),
+            "value": [1.0, np.nan, -0.0, 1e-300, np.inf, 2.5],
+            "bin": np.arange(6, dtype=np.int64),
+            "cat": pd.Categorical(["a", "b", "a", "c", "b", "a"]),
+        },
+        index=[3, 5, 7, 9, 11, 13],
+    )
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+
+    assert cache.load(str(source), "test-v1") is None
+    assert cache.store(str(source), "test-v1", {"data": frame}, {"wafer_id": "7", "headers": ["a", None]})
+
+    cached = ParsedFileCache(str(tmp_path / "cache")).load(str(source), "test-v1")
+    assert cached is not None
+    pd.testing.assert_frame_equal(cached.frames["data"], frame)
+    assert [type(value) for value in cached.frames["data"]["mixed"]] == [type(value) for value in frame["mixed"]]
+    assert cached.meta == {"wafer_id": "7", "headers": ["a", None]}
+
+
+def test_dcp_rerun_and_copied_file_hit_cache(tmp_path):
+    (tmp_path / "lot").mkdir()
+    files = [str(write_dcp(tmp_path / "lot" / f"w{i}.txt", wafer_no=i, seed=i)) for i in (1, 2)]
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+
+    first = DCPReader(files, cache=cache).read()
+    assert (cache.misses, cache.stores) == (2, 2)
+
+    second = DCPReader(files, cache=cache).read()
+    assert cache.hits == 2
+    assert_same_wafers(first, second)
+
+    copied = tmp_path / "copy"
+    shutil.copytree(tmp_path / "lot", copied)
+    reader = DCPReader([str(copied / "w1.txt")], cache=cache)
+    third = reader.read()
+    assert cache.hits == 3
+    assert third.wafers[0].file_path == str(copied / "w1.txt")
+    assert reader.file_scans[str(copied / "w1.txt")].lot_id_r2c2 == "FA54-5339-327A-250501@203"
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    path = write_dcp(tmp_path / "w1.txt", seed=1)
+    cache = ParsedFileCache(str(tmp_path / "cache"))
+    DCPReader([str(path)], cache=cache).read()
+
+    write_dcp(path, seed=2, die_count=150)
+    lot = DCPReader([str(path)], cache=cache).read()
+
+    assert cache.hits == 0
+    assert lot.wafers[0].chip_count == 150
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    frame = pd.DataFrame({"value": np.arange(20000, dtype=np.float64)})
+    sources = []
+    for name in ("a", "b", "c"):
+        source = tmp_path / f"{name}.txt"
+        source.write_text(name, encoding="utf-8")
+        sources.append(str(source))
+    cache = ParsedFileCache(str(tmp_path / "cache"), max_size_mb=0.35)
+
+    cache.store(sources[0], "test-v1", {"data": frame})
+    cache.store(sources[1], "test-v1", {"data": frame})
+    assert cache.load(sources[0], "test-v1") is not None
+    cache.store(sources[2], "test-v1", {"data": frame})
+    assert cache.evictions == 0
+    cache.flush()
+
+    assert cache.evictions == 1
+    assert cache.load(sources[1], "test-v1") is None
+    assert cache.load(sources[0], "test-v1") is not None
+    assert cache.size_bytes <= 0.35 * 1024 * 1024
+
+
+def test_concurrent_writers_merge_index(tmp_path):
+    cache_dir = tmp_path / "cache"
+    a, b, c = write_sources(tmp_path, "abc")
+    frame = pd.DataFrame({"value": [1.0]})
+    first, second = ParsedFileCache(str(cache_dir)), ParsedFileCache(str(cache_dir))
+    first.store(a, "test-v1", {"data": frame})
+    second.store(b, "test-v1", {"data": frame})
+    # store 只写条目文件，索引在 flush 时合并写回
+    assert not (cache_dir / INDEX_FILE_NAME).exists()
+    first.flush()
+    second.flush()
+    assert indexed_paths(cache_dir) == {a, b}
+    assert second.load(a, "test-v1") is not None
+
+    # 一个进程淘汰的条目不会被另一个进程的写回恢复
+    first.clear()
+    second.store(c, "test-v1", {"data": frame})
+    second.flush()
+    assert indexed_paths(cache_dir) == {b, c}
+    assert ParsedFileCache(str(cache_dir)).load(a, "test-v1") is None
+
+
+def test_worker_processes_share_one_index(tmp_path):
+    cache_dir = tmp_path / "cache"
+    sources = write_sources(tmp_path, [f"s{i}" for i in range(8)])
+
+    with ParallelProcessor("process", parallel=True, max_workers=4) as processor:
+        assert all(processor.map_values(store_in_worker, [(str(cache_dir), source) for source in sources]))
+
+    assert indexed_paths(cache_dir) == set(sources)
+    assert not (cache_dir / "index.lock").exists()
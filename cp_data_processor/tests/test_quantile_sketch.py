@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.data_models.lot_collection import LotCollection
+from cp_data_processor.processing.data_transformer import DataTransformer, StreamingOutlierFences
+from cp_data_processor.processing.quantile_sketch import QuantileSketch
+from cp_data_processor.processing.standard_csv_generator import StandardCSVGenerator
+
+
+def test_sketch_is_exact_until_compacted():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500)
+    values[::7] = np.nan
+
+    sketch = QuantileSketch(k=512).update(values[:200]).merge(QuantileSketch(k=512).update(values[200:]))
+
+    assert sketch.rank_error == 0 and sketch.count == np.count_nonzero(~np.isnan(values))
+    np.testing.assert_array_equal(sketch.quantile([0.25, 0.5, 0.75]),
+                                  pd.Series(values).quantile([0.25, 0.5, 0.75]).to_numpy())
+
+
+def test_merged_sketches_stay_within_rank_error_bound():
+    rng = np.random.default_rng(1)
+    values = rng.standard_t(3, 200_000)
+    parts = [QuantileSketch(k=128).update(chunk) for chunk in np.array_split(values, 37)]
+    sketch = QuantileSketch(k=128)
+    for part in parts:
+        sketch.merge(part)
+
+    ordered = np.sort(values)
+    assert 0 < sketch.rank_error < 0.1 and sketch.retained < 128 * 20
+    assert sketch.quantile(0.0) == ordered[0] and sketch.quantile(1.0) == ordered[-1]
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        rank = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) <= sketch.rank_error
+
+
+def make_lot(lot_id, seed):
+    rng = np.random.default_rng(seed)
+    wafers = []
+    for number in (1, 2, 3):
+        chip_data = pd.DataFrame({"X_COORD": np.arange(60), "Y_COORD": np.arange(60) % 7,
+                                  "VTH": rng.normal(1.0 + number, 0.1, 60),
+                                  "IDSS": rng.integers(0, 100, 60)})
+        chip_data.loc[[4, 30], "VTH"] = [50.0, -50.0]
+        wafers.append(CPWafer(wafer_id=f"{lot_id}-{number:02d}", chip_data=chip_data))
+    lot = CPLot(lot_id=lot_id, wafers=wafers, params=[CPParameter(id="VTH"), CPParameter(id="IDSS")])
+    lot.combine_data_from_wafers()
+    return lot
+
+
+@pytest.mark.parametrize("method", ["std_dev", "iqr", "iqr_wafer", "mad"])
+@pytest.mark.parametrize("parallel", [False, True])
+def test_streaming_fences_match_in_memory_cleaning(tmp_path, method, parallel):
+    lot = make_lot("LOT_A", 0)
+    collection = LotCollection.save_lots([lot], tmp_path)
+
+    fences = StreamingOutlierFences(method).fit(collection, parallel=parallel, max_workers=2)
+    DataTransformer(lot).clean_data(method)
+
+    assert fences.parameters == ["VTH", "IDSS"] and fences.rank_error == 0
+    for wafer, chip_data in collection.iter_chip_data():
+        chip_data = chip_data.copy()
+        fences.apply(chip_data, wafer.lot_id, wafer.wafer_id)
+        expected = lot.combined_data.iloc[lot.wafer_rows(lot.wafers[wafer.number])]
+        for param in ("VTH", "IDSS"):
+            np.testing.assert_allclose(chip_data[param], expected[param], rtol=1e-12)
+            assert chip_data[param].dtype == np.float64
+
+
+def test_streamed_csv_with_fences_matches_in_memory(tmp_path):
+    lots = {lot_id: make_lot(lot_id, seed) for seed, lot_id in enumerate(["LOT_B", "LOT_A"])}
+    collection = LotCollection.save_lots(lots, tmp_path / "lots")
+    fences = StreamingOutlierFences("iqr_lot", sketch_size=64).fit(collection)
+    generator = StandardCSVGenerator()
+    generator._generate_timestamp = lambda: "T"
+
+    expected = generator.generate_combined_standard_csvs(lots, str(tmp_path / "memory"), outlier_fences=fences)
+    streamed = generator.generate_combined_standard_csvs(collection, str(tmp_path / "stream"),
+                                                         outlier_fences=fences)
+
+    assert fences.rank_error > 0
+    with open(expected["cleaned"], "rb") as a, open(streamed["cleaned"], "rb") as b:
+        assert a.read() == b.read()
+    cleaned = pd.read_csv(streamed["cleaned"])
+    assert cleaned["VTH"].isna().sum() >= 12 and cleaned["VTH"].abs().max() < 50
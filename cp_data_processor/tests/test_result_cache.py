@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from cp_data_processor.analysis.capability_analyzer import CapabilityAnalyzer
+from cp_data_processor.processing import result_cache
+from cp_data_processor.processing.result_cache import (
+    ENTRY_OVERHEAD,
+    OPAQUE_OBJECT_SIZE,
+    ResultCache,
+    cached_read_csv,
+    estimate_size,
+    frame_fingerprint,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_estimate_size_counts_object_columns():
+    frame = pd.DataFrame({"VTH": np.arange(1000, dtype=np.float64), "Lot": ["LOT_" + str(i) for i in range(1000)]})
+
+    assert estimate_size(frame) == frame.memory_usage(index=True, deep=True).sum()
+    assert estimate_size(frame) > frame.memory_usage(index=True).sum() + 1000 * 40
+    assert estimate_size(np.zeros((10, 10))) == 800
+    assert estimate_size({"a": np.zeros(100)}) > 800
+    assert estimate_size(FakeClock()) == OPAQUE_OBJECT_SIZE
+
+
+def test_lru_eviction_within_byte_budget_and_ttl():
+    clock = FakeClock()
+    block = np.zeros(100_000)  # 800KB
+    cache = ResultCache(max_size_mb=2, ttl_seconds=60, enabled=True, clock=clock)
+
+    for name in ("a", "b"):
+        cache.set(("t", name), block.copy())
+    assert cache.get(("t", "a")) is not None  # a 成为最近使用
+    cache.set(("t", "c"), block.copy())
+
+    assert cache.get(("t", "b")) is None and cache.get(("t", "a")) is not None
+    assert cache.size_bytes == 2 * (block.nbytes + ENTRY_OVERHEAD) <= cache.max_bytes
+    cache.set(("t", "huge"), np.zeros(1_000_000))
+    assert cache.get(("t", "huge")) is None
+
+    clock.now += 61
+    assert cache.get(("t", "a")) is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (2, 3, 1, 1)
+
+
+def test_disk_tier_receives_evicted_entries(tmp_path):
+    cache = ResultCache(max_size_mb=1, ttl_seconds=0, enabled=True, disk_dir=str(tmp_path), disk_size_mb=10)
+    frames = {name: pd.DataFrame({"v": np.full(80_000, i, dtype=np.float64)}) for i, name in enumerate("abc")}
+    for name, frame in frames.items():
+        cache.set(("frame", name), frame)
+
+    assert cache.keys() == [("frame", "c")] and len(list(tmp_path.glob("*.pkl"))) == 2
+    restored = cache.get(("frame", "a"))
+    pd.testing.assert_frame_equal(restored, frames["a"])
+    assert cache.disk_hits == 1 and cache.keys() == [("frame", "a")]
+
+    # 另一个进程（新的实例）也能读到磁盘层
+    other = ResultCache(max_size_mb=1, enabled=True, disk_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(other.get(("frame", "b")), frames["b"])
+
+
+def test_disabled_cache_never_stores():
+    cache = ResultCache(enabled=False)
+    calls = []
+    assert cache.get_or_compute(("k",), lambda: calls.append(1) or 5) == 5
+    assert cache.get_or_compute(("k",), lambda: calls.append(1) or 5) == 5
+    assert len(calls) == 2 and len(cache) == 0
+
+
+def test_file_and_frame_keys_follow_content(tmp_path, monkeypatch):
+    cache = ResultCache(max_size_mb=16, enabled=True)
+    monkeypatch.setattr(result_cache, "_default_cache", cache)
+    path = tmp_path / "data_cleaned_T.csv"
+    pd.DataFrame({"VTH": [1.0, 2.0]}).to_csv(path, index=False)
+
+    first = cached_read_csv(path)
+    assert cached_read_csv(path) is first and cache.hits == 1  # 返回缓存中的对象，不复制
+    assert first["VTH"].tolist() == [1.0, 2.0]
+
+    pd.DataFrame({"VTH": [3.0, 4.0, 5.0]}).to_csv(path, index=False)
+    assert cached_read_csv(path)["VTH"].tolist() == [3.0, 4.0, 5.0]
+
+    frame = pd.DataFrame({"VTH": [1.0, 2.0], "Other": ["x", "y"]})
+    fingerprint = frame_fingerprint(frame, ["VTH"])
+    assert frame_fingerprint(frame.copy(), ["VTH"]) == fingerprint
+    frame.loc[1, "Other"] = "z"
+    assert frame_fingerprint(frame, ["VTH"]) == fingerprint
+    frame.loc[1, "VTH"] = 2.5
+    assert frame_fingerprint(frame, ["VTH"]) != fingerprint
+
+
+def test_capability_results_are_served_from_cache(monkeypatch):
+    cache = ResultCache(max_size_mb=16, enabled=True)
+    monkeypatch.setattr(result_cache, "_default_cache", cache)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Wafer": np.repeat([1, 2], 50), "VTH": rng.normal(1.0, 0.1, 100)})
+    specs = {"VTH": {"LSL": 0.7, "USL": 1.3}}
+    calls = []
+    original = CapabilityAnalyzer._calculate_capabilities
+
+    def counting(self, data, parameters):
+        calls.append(len(data))
+        return original(self, data, parameters)
+
+    monkeypatch.setattr(CapabilityAnalyzer, "_calculate_capabilities", counting)
+    first = CapabilityAnalyzer(df, specs=specs, by_wafer=True).analyze()
+    first["overall"]["VTH"]["Cp"] = None  # 修改结果不影响缓存
+    second = CapabilityAnalyzer(df.copy(), specs=specs, by_wafer=True).analyze()
+
+    assert calls == [100, 50, 50] and second["overall"]["VTH"]["Cp"] is not None
+    assert second["by_wafer"][2] == CapabilityAnalyzer(df, specs=specs, by_wafer=True).analyze()["by_wafer"][2]
+
+    CapabilityAnalyzer(df, specs={"VTH": {"LSL": 0.8, "USL": 1.3}}).analyze()
+    assert calls[-1] == 100 and len(calls) == 4
@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+import pstats
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.config import performance_config
+from cp_data_processor.data_models.cp_data import CPLot, CPWafer
+from cp_data_processor.processing import stage_profiler
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.processing.stage_profiler import (
+    NULL_PROBE,
+    current_run,
+    lot_rows,
+    profiled,
+    profiling_run,
+    stage,
+)
+
+
+@profiled("解析", rows=lot_rows)
+def read_lot(rows):
+    chip_data = pd.DataFrame({"VTH": np.arange(rows, dtype=np.float64)})
+    return CPLot(lot_id="LOT", wafers=[CPWafer(wafer_id="W01", chip_data=chip_data)] * 2)
+
+
+def read_in_worker(rows):
+    read_lot(rows)
+    return os.getpid()
+
+
+@pytest.fixture
+def monitoring(monkeypatch):
+    config = performance_config.get_performance_config()
+    for name in ("ENABLE_PROFILING", "LOG_PERFORMANCE", "PERFORMANCE_REPORT"):
+        monkeypatch.setattr(config, name, getattr(config, name))
+    return config
+
+
+def test_monitoring_is_opt_in():
+    config = performance_config.PerformanceConfig()
+    assert not (config.ENABLE_PROFILING or config.LOG_PERFORMANCE or config.PERFORMANCE_REPORT)
+
+    config.update_config({"monitoring": {"performance_report": True}})
+    assert config.PERFORMANCE_REPORT
+
+
+def test_disabled_monitoring_records_nothing(monitoring, tmp_path):
+    assert stage("解析") is NULL_PROBE and current_run() is None
+    monitoring.ENABLE_PROFILING = monitoring.LOG_PERFORMANCE = monitoring.PERFORMANCE_REPORT = False
+
+    with profiling_run("DCP", str(tmp_path)) as run:
+        assert stage("解析") is NULL_PROBE
+        lot = read_lot(10)
+    assert lot_rows(lot) == 20 and not run.stages and not list(tmp_path.iterdir())
+
+
+def test_report_contains_stage_metrics(monitoring, tmp_path, caplog):
+    monitoring.ENABLE_PROFILING, monitoring.LOG_PERFORMANCE, monitoring.PERFORMANCE_REPORT = True, True, True
+    caplog.set_level(logging.INFO, logger=stage_profiler.logger.name)
+
+    with profiling_run("国宇") as run:
+        for _ in range(2):
+            read_lot(500)
+        with stage("CSV写出", rows=1000, bytes_in=10) as probe:
+            with stage("清洗"):
+                np.sort(np.random.default_rng(0).normal(size=200_000))
+            probe.add(bytes_out=2048)
+        run.output_dir = str(tmp_path)
+    assert current_run() is None
+
+    report_path, = tmp_path.glob("performance_国宇_*.json")
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    stages = {entry["name"]: entry for entry in report["stages"]}
+    assert list(stages) == ["解析", "CSV写出", "清洗"]
+    assert (stages["解析"]["calls"], stages["解析"]["rows"]) == (2, 2000)
+    assert (stages["CSV写出"]["bytes_in"], stages["CSV写出"]["bytes_out"]) == (10, 2048)
+    assert stages["CSV写出"]["wall_time"] >= stages["清洗"]["wall_time"] > 0
+    assert stages["解析"]["rows_per_sec"] > 0 and stages["清洗"]["peak_rss_mb"] > 0
+    assert "性能汇总 [国宇]" in caplog.text
+
+    # 嵌套阶段包含在外层阶段的 cProfile 结果中
+    assert set(report["profiles"]) == {"解析", "CSV写出"}
+    functions = pstats.Stats(str(tmp_path / report["profiles"]["CSV写出"])).stats
+    assert any(name == "sort" for _, _, name in functions)
+
+
+def test_worker_process_stages_are_merged(monitoring, tmp_path):
+    monitoring.ENABLE_PROFILING, monitoring.LOG_PERFORMANCE, monitoring.PERFORMANCE_REPORT = False, False, True
+
+    with profiling_run("Lion", str(tmp_path)) as run:
+        with ParallelProcessor("process", parallel=True, max_workers=2) as processor:
+            pids = processor.map_values(read_in_worker, [100, 200, 300])
+
+    assert os.getpid() not in pids
+    assert (run.stages["解析"].calls, run.stages["解析"].rows) == (3, 1200)
+    assert stage_profiler._active_runs == []
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from cp_data_processor.readers.unified_reader import UnifiedReader, batch_read_cp_data
+from guoyu.tests.test_guoyu_reader import write_juno_workbook
+
+
+@pytest.fixture
+def mixed_batch(tmp_path):
+    files = [str(write_juno_workbook(tmp_path / "257375" / f"{i:02d}.xlsx", wafer_no=i, seed=i)) for i in (3, 1, 2)]
+    (tmp_path / "misc").mkdir()
+    unknown = tmp_path / "misc" / "notes.csv"
+    unknown.write_text("a,b\n", encoding="utf-8")
+    return files[:2] + [str(tmp_path / "missing.xlsx"), str(unknown)] + files[2:]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_read_batch_isolates_failures_and_reports_progress(mixed_batch, parallel):
+    reader = UnifiedReader()
+    progress = []
+
+    results = reader.read_batch(mixed_batch, parallel=parallel, max_workers=2,
+                                progress_callback=lambda *args: progress.append(args))
+
+    good = [mixed_batch[0], mixed_batch[1], mixed_batch[4]]
+    assert list(results) == good
+    assert [results[path].wafers[0].wafer_id for path in good] == ["3", "1", "2"]
+    assert [path for path, _error in reader.failed_files] == mixed_batch[2:4]
+    assert reader.failed_files[0][1].startswith("文件不存在")
+    assert "无法识别文件所属公司" in reader.failed_files[1][1]
+    assert [call[:2] for call in progress] == [(index, 5) for index in range(1, 6)]
+    assert sorted((path, ok) for _done, _total, path, ok in progress) == sorted(
+        [(path, True) for path in good] + [(path, False) for path in mixed_batch[2:4]]
+    )
+
+
+def test_parallel_batch_matches_serial_batch(mixed_batch):
+    serial = batch_read_cp_data(mixed_batch, parallel=False)
+    parallel = batch_read_cp_data(mixed_batch, parallel=True, max_workers=2)
+
+    assert list(parallel) == list(serial)
+    for path in serial:
+        pd.testing.assert_frame_equal(parallel[path].combined_data, serial[path].combined_data)
@@ -17,6 +17,8 @@ import re
 from typing import Dict, Optional, Tuple, Union, Any, List
 import numpy as np
 
+from cp_data_processor.processing.stage_profiler import file_bytes, profiled
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -219,6 +221,7 @@ class UnitConverter:
             
         return value / rate
 
+@profiled("单位转换", bytes_in=lambda input_file, *args, **kwargs: file_bytes([input_file]))
 def process_excel_file(input_file: str, output_file: str = None, sheet_name: str = 'Spec', format_only: bool = False) -> bool:
     """
     处理Excel或CSV文件，转换LimitU和LimitL列，保持TestCond列不变
@@ -14,6 +14,9 @@ from datetime import datetime
 from pathlib import Path
 import logging
 
+from cp_data_processor.processing.stage_profiler import file_bytes, path_bytes, profiled
+from cp_data_processor.readers.dcp_file_scan import DCPFileScan
+
 try:
     from cp_unit_converter import UnitConverter  # 导入UnitConverter类
 except ImportError:
@@ -139,7 +142,10 @@ def _format_value_for_csv(value: float | None) -> str:
     else:
         return str(int(value))
 
-def generate_spec_file(dcp_file_path: str, output_dir: str, lot_id: str = None) -> str | None:
+@profiled("规格提取", bytes_in=lambda dcp_file_path, *args, **kwargs: file_bytes([dcp_file_path]),
+          bytes_out=path_bytes)
+def generate_spec_file(dcp_file_path: str, output_dir: str, lot_id: str = None,
+                       scan: DCPFileScan | None = None) -> str | None:
     """
     解析DCP文件的头部，提取规格数据，
     并将其写入一个使用制表符分隔的 _spec_.csv 文件。
@@ -148,26 +154,25 @@ def generate_spec_file(dcp_file_path: str, output_dir: str, lot_id: str = None)
         dcp_file_path (str): 输入的DCP .txt文件路径。
         output_dir (str): 输出CSV文件将被保存的目录。
         lot_id (str, optional): 批次ID，用于统一文件命名。如果提供，将使用{lot_id}_spec_{timestamp}.csv格式。
+        scan (DCPFileScan, optional): 该文件已有的扫描结果（例如 DCPReader.file_scans 中的条目）。
+            提供时直接使用内存中的头部行，不再读取磁盘。
 
     返回:
         str | None: 生成的CSV文件的路径，如果发生错误则返回None。
     """
     try:
         dcp_file = Path(dcp_file_path)
-        if not dcp_file.exists() or not dcp_file.is_file():
-            logger.error(f"DCP文件未找到或不是一个文件: {dcp_file_path}")
-            return None
+        if scan is None:
+            if not dcp_file.exists() or not dcp_file.is_file():
+                logger.error(f"DCP文件未找到或不是一个文件: {dcp_file_path}")
+                return None
+            # 只读取并解码头部区域（约20行），这应该包含头部信息
+            scan = DCPFileScan.from_file(str(dcp_file), header_only=True)
         
         # 创建单位转换器实例
         converter = UnitConverter()
 
-        # 读取文件的前约20行，这应该包含头部信息
-        header_lines = []
-        with open(dcp_file, 'r', encoding='utf-8', errors='ignore') as f:
-            for i, line in enumerate(f):
-                if i >= 20: # 最多读取20行，应足以包含头部
-                    break
-                header_lines.append(line.strip())
+        header_lines = [line.strip() for line in scan.header_rows]
 
         if len(header_lines) < 15: # 检查是否有足够的行用于典型的规格数据
             logger.warning(f"文件 {dcp_file_path} 的行数少于15行。规格数据可能不完整或缺失。")
@@ -175,30 +180,21 @@ def generate_spec_file(dcp_file_path: str, output_dir: str, lot_id: str = None)
 
         # --- 行索引 (0-based) 基于典型的DCP结构 ---
         # 参数名称行: 通常以 "No.U X Y Bin CONT..." 开头
-        # 查找 "No.U" 然后是 "X" 然后是 "Y" 然后是 "Bin"
-        param_line_idx = -1
-        for i, line in enumerate(header_lines):
-            parts = line.split('\t') # 使用实际的制表符进行分割
-            if len(parts) > 4 and parts[0].strip() == "No.U" and \
-               parts[1].strip() == "X" and parts[2].strip() == "Y" and \
-               parts[3].strip() == "Bin":
-                param_line_idx = i
-                break
+        param_line_idx = scan.param_row_index
         
         if param_line_idx == -1:
             logger.error(f"在 {dcp_file_path} 中未找到参数标题行 (例如 'No.U X Y Bin...')")
             return None
 
-        limit_u_line_idx = param_line_idx + 1
-        limit_l_line_idx = param_line_idx + 2
-        bias_start_line_idx = param_line_idx + 3
-        bias_end_line_idx = bias_start_line_idx + 5 # Bias 1 到 Bias 6
+        if scan.limit_u_row is None or scan.limit_l_row is None:
+            logger.error(f"文件 {dcp_file_path} 中参数标题行之后缺少 LimitU/LimitL 行")
+            return None
 
         # --- 直接从源文件提取参数、限值和单位 ---
         # 参数从第5列开始 (索引为4)
         param_line = header_lines[param_line_idx].split('\t') # 使用实际的制表符
-        limit_u_line = header_lines[limit_u_line_idx].split('\t')
-        limit_l_line = header_lines[limit_l_line_idx].split('\t')
+        limit_u_line = scan.limit_u_row.strip().split('\t')
+        limit_l_line = scan.limit_l_row.strip().split('\t')
         
         # 检查行长度是否足够
         if len(param_line) <= 4:
@@ -277,28 +273,27 @@ def generate_spec_file(dcp_file_path: str, output_dir: str, lot_id: str = None)
         # 创建对应Bias数据的行
         bias_rows = []
         
-        for line_idx in range(bias_start_line_idx, min(bias_end_line_idx + 1, len(header_lines))):
-            if line_idx < len(header_lines):
-                bias_line = header_lines[line_idx].split('\t')
+        for bias_idx, bias_row in enumerate(scan.bias_rows):
+            bias_line = bias_row.strip().split('\t')
+            
+            # 如果是Bias行
+            if len(bias_line) > 0 and bias_line[0].strip().startswith("Bias"):
+                # 获取从索引4开始的所有数据（对应参数列）
+                bias_data = [''] * num_params
                 
-                # 如果是Bias行
-                if len(bias_line) > 0 and bias_line[0].strip().startswith("Bias"):
-                    # 获取从索引4开始的所有数据（对应参数列）
-                    bias_data = [''] * num_params
-                    
-                    if len(bias_line) > 4:
-                        # 直接从源文件复制相应列的数据
-                        for i in range(min(len(bias_line) - 4, num_params)):
-                            bias_data[i] = bias_line[i+4].strip().strip('"')
-                    
-                    # 特殊处理Bias 1行，第一行设为"TestCond:"
-                    if line_idx == bias_start_line_idx:
-                        bias_rows.append(["TestCond:"] + bias_data)
-                    else:
-                        bias_rows.append([''] + bias_data)
+                if len(bias_line) > 4:
+                    # 直接从源文件复制相应列的数据
+                    for i in range(min(len(bias_line) - 4, num_params)):
+                        bias_data[i] = bias_line[i+4].strip().strip('"')
+                
+                # 特殊处理Bias 1行，第一行设为"TestCond:"
+                if bias_idx == 0:
+                    bias_rows.append(["TestCond:"] + bias_data)
                 else:
-                    # 如果行不是以Bias开头但应该是Bias行（例如空行），添加空行
-                    bias_rows.append([''] + [''] * num_params)
+                    bias_rows.append([''] + bias_data)
+            else:
+                # 如果行不是以Bias开头但应该是Bias行（例如空行），添加空行
+                bias_rows.append([''] + [''] * num_params)
         
         # 添加所有Bias行数据
         output_data.extend(bias_rows)
@@ -14,6 +14,9 @@ from typing import Dict, List, Optional, Tuple
 import logging
 from pathlib import Path
 
+from cp_data_processor.processing.result_cache import cached_read_csv, file_signature, get_result_cache
+from cp_data_processor.processing.stage_profiler import file_bytes, profiled, stage
+
 # 导入JavaScript嵌入工具 - 使用兼容的导入方式
 def get_embedded_plotly_js():
     """获取嵌入式Plotly.js内容"""
@@ -50,6 +53,7 @@ class BoxplotChart:
         self.cleaned_data = None
         self.spec_data = None
         self.all_charts_cache: Dict[str, go.Figure] = {} # 新增图表缓存
+        self._data_signature = None  # 已加载数据文件的签名，作为共享结果缓存键的一部分
         
         # 图表样式配置
         self.chart_config = {
@@ -102,7 +106,7 @@ class BoxplotChart:
             
             # 使用第一个找到的cleaned文件
             cleaned_file = cleaned_files[0]
-            self.cleaned_data = pd.read_csv(cleaned_file)
+            self.cleaned_data = cached_read_csv(cleaned_file)
             logger.info(f"加载cleaned数据: {cleaned_file.name}")
             
             # 记录加载的cleaned_data的总行数
@@ -117,8 +121,9 @@ class BoxplotChart:
             
             # 使用第一个找到的spec文件
             spec_file = spec_files[0]
-            self.spec_data = pd.read_csv(spec_file)
+            self.spec_data = cached_read_csv(spec_file)
             logger.info(f"加载spec数据: {spec_file.name}")
+            self._data_signature = (file_signature(cleaned_file), file_signature(spec_file))
 
             # 数据加载成功后，预生成并缓存所有图表
             self._populate_charts_cache()
@@ -130,6 +135,7 @@ class BoxplotChart:
             self.cleaned_data = None #确保状态一致性
             self.spec_data = None
             self.all_charts_cache = {}
+            self._data_signature = None
             return False
     
     def get_available_parameters(self) -> List[str]:
@@ -1055,6 +1061,7 @@ class BoxplotChart:
         
         return fig
     
+    @profiled("图表生成")
     def _populate_charts_cache(self):
         """填充图表缓存"""
         if self.cleaned_data is None or self.spec_data is None:
@@ -1068,7 +1075,7 @@ class BoxplotChart:
         success_count = 0
         for param in available_params:
             try:
-                chart_fig = self._create_boxplot_chart(param)
+                chart_fig = self._cached_boxplot_chart(param)
                 if chart_fig is not None:
                     self.all_charts_cache[param] = chart_fig
                     success_count += 1
@@ -1078,6 +1085,22 @@ class BoxplotChart:
         # 性能优化：只输出摘要信息
         logger.info(f"箱体图表生成完成: {success_count}/{len(available_params)} 个成功")
 
+    def _cached_boxplot_chart(self, parameter: str) -> Optional[go.Figure]:
+        """
+        生成参数的图表；同一组数据文件和图表配置已生成过的图表由共享结果缓存提供（返回副本）。
+        """
+        if self._data_signature is None:
+            return self._create_boxplot_chart(parameter)
+        key = ('boxplot_chart', self._data_signature, repr(sorted(self.chart_config.items())), parameter)
+        cache = get_result_cache()
+        chart_fig = cache.get(key)
+        if chart_fig is None:
+            chart_fig = self._create_boxplot_chart(parameter)
+            if chart_fig is not None:
+                cache.set(key, go.Figure(chart_fig))
+            return chart_fig
+        return go.Figure(chart_fig)
+
     def get_chart(self, parameter: str) -> Optional[go.Figure]:
         """
         从缓存中获取指定参数的图表。
@@ -1144,11 +1167,13 @@ class BoxplotChart:
             file_path = output_path / filename
             
             # 使用本地嵌入的Plotly.js，避免CDN加载失败
-            figure_to_save.write_html(
-                str(file_path),
-                include_plotlyjs=get_embedded_plotly_js(),
-                validate=False  # 跳过验证，提升速度
-            )
+            with stage("图表写出") as probe:
+                figure_to_save.write_html(
+                    str(file_path),
+                    include_plotlyjs=get_embedded_plotly_js(),
+                    validate=False  # 跳过验证，提升速度
+                )
+                probe.add(bytes_out=file_bytes([file_path]))
             logger.info(f"图表已保存: {file_path}")
             
             return file_path
@@ -1186,11 +1211,13 @@ class BoxplotChart:
                 file_path = output_path / filename
                 
                 # 使用本地嵌入的Plotly.js，避免CDN加载失败
-                figure.write_html(
-                    str(file_path),
-                    include_plotlyjs=get_embedded_plotly_js(),
-                    validate=False  # 跳过验证，提升速度
-                )
+                with stage("图表写出") as probe:
+                    figure.write_html(
+                        str(file_path),
+                        include_plotlyjs=get_embedded_plotly_js(),
+                        validate=False  # 跳过验证，提升速度
+                    )
+                    probe.add(bytes_out=file_bytes([file_path]))
                 saved_paths.append(file_path)
                 success_count += 1
             except Exception as e:
@@ -16,6 +16,9 @@ from typing import Dict, List, Optional, Tuple
 import logging
 from pathlib import Path
 
+from cp_data_processor.processing.result_cache import cached_read_csv, file_signature, get_result_cache
+from cp_data_processor.processing.stage_profiler import file_bytes, profiled, stage
+
 # 导入JavaScript嵌入工具 - 使用兼容的导入方式
 def get_embedded_plotly_js():
     """获取嵌入式Plotly.js内容"""
@@ -52,6 +55,7 @@ class YieldChart:
         self.yield_data = None
         # 移除spec_data和cleaned_data，不再需要
         self.all_charts_cache: Dict[str, go.Figure] = {}  # 图表缓存
+        self._data_signature = None  # 已加载数据文件的签名，作为共享结果缓存键的一部分
         
         # 图表样式配置
         self.chart_config = {
@@ -86,8 +90,9 @@ class YieldChart:
                 return False
             
             yield_file = yield_files[0]
-            self.yield_data = pd.read_csv(yield_file)
+            self.yield_data = cached_read_csv(yield_file)
             logger.info(f"加载yield数据: {yield_file.name}")
+            self._data_signature = file_signature(yield_file)
             
             # 数据预处理
             self._preprocess_data()
@@ -101,6 +106,7 @@ class YieldChart:
             logger.error(f"数据加载或图表预生成失败: {e}")
             self.yield_data = None
             self.all_charts_cache = {}
+            self._data_signature = None
             return False
     
     def _preprocess_data(self):
@@ -584,6 +590,7 @@ class YieldChart:
         
         return fig
     
+    @profiled("图表生成")
     def _populate_charts_cache(self):
         """填充图表缓存"""
         if self.yield_data is None:
@@ -594,15 +601,28 @@ class YieldChart:
         chart_types = ['wafer_trend', 'lot_comparison', 'failure_analysis']
         logger.info(f"开始生成 {len(chart_types)} 个良率图表...")
         
+        builders = {
+            'wafer_trend': self._create_wafer_trend_chart,
+            'lot_comparison': self._create_lot_comparison_chart,
+            'failure_analysis': self._create_failure_analysis_chart,
+        }
+        cache = get_result_cache()
         success_count = 0
         for chart_type in chart_types:
             try:
-                if chart_type == 'wafer_trend':
-                    self.all_charts_cache[chart_type] = self._create_wafer_trend_chart()
-                elif chart_type == 'lot_comparison':
-                    self.all_charts_cache[chart_type] = self._create_lot_comparison_chart()
-                elif chart_type == 'failure_analysis':
-                    self.all_charts_cache[chart_type] = self._create_failure_analysis_chart()
+                # 同一数据文件和图表配置已生成过的图表由共享结果缓存提供（返回副本）
+                if self._data_signature is None:
+                    self.all_charts_cache[chart_type] = builders[chart_type]()
+                else:
+                    key = ('yield_chart', self._data_signature, repr(sorted(self.chart_config.items())), chart_type)
+                    chart_fig = cache.get(key)
+                    if chart_fig is None:
+                        chart_fig = builders[chart_type]()
+                        if chart_fig is not None:
+                            cache.set(key, go.Figure(chart_fig))
+                    else:
+                        chart_fig = go.Figure(chart_fig)
+                    self.all_charts_cache[chart_type] = chart_fig
                 success_count += 1
             except Exception as e:
                 logger.error(f"生成 {chart_type} 图表失败: {e}")
@@ -676,11 +696,13 @@ class YieldChart:
             file_path = output_path / filename
             
             # 使用本地嵌入的Plotly.js，避免CDN加载失败
-            figure_to_save.write_html(
-                str(file_path),
-                include_plotlyjs=get_embedded_plotly_js(),
-                validate=False  # 跳过验证，提升速度
-            )
+            with stage("图表写出") as probe:
+                figure_to_save.write_html(
+                    str(file_path),
+                    include_plotlyjs=get_embedded_plotly_js(),
+                    validate=False  # 跳过验证，提升速度
+                )
+                probe.add(bytes_out=file_bytes([file_path]))
             logger.info(f"图表已保存: {file_path}")
             
             return file_path
@@ -718,11 +740,13 @@ class YieldChart:
                 file_path = output_path / filename
                 
                 # 使用本地嵌入的Plotly.js，避免CDN加载失败
-                figure.write_html(
-                    str(file_path),
-                    include_plotlyjs=get_embedded_plotly_js(),
-                    validate=False  # 跳过验证，提升速度
-                )
+                with stage("图表写出") as probe:
+                    figure.write_html(
+                        str(file_path),
+                        include_plotlyjs=get_embedded_plotly_js(),
+                        validate=False  # 跳过验证，提升速度
+                    )
+                    probe.add(bytes_out=file_bytes([file_path]))
                 saved_paths.append(file_path)
                 success_count += 1
             except Exception as e:
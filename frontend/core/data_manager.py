@@ -12,10 +12,19 @@ from pathlib import Path
 from typing import Optional, Dict, Any
 import logging
 
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cp_data_processor.processing.result_cache import get_result_cache
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# DataManager 在共享结果缓存中的命名空间
+CACHE_NAMESPACE = "data_manager"
+
 class DataManager:
     """混合式数据管理器 - 支持文件/内存/缓存多种数据源"""
     
@@ -25,13 +34,13 @@ class DataManager:
         
         Args:
             data_source (str): 数据源类型 - "file", "memory", "cache", "auto"
-            cache_enabled (bool): 是否启用缓存
+            cache_enabled (bool): 是否启用缓存（使用共享结果缓存，容量和有效期见性能配置）
             data_dir (str): 数据目录路径
         """
         self.data_source = data_source
         self.cache_enabled = cache_enabled
         self.data_dir = Path(data_dir)
-        self.cache_data = {}  # 内存缓存
+        self.cache = get_result_cache()
         
         # 初始化适配器（延迟导入避免循环依赖）
         self.file_adapter = None
@@ -77,9 +86,11 @@ class DataManager:
             cache_key = self._generate_cache_key(data_type, lot_id, **kwargs)
             
             # 1. 尝试从缓存获取
-            if self.cache_enabled and cache_key in self.cache_data:
-                logger.info(f"从缓存获取数据: {cache_key}")
-                return self.cache_data[cache_key]
+            if self.cache_enabled:
+                cached = self.cache.get(self._shared_key(cache_key))
+                if cached is not None:
+                    logger.info(f"从缓存获取数据: {cache_key}")
+                    return cached
             
             # 2. 根据配置选择数据源
             data = None
@@ -94,7 +105,7 @@ class DataManager:
             
             # 3. 缓存数据
             if self.cache_enabled and data is not None:
-                self.cache_data[cache_key] = data.copy()  # 存储副本避免意外修改
+                self.cache.set(self._shared_key(cache_key), data.copy())  # 存储副本避免意外修改
                 logger.info(f"数据已缓存: {cache_key}, 形状: {data.shape}")
             
             return data
@@ -152,25 +163,33 @@ class DataManager:
             key_parts.append(kwargs_str)
         return "_".join(key_parts)
     
+    def _shared_key(self, cache_key: str) -> tuple:
+        """共享结果缓存中的键：不同数据源、数据目录的 DataManager 互不干扰"""
+        return (CACHE_NAMESPACE, self.data_source, str(self.data_dir.resolve()), cache_key)
+    
     def store_data(self, data_type: str, data: pd.DataFrame, lot_id: Optional[str] = None):
         """存储数据到内存适配器"""
         self._init_adapters()
         self.memory_adapter.store_data(data_type, data, lot_id)
+        # 内存数据变化后，之前缓存的结果可能已过时
+        self.cache.clear(CACHE_NAMESPACE)
         logger.info(f"数据已存储到内存: {data_type}, 批次: {lot_id}, 形状: {data.shape}")
     
     def clear_cache(self):
-        """清空缓存"""
-        self.cache_data.clear()
+        """清空缓存（所有 DataManager 在共享结果缓存中的条目）"""
+        self.cache.clear(CACHE_NAMESPACE)
         if self.memory_adapter:
             self.memory_adapter.clear_cache()
         logger.info("缓存已清空")
     
     def get_cache_info(self) -> Dict[str, Any]:
         """获取缓存信息"""
+        keys = [key for key in self.cache.keys(CACHE_NAMESPACE) if key[1:3] == self._shared_key("")[1:3]]
         info = {
-            "cache_enabled": self.cache_enabled,
-            "cache_size": len(self.cache_data),
-            "cache_keys": list(self.cache_data.keys()),
+            "cache_enabled": self.cache_enabled and self.cache.enabled,
+            "cache_size": len(keys),
+            "cache_keys": [key[-1] for key in keys],
+            "cache_stats": self.cache.get_stats(),
             "data_source": self.data_source,
             "data_dir": str(self.data_dir)
         }
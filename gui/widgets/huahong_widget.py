@@ -13,7 +13,7 @@ import re
 from typing import Sequence
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QTextEdit, QFileDialog, 
-                             QMessageBox, QProgressBar)
+                             QMessageBox, QProgressBar, QComboBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 import logging
@@ -35,6 +35,17 @@ from frontend.charts.boxplot_chart import BoxplotChart
 
 logger = logging.getLogger(__name__)
 
+# 界面上的异常值处理方法选项：(显示名称, DataTransformer.clean_data 的方法名)
+OUTLIER_METHOD_OPTIONS = [
+    ("IQR（整批次）", 'iqr'),
+    ("IQR（按晶圆）", 'iqr_wafer'),
+    ("IQR（按批次）", 'iqr_lot'),
+    ("MAD（整批次）", 'mad'),
+    ("MAD（按晶圆）", 'mad_wafer'),
+    ("MAD（按批次）", 'mad_lot'),
+    ("标准差（整批次）", 'std_dev'),
+]
+
 
 def get_desktop_path():
     """获取当前 Windows 用户的桌面路径。"""
@@ -189,12 +200,13 @@ class HHDataProcessingThread(QThread):
     progress_updated = pyqtSignal(str)  # 进度更新信号
     finished = pyqtSignal(bool, str)    # 完成信号(成功/失败, 消息)
     
-    def __init__(self, input_paths, output_dir, operation_type):
+    def __init__(self, input_paths, output_dir, operation_type, outlier_method='iqr'):
         super().__init__()
         self.input_paths = normalize_input_paths(input_paths)
         self.input_dir = str(self.input_paths[0])
         self.output_dir = output_dir
         self.operation_type = operation_type  # 'clean' 或 'generate'
+        self.outlier_method = outlier_method
     
     def run(self):
         """执行数据处理"""
@@ -225,7 +237,7 @@ class HHDataProcessingThread(QThread):
                 result = clean_dcp_process_directory(
                     directory_path=str(prepared_input.directory),
                     output_dir=self.output_dir,
-                    outlier_method='iqr',
+                    outlier_method=self.outlier_method,
                     convert_units=True
                 )
 
@@ -423,6 +435,22 @@ class HuaHongWidget(QWidget):
         output_layout.addWidget(self.output_browse_btn)
         main_layout.addLayout(output_layout)
         
+        # 异常值处理方法选择
+        method_layout = QHBoxLayout()
+        method_label = QLabel("🧹 异常值处理:")
+        method_label.setMinimumWidth(125)
+        method_label.setFont(QFont("", 12))
+        self.outlier_method_combo = QComboBox()
+        self.outlier_method_combo.setMinimumHeight(35)
+        self.outlier_method_combo.setFont(QFont("", 11))
+        for text, method in OUTLIER_METHOD_OPTIONS:
+            self.outlier_method_combo.addItem(text, method)
+        
+        method_layout.addWidget(method_label)
+        method_layout.addWidget(self.outlier_method_combo)
+        method_layout.addStretch()
+        main_layout.addLayout(method_layout)
+        
         # 操作按钮
         button_layout = QHBoxLayout()
         button_layout.setSpacing(30)
@@ -608,8 +636,10 @@ class HuaHongWidget(QWidget):
         self.set_processing_state(True)
         
         # 启动后台处理线程
+        outlier_method = self.outlier_method_combo.currentData()
+        self.log_message(f"🧹 异常值处理方法: {self.outlier_method_combo.currentText()}")
         self.processing_thread = HHDataProcessingThread(
-            normalized_sources, self.output_dir, 'clean'
+            normalized_sources, self.output_dir, 'clean', outlier_method
         )
         self.processing_thread.progress_updated.connect(self.log_message)
         self.processing_thread.finished.connect(self.on_cleaning_finished)
@@ -695,6 +725,7 @@ class HuaHongWidget(QWidget):
         self.output_browse_btn.setEnabled(not is_processing)
         self.input_path_edit.setEnabled(not is_processing)
         self.output_path_edit.setEnabled(not is_processing)
+        self.outlier_method_combo.setEnabled(not is_processing)
         
         # 显示/隐藏进度条
         if is_processing:
@@ -2,15 +2,31 @@
 
 from __future__ import annotations
 
+import itertools
+import os
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.readers.base_reader import BaseReader
+from cp_data_processor.readers.excel_stream import (
+    ColumnSpec,
+    SheetRowStream,
+    collect_columns,
+    read_until,
+    rows_to_frame,
+    trimmed_width,
+)
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache, get_parsed_file_cache
 
 
 PARAMETER_DEFINITIONS = [
@@ -34,6 +50,24 @@ ENGINEERING_FACTORS = {
     "M": 1e6,
 }
 UNIT_FACTORS = {"V": 1.0, "A": 1.0, "s": 1.0}
+# 解析缓存命名空间，Excel 解析逻辑变化时需要升级版本号
+PARSED_CACHE_NAMESPACE = "guoyu-v2"
+# 文件头部识别区域行数，覆盖 JUNO 签名和 LotName/WaferID 等元数据
+HEADER_ROW_COUNT = 31
+METADATA_LABELS = ("LotName", "WaferID", "Devices", "Pass", "Fail")
+DIE_SERIAL_PATTERN = r"[PF]\d+"
+ENGINEERING_VALUE_PATTERN = r"([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*([pnumkM]?)([VAs]?)"
+_NUMERIC_TYPES = (int, float, np.number)
+
+
+@lru_cache(maxsize=None)
+def _target_unit_factor(target_unit: str) -> Tuple[str, float]:
+    """解析目标单位，返回 (基本单位, 换算系数)，结果按目标单位缓存。"""
+    target_match = re.fullmatch(r"([pnumkM]?)([VAs]?)", target_unit)
+    if not target_match:
+        raise ValueError(f"不支持的目标单位: {target_unit}")
+    target_prefix, target_base_unit = target_match.groups()
+    return target_base_unit, ENGINEERING_FACTORS[target_prefix] * UNIT_FACTORS.get(target_base_unit, 1.0)
 
 
 def parse_engineering_value(value, target_unit: str) -> float:
@@ -44,112 +78,255 @@ def parse_engineering_value(value, target_unit: str) -> float:
         return float(value)
 
     text = str(value).strip()
-    match = re.fullmatch(
-        r"([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*([pnumkM]?)([VAs]?)",
-        text,
-    )
+    match = re.fullmatch(ENGINEERING_VALUE_PATTERN, text)
     if not match:
         return np.nan
 
     number = float(match.group(1))
     prefix = match.group(2)
     base_unit = match.group(3)
-    target_match = re.fullmatch(r"([pnumkM]?)([VAs]?)", target_unit)
-    if not target_match:
-        raise ValueError(f"不支持的目标单位: {target_unit}")
-
-    target_prefix, target_base_unit = target_match.groups()
+    target_base_unit, target_factor = _target_unit_factor(target_unit)
     if base_unit and target_base_unit and base_unit != target_base_unit:
         raise ValueError(f"单位不匹配: {text} -> {target_unit}")
 
     base_value = number * ENGINEERING_FACTORS[prefix] * UNIT_FACTORS.get(base_unit, 1.0)
-    target_factor = ENGINEERING_FACTORS[target_prefix] * UNIT_FACTORS.get(target_base_unit, 1.0)
     return base_value / target_factor
 
 
+def parse_engineering_series(values: pd.Series, target_unit: str) -> pd.Series:
+    """
+    按列转换工程单位，结果与逐个调用 parse_engineering_value 完全一致。
+
+    文本值先按内容去重（仪器输出的有效位数有限，重复度很高），再对去重后的值
+    一次性提取数值、前缀和单位，换算系数查表后整列计算并按编码展开。
+    单位不匹配时抛出与逐个转换相同的 ValueError（报告列中第一个不匹配的值）。
+    """
+    cells = values.astype(object).to_numpy()
+    result = np.full(len(cells), np.nan)
+    missing = pd.isna(cells)
+    numeric = ~missing & np.fromiter(
+        (isinstance(cell, _NUMERIC_TYPES) for cell in cells), dtype=bool, count=len(cells)
+    )
+    result[numeric] = cells[numeric].astype(np.float64)
+
+    text_positions = np.flatnonzero(~missing & ~numeric)
+    if len(text_positions):
+        codes, uniques = pd.factorize(cells[text_positions])
+        result[text_positions] = parse_engineering_codes(codes, list(uniques), target_unit)
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def parse_engineering_codes(codes: np.ndarray, uniques: List[object], target_unit: str) -> np.ndarray:
+    """
+    转换去重编码后的列：codes 为每个单元格在 uniques 中的位置，-1 表示缺失。
+
+    每个去重值只转换一次，结果与逐个调用 parse_engineering_value 一致。
+    """
+    result = np.full(len(codes), np.nan)
+    if not uniques:
+        return result
+
+    cells = np.empty(len(uniques), dtype=object)
+    cells[:] = uniques
+    unique_values = np.full(len(cells), np.nan)
+    missing = pd.isna(cells)
+    numeric = ~missing & np.fromiter(
+        (isinstance(cell, _NUMERIC_TYPES) for cell in cells), dtype=bool, count=len(cells)
+    )
+    unique_values[numeric] = cells[numeric].astype(np.float64)
+
+    text_positions = np.flatnonzero(~missing & ~numeric)
+    if len(text_positions):
+        texts = pd.Series([str(cell).strip() for cell in cells[text_positions]], dtype=object)
+        parts = texts.str.extract(f"^{ENGINEERING_VALUE_PATTERN}\\Z")
+        matched = parts[0].notna().to_numpy()
+        if matched.any():
+            target_base_unit, target_factor = _target_unit_factor(target_unit)
+            if target_base_unit:
+                mismatched = np.zeros(len(cells), dtype=bool)
+                mismatched[text_positions] = (matched & (parts[2] != "") & (parts[2] != target_base_unit)).to_numpy()
+                if mismatched.any():
+                    first = codes[np.flatnonzero((codes >= 0) & mismatched[codes])[0]]
+                    raise ValueError(f"单位不匹配: {str(cells[first]).strip()} -> {target_unit}")
+            parts = parts[matched]
+            numbers = parts[0].to_numpy(dtype=object).astype(np.float64)
+            prefix_factors = parts[1].map(ENGINEERING_FACTORS).to_numpy(dtype=np.float64)
+            unit_factors = parts[2].map(UNIT_FACTORS).fillna(1.0).to_numpy(dtype=np.float64)
+            unique_values[text_positions[matched]] = numbers * prefix_factors * unit_factors / target_factor
+
+    present = codes >= 0
+    result[present] = unique_values[codes[present]]
+    return result
+
+
+@dataclass
+class GuoyuFileHeader:
+    """文件头部的识别结果：是否为 JUNO 文件，以及已找到的元数据字段。"""
+
+    is_guoyu: bool
+    metadata: Dict[str, object] = field(default_factory=dict)
+
+    @classmethod
+    def from_raw(cls, raw: pd.DataFrame) -> "GuoyuFileHeader":
+        head = raw.iloc[:HEADER_ROW_COUNT]
+        if head.empty:
+            return cls(is_guoyu=False)
+        labels = head.iloc[:, 0].astype(str)
+        is_guoyu = (
+            str(head.iloc[0, 0]).startswith("JUNO Test System")
+            and labels.eq("WaferID").any()
+            and labels.eq("Serial#").any()
+        )
+        metadata = {}
+        for label in METADATA_LABELS:
+            try:
+                metadata[label] = GuoyuFRDReader._metadata_value(head, label)
+            except ValueError:
+                continue
+        return cls(is_guoyu=is_guoyu, metadata=metadata)
+
+    @property
+    def lot_name(self) -> Optional[str]:
+        value = self.metadata.get("LotName")
+        return None if value is None else str(value).strip()
+
+
+@dataclass
+class GuoyuFileData:
+    """一次加载得到的单个文件内容：摘要元数据、规格表和不含 Lot_ID 的 Die 表。"""
+
+    metadata: Dict[str, object]
+    spec_data: pd.DataFrame
+    die_data: pd.DataFrame
+
+
+# 绝对路径 -> ((文件大小, mtime_ns), 头部识别结果)，识别、读取和批次发现共用；
+# 最多保留 HEADER_CACHE_SIZE 个文件，超出时淘汰最久未使用的结果
+HEADER_CACHE_SIZE = 1024
+_header_cache: "OrderedDict[str, Tuple[Tuple[int, int], GuoyuFileHeader]]" = OrderedDict()
+_header_cache_lock = threading.Lock()
+
+
+def _file_signature(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def remember_file_header(file_path: str, raw: pd.DataFrame) -> GuoyuFileHeader:
+    """用已读取的工作表内容登记文件头部识别结果。"""
+    header = GuoyuFileHeader.from_raw(raw)
+    key = os.path.abspath(file_path)
+    signature = _file_signature(file_path)
+    with _header_cache_lock:
+        _header_cache[key] = (signature, header)
+        _header_cache.move_to_end(key)
+        while len(_header_cache) > HEADER_CACHE_SIZE:
+            _header_cache.popitem(last=False)
+    return header
+
+
+def read_file_header(file_path: str) -> GuoyuFileHeader:
+    """读取文件头部识别结果；文件未变化时直接返回已登记的结果，不再打开文件。"""
+    key = os.path.abspath(file_path)
+    with _header_cache_lock:
+        cached = _header_cache.get(key)
+        if cached is not None:
+            _header_cache.move_to_end(key)
+    if cached is not None and cached[0] == _file_signature(file_path):
+        return cached[1]
+    raw = pd.read_excel(file_path, sheet_name=0, header=None, nrows=HEADER_ROW_COUNT)
+    return remember_file_header(file_path, raw)
+
+
+def clear_header_cache() -> None:
+    with _header_cache_lock:
+        _header_cache.clear()
+
+
 class GuoyuFRDReader(BaseReader):
     """读取一个批次目录下的一片或多片国宇 FRD Excel 文件。"""
 
-    def __init__(self, file_paths=None, pass_bin: int = 1, lot_id: Optional[str] = None):
+    def __init__(
+        self,
+        file_paths=None,
+        pass_bin: int = 1,
+        lot_id: Optional[str] = None,
+        cache: Optional[ParsedFileCache] = None,
+        streaming: Optional[bool] = None,
+    ):
         super().__init__(file_paths or [], pass_bin)
         self.explicit_lot_id = lot_id
+        self.cache = cache if cache is not None else get_parsed_file_cache()
+        if streaming is None:
+            from cp_data_processor.config.performance_config import get_performance_config
+            streaming = get_performance_config().ENABLE_STREAMING_EXCEL
+        self.streaming = streaming
 
     def can_read(self, file_path: str) -> bool:
         try:
             path = Path(file_path)
             if path.suffix.lower() not in {".xls", ".xlsx"}:
                 return False
-            raw = pd.read_excel(path, sheet_name=0, header=None, nrows=31)
-            return (
-                str(raw.iloc[0, 0]).startswith("JUNO Test System")
-                and raw.iloc[:, 0].astype(str).eq("WaferID").any()
-                and raw.iloc[:, 0].astype(str).eq("Serial#").any()
-            )
+            return read_file_header(str(path)).is_guoyu
         except Exception:
             return False
 
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         if not self.file_paths:
             raise ValueError("没有指定国宇 FRD 数据文件")
 
-        lot_id = self.explicit_lot_id or self._read_file_lot_name(self.file_paths[0])
+        # 每个文件只加载一次，加入批次后即释放，同一时刻最多持有两个文件的解析结果；
+        # 批次号取自第一个文件，该文件先加载，轮到它时直接使用
+        first_path = self.file_paths[0]
+        first_data: Optional[GuoyuFileData] = self.load_file(first_path)
+        lot_id = self.explicit_lot_id or first_data.metadata["lot_name"]
+        if not lot_id:
+            raise ValueError("缺少元数据字段: LotName")
         lot = CPLot(lot_id=lot_id, product="FRD", pass_bin=self.pass_bin)
         for file_path in sorted(self.file_paths):
-            self._extract_from_file(file_path, lot)
+            if file_path == first_path and first_data is not None:
+                file_data, first_data = first_data, None
+            else:
+                file_data = self.load_file(file_path)
+            self._add_wafer(file_path, file_data, lot)
+            del file_data
+        self.cache.flush()
 
         lot.params = self._build_parameters(lot.wafers[0].spec_data)
         lot.update_counts()
-        lot.combined_data = pd.concat(
-            [wafer.chip_data for wafer in lot.wafers], ignore_index=True
-        )
+        lot.combine_data_from_wafers(id_columns=False)
         return lot
 
     @classmethod
     def _read_file_lot_name(cls, file_path: str) -> str:
-        raw = pd.read_excel(file_path, sheet_name=0, header=None, nrows=20)
-        return str(cls._metadata_value(raw, "LotName")).strip()
+        lot_name = read_file_header(file_path).lot_name
+        if lot_name is None:
+            raise ValueError("缺少元数据字段: LotName")
+        return lot_name
 
     def read_file(self, file_path: str) -> CPLot:
         return GuoyuFRDReader(
-            [file_path], pass_bin=self.pass_bin, lot_id=self.explicit_lot_id
+            [file_path],
+            pass_bin=self.pass_bin,
+            lot_id=self.explicit_lot_id,
+            cache=self.cache,
+            streaming=self.streaming,
         ).read()
 
     def _extract_from_file(self, file_path: str, lot: CPLot) -> None:
-        raw = pd.read_excel(file_path, sheet_name=0, header=None)
-        header_rows = raw.index[raw.iloc[:, 0].astype(str).eq("Serial#")].tolist()
-        if not header_rows:
-            raise ValueError(f"未找到 Serial# 数据表头: {file_path}")
-        header_row = header_rows[0]
+        self._add_wafer(file_path, self.load_file(file_path), lot)
 
-        wafer_id = str(int(float(self._metadata_value(raw, "WaferID"))))
-        chip_count = int(float(self._metadata_value(raw, "Devices")))
-        pass_count = int(float(self._metadata_value(raw, "Pass")))
-        fail_count = int(float(self._metadata_value(raw, "Fail")))
+    def _add_wafer(self, file_path: str, file_data: GuoyuFileData, lot: CPLot) -> None:
+        meta = file_data.metadata
+        wafer_id = meta["wafer_id"]
+        chip_count = meta["chip_count"]
+        pass_count = meta["pass_count"]
+        fail_count = meta["fail_count"]
 
-        source_headers = raw.iloc[header_row].tolist()
-        data = raw.iloc[header_row + 1 :].copy()
-        valid_die_rows = data.iloc[:, 0].astype(str).str.fullmatch(r"[PF]\d+", na=False)
-        data = data.loc[valid_die_rows].copy()
-        if len(data) != chip_count:
-            raise ValueError(
-                f"有效 Die 行数与 Devices 不一致: {file_path} "
-                f"(有效行={len(data)}, Devices={chip_count})"
-            )
-        data.columns = range(data.shape[1])
-        chip_data = pd.DataFrame(
-            {
-                "Lot_ID": lot.lot_id,
-                "Wafer_ID": int(wafer_id),
-                "Seq": data.iloc[:, 0].map(self._parse_seq),
-                "Bin": pd.to_numeric(data.iloc[:, 1], errors="coerce"),
-                "X": pd.to_numeric(data.iloc[:, 2], errors="coerce"),
-                "Y": pd.to_numeric(data.iloc[:, 3], errors="coerce"),
-            }
-        )
-        for offset, name in enumerate(PARAMETER_NAMES, start=4):
-            chip_data[name] = data.iloc[:, offset].map(
-                lambda value, unit=PARAMETER_UNITS[name]: parse_engineering_value(value, unit)
-            )
+        # load_file 的结果只供本次加入批次使用，Die 表直接作为 chip_data，不再复制
+        chip_data = file_data.die_data
+        chip_data.insert(0, "Lot_ID", lot.lot_id)
 
         bin_counts = chip_data["Bin"].value_counts()
         actual_pass_count = int(bin_counts.get(lot.pass_bin, 0))
@@ -161,7 +338,6 @@ class GuoyuFRDReader(BaseReader):
                 f"摘要 Pass/Fail={pass_count}/{fail_count})"
             )
 
-        spec_data = self._extract_spec(raw, header_row)
         summary_data = {
             "gross_die": chip_count,
             "good_die": pass_count,
@@ -182,11 +358,133 @@ class GuoyuFRDReader(BaseReader):
             pass_chips=pass_count,
             fail_chips=fail_count,
         )
-        wafer.spec_data = spec_data
+        wafer.spec_data = file_data.spec_data
         wafer.summary_data = summary_data
-        wafer.source_headers = source_headers
+        wafer.source_headers = meta["source_headers"]
         lot.wafers.append(wafer)
 
+    def load_file(self, file_path: str) -> GuoyuFileData:
+        """
+        一次加载单个文件的摘要元数据、规格表和 Die 表。
+
+        内容未变的文件直接使用解析缓存；实际解析时顺带登记头部识别结果，
+        之后的 can_read 和批次号读取不再打开该文件。
+        """
+        cached = self.cache.load(file_path, PARSED_CACHE_NAMESPACE)
+        if cached is not None:
+            return GuoyuFileData(cached.meta, cached.frames["spec_data"], cached.frames["die_data"])
+
+        file_data = self._parse_file(file_path)
+        self.cache.store(
+            file_path,
+            PARSED_CACHE_NAMESPACE,
+            {"die_data": file_data.die_data, "spec_data": file_data.spec_data},
+            file_data.metadata,
+        )
+        return file_data
+
+    def _parse_file(self, file_path: str) -> GuoyuFileData:
+        """解析单个文件，返回不含 Lot_ID 的 Die 数据、规格表和摘要元数据。"""
+        if self.streaming:
+            return self._parse_file_streaming(file_path)
+
+        raw = pd.read_excel(file_path, sheet_name=0, header=None)
+        file_header = remember_file_header(file_path, raw)
+        header_rows = raw.index[raw.iloc[:, 0].astype(str).eq("Serial#")].tolist()
+        if not header_rows:
+            raise ValueError(f"未找到 Serial# 数据表头: {file_path}")
+        header_row = header_rows[0]
+
+        data = raw.iloc[header_row + 1 :].copy()
+        valid_die_rows = data.iloc[:, 0].astype(str).str.fullmatch(DIE_SERIAL_PATTERN, na=False)
+        data = data.loc[valid_die_rows].copy()
+        meta = self._file_metadata(file_path, raw, file_header, header_row, len(data))
+        data.columns = range(data.shape[1])
+        die_data = pd.DataFrame(
+            {
+                "Wafer_ID": int(meta["wafer_id"]),
+                "Seq": data.iloc[:, 0].map(self._parse_seq),
+                "Bin": pd.to_numeric(data.iloc[:, 1], errors="coerce"),
+                "X": pd.to_numeric(data.iloc[:, 2], errors="coerce"),
+                "Y": pd.to_numeric(data.iloc[:, 3], errors="coerce"),
+            }
+        )
+        for offset, name in enumerate(PARAMETER_NAMES, start=4):
+            die_data[name] = parse_engineering_series(data.iloc[:, offset], PARAMETER_UNITS[name])
+        return GuoyuFileData(meta, self._extract_spec(raw, header_row), die_data)
+
+    def _parse_file_streaming(self, file_path: str) -> GuoyuFileData:
+        """
+        流式解析单个文件，结果与 _parse_file 的 pandas 路径一致。
+
+        只有 Serial# 表头之前的区域被保留为 DataFrame；Die 行逐行读取，
+        Seq/Bin/X/Y 直接写入数值缓冲区，参数列按文本去重编码后再换算单位。
+        """
+        specs = [
+            ColumnSpec("Seq", 0, "float", converter=self._parse_seq),
+            ColumnSpec("Bin", 1, "numeric"),
+            ColumnSpec("X", 2, "numeric"),
+            ColumnSpec("Y", 3, "numeric"),
+        ] + [ColumnSpec(name, offset, "codes") for offset, name in enumerate(PARAMETER_NAMES, start=4)]
+
+        with SheetRowStream(file_path, 0) as stream:
+            rows = iter(stream)
+            head, found = read_until(rows, lambda row: bool(row) and str(row[0]) == "Serial#")
+            # 头部识别区域可能延伸到 Serial# 之后，这部分行同时参与 Die 行收集
+            extra = list(itertools.islice(rows, max(0, HEADER_ROW_COUNT - len(head))))
+            block = collect_columns(
+                itertools.chain(extra, rows),
+                specs,
+                first_row_number=len(head),
+                row_filter=lambda row: bool(row) and re.fullmatch(DIE_SERIAL_PATTERN, str(row[0])) is not None,
+            )
+
+        width = max([block.max_width] + [trimmed_width(row) for row in head])
+        raw = rows_to_frame(head + extra, width)
+        file_header = remember_file_header(file_path, raw)
+        if not found:
+            raise ValueError(f"未找到 Serial# 数据表头: {file_path}")
+        header_row = len(head) - 1
+
+        meta = self._file_metadata(file_path, raw, file_header, header_row, len(block))
+        columns = block.columns
+        die_data = pd.DataFrame(
+            {
+                "Wafer_ID": int(meta["wafer_id"]),
+                "Seq": columns["Seq"],
+                "Bin": columns["Bin"],
+                "X": columns["X"],
+                "Y": columns["Y"],
+            },
+            index=block.row_numbers,
+        )
+        for name in PARAMETER_NAMES:
+            coded = columns[name]
+            die_data[name] = parse_engineering_codes(coded.codes, coded.uniques, PARAMETER_UNITS[name])
+        return GuoyuFileData(meta, self._extract_spec(raw, header_row), die_data)
+
+    def _file_metadata(
+        self, file_path: str, raw: pd.DataFrame, file_header: GuoyuFileHeader, header_row: int, die_count: int
+    ) -> Dict[str, object]:
+        """读取摘要元数据，并校验有效 Die 行数与 Devices 一致。"""
+        wafer_id = str(int(float(self._metadata_value(raw, "WaferID"))))
+        chip_count = int(float(self._metadata_value(raw, "Devices")))
+        pass_count = int(float(self._metadata_value(raw, "Pass")))
+        fail_count = int(float(self._metadata_value(raw, "Fail")))
+        if die_count != chip_count:
+            raise ValueError(
+                f"有效 Die 行数与 Devices 不一致: {file_path} "
+                f"(有效行={die_count}, Devices={chip_count})"
+            )
+        return {
+            "lot_name": file_header.lot_name,
+            "wafer_id": wafer_id,
+            "chip_count": chip_count,
+            "pass_count": pass_count,
+            "fail_count": fail_count,
+            "source_headers": raw.iloc[header_row].tolist(),
+        }
+
     @staticmethod
     def _metadata_value(raw: pd.DataFrame, label: str):
         rows = raw.index[raw.iloc[:, 0].astype(str).eq(label)].tolist()
@@ -4,6 +4,9 @@ from pathlib import Path
 import pandas as pd
 import pytest
 
+import guoyu_batch_processor
+from cp_data_processor.data_models.cp_data import CPLot, CPParameter, CPWafer
+from cp_data_processor.processing.memory_governor import MemoryGovernor
 from guoyu_batch_processor import discover_guoyu_batches, process_guoyu_directory
 
 
@@ -51,3 +54,35 @@ def test_three_level_eds_directory_groups_by_source_lot(tmp_path):
     single_batch = discover_guoyu_batches(str(sample_dir / "25B103"))
     assert list(single_batch) == ["25B103"]
     assert len(single_batch["25B103"]) == 48
+
+
+def _fake_lot(batch, product_name):
+    lot_id, _files = batch
+    wafers = []
+    for number in (2, 1):
+        chip_data = pd.DataFrame({"X": range(5), "Y": range(5), "Bin": [1, 1, 2, 1, 3],
+                                  "VF": [0.1 * number + value for value in range(5)]})
+        wafers.append(CPWafer(wafer_id=f"{lot_id}-{number:02d}", chip_data=chip_data))
+    lot = CPLot(lot_id=lot_id, product=product_name, wafers=wafers,
+                params=[CPParameter(id="VF", unit="V", sl=0.0, su=5.0)])
+    lot.combine_data_from_wafers()
+    return lot
+
+
+def test_memory_pressure_spills_batches_without_changing_output(tmp_path, monkeypatch):
+    product_dir = tmp_path / "FRD_PRODUCT"
+    for lot_id in ("25B148", "25B103"):
+        (product_dir / lot_id).mkdir(parents=True)
+        (product_dir / lot_id / "data.xls").touch()
+    monkeypatch.setattr(guoyu_batch_processor, "_read_guoyu_batch_entry", _fake_lot)
+
+    outputs = {}
+    for name, limit_mb in (("memory", 1e6), ("spilled", 1)):
+        governor = MemoryGovernor(limit_mb=limit_mb, enabled=True, rss_sampler=lambda: 100)
+        monkeypatch.setattr(guoyu_batch_processor, "get_memory_governor", lambda: governor)
+        result = process_guoyu_directory(str(product_dir), str(tmp_path / name), parallel=False)
+        assert result["batch_ids"] == ["25B103", "25B148"] and result["wafer_count"] == 4
+        assert len(governor.decisions) == (name == "spilled")
+        outputs[name] = {kind: Path(path).read_bytes() for kind, path in result["files"].items()}
+
+    assert outputs["spilled"] == outputs["memory"]
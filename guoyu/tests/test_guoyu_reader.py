@@ -1,9 +1,66 @@
+import gc
+import weakref
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from guoyu.guoyu_reader import GuoyuFRDReader, parse_engineering_value
+from guoyu import guoyu_reader
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache
+from guoyu.guoyu_reader import (
+    GuoyuFRDReader,
+    parse_engineering_codes,
+    parse_engineering_series,
+    parse_engineering_value,
+)
+
+
+def write_juno_workbook(path: Path, wafer_no: int = 1, die_count: int = 40, seed: int = 0) -> Path:
+    """生成与 JUNO DTS-2000 导出结构一致的最小国宇文件。"""
+    rng = np.random.default_rng(seed)
+    bins = rng.choice([1, 2], size=die_count, p=[0.9, 0.1])
+    width = 11
+    rows = [["JUNO Test System DTS-2000"] + [None] * (width - 1)]
+    for label, value in [
+        ("LotName", "257375-D70 "),
+        ("WaferID", f"{wafer_no}.0"),
+        ("Devices", die_count),
+        ("Pass", int((bins == 1).sum())),
+        ("Fail", int((bins == 2).sum())),
+    ]:
+        rows.append([label, value] + [None] * (width - 2))
+    for index in range(3):
+        rows.append([f"Cond{index}", None, None, None] + [f"c{index}_{offset}" for offset in range(7)])
+    rows.append(["LimitL", None, None, None] + ["0mV", "0nA", "1.000V", "1.000V", "0V", "0V", "0nA"])
+    rows.append(["LimitU", None, None, None] + ["20.00mV", "100.0nA", "9.000V", "9.000V", "1.000V", "2.000V", "100.0nA"])
+    rows.extend([[None] * width for _ in range(4)])
+    rows.append(["Unit", None, None, None] + [unit for _name, unit in guoyu_reader.PARAMETER_DEFINITIONS])
+    rows.append(["Serial#", "Bin", "X", "Y"] + guoyu_reader.PARAMETER_NAMES)
+    for index, die_bin in enumerate(bins):
+        rows.append(
+            [("P" if die_bin == 1 else "F") + str(index + 1), int(die_bin), index % 8, index // 8]
+            + [f"{rng.uniform(0, 20):.2f}mV", f"{rng.uniform(0, 900):.1f}pA", f"{rng.uniform(1, 9):.3f}V",
+               f"{rng.uniform(1000, 9000):.1f}mV", "F Over", f"{rng.uniform(0, 2):.4f}", f"{rng.uniform(0, 90):.2f}nA"]
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows).to_excel(path, header=False, index=False)
+    return path
+
+
+@pytest.fixture
+def count_excel_reads(monkeypatch):
+    guoyu_reader.clear_header_cache()
+    reads = []
+    original_read_excel = pd.read_excel
+
+    def counting_read_excel(io, *args, **kwargs):
+        reads.append((str(io), kwargs.get("nrows")))
+        return original_read_excel(io, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_excel", counting_read_excel)
+    yield reads
+    guoyu_reader.clear_header_cache()
 
 
 def test_parse_engineering_value():
@@ -13,6 +70,48 @@ def test_parse_engineering_value():
     assert pd.isna(parse_engineering_value("F Over", "nA"))
 
 
+def test_parse_engineering_series_matches_scalar_parser():
+    common = ["F Over", "", None, np.nan, 3, -0.0, True, "1e3", "2.5 n", "١٢m", "1.2.3", pd.Timestamp("2024-01-01")]
+    cases = {
+        "nA": [" 700.0pA ", "+.5uA", "1.7nA", "700.0pA"],
+        "mV": ["01.02mV", "434.4m", "-1.mV", "01.02mV", "0.7V"],
+        "V": ["434.4m", "650.1V", "12kV"],
+    }
+
+    for unit, texts in cases.items():
+        values = pd.Series(texts + common, index=range(10, 10 + len(texts) + len(common)), name=unit, dtype=object)
+        expected = values.map(lambda value, target=unit: parse_engineering_value(value, target))
+        result = parse_engineering_series(values, unit)
+        pd.testing.assert_series_equal(result, expected, check_exact=True)
+        assert np.array_equal(np.signbit(result.to_numpy()), np.signbit(expected.to_numpy()))
+
+
+def test_parse_engineering_series_reports_first_unit_mismatch():
+    values = pd.Series(["1.0nA", "F Over", "2.0mV", "3.0V", "2.0mV"], dtype=object)
+
+    with pytest.raises(ValueError) as scalar_error:
+        values.map(lambda value: parse_engineering_value(value, "nA"))
+    with pytest.raises(ValueError) as series_error:
+        parse_engineering_series(values, "nA")
+
+    assert str(series_error.value) == str(scalar_error.value) == "单位不匹配: 2.0mV -> nA"
+    with pytest.raises(ValueError, match="不支持的目标单位"):
+        parse_engineering_series(values, "xx")
+
+
+def test_parse_engineering_codes_matches_scalar_parser():
+    uniques = ["700.0pA", 3, -0.0, "F Over", "1.7nA"]
+    codes = np.array([0, -1, 1, 2, 3, 4, 0, 2])
+
+    result = parse_engineering_codes(codes, uniques, "nA")
+
+    expected = [np.nan if code < 0 else parse_engineering_value(uniques[code], "nA") for code in codes]
+    np.testing.assert_array_equal(result, expected)
+    assert np.array_equal(np.signbit(result), np.signbit(expected))
+    with pytest.raises(ValueError, match="单位不匹配: 700.0pA -> mV"):
+        parse_engineering_codes(codes, uniques, "mV")
+
+
 def test_sample_batch_contract():
     sample_dir = Path(__file__).parents[2] / "data" / "257375"
     files = sorted(sample_dir.glob("*.xls"))
@@ -64,3 +163,110 @@ def test_unit_row_is_not_exported_as_die():
     assert lot.combined_data["Seq"].notna().all()
     assert len(lot.combined_data) == lot.wafers[0].pass_chips + lot.wafers[0].fail_chips
     assert lot.combined_data["Bin"].value_counts().to_dict() == {1: 3226, 2: 39, 4: 1}
+
+
+def test_detection_and_read_share_one_load(tmp_path, count_excel_reads):
+    path = str(write_juno_workbook(tmp_path / "257375" / "01.xlsx", wafer_no=1))
+    reader = GuoyuFRDReader()
+
+    assert reader.can_read(path)
+    lot = GuoyuFRDReader([path]).read()
+    assert reader.can_read(path)
+
+    assert count_excel_reads == [(path, guoyu_reader.HEADER_ROW_COUNT), (path, None)]
+    assert lot.lot_id == "257375-D70"
+    assert lot.wafers[0].wafer_id == "1"
+    assert lot.wafers[0].chip_count == 40
+    assert lot.params[0].su == pytest.approx(20.0)
+    assert lot.params[0].test_cond == ["c0_0; c1_0; c2_0"]
+
+
+def test_read_without_detection_loads_each_file_once(tmp_path, count_excel_reads):
+    paths = [str(write_juno_workbook(tmp_path / "257375" / f"0{i}.xlsx", wafer_no=i, seed=i)) for i in (2, 1)]
+
+    lot = GuoyuFRDReader(paths).read()
+
+    assert sorted(count_excel_reads) == sorted((path, None) for path in paths)
+    assert [wafer.wafer_id for wafer in lot.wafers] == ["1", "2"]
+    assert GuoyuFRDReader._read_file_lot_name(paths[0]) == "257375-D70"
+    assert len(count_excel_reads) == 2
+
+
+def test_non_juno_workbook_is_rejected(tmp_path, count_excel_reads):
+    path = tmp_path / "other.xlsx"
+    pd.DataFrame({"PART_INDEX": [1, 2]}).to_excel(path, index=False)
+
+    assert not GuoyuFRDReader().can_read(str(path))
+    assert not GuoyuFRDReader().can_read(str(path))
+    assert len(count_excel_reads) == 1
+
+
+def test_streaming_parse_matches_pandas_parse(tmp_path):
+    path = write_juno_workbook(tmp_path / "257375" / "01.xlsx", die_count=60, seed=3)
+    openpyxl = pytest.importorskip("openpyxl")
+    book = openpyxl.load_workbook(path)
+    sheet = book.active
+    sheet.cell(20, 5).value = None
+    sheet.cell(21, 6).value = "NA"
+    sheet.cell(22, 7).value = 1.5
+    sheet.cell(24, 2).value = "3"
+    sheet.cell(25, 3).value = None
+    sheet.cell(26, 13).value = "extra"
+    sheet.insert_rows(30)
+    book.save(path)
+    cache = ParsedFileCache(str(tmp_path / "cache"), enabled=False)
+
+    expected = GuoyuFRDReader(cache=cache, streaming=False).load_file(str(path))
+    result = GuoyuFRDReader(cache=cache, streaming=True).load_file(str(path))
+
+    pd.testing.assert_frame_equal(result.die_data, expected.die_data, check_exact=True)
+    pd.testing.assert_frame_equal(result.spec_data, expected.spec_data, check_exact=True)
+    assert {key: value for key, value in result.metadata.items() if key != "source_headers"} == {
+        key: value for key, value in expected.metadata.items() if key != "source_headers"
+    }
+    assert pd.Series(result.metadata["source_headers"]).equals(pd.Series(expected.metadata["source_headers"]))
+
+
+def test_streaming_read_does_not_use_read_excel(tmp_path, count_excel_reads):
+    path = str(write_juno_workbook(tmp_path / "257375" / "01.xlsx", wafer_no=2))
+
+    lot = GuoyuFRDReader([path], streaming=True).read()
+
+    assert count_excel_reads == []
+    assert GuoyuFRDReader().can_read(path)
+    assert count_excel_reads == []
+    assert lot.wafers[0].wafer_id == "2"
+    assert lot.wafers[0].chip_count == 40
+
+
+def test_read_holds_at_most_two_loaded_files(tmp_path, monkeypatch):
+    paths = [str(write_juno_workbook(tmp_path / "257375" / f"0{i}.xlsx", wafer_no=i, seed=i)) for i in (3, 1, 2, 4)]
+    loaded = []
+    peak = []
+    original_load_file = GuoyuFRDReader.load_file
+
+    def tracking_load_file(self, file_path):
+        gc.collect()
+        peak.append(sum(ref() is not None for ref in loaded))
+        file_data = original_load_file(self, file_path)
+        loaded.append(weakref.ref(file_data))
+        return file_data
+
+    monkeypatch.setattr(GuoyuFRDReader, "load_file", tracking_load_file)
+    lot = GuoyuFRDReader(paths).read()
+
+    assert len(peak) == 4 and max(peak) <= 1
+    assert lot.lot_id == "257375-D70"
+    assert [wafer.wafer_id for wafer in lot.wafers] == ["1", "2", "3", "4"]
+
+
+def test_header_cache_keeps_most_recently_used_files(tmp_path, monkeypatch, count_excel_reads):
+    monkeypatch.setattr(guoyu_reader, "HEADER_CACHE_SIZE", 2)
+    paths = [str(write_juno_workbook(tmp_path / f"0{i}.xlsx", wafer_no=i)) for i in (1, 2, 3)]
+    for path in paths[:2]:
+        guoyu_reader.read_file_header(path)
+    guoyu_reader.read_file_header(paths[0])
+    guoyu_reader.read_file_header(paths[2])
+
+    assert list(guoyu_reader._header_cache) == [str(Path(paths[0]).resolve()), str(Path(paths[2]).resolve())]
+    assert len(count_excel_reads) == 3
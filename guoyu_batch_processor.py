@@ -5,10 +5,17 @@ from __future__ import annotations
 
 import argparse
 import re
+import shutil
+import tempfile
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 
+from cp_data_processor.data_models.lot_collection import LotCollection
+from cp_data_processor.processing.memory_governor import get_memory_governor
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.processing.stage_profiler import profiled, profiling_run
 from cp_data_processor.processing.standard_csv_generator import StandardCSVGenerator
 from cp_data_processor.data_models.cp_data import CPLot
 from cp_data_processor.readers.company_adapters.company_config import get_company_config
@@ -28,6 +35,7 @@ def _find_excel_files(directory: Path, recursive: bool = False) -> List[Path]:
     return sorted(set(files), key=lambda path: str(path).lower())
 
 
+@profiled("文件发现", rows=lambda batches: sum(len(files) for files in batches.values()))
 def discover_guoyu_batches(input_dir: str) -> Dict[str, List[str]]:
     """
     递归识别国宇单批次或多批次目录。
@@ -90,6 +98,12 @@ def _read_guoyu_batch(lot_id: str, files: List[str], product_name: str) -> CPLot
     )
 
 
+def _read_guoyu_batch_entry(batch: Tuple[str, List[str]], product_name: str) -> CPLot:
+    """并行读取时的任务函数，batch 为 (批次号, 文件列表)。"""
+    lot_id, files = batch
+    return _read_guoyu_batch(lot_id, files, product_name)
+
+
 def process_guoyu_batch(input_dir: str, output_dir: str) -> Dict[str, str]:
     """处理一个国宇批次目录，并直接输出到指定目录。"""
     batches = discover_guoyu_batches(input_dir)
@@ -100,36 +114,80 @@ def process_guoyu_batch(input_dir: str, output_dir: str) -> Dict[str, str]:
     return StandardCSVGenerator().generate_standard_csvs(lot, output_dir)
 
 
-def process_guoyu_directory(input_dir: str, output_parent_dir: str) -> Dict[str, object]:
+def process_guoyu_directory(
+    input_dir: str, output_parent_dir: str, parallel: Optional[bool] = None
+) -> Dict[str, object]:
     """
     处理单批次或产品目录下的多个批次。
 
     输出目录自动命名为“第一个批次号_YYYYMMDD_HHMMSS”。
+    多个批次在进程池中并行读取；parallel 为 None 时跟随性能配置，False 强制串行。
+    读取过程中内存达到调控水位时，已读入的批次转存到临时目录，改为按批次集合
+    逐片晶圆生成 CSV，输出内容不变。
+    各阶段的性能按监控配置写入日志，报告写到输出目录（见 stage_profiler）。
     """
+    with profiling_run("国宇") as run:
+        result = _process_guoyu_directory(input_dir, output_parent_dir, parallel)
+        run.output_dir = result["output_dir"]
+        return result
+
+
+def _process_guoyu_directory(
+    input_dir: str, output_parent_dir: str, parallel: Optional[bool]
+) -> Dict[str, object]:
+    """process_guoyu_directory 的实现。"""
     batches = discover_guoyu_batches(input_dir)
     product_name = Path(input_dir).name
     first_lot_id = next(iter(batches))
     output_dir = Path(output_parent_dir) / generate_output_folder_name(first_lot_id)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    lots = {
-        lot_id: _read_guoyu_batch(lot_id, files, product_name)
-        for lot_id, files in batches.items()
-    }
-    generator = StandardCSVGenerator()
-    if len(lots) == 1:
-        files = generator.generate_standard_csvs(next(iter(lots.values())), str(output_dir))
-    else:
-        files = generator.generate_combined_standard_csvs(
-            lots, str(output_dir), combined_name=first_lot_id
-        )
+    if len(batches) < 2:
+        parallel = False
+    governor = get_memory_governor()
+    lots: Dict[str, Union[CPLot, str]] = {}  # 转存后的批次记录保存目录
+    spill_dir: Optional[Path] = None
+    try:
+        with ParallelProcessor("process", parallel=parallel) as processor:
+            for result in processor.map(
+                partial(_read_guoyu_batch_entry, product_name=product_name), batches.items()
+            ):
+                lot_id = result.item[0]
+                lots[lot_id] = result.result()
+                if spill_dir is None and len(batches) > 1 and governor.degrade(
+                    "国宇批次读取", "已读入的批次转存到磁盘，逐片晶圆生成CSV"
+                ):
+                    spill_dir = Path(tempfile.mkdtemp(prefix="guoyu_lots_"))
+                if spill_dir is not None:
+                    for position, (key, lot) in enumerate(lots.items()):
+                        if isinstance(lot, CPLot):
+                            lots[key] = lot.save(str(spill_dir / f"{position:04d}"))
+
+        generator = StandardCSVGenerator()
+        if spill_dir is not None:
+            collection = LotCollection(lots.values())
+            wafer_count = len(collection.wafers)
+            files = generator.generate_combined_standard_csvs(
+                collection, str(output_dir), combined_name=first_lot_id
+            )
+        else:
+            wafer_count = sum(len(lot.wafers) for lot in lots.values())
+            if len(lots) == 1:
+                files = generator.generate_standard_csvs(next(iter(lots.values())), str(output_dir))
+            else:
+                files = generator.generate_combined_standard_csvs(
+                    lots, str(output_dir), combined_name=first_lot_id
+                )
+    finally:
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
 
     return {
         "files": files,
         "output_dir": str(output_dir),
         "batch_ids": list(lots),
         "batch_count": len(lots),
-        "wafer_count": sum(len(lot.wafers) for lot in lots.values()),
+        "wafer_count": wafer_count,
         "product_name": product_name,
     }
 
@@ -138,9 +196,12 @@ def main() -> int:
     parser = argparse.ArgumentParser(description="扬州国宇 FRD CP 数据处理器")
     parser.add_argument("input_dir", help="单批次目录，或包含多层批次数据的产品目录")
     parser.add_argument("-o", "--output", default="output", help="输出父目录")
+    parser.add_argument("--serial", action="store_true", help="强制串行读取批次（默认按性能配置并行）")
     args = parser.parse_args()
 
-    result = process_guoyu_directory(args.input_dir, args.output)
+    result = process_guoyu_directory(
+        args.input_dir, args.output, parallel=False if args.serial else None
+    )
     print(f"output_dir: {result['output_dir']}")
     for file_type, file_path in result["files"].items():
         print(f"{file_type}: {file_path}")
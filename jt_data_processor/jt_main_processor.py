@@ -63,14 +63,16 @@ class JTDataProcessor:
     5. 生成规格文件
     """
     
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, config: Optional[Dict[str, Any]] = None, parallel: Optional[bool] = None):
         """
         初始化JT数据处理器
         
         Args:
             config: JT配置字典，默认使用DEFAULT_JT_CONFIG
+            parallel: 是否并行解析Excel文件。None表示跟随PerformanceConfig.ENABLE_PARALLEL，False强制串行
         """
         self.config = config if config else DEFAULT_JT_CONFIG
+        self.parallel = parallel
         self.logger = logging.getLogger(f"{__name__}.JTDataProcessor")
         
         # 初始化组件
@@ -105,7 +107,7 @@ class JTDataProcessor:
             
             # 2. 读取数据
             self.logger.info("步骤1: 读取JT Excel文件...")
-            self.reader = JTReader(validated_files, pass_bin)
+            self.reader = JTReader(validated_files, pass_bin, parallel=self.parallel)
             self.lot = self.reader.read()
             
             # 3. 数据转换和清洗
@@ -867,7 +869,8 @@ class JTDataProcessor:
 def process_jt_files(input_paths: Union[str, List[str]], 
                     output_dir: str = "output",
                     pass_bin: int = 1,
-                    config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                    config: Optional[Dict[str, Any]] = None,
+                    parallel: Optional[bool] = None) -> Dict[str, Any]:
     """
     处理JT文件的便捷函数（支持HH公司风格的目录输入）
     
@@ -876,11 +879,12 @@ def process_jt_files(input_paths: Union[str, List[str]],
         output_dir: 输出目录
         pass_bin: 合格bin值
         config: 自定义配置
+        parallel: 是否并行解析文件，None表示跟随性能配置
         
     Returns:
         Dict[str, Any]: 处理结果
     """
-    processor = JTDataProcessor(config)
+    processor = JTDataProcessor(config, parallel=parallel)
     return processor.process_files(input_paths, output_dir, pass_bin)
 
 
@@ -896,6 +900,7 @@ if __name__ == "__main__":
     parser.add_argument('-o', '--output', default='output', help='输出目录')
     parser.add_argument('-b', '--pass-bin', type=int, default=1, help='合格bin值')
     parser.add_argument('-v', '--verbose', action='store_true', help='详细输出')
+    parser.add_argument('--serial', action='store_true', help='强制串行读取文件（默认按性能配置并行）')
     
     args = parser.parse_args()
     
@@ -911,7 +916,8 @@ if __name__ == "__main__":
         print(f"合格bin值: {args.pass_bin}")
         print("-" * 60)
         
-        result = process_jt_files(args.inputs, args.output, args.pass_bin)
+        result = process_jt_files(args.inputs, args.output, args.pass_bin,
+                                  parallel=False if args.serial else None)
         
         print("\n=== 处理完成 ===")
         print(f"批次ID: {result['lot_id']}")
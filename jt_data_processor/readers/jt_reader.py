@@ -17,9 +17,12 @@ JT公司Excel格式CP数据读取器
 
 import os
 import sys
+import itertools
 import logging
+import numpy as np
 import pandas as pd
 import re
+from functools import partial
 from typing import List, Union, Dict, Tuple, Optional
 from pathlib import Path
 
@@ -29,10 +32,23 @@ project_root = os.path.join(current_dir, '..', '..')
 sys.path.insert(0, project_root)
 
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.readers.excel_stream import (
+    ColumnSpec,
+    SheetRowStream,
+    collect_columns,
+    drop_trailing_blank_rows,
+    infer_object_column,
+    trimmed_width,
+)
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache, get_parsed_file_cache
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
+# 解析缓存命名空间，DUT_DATA/Summary读取逻辑变化时需要升级版本号
+PARSED_CACHE_NAMESPACE = 'jt-v1'
+
 
 class JTReader:
     """
@@ -48,17 +64,33 @@ class JTReader:
     重要：JT数据无需单位转换，rawdata已与unit匹配
     """
     
-    def __init__(self, file_paths: Union[str, List[str]], pass_bin: int = 1):
+    def __init__(self, file_paths: Union[str, List[str]], pass_bin: int = 1,
+                 cache: Optional[ParsedFileCache] = None, parallel: Optional[bool] = False,
+                 max_workers: Optional[int] = None, streaming: Optional[bool] = None):
         """
         初始化JT数据读取器
         
         Args:
             file_paths: Excel文件路径，可以是单个文件或文件列表
             pass_bin: 合格bin值，默认为1
+            cache: 解析结果磁盘缓存，None表示使用全局缓存
+            parallel: 是否在进程池中并行解析Excel文件。默认False串行；
+                None表示跟随PerformanceConfig.ENABLE_PARALLEL
+            max_workers: 进程数上限，默认取PerformanceConfig.MAX_WORKERS
+            streaming: 是否流式读取工作表，None表示跟随PerformanceConfig.ENABLE_STREAMING_EXCEL
         """
         self.file_paths = [file_paths] if isinstance(file_paths, str) else file_paths
         self.pass_bin = pass_bin
+        self.parallel = parallel
+        self.max_workers = max_workers
         self.lot = None
+        self.cache = cache if cache is not None else get_parsed_file_cache()
+        if streaming is None:
+            from cp_data_processor.config.performance_config import get_performance_config
+            streaming = get_performance_config().ENABLE_STREAMING_EXCEL
+        self.streaming = streaming
+        # 文件路径 -> (单位信息, 规格信息)，供 get_unit_info/get_spec_info 复用
+        self._sheet_info: Dict[str, Tuple[Dict, Dict]] = {}
         
         # 设置日志
         self.logger = logging.getLogger(f"{__name__}.JTReader")
@@ -137,14 +169,17 @@ class JTReader:
         self.lot = CPLot(lot_id=lot_id, pass_bin=self.pass_bin)
         self.logger.info(f"创建CPLot对象，Lot ID: {lot_id}")
         
-        # 处理每个文件
+        # 并行解析各文件的Excel工作表，再按文件顺序处理
+        loaded = self._load_sheets_parallel()
         for file_path in self.file_paths:
             try:
-                self._process_single_file(file_path)
+                self._process_single_file(file_path, loaded.get(file_path))
             except Exception as e:
                 self.logger.error(f"处理文件 {file_path} 时出错: {e}")
                 continue
         
+        self.cache.flush()
+        
         # 更新批次统计信息
         self.lot.update_counts()
         self.logger.info(f"JT数据读取完成，晶圆数: {len(self.lot.wafers)}, 参数数: {self.lot.param_count}")
@@ -188,50 +223,213 @@ class JTReader:
         Returns:
             str: 提取的Wafer ID（冒号后的数字）
         """
+        try:
+            with self._open_workbook(file_path) as book:
+                wafer_id = self._read_summary_wafer_id(file_path, book)
+        except Exception as e:
+            self.logger.error(f"打开 {file_path} 失败: {e}")
+            wafer_id = None
+        return self._wafer_id_or_default(file_path, wafer_id)
+    
+    def _open_workbook(self, file_path: str) -> pd.ExcelFile:
+        """
+        打开一次Excel工作簿，同一文件的Summary information和DUT_DATA都从这个句柄读取
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            pd.ExcelFile: 工作簿会话，调用方负责关闭（支持with语句）
+        """
+        engine = 'xlrd' if Path(file_path).suffix.lower() == '.xls' else None
+        return pd.ExcelFile(file_path, engine=engine)
+    
+    def _read_summary_wafer_id(self, file_path: str, book: pd.ExcelFile) -> Optional[str]:
+        """
+        读取Summary information工作表第9行中的Wafer ID，失败时返回None
+        
+        Args:
+            file_path: Excel文件路径
+            book: 已打开的工作簿会话
+            
+        Returns:
+            Optional[str]: 冒号后的数字；没有冒号格式时为原文本
+        """
         try:
             self.logger.debug(f"从 {file_path} 提取Wafer ID...")
             
             # 读取Summary information工作表
-            summary_df = pd.read_excel(file_path, sheet_name='Summary information', header=None, engine='xlrd')
-            
-            # 根据用户确认：第9行获取WAFER_ID（索引为8）
-            if len(summary_df) > 8:
-                wafer_id_text = str(summary_df.iloc[8, 0])  # 第9行第1列（数据只有一列）
+            summary_df = book.parse('Summary information', header=None)
+            return self._parse_summary_wafer_id(summary_df.iloc[:, 0].tolist())
                 
-                # 使用正则表达式提取冒号右边的数字
-                match = re.search(r':(\d+)', wafer_id_text)
-                if match:
-                    wafer_id = match.group(1)
-                    self.logger.info(f"成功用正则表达式提取Wafer ID: {wafer_id} (原文本: {wafer_id_text})")
-                    return wafer_id
-                else:
-                    self.logger.warning(f"未找到冒号格式的Wafer ID，使用原文本: {wafer_id_text}")
-                    return wafer_id_text
+        except Exception as e:
+            self.logger.error(f"从 {file_path} 提取Wafer ID失败: {e}")
+            return None
+    
+    def _parse_summary_wafer_id(self, first_column: List) -> str:
+        """
+        从Summary information第一列提取Wafer ID
+        
+        Args:
+            first_column: 第一列各行的值
+            
+        Returns:
+            str: 冒号后的数字；没有冒号格式时为原文本
+        """
+        # 根据用户确认：第9行获取WAFER_ID（索引为8）
+        if len(first_column) > 8:
+            wafer_id_text = str(first_column[8])  # 第9行第1列（数据只有一列）
+            
+            # 使用正则表达式提取冒号右边的数字
+            match = re.search(r':(\d+)', wafer_id_text)
+            if match:
+                wafer_id = match.group(1)
+                self.logger.info(f"成功用正则表达式提取Wafer ID: {wafer_id} (原文本: {wafer_id_text})")
+                return wafer_id
             else:
-                raise ValueError("Summary information工作表行数不足，无法读取第9行")
-                
+                self.logger.warning(f"未找到冒号格式的Wafer ID，使用原文本: {wafer_id_text}")
+                return wafer_id_text
+        else:
+            raise ValueError("Summary information工作表行数不足，无法读取第9行")
+    
+    def _wafer_id_or_default(self, file_path: str, wafer_id: Optional[str]) -> str:
+        """Wafer ID提取失败时回退到基于文件名的默认值"""
+        if wafer_id is not None:
+            return wafer_id
+        default_wafer_id = f"WAFER_{Path(file_path).stem}"
+        self.logger.warning(f"回退到默认Wafer ID: {default_wafer_id}")
+        return default_wafer_id
+    
+    def _load_file_sheets(self, file_path: str) -> Tuple[Optional[str], pd.DataFrame]:
+        """
+        读取单个文件的Summary Wafer ID和完整的DUT_DATA工作表，内容未变的文件直接使用解析缓存
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            Tuple[Optional[str], pd.DataFrame]: (Summary中的Wafer ID, DUT_DATA原始表)
+        """
+        cached = self._load_cached_sheets(file_path)
+        if cached is not None:
+            return cached
+        summary_wafer_id, full_df = self._parse_file_sheets(file_path)
+        self._store_cached_sheets(file_path, summary_wafer_id, full_df)
+        return summary_wafer_id, full_df
+    
+    def _load_cached_sheets(self, file_path: str) -> Optional[Tuple[Optional[str], pd.DataFrame]]:
+        """从解析缓存恢复Summary Wafer ID和DUT_DATA原始表，未命中时返回None"""
+        cached = self.cache.load(file_path, PARSED_CACHE_NAMESPACE)
+        if cached is None:
+            return None
+        self.logger.info(f"解析缓存命中，跳过Excel解析: {file_path}")
+        return cached.meta['wafer_id'], cached.frames['dut_data']
+    
+    def _store_cached_sheets(self, file_path: str, summary_wafer_id: Optional[str], full_df: pd.DataFrame) -> None:
+        self.cache.store(file_path, PARSED_CACHE_NAMESPACE, {'dut_data': full_df}, {'wafer_id': summary_wafer_id})
+    
+    def _parse_file_sheets(self, file_path: str) -> Tuple[Optional[str], pd.DataFrame]:
+        """打开一次工作簿，读取Summary Wafer ID和完整的DUT_DATA工作表（不使用缓存）"""
+        if self.streaming:
+            sheets = self._parse_file_sheets_streaming(file_path)
+            if sheets is not None:
+                return sheets
+        with self._open_workbook(file_path) as book:
+            summary_wafer_id = self._read_summary_wafer_id(file_path, book)
+            self.logger.debug(f"读取 {file_path} 的DUT_DATA工作表...")
+            full_df = book.parse('DUT_DATA', header=None)
+        return summary_wafer_id, full_df
+    
+    def _parse_file_sheets_streaming(self, file_path: str) -> Optional[Tuple[Optional[str], pd.DataFrame]]:
+        """
+        流式读取Summary Wafer ID和完整的DUT_DATA工作表，结果与book.parse(header=None)一致
+        
+        DUT_DATA的第1行是文本表头，pandas对每一列都推断为保留原始单元格的对象列，这里
+        逐行把单元格写入各列的对象缓冲区，不经过pandas逐单元格的行列表。表头不全是文本
+        或有超出表头的列时返回None，由pandas路径读取。
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            Optional[Tuple[Optional[str], pd.DataFrame]]: (Summary中的Wafer ID, DUT_DATA原始表)
+        """
+        with SheetRowStream(file_path, 'DUT_DATA') as stream:
+            rows = drop_trailing_blank_rows(iter(stream))
+            header = next(rows, ())
+            width = trimmed_width(header)
+            if not width or not all(isinstance(name, str) for name in header[:width]):
+                return None
+            self.logger.debug(f"流式读取 {file_path} 的DUT_DATA工作表...")
+            block = collect_columns(itertools.chain([header], rows),
+                                    [ColumnSpec(index, index, 'object') for index in range(width)])
+            if block.max_width > width:
+                return None
+            summary_wafer_id = self._read_summary_wafer_id_streaming(file_path, stream)
+        full_df = pd.DataFrame({index: block.columns.pop(index) for index in range(width)})
+        return summary_wafer_id, full_df
+    
+    def _read_summary_wafer_id_streaming(self, file_path: str, stream: SheetRowStream) -> Optional[str]:
+        """从已打开的工作簿流式读取Summary information中的Wafer ID，失败时返回None"""
+        try:
+            self.logger.debug(f"从 {file_path} 提取Wafer ID...")
+            rows = drop_trailing_blank_rows(stream.rows('Summary information'))
+            first_column = np.array([row[0] if row else np.nan for row in rows], dtype=object)
+            return self._parse_summary_wafer_id(infer_object_column(first_column).tolist())
         except Exception as e:
             self.logger.error(f"从 {file_path} 提取Wafer ID失败: {e}")
-            # 回退到默认值
-            default_wafer_id = f"WAFER_{Path(file_path).stem}"
-            self.logger.warning(f"回退到默认Wafer ID: {default_wafer_id}")
-            return default_wafer_id
+            return None
+    
+    def _load_sheets_parallel(self) -> Dict[str, Tuple[Optional[str], pd.DataFrame]]:
+        """
+        在进程池中解析未命中缓存的文件，返回 文件路径 -> (Summary中的Wafer ID, DUT_DATA原始表)。
+        
+        串行模式或只有一个文件时返回空字典，由_process_single_file逐个读取；
+        解析失败的文件不在结果中，之后按串行逻辑重新读取并记录错误。
+        """
+        workers = ParallelProcessor('process', self.parallel, self.max_workers).workers
+        if len(self.file_paths) < 2 or workers <= 1:
+            return {}
+        loaded = {}
+        for file_path in self.file_paths:
+            cached = self._load_cached_sheets(file_path)
+            if cached is not None:
+                loaded[file_path] = cached
+        pending = [file_path for file_path in self.file_paths if file_path not in loaded]
+        if not pending:
+            return loaded
+        
+        workers = min(workers, len(pending))
+        self.logger.info(f"使用 {workers} 个进程并行解析 {len(pending)} 个JT文件")
+        with ParallelProcessor('process', parallel=True, max_workers=workers) as processor:
+            parse = partial(_parse_jt_file_sheets, streaming=self.streaming)
+            for result in processor.map(parse, pending):
+                if result.ok:
+                    loaded[result.item] = result.value
+                    self._store_cached_sheets(result.item, *result.value)
+                else:
+                    self.logger.warning(f"并行解析 {result.item} 失败: {result.error}")
+        return loaded
     
-    def _process_single_file(self, file_path: str) -> None:
+    def _process_single_file(self, file_path: str,
+                             loaded: Optional[Tuple[Optional[str], pd.DataFrame]] = None) -> None:
         """
         处理单个JT Excel文件
         
         Args:
             file_path: 要处理的Excel文件路径
+            loaded: 已读取的(Summary中的Wafer ID, DUT_DATA原始表)，None时从文件或缓存读取
         """
         self.logger.info(f"开始处理文件: {file_path}")
         
         try:
-            # 1. 提取元数据
-            wafer_id = self._extract_wafer_id_from_summary(file_path)
+            # 1. 提取元数据并读取DUT_DATA工作表
+            summary_wafer_id, full_df = loaded if loaded is not None else self._load_file_sheets(file_path)
+            wafer_id = self._wafer_id_or_default(file_path, summary_wafer_id)
             
-            # 2. 读取DUT_DATA工作表
-            dut_data, unit_info, spec_info = self._read_dut_data_sheet(file_path)
+            # 2. 拆分DUT_DATA工作表
+            dut_data, unit_info, spec_info = self._split_dut_data(full_df)
+            self._sheet_info[file_path] = (unit_info, spec_info)
             
             # 3. 提取基础列数据
             basic_data = self._extract_basic_columns(dut_data)
@@ -275,11 +473,27 @@ class JTReader:
             Tuple[pd.DataFrame, Dict, Dict]: (测试数据, 单位信息, 规格信息)
         """
         try:
-            self.logger.debug(f"读取 {file_path} 的DUT_DATA工作表...")
+            # 读取DUT_DATA工作表的所有数据（与read()共用工作簿会话和解析缓存）
+            _, full_df = self._load_file_sheets(file_path)
+            data_df, unit_info, spec_info = self._split_dut_data(full_df)
+            self._sheet_info[file_path] = (unit_info, spec_info)
+            return data_df, unit_info, spec_info
             
-            # 读取DUT_DATA工作表的所有数据
-            full_df = pd.read_excel(file_path, sheet_name='DUT_DATA', header=None, engine='xlrd')
+        except Exception as e:
+            self.logger.error(f"读取DUT_DATA工作表失败: {e}")
+            raise
+    
+    def _split_dut_data(self, full_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict, Dict]:
+        """
+        把不带表头读取的DUT_DATA工作表拆分为测试数据、单位信息和规格信息
+        
+        Args:
+            full_df: header=None读取的DUT_DATA工作表
             
+        Returns:
+            Tuple[pd.DataFrame, Dict, Dict]: (测试数据, 单位信息, 规格信息)
+        """
+        try:
             if len(full_df) < 6:
                 raise ValueError("DUT_DATA工作表数据不足，至少需要6行")
             
@@ -504,6 +718,12 @@ class JTReader:
         
         return wafer
     
+    def _get_sheet_info(self, file_path: str) -> Tuple[Dict, Dict]:
+        """获取文件的(单位信息, 规格信息)，已读取过的文件直接返回记录的结果"""
+        if file_path not in self._sheet_info:
+            self._read_dut_data_sheet(file_path)
+        return self._sheet_info[file_path]
+    
     def get_unit_info(self, file_path: str) -> Dict:
         """
         获取指定文件的单位信息（用于规格文件生成）
@@ -515,8 +735,7 @@ class JTReader:
             Dict: 单位信息字典
         """
         try:
-            _, unit_info, _ = self._read_dut_data_sheet(file_path)
-            return unit_info
+            return self._get_sheet_info(file_path)[0]
         except Exception as e:
             self.logger.error(f"获取单位信息失败: {e}")
             return {}
@@ -532,13 +751,18 @@ class JTReader:
             Dict: 规格信息字典
         """
         try:
-            _, _, spec_info = self._read_dut_data_sheet(file_path)
-            return spec_info
+            return self._get_sheet_info(file_path)[1]
         except Exception as e:
             self.logger.error(f"获取规格信息失败: {e}")
             return {}
 
 
+def _parse_jt_file_sheets(file_path: str, streaming: bool = False) -> Tuple[Optional[str], pd.DataFrame]:
+    """在工作进程中解析单个JT文件的工作表（缓存由主进程读写）"""
+    reader = JTReader(file_path, cache=ParsedFileCache(enabled=False), streaming=streaming)
+    return reader._parse_file_sheets(file_path)
+
+
 # 简化的函数接口（保持与现有代码兼容）
 def read_jt_files(file_paths: Union[str, List[str]], pass_bin: int = 1) -> CPLot:
     """
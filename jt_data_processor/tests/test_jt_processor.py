@@ -11,8 +11,10 @@ JT数据处理器测试模块
 
 import os
 import sys
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 # 添加项目根目录到路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +25,8 @@ sys.path.insert(0, project_root)
 try:
     from jt_data_processor.config.jt_config import JTConfig, DEFAULT_JT_CONFIG
     from jt_data_processor.adapters.jt_adapter import JTAdapter
+    from jt_data_processor.readers.jt_reader import JTReader
+    from cp_data_processor.readers.parsed_file_cache import ParsedFileCache
 except ImportError as e:
     print(f"导入JT模块失败: {e}")
     print("请确保运行测试前已正确设置Python路径")
@@ -138,6 +142,76 @@ class TestJTConfigIntegration(unittest.TestCase):
         self.assertEqual(spec_config['testcond_value'], '', "JT测试条件值应为空")
 
 
+def write_jt_workbook(path: Path, wafer_no: int, die_count: int = 20) -> Path:
+    """生成一个包含Summary information和DUT_DATA工作表的最小JT文件"""
+    import pandas as pd
+    summary = pd.DataFrame([[f"line {i}"] for i in range(8)] + [[f"WAFER_ID:{wafer_no}"]])
+    rows = [
+        ['DUT_NO', 'SOFT_BIN', 'X_COORD', 'Y_COORD', 'TEST_NUM', 'VTH', 'IGSS'],
+        ['', '', '', '', '', 'V', 'nA'],
+        ['', '', '', '', '', 1, 0],
+        ['', '', '', '', '', 3, 100],
+        ['', '', '', '', '', '', ''],
+    ]
+    for i in range(die_count):
+        rows.append([i + 1, 1 + i % 2, i % 5, i // 5, 1, 2.0 + i * 0.01, float(i)])
+    with pd.ExcelWriter(path) as writer:
+        summary.to_excel(writer, sheet_name='Summary information', header=False, index=False)
+        pd.DataFrame(rows).to_excel(writer, sheet_name='DUT_DATA', header=False, index=False)
+    return path
+
+
+class TestJTReaderWorkbookSession(unittest.TestCase):
+    """JT读取器工作簿会话测试类"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        lot_dir = Path(self.temp_dir.name) / 'LOT01'
+        lot_dir.mkdir()
+        self.files = [str(write_jt_workbook(lot_dir / f'w{i}.xlsx', i)) for i in (3, 4)]
+        self.cache = ParsedFileCache(str(Path(self.temp_dir.name) / 'cache'), enabled=False)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_each_workbook_opened_once(self):
+        """每个文件只打开一次工作簿，get_unit_info/get_spec_info复用读取结果"""
+        reader = JTReader(self.files, cache=self.cache)
+        with mock.patch.object(reader, '_open_workbook', wraps=reader._open_workbook) as open_workbook:
+            lot = reader.read()
+            unit_info = reader.get_unit_info(self.files[0])
+            spec_info = reader.get_spec_info(self.files[0])
+        
+        self.assertEqual(open_workbook.call_count, len(self.files), "每个文件应只打开一次工作簿")
+        self.assertEqual([wafer.wafer_id for wafer in lot.wafers], ['3', '4'])
+        self.assertEqual(lot.wafers[0].chip_count, 20)
+        self.assertEqual(unit_info['VTH'], 'V')
+        self.assertEqual(spec_info['limit_u']['IGSS'], 100)
+    
+    def test_streaming_parse_matches_pandas_parse(self):
+        """流式读取的Summary Wafer ID和DUT_DATA原始表与pandas读取结果一致"""
+        import pandas as pd
+        pandas_reader = JTReader(self.files[0], cache=self.cache, streaming=False)
+        streaming_reader = JTReader(self.files[0], cache=self.cache, streaming=True)
+        expected_id, expected = pandas_reader._parse_file_sheets(self.files[0])
+        with mock.patch.object(streaming_reader, '_open_workbook') as open_workbook:
+            wafer_id, full_df = streaming_reader._parse_file_sheets(self.files[0])
+        
+        open_workbook.assert_not_called()
+        self.assertEqual(wafer_id, expected_id)
+        pd.testing.assert_frame_equal(full_df, expected)
+        self.assertEqual(streaming_reader.read().wafers[0].chip_count, 20)
+    
+    def test_unit_info_without_read(self):
+        """未调用read()时get_unit_info只读取一次文件"""
+        reader = JTReader(self.files[0], cache=self.cache)
+        with mock.patch.object(reader, '_open_workbook', wraps=reader._open_workbook) as open_workbook:
+            self.assertEqual(reader.get_unit_info(self.files[0])['IGSS'], 'nA')
+            self.assertEqual(reader.get_spec_info(self.files[0])['limit_l']['VTH'], 1)
+        
+        self.assertEqual(open_workbook.call_count, 1)
+
+
 def run_jt_config_test():
     """运行JT配置测试的便捷函数"""
     print("=== JT配置测试 ===")
@@ -29,6 +29,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
+from cp_data_processor.processing.stage_profiler import lot_rows, profiled
 from cp_data_processor.readers.company_adapters.base_company_adapter import BaseCompanyAdapter
 
 logger = logging.getLogger(__name__)
@@ -55,6 +56,7 @@ class LionAdapter(BaseCompanyAdapter):
         super().__init__('LION', config)
         self.logger = logging.getLogger(f"{__name__}.LION")
         
+    @profiled("适配转换", rows=lot_rows)
     def transform_to_standard_format(self, lot: CPLot) -> CPLot:
         """
         将Lion格式转换为标准格式
@@ -254,18 +256,9 @@ class LionAdapter(BaseCompanyAdapter):
         Returns:
             pd.DataFrame: 合并的数据
         """
-        combined_data_list = []
-        
-        for wafer in lot.wafers:
-            if hasattr(wafer, 'chip_data') and wafer.chip_data is not None:
-                combined_data_list.append(wafer.chip_data)
-        
-        if combined_data_list:
-            combined_data = pd.concat(combined_data_list, ignore_index=True)
-        else:
-            combined_data = pd.DataFrame()
-        
-        return combined_data
+        # 按列合并：combined_data 与各晶圆 chip_data 共用同一份数据
+        lot.combine_data_from_wafers(id_columns=False)
+        return lot.combined_data
     
     def get_field_mapping(self) -> Dict[str, str]:
         """
@@ -17,7 +17,7 @@ import logging
 import sys
 from pathlib import Path
 import pandas as pd
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Iterable, Optional, Tuple, Any
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
@@ -30,6 +30,7 @@ sys.path.insert(0, str(project_root))
 from frontend.charts.yield_chart import YieldChart
 from frontend.charts.boxplot_chart import BoxplotChart
 from frontend.charts.summary_chart import SummaryChart
+from cp_data_processor.processing.quantile_sketch import DEFAULT_SKETCH_SIZE, QuantileSketch
 
 # 导入JavaScript嵌入工具
 def get_embedded_plotly_js():
@@ -58,8 +59,43 @@ class LionOutlierHandler:
         """
         self.method = method
         self.threshold = threshold
+        self.fences: Optional[Dict[str, Tuple[float, float]]] = None  # fit 得到的各参数上下限
         self.logger = logging.getLogger(f"{__name__}.LionOutlierHandler")
     
+    def fit(self, chunks: Iterable[pd.DataFrame], sketch_size: int = DEFAULT_SKETCH_SIZE) -> 'LionOutlierHandler':
+        """
+        分块流式计算各参数的 IQR 上下限，用于无法一次读入内存的数据
+        （如 pd.read_csv(..., chunksize=...) 返回的数据块）。
+        
+        之后 detect_outliers / handle_outliers 使用这里得到的上下限，可以逐块处理数据。
+        分位数由 QuantileSketch 计算，数据量不超过草图容量时与一次读入全部数据的结果一致。
+        
+        Args:
+            chunks: 数据块
+            sketch_size: 分位数草图每层保留的样本数
+        """
+        sketches: Dict[str, QuantileSketch] = {}
+        for chunk in chunks:
+            for param in self._parameter_columns(chunk):
+                values = chunk[param].to_numpy(dtype=np.float64, na_value=np.nan)
+                sketches.setdefault(param, QuantileSketch(sketch_size)).update(values)
+        
+        self.fences = {}
+        for param, sketch in sketches.items():
+            if sketch.count < 4:  # 数据点太少，无法计算四分位数
+                continue
+            Q1, Q3 = sketch.quantile([0.25, 0.75])
+            IQR = Q3 - Q1
+            self.fences[param] = (Q1 - self.threshold * IQR, Q3 + self.threshold * IQR)
+        return self
+    
+    @staticmethod
+    def _parameter_columns(df: pd.DataFrame) -> List[str]:
+        """测试参数列（排除基础列和非数值列）"""
+        basic_columns = ['Lot_ID', 'Wafer_ID', 'X', 'Y', 'Seq', 'Bin', 'SITE_NUM', 'CONT', 'T_TIME', 'TEST_NUM']
+        return [col for col in df.columns
+                if col not in basic_columns and pd.api.types.is_numeric_dtype(df[col])]
+    
     def detect_outliers(self, df: pd.DataFrame, parameter: str) -> pd.Series:
         """
         检测指定参数的异常值
@@ -74,6 +110,14 @@ class LionOutlierHandler:
         if parameter not in df.columns:
             return pd.Series([False] * len(df), index=df.index)
         
+        if self.fences is not None:
+            # 已经流式拟合：使用全部数据的上下限，而不是当前数据块的
+            if parameter not in self.fences:
+                return pd.Series([False] * len(df), index=df.index)
+            lower_bound, upper_bound = self.fences[parameter]
+            outliers = (df[parameter] < lower_bound) | (df[parameter] > upper_bound)
+            return outliers.fillna(False)
+        
         data = df[parameter].dropna()
         if len(data) < 4:  # 数据点太少，无法计算四分位数
             return pd.Series([False] * len(df), index=df.index)
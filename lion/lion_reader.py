@@ -20,6 +20,7 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
+import itertools
 import logging
 import sys
 import os
@@ -28,10 +29,31 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from cp_data_processor.data_models.cp_data import CPLot, CPWafer, CPParameter
+from cp_data_processor.processing.stage_profiler import file_bytes, lot_rows, profiled
 from cp_data_processor.readers.base_reader import BaseReader
+from cp_data_processor.readers.excel_stream import (
+    ColumnSpec,
+    SheetRowStream,
+    collect_columns,
+    drop_trailing_blank_rows,
+    infer_object_column,
+    trimmed_width,
+)
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache, get_parsed_file_cache
 
 logger = logging.getLogger(__name__)
 
+# 解析缓存命名空间，dut_data/summary_information解析逻辑变化时需要升级版本号
+PARSED_CACHE_NAMESPACE = 'lion-v1'
+
+# dut_data 前 3 行的规格信息
+SPEC_ROWS = ['UNIT', 'LIMIT_LOW', 'LIMIT_HIGH']
+# 任一列缺失的数据行被丢弃
+REQUIRED_COLUMNS = ['PART_INDEX', 'SOFT_BIN', 'X_COORD', 'Y_COORD']
+# 转换为数值的基础列，以及保持原值的列；其余列均为测试参数
+NUMERIC_COLUMNS = REQUIRED_COLUMNS + ['PASSFG']
+RAW_COLUMNS = ['SITE_NUM', 'T_TIME', 'TEST_NUM']
+
 
 class LionExcelReader(BaseReader):
     """
@@ -43,12 +65,19 @@ class LionExcelReader(BaseReader):
     3. 从第4行开始为实际测试数据
     """
     
-    def __init__(self, file_paths=None, pass_bin=1):
+    def __init__(self, file_paths=None, pass_bin=1, cache: Optional[ParsedFileCache] = None,
+                 streaming: Optional[bool] = None):
         # 如果没有提供file_paths，使用空列表
         if file_paths is None:
             file_paths = []
         super().__init__(file_paths, pass_bin)
         self.logger = logging.getLogger(f"{__name__}.LionExcelReader")
+        self.cache = cache if cache is not None else get_parsed_file_cache()
+        # 是否流式读取 dut_data，None 表示跟随 PerformanceConfig.ENABLE_STREAMING_EXCEL
+        if streaming is None:
+            from cp_data_processor.config.performance_config import get_performance_config
+            streaming = get_performance_config().ENABLE_STREAMING_EXCEL
+        self.streaming = streaming
     
     def can_read(self, file_path: str) -> bool:
         """
@@ -71,25 +100,36 @@ class LionExcelReader(BaseReader):
             if not file_path_obj.exists():
                 return False
             
-            # 尝试读取Excel文件并检查工作表
-            xl_file = pd.ExcelFile(file_path)
-            if 'dut_data' not in xl_file.sheet_names:
+            # 只读取工作表名称和dut_data的表头行，不加载整张工作表
+            columns = self._sniff_dut_data_columns(file_path)
+            if columns is None:
                 return False
             
-            # 检查dut_data工作表的基本结构
-            df = pd.read_excel(file_path, sheet_name='dut_data')
-            required_columns = ['PART_INDEX', 'SOFT_BIN', 'X_COORD', 'Y_COORD']
-            
             # 检查是否包含必要的列
-            if not all(col in df.columns for col in required_columns):
-                return False
-            
-            return True
+            required_columns = ['PART_INDEX', 'SOFT_BIN', 'X_COORD', 'Y_COORD']
+            return all(col in columns for col in required_columns)
             
         except Exception as e:
             self.logger.debug(f"无法读取文件 {file_path}: {e}")
             return False
     
+    @staticmethod
+    def _sniff_dut_data_columns(file_path: str) -> Optional[List]:
+        """
+        读取dut_data工作表的列名（xlsx使用openpyxl只读流式模式，只解析表头行）
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            Optional[List]: dut_data的列名，没有dut_data工作表时返回None
+        """
+        with pd.ExcelFile(file_path) as xl_file:
+            if 'dut_data' not in xl_file.sheet_names:
+                return None
+            return xl_file.parse('dut_data', nrows=0).columns.tolist()
+    
+    @profiled("解析", rows=lot_rows, bytes_in=BaseReader.input_bytes)
     def read(self) -> CPLot:
         """
         读取所有文件并返回一个填充好的 CPLot 对象
@@ -114,6 +154,7 @@ class LionExcelReader(BaseReader):
         # 处理所有文件
         for file_path in self.file_paths:
             self._extract_from_file(file_path, lot)
+        self.cache.flush()
         
         return lot
     
@@ -129,6 +170,7 @@ class LionExcelReader(BaseReader):
         """
         return self.read_single_file(file_path)
     
+    @profiled("解析", rows=lot_rows, bytes_in=lambda reader, file_path: file_bytes([file_path]))
     def read_single_file(self, file_path: str) -> CPLot:
         """
         读取单个Lion Excel文件
@@ -146,7 +188,7 @@ class LionExcelReader(BaseReader):
             lot_id = self._extract_lot_id(file_path)
             
             # 读取数据
-            data_df, spec_df = self._read_excel_data(file_path)
+            data_df, spec_df, summary_data = self._load_file_tables(file_path)
             
             # 创建CPLot对象
             lot = CPLot(
@@ -156,7 +198,7 @@ class LionExcelReader(BaseReader):
             )
             
             # 处理数据并创建晶圆
-            wafer = self._create_wafer_from_data(data_df, spec_df, lot_id, file_path)
+            wafer = self._create_wafer_from_data(data_df, spec_df, lot_id, file_path, summary_data)
             lot.wafers = [wafer]
             
             # 提取参数信息
@@ -184,13 +226,13 @@ class LionExcelReader(BaseReader):
         
         try:
             # 读取数据
-            data_df, spec_df = self._read_excel_data(file_path)
+            data_df, spec_df, summary_data = self._load_file_tables(file_path)
             
             # 从文件名提取批次ID
             lot_id = self._extract_lot_id(file_path)
             
             # 处理数据并创建晶圆
-            wafer = self._create_wafer_from_data(data_df, spec_df, lot_id, file_path)
+            wafer = self._create_wafer_from_data(data_df, spec_df, lot_id, file_path, summary_data)
             lot.wafers.append(wafer)
             
             # 如果是第一个文件，设置参数信息
@@ -245,41 +287,65 @@ class LionExcelReader(BaseReader):
         
         return wafer_id
     
-    def _read_excel_data(self, file_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def _load_file_tables(self, file_path: str) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+        """
+        读取单个文件的测试数据、规格和summary信息，内容未变的文件直接使用解析缓存
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame, Dict]: (数据DataFrame, 规格DataFrame, summary信息)
+        """
+        cached = self.cache.load(file_path, PARSED_CACHE_NAMESPACE)
+        if cached is not None:
+            self.logger.info(f"解析缓存命中，跳过Excel解析: {file_path}")
+            return cached.frames['data'], cached.frames['spec'], cached.meta['summary']
+        
+        tables = self._read_tables_streaming(file_path) if self.streaming else None
+        if tables is not None:
+            data_df, spec_df, summary_data = tables
+        else:
+            # 打开一次工作簿，dut_data和summary_information从同一个句柄读取
+            with pd.ExcelFile(file_path) as xl_file:
+                data_df, spec_df = self._read_excel_data(file_path, xl_file)
+                summary_data = self._read_summary_information(file_path, xl_file)
+        self.cache.store(file_path, PARSED_CACHE_NAMESPACE, {'data': data_df, 'spec': spec_df},
+                         {'summary': summary_data})
+        return data_df, spec_df, summary_data
+    
+    def _read_excel_data(self, file_path: str, xl_file: Optional[pd.ExcelFile] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         读取Excel文件并分离数据和规格
         
         Args:
             file_path: 文件路径
+            xl_file: 已打开的工作簿，None时按file_path重新打开
             
         Returns:
             Tuple[pd.DataFrame, pd.DataFrame]: (数据DataFrame, 规格DataFrame)
         """
         # 读取dut_data工作表
-        df = pd.read_excel(file_path, sheet_name='dut_data')
-        
-        # 分离规格信息和实际数据
-        spec_rows = ['UNIT', 'LIMIT_LOW', 'LIMIT_HIGH']
+        df = pd.read_excel(xl_file if xl_file is not None else file_path, sheet_name='dut_data')
         
         # 提取规格信息（前3行）
         spec_data = df.head(3).copy()
-        spec_data.index = spec_rows
+        spec_data.index = SPEC_ROWS
         
         # 提取实际数据（从第4行开始）
         data_df = df.iloc[3:].copy().reset_index(drop=True)
         
         # 清理数据：移除空行和无效数据
-        data_df = data_df.dropna(subset=['PART_INDEX', 'SOFT_BIN', 'X_COORD', 'Y_COORD'])
+        data_df = data_df.dropna(subset=REQUIRED_COLUMNS)
         
         # 确保数值列的数据类型正确
-        numeric_columns = ['PART_INDEX', 'SOFT_BIN', 'X_COORD', 'Y_COORD', 'PASSFG']
-        for col in numeric_columns:
+        for col in NUMERIC_COLUMNS:
             if col in data_df.columns:
                 data_df[col] = pd.to_numeric(data_df[col], errors='coerce')
         
         # 处理测试参数列
         param_columns = [col for col in data_df.columns 
-                        if col not in numeric_columns + ['SITE_NUM', 'T_TIME', 'TEST_NUM']]
+                        if col not in NUMERIC_COLUMNS + RAW_COLUMNS]
         
         for col in param_columns:
             if col in data_df.columns:
@@ -288,77 +354,164 @@ class LionExcelReader(BaseReader):
         
         return data_df, spec_data
     
-    def _read_summary_information(self, file_path: str) -> Dict:
+    def _read_tables_streaming(self, file_path: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, Dict]]:
+        """
+        流式读取dut_data和summary_information，结果与_read_excel_data/_read_summary_information一致
+        
+        参数列直接写入数值缓冲区，只有基础列和保持原值的列按原始单元格收集；各列的类型按
+        pandas对整列（含规格行和被丢弃的行）的推断确定。表头不是互不相同的文本、缺少必需列、
+        规格行不足或有超出表头的列时返回None，由pandas路径读取。
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            Optional[Tuple[pd.DataFrame, pd.DataFrame, Dict]]: (数据DataFrame, 规格DataFrame, summary信息)
+        """
+        with SheetRowStream(file_path, 'dut_data') as stream:
+            rows = drop_trailing_blank_rows(iter(stream))
+            header = next(rows, ())
+            headers = list(header[:trimmed_width(header)])
+            if (not all(isinstance(name, str) for name in headers) or len(set(headers)) != len(headers)
+                    or not set(REQUIRED_COLUMNS) <= set(headers)):
+                return None
+            spec_cells = list(itertools.islice(rows, len(SPEC_ROWS)))
+            if len(spec_cells) < len(SPEC_ROWS) or max(map(trimmed_width, spec_cells)) > len(headers):
+                return None
+            object_columns = set(NUMERIC_COLUMNS + RAW_COLUMNS)
+            block = collect_columns(rows, [ColumnSpec(name, index, 'object' if name in object_columns else 'numeric')
+                                           for index, name in enumerate(headers)])
+            if block.max_width > len(headers):
+                return None
+            summary_data = self._read_summary_information_streaming(file_path, stream)
+
+        keep = np.ones(len(block), dtype=bool)
+        for name in REQUIRED_COLUMNS:
+            keep &= ~pd.isna(block.columns[name])
+        data, spec = {}, {}
+        for position, name in enumerate(headers):
+            spec_values = np.array([row[position] if position < len(row) else np.nan for row in spec_cells],
+                                   dtype=object)
+            values = block.columns.pop(name)
+            if name in object_columns:
+                column = infer_object_column(np.concatenate([spec_values, values]))
+                spec[name], values = column[:len(SPEC_ROWS)], column[len(SPEC_ROWS):][keep]
+                if name in NUMERIC_COLUMNS:
+                    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy()
+            else:
+                spec_numeric = infer_object_column(spec_values)
+                if spec_numeric.dtype != object and name not in block.coerced:
+                    # 整列都是数值：规格行和数据行使用同一个数值类型
+                    dtype = np.result_type(spec_numeric.dtype, values.dtype)
+                    spec[name], values = spec_numeric.astype(dtype), values[keep].astype(dtype)
+                else:
+                    # 整列为对象列：规格行保持原值，数据行单独转换，保留的行全是整数时为整数列
+                    spec[name], values = spec_values, values[keep]
+                    if (values.dtype.kind == 'f' and len(values) and not np.isnan(values).any()
+                            and (values == np.round(values)).all()):
+                        values = values.astype(np.int64)
+            data[name] = values
+        # 与 dropna 一致：没有丢弃的行时保持 RangeIndex
+        index = pd.RangeIndex(len(keep)) if keep.all() else pd.Index(np.flatnonzero(keep))
+        data_df = pd.DataFrame(data, index=index)
+        spec_data = pd.DataFrame(spec, index=SPEC_ROWS)
+        return data_df, spec_data, summary_data
+    
+    def _read_summary_information_streaming(self, file_path: str, stream: SheetRowStream) -> Dict:
+        """从已打开的工作簿流式读取summary_information，结果与_read_summary_information一致"""
+        try:
+            rows = drop_trailing_blank_rows(stream.rows('summary_information'))
+            if next(rows, None) is None:
+                raise ValueError("summary_information工作表为空")
+            all_rows = [row[0] if row else np.nan for row in rows]
+            return self._parse_summary_rows(all_rows)
+        except Exception as e:
+            self.logger.error(f"读取summary_information失败: {e}")
+            return {}
+    
+    def _read_summary_information(self, file_path: str, xl_file: Optional[pd.ExcelFile] = None) -> Dict:
         """
         读取summary_information工作表并提取yield相关数据
         
         Args:
             file_path: 文件路径
+            xl_file: 已打开的工作簿，None时按file_path重新打开
             
         Returns:
             Dict: 包含yield相关信息的字典
         """
         try:
             # 读取summary_information工作表
-            df = pd.read_excel(file_path, sheet_name='summary_information')
-            
-            # 提取数据
-            summary_data = {}
+            df = pd.read_excel(xl_file if xl_file is not None else file_path, sheet_name='summary_information')
             
             # 获取所有行的数据（第一列）
-            all_rows = df.iloc[:, 0].tolist()
-            
-            # 提取gross_die (第20行，索引19): "Total: 1008" -> 1008
-            if len(all_rows) > 19:
-                total_row = str(all_rows[19])
-                if 'Total:' in total_row or 'total:' in total_row.lower():
-                    import re
-                    match = re.search(r'total:\s*(\d+)', total_row, re.IGNORECASE)
-                    if match:
-                        summary_data['gross_die'] = int(match.group(1))
-            
-            # 提取good_die和yield (第21行，索引20): "Pass: 1002   99.40%" -> 1002, 99.40
-            if len(all_rows) > 20:
-                pass_row = str(all_rows[20])
-                if 'Pass:' in pass_row or 'pass:' in pass_row.lower():
-                    import re
-                    # 提取good_die数字
-                    match = re.search(r'pass:\s*(\d+)', pass_row, re.IGNORECASE)
-                    if match:
-                        summary_data['good_die'] = int(match.group(1))
-                    
-                    # 提取yield百分比
-                    yield_match = re.search(r'(\d+\.?\d*)%', pass_row)
-                    if yield_match:
-                        summary_data['yield'] = f"{yield_match.group(1)}%"
-            
-            # 提取参数失败计数 (从第24行开始，索引23)
-            param_counts = {}
-            for i in range(23, len(all_rows)):
-                row_data = str(all_rows[i])
-                if 'SBin[' in row_data and '__AllFail' in row_data:
-                    import re
-                    # 匹配模式: "SBin[6]   IR_35V__AllFail                 0     0.00%   2"
-                    # 提取失败计数（第三个数字）而不是最后的bin number
-                    match = re.search(r'SBin\[\d+\]\s+(\w+)__AllFail\s+(\d+)', row_data)
-                    if match:
-                        param_name = match.group(1)
-                        fail_count = int(match.group(2))
-                        param_counts[param_name] = fail_count
-            
-            summary_data['param_counts'] = param_counts
-            
-            self.logger.info(f"提取summary信息: gross_die={summary_data.get('gross_die')}, "
-                           f"good_die={summary_data.get('good_die')}, yield={summary_data.get('yield')}")
-            self.logger.info(f"参数失败计数: {param_counts}")
-            
-            return summary_data
+            return self._parse_summary_rows(df.iloc[:, 0].tolist())
             
         except Exception as e:
             self.logger.error(f"读取summary_information失败: {e}")
             return {}
     
-    def _create_wafer_from_data(self, data_df: pd.DataFrame, spec_df: pd.DataFrame, lot_id: str, file_path: str = None) -> CPWafer:
+    def _parse_summary_rows(self, all_rows: List) -> Dict:
+        """
+        从summary_information第一列（不含表头行）提取yield相关数据
+        
+        Args:
+            all_rows: 第一列各行的值
+            
+        Returns:
+            Dict: 包含yield相关信息的字典
+        """
+        # 提取数据
+        summary_data = {}
+        
+        # 提取gross_die (第20行，索引19): "Total: 1008" -> 1008
+        if len(all_rows) > 19:
+            total_row = str(all_rows[19])
+            if 'Total:' in total_row or 'total:' in total_row.lower():
+                import re
+                match = re.search(r'total:\s*(\d+)', total_row, re.IGNORECASE)
+                if match:
+                    summary_data['gross_die'] = int(match.group(1))
+        
+        # 提取good_die和yield (第21行，索引20): "Pass: 1002   99.40%" -> 1002, 99.40
+        if len(all_rows) > 20:
+            pass_row = str(all_rows[20])
+            if 'Pass:' in pass_row or 'pass:' in pass_row.lower():
+                import re
+                # 提取good_die数字
+                match = re.search(r'pass:\s*(\d+)', pass_row, re.IGNORECASE)
+                if match:
+                    summary_data['good_die'] = int(match.group(1))
+                
+                # 提取yield百分比
+                yield_match = re.search(r'(\d+\.?\d*)%', pass_row)
+                if yield_match:
+                    summary_data['yield'] = f"{yield_match.group(1)}%"
+        
+        # 提取参数失败计数 (从第24行开始，索引23)
+        param_counts = {}
+        for i in range(23, len(all_rows)):
+            row_data = str(all_rows[i])
+            if 'SBin[' in row_data and '__AllFail' in row_data:
+                import re
+                # 匹配模式: "SBin[6]   IR_35V__AllFail                 0     0.00%   2"
+                # 提取失败计数（第三个数字）而不是最后的bin number
+                match = re.search(r'SBin\[\d+\]\s+(\w+)__AllFail\s+(\d+)', row_data)
+                if match:
+                    param_name = match.group(1)
+                    fail_count = int(match.group(2))
+                    param_counts[param_name] = fail_count
+        
+        summary_data['param_counts'] = param_counts
+        
+        self.logger.info(f"提取summary信息: gross_die={summary_data.get('gross_die')}, "
+                       f"good_die={summary_data.get('good_die')}, yield={summary_data.get('yield')}")
+        self.logger.info(f"参数失败计数: {param_counts}")
+        
+        return summary_data
+    
+    def _create_wafer_from_data(self, data_df: pd.DataFrame, spec_df: pd.DataFrame, lot_id: str, file_path: str = None,
+                                summary_data: Optional[Dict] = None) -> CPWafer:
         """
         从数据创建CPWafer对象
         
@@ -367,6 +520,7 @@ class LionExcelReader(BaseReader):
             spec_df: 规格DataFrame
             lot_id: 批次ID
             file_path: 文件路径（用于提取wafer_id）
+            summary_data: 已读取的summary信息，None时从file_path读取
             
         Returns:
             CPWafer: 晶圆对象
@@ -423,7 +577,9 @@ class LionExcelReader(BaseReader):
         wafer.lot_id = lot_id
         
         # 读取summary信息
-        if file_path:
+        if summary_data is not None:
+            wafer.summary_data = summary_data
+        elif file_path:
             summary_data = self._read_summary_information(file_path)
             wafer.summary_data = summary_data
         
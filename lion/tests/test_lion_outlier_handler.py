@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("scipy")
+pytest.importorskip("plotly")
+
+from lion.lion_chart_generator import LionOutlierHandler
+
+
+def test_streaming_fit_matches_whole_frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Wafer_ID": np.repeat([1, 2], 150), "VTH": rng.normal(1.0, 0.1, 300),
+                       "IR": rng.normal(5.0, 1.0, 300)})
+    df.loc[[3, 200], "VTH"] = [9.0, -9.0]
+    expected, expected_stats = LionOutlierHandler().handle_outliers(df)
+
+    blocks = [df.iloc[start:start + 75] for start in range(0, len(df), 75)]
+    handler = LionOutlierHandler().fit(blocks)
+    chunks = [handler.handle_outliers(chunk) for chunk in blocks]
+
+    pd.testing.assert_frame_equal(pd.concat([chunk for chunk, _ in chunks]), expected)
+    assert sum(stats["VTH"]["outlier_count"] for _, stats in chunks if "VTH" in stats) \
+        == expected_stats["VTH"]["outlier_count"]
@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cp_data_processor.readers.parsed_file_cache import ParsedFileCache
+from lion.lion_reader import LionExcelReader
+
+
+COLUMNS = ["SITE_NUM", "PART_INDEX", "SOFT_BIN", "X_COORD", "Y_COORD", "PASSFG", "T_TIME", "VTH", "IR"]
+
+
+def write_lion_workbook(path: Path, die_count: int = 30, extra_rows=()) -> Path:
+    spec_rows = [
+        ["", "", "", "", "", "", "", "V", "nA"],
+        [None] * 7 + [1, 0],
+        [None] * 7 + [3, 100],
+    ]
+    die_rows = [
+        [1, index + 1, 1 + index % 3 // 2, index % 6, index // 6, 1, 0.1, 2.0 + index * 0.01, float(index)]
+        for index in range(die_count)
+    ] + [list(row) for row in extra_rows]
+    summary_rows = [f"line {index}" for index in range(19)] + [
+        f"Total: {die_count}",
+        "Pass: 20   66.67%",
+        "",
+        "",
+        "SBin[6]   IR__AllFail   3     0.00%   2",
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"info": summary_rows}).to_excel(writer, sheet_name="summary_information", index=False)
+        pd.DataFrame(spec_rows + die_rows, columns=COLUMNS).to_excel(writer, sheet_name="dut_data", index=False)
+    return path
+
+
+def count_workbook_opens(monkeypatch):
+    opened = []
+    original_init = pd.ExcelFile.__init__
+
+    def counting_init(self, path_or_buffer, *args, **kwargs):
+        opened.append(str(path_or_buffer))
+        original_init(self, path_or_buffer, *args, **kwargs)
+
+    monkeypatch.setattr(pd.ExcelFile, "__init__", counting_init)
+    return opened
+
+
+def test_can_read_sniffs_sheet_header(tmp_path):
+    lion_file = write_lion_workbook(tmp_path / "F1.01" / "F1_3.xlsx")
+    other_file = tmp_path / "other.xlsx"
+    pd.DataFrame({"PART_INDEX": [1]}).to_excel(other_file, sheet_name="dut_data", index=False)
+    reader = LionExcelReader()
+
+    assert reader.can_read(str(lion_file))
+    assert not reader.can_read(str(other_file))
+    assert not reader.can_read(str(tmp_path / "missing.xlsx"))
+
+
+def test_read_opens_workbook_once_per_file(tmp_path, monkeypatch):
+    path = str(write_lion_workbook(tmp_path / "F1.01" / "F1_3.xlsx"))
+    opened = count_workbook_opens(monkeypatch)
+
+    lot = LionExcelReader([path]).read()
+
+    assert opened == [path]
+    wafer = lot.wafers[0]
+    assert wafer.wafer_id == "3"
+    assert wafer.chip_count == 30
+    assert list(wafer.spec_data.index) == ["UNIT", "LIMIT_LOW", "LIMIT_HIGH"]
+    assert wafer.summary_data == {"gross_die": 30, "good_die": 20, "yield": "66.67%", "param_counts": {"IR": 3}}
+
+
+@pytest.mark.parametrize(
+    "extra_rows",
+    [
+        [],
+        # 空行、缺少坐标被丢弃的行、参数列中的文本和数字文本
+        [[None] * 9, [1, 99, 1, None, 3, 1, 0.1, 2.5, 7.0], [2, 100, 2, 1, 5, 0, "0.2", "OVER", "12"]],
+    ],
+)
+def test_streaming_read_matches_pandas_read(tmp_path, extra_rows):
+    path = str(write_lion_workbook(tmp_path / "F1.01" / "F1_3.xlsx", extra_rows=extra_rows))
+    cache = ParsedFileCache(enabled=False)
+
+    expected = LionExcelReader(cache=cache, streaming=False)._load_file_tables(path)
+    result = LionExcelReader(cache=cache, streaming=True)._load_file_tables(path)
+
+    pd.testing.assert_frame_equal(result[0], expected[0], check_index_type=True)
+    pd.testing.assert_frame_equal(result[1], expected[1])
+    assert [[type(value) for value in row] for row in result[1].to_numpy().tolist()] == \
+        [[type(value) for value in row] for row in expected[1].to_numpy().tolist()]
+    assert result[2] == expected[2]
+
+
+def test_streaming_read_does_not_use_read_excel(tmp_path, monkeypatch):
+    path = str(write_lion_workbook(tmp_path / "F1.01" / "F1_3.xlsx"))
+    monkeypatch.setattr(pd, "read_excel", lambda *args, **kwargs: pytest.fail("read_excel called"))
+
+    lot = LionExcelReader([path], streaming=True).read()
+
+    assert lot.wafers[0].chip_count == 30
+    assert lot.wafers[0].summary_data["param_counts"] == {"IR": 3}
@@ -18,7 +18,7 @@ import sys
 import pandas as pd
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 if sys.stdout and hasattr(sys.stdout, "reconfigure"):
@@ -34,12 +34,16 @@ from cp_data_processor.readers.company_adapters.company_config import get_compan
 from cp_data_processor.readers.company_adapters.lion_adapter import LIONAdapter
 from cp_data_processor.processing.standard_csv_generator import StandardCSVGenerator
 from cp_data_processor.data_models.cp_data import CPLot
+from cp_data_processor.processing.parallel_processor import ParallelProcessor
+from cp_data_processor.processing.memory_governor import get_memory_governor
+from cp_data_processor.processing.stage_profiler import profiled, profiling_run
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+@profiled("文件发现", rows=lambda batches: sum(len(files) for files in batches.values()))
 def discover_batch_files(data_dir: Path) -> Dict[str, List[str]]:
     """
     发现单批次目录或产品目录下的多个批次文件。
@@ -107,41 +111,44 @@ def discover_batch_files(data_dir: Path) -> Dict[str, List[str]]:
     return dict(batch_files)
 
 
-def process_lion_batch_files(file_paths: List[str]) -> Dict[str, CPLot]:
+def _read_lion_file(file_path: str) -> CPLot:
+    """读取并标准化单个Lion文件（在工作进程中执行）"""
+    reader = LionExcelReader([file_path])
+    raw_lot = reader.read_file(file_path)
+    return LIONAdapter(get_company_config('LION')).transform_to_standard_format(raw_lot)
+
+
+def process_lion_batch_files(file_paths: List[str],
+                             processor: Optional[ParallelProcessor] = None) -> Dict[str, CPLot]:
     """
     直接使用Lion读取器处理文件列表，无需通用识别
     
     Args:
         file_paths: Lion Excel文件路径列表
+        processor: 执行读取的ParallelProcessor，None时按性能配置新建进程池
         
     Returns:
-        Dict[str, CPLot]: 文件路径到CPLot对象的映射
+        Dict[str, CPLot]: 文件路径到CPLot对象的映射（按输入顺序）
     """
-    # 获取Lion配置和适配器
-    lion_config = get_company_config('LION')
-    adapter = LIONAdapter(lion_config)
-    
     results = {}
     failed_files = []
     
-    for file_path in file_paths:
-        try:
+    owned = processor is None
+    processor = processor or ParallelProcessor('process')
+    try:
+        for result in processor.map(_read_lion_file, file_paths):
+            file_path = result.item
             print(f"    📄 处理: {Path(file_path).name}")
-            
-            # 使用Lion专用读取器
-            reader = LionExcelReader([file_path])
-            raw_lot = reader.read_file(file_path)
-            
-            # 使用Lion适配器标准化
-            standardized_lot = adapter.transform_to_standard_format(raw_lot)
-            
-            results[file_path] = standardized_lot
-            print(f"    ✓ 成功")
-            
-        except Exception as e:
-            failed_files.append((file_path, str(e)))
-            print(f"    ❌ 失败: {e}")
-            logger.error(f"处理文件失败 {file_path}: {e}")
+            if result.ok:
+                results[file_path] = result.value
+                print(f"    ✓ 成功")
+            else:
+                failed_files.append((file_path, str(result.error)))
+                print(f"    ❌ 失败: {result.error}")
+                logger.error(f"处理文件失败 {file_path}: {result.error}")
+    finally:
+        if owned:
+            processor.close()
     
     if failed_files:
         print(f"   ⚠️  {len(failed_files)} 个文件处理失败")
@@ -194,13 +201,19 @@ def create_batch_lot(individual_lots: Dict[str, CPLot]) -> CPLot:
     batch_lot.wafers = all_wafers
     batch_lot.params = all_params
     
-    # 合并所有芯片数据
-    if all_chip_data:
+    # 合并所有芯片数据（CSV 只按晶圆数据生成，内存紧张时跳过）
+    if all_chip_data and not _skip_combined_data("Lion批次合并", all_chip_data):
         batch_lot.combined_data = pd.concat(all_chip_data, ignore_index=True)
     
     return batch_lot
 
 
+def _skip_combined_data(stage: str, frames: List[pd.DataFrame]) -> bool:
+    """合并 frames 会使内存越过调控水位时返回 True（并记录降级决定）"""
+    estimated = sum(int(frame.memory_usage(index=False).sum()) for frame in frames)
+    return get_memory_governor().degrade(stage, "跳过合并芯片数据，CSV 直接按晶圆数据生成", estimated)
+
+
 def create_combined_lot(all_batch_lots: List[CPLot]) -> CPLot:
     """
     将多个批次的CPLot合并为一个超级CPLot
@@ -258,8 +271,8 @@ def create_combined_lot(all_batch_lots: List[CPLot]) -> CPLot:
     combined_lot.wafers = all_wafers
     combined_lot.params = all_params
     
-    # 合并所有芯片数据（按批次顺序）
-    if all_chip_data:
+    # 合并所有芯片数据（按批次顺序，内存紧张时跳过）
+    if all_chip_data and not _skip_combined_data("Lion多批次合并", all_chip_data):
         combined_lot.combined_data = pd.concat(all_chip_data, ignore_index=True)
     
     return combined_lot
@@ -280,6 +293,13 @@ def main():
     # 确保输出目录存在
     output_dir.mkdir(exist_ok=True)
     
+    # 各阶段的性能按监控配置写入日志，报告写到输出目录
+    with profiling_run("Lion", str(output_dir)):
+        return _process_batches(data_dir, output_dir)
+
+
+def _process_batches(data_dir: Path, output_dir: Path) -> bool:
+    """发现、读取并汇总所有批次，返回是否有批次处理成功"""
     # 检查数据目录
     if not data_dir.exists():
         print(f"❌ 数据目录不存在: {data_dir}")
@@ -306,53 +326,54 @@ def main():
     all_batch_lots = []
     success_count = 0
     failed_batches = []
-    
-    for batch_id, file_paths in batch_files.items():
-        try:
-            print(f"\n📦 处理批次: {batch_id}")
-            print(f"   文件数量: {len(file_paths)}")
+    # 各批次共用一个进程池
+    with ParallelProcessor('process') as processor:
+        for batch_id, file_paths in batch_files.items():
+            try:
+                print(f"\n📦 处理批次: {batch_id}")
+                print(f"   文件数量: {len(file_paths)}")
             
-            # 显示文件列表
-            for i, file_path in enumerate(file_paths, 1):
-                filename = Path(file_path).name
-                print(f"     {i:2d}. {filename}")
+                # 显示文件列表
+                for i, file_path in enumerate(file_paths, 1):
+                    filename = Path(file_path).name
+                    print(f"     {i:2d}. {filename}")
             
-            # 1. 使用Lion专用处理器读取该批次的所有文件
-            print(f"   📖 读取Lion数据...")
-            individual_lots = process_lion_batch_files(file_paths)
+                # 1. 使用Lion专用处理器读取该批次的所有文件
+                print(f"   📖 读取Lion数据...")
+                individual_lots = process_lion_batch_files(file_paths, processor)
             
-            if not individual_lots:
-                print(f"   ❌ 批次 {batch_id}: 没有成功读取任何文件")
-                failed_batches.append(batch_id)
-                continue
+                if not individual_lots:
+                    print(f"   ❌ 批次 {batch_id}: 没有成功读取任何文件")
+                    failed_batches.append(batch_id)
+                    continue
             
-            print(f"   ✓ 成功读取 {len(individual_lots)} 个文件")
+                print(f"   ✓ 成功读取 {len(individual_lots)} 个文件")
             
-            # 统计晶圆信息
-            total_chips = 0
-            wafer_ids = []
-            for file_path, lot in individual_lots.items():
-                for wafer in lot.wafers:
-                    wafer_ids.append(wafer.wafer_id)
-                    total_chips += wafer.chip_count
+                # 统计晶圆信息
+                total_chips = 0
+                wafer_ids = []
+                for file_path, lot in individual_lots.items():
+                    for wafer in lot.wafers:
+                        wafer_ids.append(wafer.wafer_id)
+                        total_chips += wafer.chip_count
             
-            print(f"   📊 数据统计:")
-            print(f"     晶圆数: {len(wafer_ids)}")
-            print(f"     晶圆ID: {sorted(wafer_ids)}")
-            print(f"     总芯片数: {total_chips}")
+                print(f"   📊 数据统计:")
+                print(f"     晶圆数: {len(wafer_ids)}")
+                print(f"     晶圆ID: {sorted(wafer_ids)}")
+                print(f"     总芯片数: {total_chips}")
             
-            # 2. 合并为批次级别的数据
-            print(f"   🔗 合并数据...")
-            batch_lot = create_batch_lot(individual_lots)
-            all_batch_lots.append(batch_lot)
+                # 2. 合并为批次级别的数据
+                print(f"   🔗 合并数据...")
+                batch_lot = create_batch_lot(individual_lots)
+                all_batch_lots.append(batch_lot)
             
-            print(f"   ✅ 批次 {batch_id} 处理完成!")
-            success_count += 1
+                print(f"   ✅ 批次 {batch_id} 处理完成!")
+                success_count += 1
             
-        except Exception as e:
-            print(f"   ❌ 批次 {batch_id} 处理失败: {e}")
-            logger.error(f"处理批次 {batch_id} 失败", exc_info=True)
-            failed_batches.append(batch_id)
+            except Exception as e:
+                print(f"   ❌ 批次 {batch_id} 处理失败: {e}")
+                logger.error(f"处理批次 {batch_id} 失败", exc_info=True)
+                failed_batches.append(batch_id)
     
     # 3. 生成汇总CSV文件
     if all_batch_lots:
@@ -1,11 +1,15 @@
+import ast
 import math
 import re
 import logging
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Callable, Optional
+from typing import List, Dict, Any, Callable, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
+from cp_data_processor.processing.result_cache import frame_fingerprint
+
 # Placeholder for CPLot, CPWafer, CPParameter from python_cp.数据类型定义
 # These should be imported from the actual data_models module in a real scenario
 # For example: from ..data_models.cp_data_model import CPLot, CPWafer, CPParameter
@@ -14,14 +18,14 @@ import pandas as pd
 
 @dataclass
 class CPParameter:
-    id: str = \"\"
-    name: str = \"\"
+    id: str = ""
+    name: str = ""
     unit: Optional[str] = None
     sl: Optional[float] = None
     su: Optional[float] = None
     test_conditions: List[str] = field(default_factory=list)
     # Add other fields as necessary, like display_name, etc.
-    display_name: str = \"\" 
+    display_name: str = "" 
 
 @dataclass
 class CPWafer:
@@ -84,6 +88,194 @@ EVAL_GLOBALS: Dict[str, Any] = {
     "pow": pow, # Alias for ** operator if preferred
 }
 
+def _array_log(x, base=None):
+    return np.log(x) if base is None else np.log(x) / np.log(base)
+
+
+def _elementwise(ufunc):
+    """Variadic element-wise max/min, e.g. max(f1, f2, f3)."""
+    def reduce(first, *rest):
+        result = first
+        for other in rest:
+            result = ufunc(result, other)
+        return result
+    return reduce
+
+
+# Array counterparts of EVAL_GLOBALS used by FormulaEngine: every name maps to a
+# function that works element-wise on whole NumPy columns. round has no entry:
+# np.round rounds half to even on the binary value (round(2.675, 2) gives 2.67,
+# np.round gives 2.68) and returns floats where round(x) returns int, so formulas
+# calling it are evaluated row by row.
+ARRAY_GLOBALS: Dict[str, Any] = {
+    "__builtins__": {},
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "log": _array_log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "atan": np.arctan,
+    "degrees": np.degrees,
+    "radians": np.radians,
+    "pi": math.pi,
+    "e": math.e,
+    "max": _elementwise(np.maximum),
+    "min": _elementwise(np.minimum),
+    "pow": np.power,
+}
+
+
+@dataclass
+class CompiledFormula:
+    python_formula: str
+    code: Any                 # Code object for eval() against ARRAY_GLOBALS
+    names: List[str]          # Column names the formula reads
+    row_wise: bool = False    # Calls a function without an array counterpart
+
+
+class FormulaEngine:
+    """
+    Evaluates calculated-parameter formulas over whole chip_data columns.
+
+    Each formula is parsed and compiled once; evaluation binds every referenced
+    parameter to a float64 column and runs the expression on the arrays, so a
+    formula costs one NumPy pass per wafer instead of one eval() per chip.
+
+    Results match row-wise eval() against EVAL_GLOBALS: <NA> where any referenced
+    value is missing or non-numeric or where the evaluation raises, and the column
+    dtype pandas infers from the row results (float64, or object when it holds
+    <NA>). Rows whose array result is not finite (division by zero, domain errors,
+    overflow, but also a genuine inf) are re-evaluated row by row, so they become
+    <NA> only where eval() would have raised. Formulas that cannot run on arrays
+    (e.g. conditionals such as "f1 if f1 > 0 else 0") or that call a function
+    without an array counterpart (round) are evaluated row by row throughout.
+
+    Results are cached per (formula, fingerprint of the referenced input columns)
+    until clear_results(); add_calculated_parameters clears them after each run,
+    compiled formulas are kept for the engine's lifetime.
+    """
+
+    def __init__(self):
+        self._compiled: Dict[str, CompiledFormula] = {}
+        self._results: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def compile(self, python_formula: str) -> CompiledFormula:
+        """Parse and compile a formula (memoized). Raises SyntaxError for invalid formulas."""
+        compiled = self._compiled.get(python_formula)
+        if compiled is None:
+            tree = ast.parse(python_formula.strip(), mode="eval")
+            called = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+            names = sorted(called - ARRAY_GLOBALS.keys() - EVAL_GLOBALS.keys())
+            row_wise = bool(called & (EVAL_GLOBALS.keys() - ARRAY_GLOBALS.keys()))
+            compiled = CompiledFormula(python_formula, compile(tree, "<formula>", "eval"), names, row_wise)
+            self._compiled[python_formula] = compiled
+        return compiled
+
+    def clear_results(self) -> None:
+        """Drop cached results; compiled formulas are kept."""
+        self._results.clear()
+
+    def evaluate(self, python_formula: str, wafer: CPWafer) -> np.ndarray:
+        """Evaluate a formula over one wafer's chip_data; all referenced columns must exist."""
+        compiled = self.compile(python_formula)
+        key = (python_formula, frame_fingerprint(wafer.chip_data, compiled.names))
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        n_rows = len(wafer.chip_data)
+        columns = {name: pd.to_numeric(wafer.chip_data[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                   for name in compiled.names}
+        missing = np.zeros(n_rows, dtype=bool)
+        for values in columns.values():
+            missing |= np.isnan(values)
+
+        values = None
+        if not compiled.row_wise:
+            try:
+                with np.errstate(all="ignore"):
+                    values = eval(compiled.code, ARRAY_GLOBALS, columns)
+                values = np.broadcast_to(np.asarray(values, dtype=np.float64), (n_rows,))
+            except Exception as e:
+                logger.debug(f"Formula '{python_formula}' cannot be evaluated on arrays ({e}); evaluating row by row.")
+                values = None
+        if values is None:
+            result = np.full(n_rows, pd.NA, dtype=object)
+            rows = np.flatnonzero(~missing)
+        else:
+            rows = np.flatnonzero(~missing & ~np.isfinite(values))
+            if not missing.any() and not len(rows):
+                result = values.copy()
+            else:
+                result = values.astype(object)
+                result[missing] = pd.NA
+        if result.dtype == object:
+            self._evaluate_rows(compiled, columns, rows, result)
+            # Same dtype inference as DataFrame.apply over the row results
+            result = pd.Series(result.tolist()).to_numpy()
+        self._results[key] = result
+        return result
+
+    @staticmethod
+    def _evaluate_rows(compiled: CompiledFormula, columns: Dict[str, np.ndarray], rows: np.ndarray,
+                       result: np.ndarray) -> None:
+        """Row-wise evaluation against EVAL_GLOBALS into result; rows that raise become <NA>."""
+        for row in rows:
+            try:
+                result[row] = eval(compiled.code, EVAL_GLOBALS, {name: float(column[row]) for name, column in columns.items()})
+            except Exception as e:
+                logger.debug(f"Error evaluating formula '{compiled.python_formula}' on row {row}: {e}")
+                result[row] = pd.NA
+
+
+def _na_column(n_rows: int) -> np.ndarray:
+    return np.full(n_rows, pd.NA, dtype=object)
+
+
+def _order_setups(setups: List[CalculatedParameterSetup],
+                  engine: FormulaEngine) -> Tuple[List[CalculatedParameterSetup], Set[str]]:
+    """
+    Order setups so that a formula referencing another calculated parameter (by
+    its ID) is evaluated after it; otherwise the configured order is kept.
+    Returns (ordered setups, IDs that cannot be evaluated: cyclic references or
+    formulas that do not compile).
+    """
+    calculated = {setup.new_param_id for setup in setups}
+    requires: Dict[str, Set[str]] = {}
+    failed: Set[str] = set()
+    for setup in setups:
+        try:
+            names = engine.compile(setup.python_formula).names
+        except SyntaxError as e:
+            logger.error(f"Invalid formula '{setup.original_formula}' for '{setup.new_param_id}': {e}")
+            failed.add(setup.new_param_id)
+            names = []
+        requires[setup.new_param_id] = {name for name in names if name in calculated and name != setup.new_param_id}
+        if setup.new_param_id in names:
+            failed.add(setup.new_param_id)
+
+    ordered: List[CalculatedParameterSetup] = []
+    done: Set[str] = set()
+    pending = list(setups)
+    while pending:
+        ready = [setup for setup in pending if requires[setup.new_param_id] <= done]
+        if not ready:
+            break
+        for setup in ready:
+            ordered.append(setup)
+            done.add(setup.new_param_id)
+        pending = [setup for setup in pending if setup.new_param_id not in done]
+    for setup in pending:
+        logger.error(f"Calculated parameter '{setup.new_param_id}' has a circular reference in '{setup.original_formula}'.")
+        failed.add(setup.new_param_id)
+    return ordered + pending, failed
+
+
 def _transform_formula(fn_formula: str, existing_param_ids: List[str]) -> tuple[str, List[str]]:
     """
     Transforms an "fN" style formula string into a Python-evaluable string
@@ -118,7 +310,7 @@ def _transform_formula(fn_formula: str, existing_param_ids: List[str]) -> tuple[
     for func_name_excel, func_py in EVAL_GLOBALS.items():
         if isinstance(func_py, Callable): # Only map function names
              # Case-insensitive replacement for known function names
-            processed_formula = re.sub(r'\\b' + re.escape(func_name_excel) + r'\\b', func_name_excel, processed_formula, flags=re.IGNORECASE)
+            processed_formula = re.sub(r'\b' + re.escape(func_name_excel) + r'\b', func_name_excel, processed_formula, flags=re.IGNORECASE)
             # Correct common Excel function capitalization differences if any
             # For example, if Excel uses ABS and Python uses abs
             processed_formula = processed_formula.replace(func_name_excel.upper(), func_name_excel.lower())
@@ -219,11 +411,16 @@ def read_calculation_setup(
 
 def add_calculated_parameters(
     cp_lot_data: CPLot, 
-    config: CalculatedParameterConfig
+    config: CalculatedParameterConfig,
+    engine: Optional[FormulaEngine] = None
 ) -> CPLot:
     """
     Adds new parameters to CPLot data based on the provided calculation configuration.
     Modifies cp_lot_data in-place and also returns it.
+
+    Formulas may reference parameters calculated by other setups through their
+    new_param_id; those are evaluated first. Pass an engine to reuse its compiled
+    formulas across calls; its per-wafer results are cleared when the run ends.
     """
     if not config.setups:
         logger.info("No calculated parameter setups to process.")
@@ -253,58 +450,49 @@ def add_calculated_parameters(
 
     cp_lot_data.param_count = len(cp_lot_data.params)
 
+    engine = engine or FormulaEngine()
+    ordered_setups, failed_ids = _order_setups(config.setups, engine)
+
     # 2. Iterate through wafers and their chip_data
     for wafer in cp_lot_data.wafers:
         if wafer.chip_data is None or wafer.chip_data.empty:
             logger.warning(f"Wafer {wafer.wafer_id} has no chip data to process for calculations.")
             continue
 
+        n_rows = len(wafer.chip_data)
         current_wafer_chip_data_cols = wafer.chip_data.columns.tolist()
 
-        # Add new columns to chip_data DataFrame for each wafer, initialized with NaN
+        # Add new columns to chip_data DataFrame for each wafer (configured order), initialized with NA
         for setup in config.setups:
             if setup.new_param_id not in current_wafer_chip_data_cols:
-                wafer.chip_data[setup.new_param_id] = pd.NA # Use pd.NA for pandas >= 1.0 or np.nan
+                wafer.chip_data[setup.new_param_id] = _na_column(n_rows)
+
+        # 3. Evaluate each formula over the whole wafer, dependencies first
+        for setup in ordered_setups:
+            if setup.new_param_id in failed_ids:
+                wafer.chip_data[setup.new_param_id] = _na_column(n_rows)
+                continue
 
-        # 3. Perform calculations for each chip
-        for setup in config.setups:
             # Check if all dependent parameters for this formula exist in the current wafer's chip_data
-            missing_deps = [dep_id for dep_id in setup.dependent_param_ids if dep_id not in current_wafer_chip_data_cols]
+            # (calculated parameters evaluated earlier count as present)
+            names = engine.compile(setup.python_formula).names
+            dependencies = list(dict.fromkeys(setup.dependent_param_ids + names))
+            missing_deps = [dep_id for dep_id in dependencies if dep_id not in wafer.chip_data.columns]
             if missing_deps:
                 logger.error(f"Wafer {wafer.wafer_id}: Missing dependent parameters {missing_deps} for formula '{setup.original_formula}' (new_param: {setup.new_param_id}). Skipping calculation for this parameter on this wafer.")
-                wafer.chip_data[setup.new_param_id] = pd.NA # Ensure column is NaN
+                wafer.chip_data[setup.new_param_id] = _na_column(n_rows) # Ensure column is NA
                 continue
             
-            # Apply calculation row-wise
-            def calculate_row(row):
-                locals_dict = {dep_id: row[dep_id] for dep_id in setup.dependent_param_ids}
-                
-                # Check for any NaN in dependent values; if so, result is NaN
-                if any(pd.isna(val) for val in locals_dict.values()):
-                    return pd.NA
-
-                try:
-                    return eval(setup.python_formula, EVAL_GLOBALS, locals_dict)
-                except ZeroDivisionError:
-                    logger.debug(f"ZeroDivisionError for {setup.new_param_id} on wafer {wafer.wafer_id}, formula: '{setup.python_formula}', row data: {row.to_dict()}")
-                    return pd.NA
-                except TypeError as te:
-                    logger.debug(f"TypeError for {setup.new_param_id} (e.g. math func on non-numeric) on wafer {wafer.wafer_id}, formula: '{setup.python_formula}', locals: {locals_dict}, error: {te}")
-                    return pd.NA
-                except Exception as e:
-                    logger.warning(f"Error evaluating formula for {setup.new_param_id} on wafer {wafer.wafer_id}: {e}. Formula: '{setup.python_formula}'. Row data relevant: {locals_dict}")
-                    return pd.NA
-            
-            if not setup.dependent_param_ids and "f" in setup.original_formula.lower():
+            if not dependencies and "f" in setup.original_formula.lower():
                  logger.warning(f"Formula '{setup.original_formula}' for '{setup.new_param_id}' seems to use 'fN' variables but no dependent IDs were extracted. This might be an error in _transform_formula or the formula itself. Calculation will likely fail or produce NaN.")
-                 wafer.chip_data[setup.new_param_id] = pd.NA
-            elif not wafer.chip_data.empty: # Only apply if there's data
-                wafer.chip_data[setup.new_param_id] = wafer.chip_data.apply(calculate_row, axis=1)
-            else: # chip_data is empty, but columns were added
-                 pass # Columns are already NaN
+                 wafer.chip_data[setup.new_param_id] = _na_column(n_rows)
+            else:
+                wafer.chip_data[setup.new_param_id] = engine.evaluate(setup.python_formula, wafer)
 
         wafer.param_count = len(wafer.chip_data.columns) if wafer.chip_data is not None else 0
 
+    # Results are only reused within this run
+    engine.clear_results()
 
     logger.info("Finished processing calculated parameters.")
     return cp_lot_data
@@ -369,7 +557,7 @@ if __name__ == '__main__':
     logger.info(f"Mock Excel setup file created at {mock_excel_file_path}")
 
     # --- Test read_calculation_setup ---
-    logger.info("\\n--- Testing read_calculation_setup ---")
+    logger.info("\n--- Testing read_calculation_setup ---")
     calculation_config = read_calculation_setup(mock_excel_file_path, "Sheet1", existing_param_ids_ordered)
     if calculation_config.setups:
         for i, setup_item in enumerate(calculation_config.setups):
@@ -384,7 +572,7 @@ if __name__ == '__main__':
         
 
     # --- Test add_calculated_parameters ---
-    logger.info("\\n--- Testing add_calculated_parameters ---")
+    logger.info("\n--- Testing add_calculated_parameters ---")
     if calculation_config.setups: # Only proceed if setups were read
       cp_lot_updated = add_calculated_parameters(cp_lot, calculation_config)
 
@@ -393,7 +581,7 @@ if __name__ == '__main__':
           logger.info(f"  ID: {p.id}, Name: {p.name}, Unit: {p.unit}, SL: {p.sl}, SU: {p.su}, Conditions: {p.test_conditions}")
 
       for w_idx, wafer_updated in enumerate(cp_lot_updated.wafers):
-          logger.info(f"\\nWafer {wafer_updated.wafer_id} (Original index {w_idx}) - Chip Data (Param Count: {wafer_updated.param_count}):")
+          logger.info(f"\nWafer {wafer_updated.wafer_id} (Original index {w_idx}) - Chip Data (Param Count: {wafer_updated.param_count}):")
           if wafer_updated.chip_data is not None:
               # For cleaner display, convert pd.NA to string 'NaN' or similar
               print(wafer_updated.chip_data.to_string())
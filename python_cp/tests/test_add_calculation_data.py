@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from python_cp.add_calculation_data import (
+    EVAL_GLOBALS, CalculatedParameterConfig, CalculatedParameterSetup, CPLot, CPParameter, CPWafer, FormulaEngine,
+    _transform_formula, add_calculated_parameters)
+
+PARAMS = ["VOLT", "CURR", "TEMP"]
+
+
+def make_setup(param_id, formula):
+    python_formula, dependent_ids = _transform_formula(formula, PARAMS)
+    return CalculatedParameterSetup(param_id, param_id, formula, python_formula, dependent_ids)
+
+
+def row_wise(chip_data, setup):
+    """逐行 eval 的原实现：缺失值和 eval 抛出异常的行得到 pd.NA，列类型由 apply 推断"""
+    def calculate_row(row):
+        values = {dep: row[dep] for dep in setup.dependent_param_ids}
+        if any(pd.isna(value) for value in values.values()):
+            return pd.NA
+        try:
+            return eval(setup.python_formula, EVAL_GLOBALS, {k: float(v) for k, v in values.items()})
+        except Exception:
+            return pd.NA
+    return chip_data.apply(calculate_row, axis=1)
+
+
+def make_lot(rows=300):
+    rng = np.random.default_rng(0)
+    chip_data = pd.DataFrame({name: rng.normal(0.5, 1.0, rows) for name in PARAMS})
+    chip_data.loc[rng.random(rows) < 0.1, "VOLT"] = np.nan
+    chip_data.loc[rng.random(rows) < 0.1, "CURR"] = 0.0
+    wafers = [CPWafer(wafer_id="W01", chip_data=chip_data),
+              CPWafer(wafer_id="W02", chip_data=chip_data.astype(object).where(chip_data.notna(), pd.NA))]
+    return CPLot(lot_id="L", params=[CPParameter(id=name) for name in PARAMS], wafers=wafers)
+
+
+@pytest.mark.parametrize("formula", ["f1/f2", "f1*f2 + f3", "log(f1)", "sqrt(f2) * 2", "Abs(f1-f2)^2",
+                                     "max(f1, f2, f3)", "f3 + pi", "log(f3, 10)", "exp(f1) / (f2 - f2)",
+                                     "f1 if f1 > 0 else 0", "1 / f2 if f2 > f3 else -f1", "round(f1, 2)",
+                                     "round(f3)", "f3 * 1e308", "f3 ** 0.5", "exp(f3 * 1000)"])
+def test_vectorized_formulas_match_row_wise_eval(formula):
+    lot = make_lot()
+    setup = make_setup("NEW", formula)
+    expected = row_wise(lot.wafers[0].chip_data, setup)
+
+    add_calculated_parameters(lot, CalculatedParameterConfig([setup]))
+
+    for wafer in lot.wafers:
+        pd.testing.assert_series_equal(wafer.chip_data["NEW"], expected, check_names=False, rtol=1e-14)
+
+
+def test_round_uses_builtin_round():
+    lot = CPLot("L", params=[CPParameter(id=name) for name in PARAMS], wafers=[
+        CPWafer("W01", chip_data=pd.DataFrame({"VOLT": [2.675, 0.125, np.nan], "CURR": 1.0, "TEMP": 1.0}))])
+    engine = FormulaEngine()
+
+    add_calculated_parameters(lot, CalculatedParameterConfig([make_setup("R2", "round(f1, 2)"),
+                                                              make_setup("R0", "round(f1 * 2)")]), engine)
+
+    chip_data = lot.wafers[0].chip_data
+    assert chip_data["R2"].tolist() == [2.67, 0.12, pd.NA]
+    assert chip_data["R0"].tolist() == [5, 0, pd.NA]
+    assert engine.compile("round(VOLT, 2)").row_wise and not engine.compile("abs(VOLT)").row_wise
+    assert not engine._results
+
+
+def test_formulas_may_reference_earlier_calculated_parameters():
+    lot = make_lot(20)
+    setups = [make_setup("P", "R * f2"), make_setup("R", "f1/f2"), make_setup("X", "Y + 1"), make_setup("Y", "X + 1")]
+    engine = FormulaEngine()
+
+    add_calculated_parameters(lot, CalculatedParameterConfig(setups), engine)
+
+    chip_data = lot.wafers[0].chip_data
+    assert list(chip_data.columns) == PARAMS + ["P", "R", "X", "Y"]
+    expected = (chip_data["VOLT"] / chip_data["CURR"]).replace([np.inf, -np.inf], np.nan) * chip_data["CURR"]
+    np.testing.assert_allclose(chip_data["P"].to_numpy(dtype=float, na_value=np.nan), expected, rtol=1e-15)
+    assert chip_data["X"].isna().all() and chip_data["Y"].isna().all()
+    assert not engine._results
+    assert engine.evaluate(setups[1].python_formula, lot.wafers[0]) is engine.evaluate(setups[1].python_formula, lot.wafers[0])
+
+
+def test_engine_reused_across_lots_with_same_wafer_ids():
+    setup = make_setup("R", "f1/f2")
+    engine = FormulaEngine()
+    first, second = make_lot(20), make_lot(20)
+    for wafer in second.wafers:
+        wafer.chip_data["VOLT"] = wafer.chip_data["VOLT"] * 10
+
+    add_calculated_parameters(first, CalculatedParameterConfig([setup]), engine)
+    add_calculated_parameters(second, CalculatedParameterConfig([make_setup("R", "f1/f2")]), engine)
+
+    for lot in (first, second):
+        chip_data = lot.wafers[0].chip_data
+        expected = (chip_data["VOLT"] / chip_data["CURR"]).replace([np.inf, -np.inf], np.nan)
+        np.testing.assert_allclose(chip_data["R"].to_numpy(dtype=float, na_value=np.nan), expected, rtol=1e-15)
+
+    # 清洗等步骤修改输入列后重新计算
+    wafer = first.wafers[0]
+    wafer.chip_data["CURR"] = 1.0
+    np.testing.assert_allclose(pd.Series(engine.evaluate(setup.python_formula, wafer)).to_numpy(dtype=float, na_value=np.nan),
+                               wafer.chip_data["VOLT"], rtol=1e-15)